@@ -0,0 +1,60 @@
+# CRM_LIFT_ATOM/mysql_pool/base.py
+"""
+Django's MySQL backend, drawing its connections from a per-process pool.
+
+With CONN_MAX_AGE=0 every request opened a new connection to the RDS
+host (TCP + TLS + auth + init_command) and closed it at the end of the
+request. This backend keeps those connections open in a bounded pool
+(see pool.py) instead: opening a connection checks one out, closing it
+checks it back in.
+
+    DATABASES = {
+        "default": {
+            "ENGINE": "CRM_LIFT_ATOM.mysql_pool",
+            ...
+            "POOL": {"max_size": 5, "timeout": 10, "max_lifetime": 1800, "max_idle": 300},
+        }
+    }
+
+Keep CONN_MAX_AGE at 0 so each request returns its connection to the pool.
+"""
+from django.db.backends.mysql import base
+
+from .pool import get_pool, pool_key
+
+POOL_DEFAULTS = {
+    'max_size': 5,
+    'timeout': 10,
+    'max_lifetime': 1800,
+    'max_idle': 300,
+}
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    # The pool the current connection came from, which it goes back to
+    checked_out_from = None
+
+    def get_pool(self, conn_params):
+        options = {**POOL_DEFAULTS, **self.settings_dict.get('POOL', {})}
+        return get_pool(
+            self.alias,
+            pool_key(conn_params),
+            lambda: super(DatabaseWrapper, self).get_new_connection(conn_params),
+            **options,
+        )
+
+    def get_new_connection(self, conn_params):
+        pool = self.get_pool(conn_params)
+        connection = pool.checkout()
+        self.checked_out_from = pool
+        return connection
+
+    def _close(self):
+        if self.connection is None:
+            return
+        # A connection in a failed state, or closed inside atomic() with a
+        # transaction still open, is not handed to anyone else
+        reusable = not self.errors_occurred and not self.in_atomic_block
+        pool, self.checked_out_from = self.checked_out_from, None
+        with self.wrap_database_errors:
+            pool.checkin(self.connection, reusable=reusable)
@@ -0,0 +1,216 @@
+# CRM_LIFT_ATOM/mysql_pool/pool.py
+"""
+A bounded, per-process pool of live database connections.
+
+checkout() hands out an idle connection, or opens a new one while fewer
+than max_size are open, or waits up to timeout seconds for one to be
+returned. An idle connection is pinged before it is handed out and
+dropped when the ping fails, when it is older than max_lifetime or when
+it sat idle longer than max_idle (the server may have closed it). The
+most recently returned connection is handed out first, so the ones not
+needed at quiet times idle out.
+
+stats() reports the pool size and how long checkouts waited.
+
+get_pool() keeps one pool per database alias and connection parameters:
+when the parameters change (the test runner renaming NAME, a new
+password...) the old pool is retired and its connections are closed as
+they come back, so none is handed out against the old database.
+"""
+import os
+import threading
+import time
+from collections import deque
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class ConnectionPool:
+    def __init__(self, connect, max_size=5, timeout=10, max_lifetime=1800, max_idle=300, ping=True, params=None):
+        self.connect = connect
+        self.params = params
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.max_idle = max_idle
+        self.ping = ping
+        self.pid = os.getpid()
+        self.retired = False
+        self._condition = threading.Condition()
+        # (connection, opened at, returned at), most recently returned last
+        self._idle = deque()
+        self._opened_at = {}
+        self._size = 0
+        self._counters = {
+            'checkouts': 0, 'opened': 0, 'closed': 0, 'failed_pings': 0, 'expired': 0, 'idled_out': 0,
+            'waits': 0, 'timeouts': 0, 'wait_seconds_total': 0.0, 'wait_seconds_max': 0.0,
+        }
+
+    def checkout(self):
+        started = time.monotonic()
+        deadline = started + self.timeout
+        while True:
+            connection = self._reserve(deadline)
+            if connection is None:
+                connection = self._open()
+                break
+            if self._expired(connection):
+                self._discard(connection, 'expired')
+            elif self.ping and not self._is_alive(connection):
+                self._discard(connection, 'failed_pings')
+            else:
+                break
+        waited = time.monotonic() - started
+        with self._condition:
+            self._counters['checkouts'] += 1
+            self._counters['wait_seconds_total'] += waited
+            self._counters['wait_seconds_max'] = max(self._counters['wait_seconds_max'], waited)
+        return connection
+
+    def checkin(self, connection, reusable=True):
+        """Return a connection; it is closed instead when not reusable or too old"""
+        if reusable:
+            try:
+                # Never hand an open transaction to the next user
+                connection.rollback()
+            except Exception:
+                reusable = False
+        if not reusable or self.retired or self._expired(connection):
+            self._discard(connection, 'expired' if reusable else None)
+            return
+        with self._condition:
+            self._idle.append((connection, self._opened_at[id(connection)], time.monotonic()))
+            self._condition.notify()
+
+    def discard(self, connection):
+        self._discard(connection, None)
+
+    def stats(self):
+        with self._condition:
+            return {
+                'max_size': self.max_size,
+                'size': self._size,
+                'idle': len(self._idle),
+                'in_use': self._size - len(self._idle),
+                **self._counters,
+            }
+
+    def close_all(self):
+        with self._condition:
+            idle, self._idle = list(self._idle), deque()
+        for connection, *_ in idle:
+            self._discard(connection, None)
+
+    def retire(self):
+        """Close the idle connections, and the ones in use as they are returned"""
+        self.retired = True
+        self.close_all()
+
+    # ---------- internals ----------
+
+    def _reserve(self, deadline):
+        """An idle connection, or None after reserving a slot for a new one"""
+        with self._condition:
+            waited = False
+            while True:
+                self._evict_idle()
+                if self._idle:
+                    return self._idle.pop()[0]
+                if self._size < self.max_size:
+                    self._size += 1
+                    return None
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._counters['timeouts'] += 1
+                    raise PoolTimeout(f'No database connection free after {self.timeout}s ({self.max_size} in use)')
+                if not waited:
+                    self._counters['waits'] += 1
+                    waited = True
+                self._condition.wait(remaining)
+
+    def _evict_idle(self):
+        # Called with the lock held; the oldest returned connections are first
+        now = time.monotonic()
+        while self._idle and now - self._idle[0][2] > self.max_idle:
+            connection = self._idle.popleft()[0]
+            self._size -= 1
+            self._counters['idled_out'] += 1
+            self._forget(connection)
+
+    def _open(self):
+        try:
+            connection = self.connect()
+        except Exception:
+            with self._condition:
+                self._size -= 1
+                self._condition.notify()
+            raise
+        with self._condition:
+            self._opened_at[id(connection)] = time.monotonic()
+            self._counters['opened'] += 1
+        return connection
+
+    def _expired(self, connection):
+        opened_at = self._opened_at.get(id(connection))
+        return opened_at is None or time.monotonic() - opened_at > self.max_lifetime
+
+    def _is_alive(self, connection):
+        try:
+            connection.ping(reconnect=False)
+            return True
+        except Exception:
+            return False
+
+    def _discard(self, connection, reason):
+        with self._condition:
+            self._size -= 1
+            if reason:
+                self._counters[reason] += 1
+            self._condition.notify()
+        self._forget(connection)
+
+    def _forget(self, connection):
+        with self._condition:
+            self._opened_at.pop(id(connection), None)
+            self._counters['closed'] += 1
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias, params, connect, **options):
+    """
+    The pool for a database alias in this process, created on first use.
+    params identifies the connections (see pool_key()); a pool opened with
+    other params is retired and replaced.
+    """
+    stale = None
+    with _pools_lock:
+        pool = _pools.get(alias)
+        if pool is None or pool.pid != os.getpid() or pool.params != params:
+            if pool is not None and pool.pid == os.getpid():
+                stale = pool
+            # A forked worker must not share its parent's sockets
+            pool = _pools[alias] = ConnectionPool(connect, params=params, **options)
+    if stale is not None:
+        stale.retire()
+    return pool
+
+
+def pool_key(conn_params):
+    """A comparable form of a backend's connection parameters"""
+    return repr(sorted((name, value) for name, value in conn_params.items() if name != 'conv'))
+
+
+def pool_stats():
+    """Stats of every pool in this process, by database alias"""
+    with _pools_lock:
+        pools = dict(_pools)
+    return {alias: pool.stats() for alias, pool in pools.items() if pool.pid == os.getpid()}
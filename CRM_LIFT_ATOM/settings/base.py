@@ -46,6 +46,8 @@ INSTALLED_APPS = [
     "travelling",
     "attendance",
     "search",
+    "django_tasks",
+    "django_tasks.backends.database",
     "wagtail_modeladmin",
     "wagtail.contrib.forms",
     "wagtail.contrib.redirects",
@@ -75,10 +77,12 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    "home.sql_instrumentation.SQLInstrumentationMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "home.profiling.ProfilingMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "wagtail.contrib.redirects.middleware.RedirectMiddleware",
@@ -116,13 +120,15 @@ pymysql.install_as_MySQLdb()
 
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.mysql",
+        "ENGINE": "CRM_LIFT_ATOM.mysql_pool",
         "NAME": "atomliftdb",
         "USER": "dbadmin",
         "PASSWORD": "Atom$1234",
         "HOST": "atomliftprod.c9iu6ua48ejv.ap-south-1.rds.amazonaws.com",
         "PORT": "3306",
         "OPTIONS": {"init_command": "SET sql_mode='STRICT_TRANS_TABLES'"},
+        # Per-process connection pool (CRM_LIFT_ATOM/mysql_pool); keep CONN_MAX_AGE at 0
+        "POOL": {"max_size": 5, "timeout": 10, "max_lifetime": 1800, "max_idle": 300},
     }
 }
 
@@ -246,6 +252,133 @@ REST_FRAMEWORK = {
     'PAGE_SIZE': 20
 }
 
+# Company details printed on every generated PDF (see home/pdf.py)
+COMPANY_DETAILS = {
+    "name": "Atom Lifts India Pvt Ltd",
+    "address": "No.87B, Pillayar Koll Street, Mannurpet, Ambattur Indus Estate, Chennai 50, CHENNAI",
+    "phone": "9600087456",
+    "email": "admin@atomlifts.com",
+}
+
+# Background tasks (django_tasks, shipped with Wagtail)
+# Tasks are stored in the database once the transaction commits and run by
+# a separate `manage.py db_worker` process (started next to gunicorn on
+# deploy), never on the web workers' request threads. Without a running
+# worker they wait in the queue.
+TASKS = {
+    "default": {
+        "BACKEND": "django_tasks.backends.database.DatabaseBackend",
+    }
+}
+
+# Attendance selfies: originals older than this are pruned by
+# `manage.py attendance_selfies --prune-originals`; compressed copies are kept
+ATTENDANCE_SELFIE_RETENTION_DAYS = 30
+
+# Host encoded into printed complaint QR codes (see complaints/qr.py).
+# Falls back to WAGTAILADMIN_BASE_URL; changing it regenerates the images.
+PUBLIC_COMPLAINT_BASE_URL = WAGTAILADMIN_BASE_URL
+
+# Complaint SLA targets in hours from the time a complaint is logged
+# (see complaints/sla.py). Run `manage.py complaint_sla --mark-overdue`
+# periodically to flag open complaints that passed their due time.
+COMPLAINT_SLA_HOURS = {
+    "response": 4,
+    "resolution": 48,
+}
+
+# Technician dispatch for new complaints (see complaints/dispatch.py).
+# Score = distance_km * distance_weight + open complaints * load_weight;
+# with auto_assign off, the best technician is only offered as a suggestion.
+COMPLAINT_DISPATCH = {
+    "auto_assign": False,
+    "require_check_in": True,
+    "distance_weight": 1.0,
+    "load_weight": 5.0,
+    "unknown_distance_km": 50.0,
+}
+
+# Recurring invoice generation (see recurringInvoice/generation.py).
+# Run `manage.py generate_recurring_invoices` daily; generated invoices are
+# due RECURRING_INVOICE_DUE_DAYS after their period starts and use the
+# named AMC type when the recurring invoice does not set one.
+RECURRING_INVOICE_DUE_DAYS = 15
+RECURRING_INVOICE_AMC_TYPE = "Recurring Invoice"
+
+# Seconds the receivables aging report stays cached (see invoice/receivables.py).
+# Invoice, invoice item and payment writes clear it immediately.
+RECEIVABLES_CACHE_SECONDS = 900
+
+# Automatic stock postings (see Requisition/posting.py). Approved requisitions
+# and delivery challan lines dated on or after STOCK_POSTING_FROM ("YYYY-MM-DD")
+# create OUTWARD stock entries. Set it to the go-live date: older documents,
+# whose stock was entered by hand, are never issued again, even when edited.
+# None (the default) disables posting entirely.
+# Postings beyond the available stock are refused unless STOCK_ALLOW_NEGATIVE.
+STOCK_POSTING_FROM = os.environ.get("STOCK_POSTING_FROM") or None
+STOCK_ALLOW_NEGATIVE = False
+
+# Seconds a built reference-data bundle stays cached (see home/reference_data.py).
+# Bundles are cached per version, so lookup writes take effect immediately.
+REFERENCE_DATA_CACHE_SECONDS = 3600
+
+# Rows a typeahead search returns by default and at most (see home/typeahead.py)
+TYPEAHEAD_LIMIT = 20
+TYPEAHEAD_MAX_LIMIT = 50
+
+# Cache shared by all worker processes (see home/caching.py). CACHE_BACKEND
+# "file" keeps entries under CACHE_LOCATION (a directory); "redis" uses the
+# server at CACHE_LOCATION (needs the redis package); "locmem" is per process.
+CACHE_BACKEND = os.environ.get("CACHE_BACKEND", "file")
+CACHE_LOCATION = os.environ.get("CACHE_LOCATION") or {
+    "file": os.path.join("/var/tmp", "crm_lift_atom_cache"),
+    "redis": "redis://127.0.0.1:6379/1",
+    "locmem": "crm_lift_atom",
+}[CACHE_BACKEND]
+CACHES = {
+    "default": {
+        "BACKEND": {
+            "file": "django.core.cache.backends.filebased.FileBasedCache",
+            "redis": "django.core.cache.backends.redis.RedisCache",
+            "locmem": "django.core.cache.backends.locmem.LocMemCache",
+        }[CACHE_BACKEND],
+        "LOCATION": CACHE_LOCATION,
+        "KEY_PREFIX": "crm",
+        "TIMEOUT": 300,
+        "OPTIONS": {"MAX_ENTRIES": 10000} if CACHE_BACKEND != "redis" else {},
+    }
+}
+
+# Seconds a cached read endpoint response or dashboard figure is kept (see
+# home/caching.py). Writes to the models behind it invalidate it immediately.
+RESPONSE_CACHE_SECONDS = 300
+
+# Share of requests whose SQL is profiled (home/sql_instrumentation.py): a
+# Server-Timing header, a JSON log line and a row on the admin SQL report.
+SQL_PROFILE_SAMPLE_RATE = float(os.environ.get("SQL_PROFILE_SAMPLE_RATE", "0.05"))
+# Statements kept per profile, both slowest and most repeated
+SQL_PROFILE_SLOWEST = 5
+SQL_PROFILE_RETENTION_HOURS = 168
+
+# cProfile of requests (home/profiling.py): superusers ask for one with an
+# "X-Profile: 1" header or "?_profile=1"; PROFILE_SAMPLE_RATE profiles a
+# share of everyone's requests. The PROFILE_KEEP slowest per URL name are
+# kept under PROFILE_DIR, local to each server.
+PROFILE_SAMPLE_RATE = float(os.environ.get("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_DIR = os.environ.get("PROFILE_DIR") or os.path.join("/var/tmp", "crm_lift_atom_profiles")
+PROFILE_KEEP = 20
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "home.sql_instrumentation": {"handlers": ["console"], "level": "INFO", "propagate": False},
+    },
+}
+
 # # CORS settings for mobile app
 # CORS_ALLOWED_ORIGINS = [
 #     "http://localhost:3000",
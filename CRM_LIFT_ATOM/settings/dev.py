@@ -62,7 +62,7 @@ CSRF_TRUSTED_ORIGINS = [
 # -- Database: override to use RDS MySQL --
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.mysql",
+        "ENGINE": "CRM_LIFT_ATOM.mysql_pool",
         "NAME": "atomliftdb",
         "USER": "dbadmin",
         "PASSWORD": "Atom$1234",
@@ -71,5 +71,7 @@ DATABASES = {
         "OPTIONS": {
             "init_command": "SET sql_mode='STRICT_TRANS_TABLES'",
         },
+        # Per-process connection pool (CRM_LIFT_ATOM/mysql_pool); keep CONN_MAX_AGE at 0
+        "POOL": {"max_size": 5, "timeout": 10, "max_lifetime": 1800, "max_idle": 300},
     }
 }
@@ -1,5 +1,6 @@
 from wagtail.snippets.models import register_snippet
 from wagtail.snippets.views.snippets import SnippetViewSet, SnippetViewSetGroup, IndexView
+from home.exports import ExportQuerysetMixin
 from wagtail import hooks
 from wagtail.admin.menu import MenuItem, SubmenuMenuItem
 from wagtail.permissions import ModelPermissionPolicy
@@ -86,7 +87,9 @@ class MaterialRequestViewSet(SnippetViewSet):
     export_formats = ["csv", "xlsx"]
 
     # Custom IndexView to restrict export to superusers
-    class RestrictedIndexView(IndexView):
+    class RestrictedIndexView(ExportQuerysetMixin, IndexView):
+        export_select_related = ('item',)
+
         def dispatch(self, request, *args, **kwargs):
             """Override dispatch to check export permissions"""
             export_format = request.GET.get('export')
@@ -0,0 +1,184 @@
+# PaymentReceived/allocation.py
+"""
+Payment allocation and invoice/AMC payment reconciliation.
+
+Payments are applied per customer. A payment linked to an invoice is
+applied to that invoice first; anything left over, and every unlinked
+payment, is applied FIFO (oldest due date first) across the customer's
+invoices that still have a balance. Allocations are rebuilt for a set of
+customers at a time in a fixed number of queries, then derived fields are
+refreshed with set-based UPDATEs:
+
+- Invoice.status: 'open', 'partially_paid' or 'paid' from allocated amounts
+- AMC.total_amount_paid / amount_due: payments allocated to the customer's
+  invoices of the same AMC type dated within the contract period. AMCs
+  with no such invoice keep their hand-entered figures.
+
+Signals call request_allocation() on payment and invoice writes. Inside
+deferred_allocation() those requests are collected and run once at the
+end, which is how bulk imports avoid reallocating once per row.
+"""
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, CharField, DecimalField, Exists, F, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.db.models.lookups import GreaterThanOrEqual, LessThanOrEqual
+
+from amc.models import AMC
+from invoice.models import Invoice
+from home.caching import invalidate_namespaces
+from invoice.receivables import invalidate_receivables
+
+from .models import PaymentAllocation, PaymentReceived
+
+ZERO = Decimal('0.00')
+MONEY = DecimalField(max_digits=12, decimal_places=2)
+DEFAULT_BATCH_SIZE = 200
+
+_pending_customers = ContextVar('pending_allocation_customers', default=None)
+
+
+def plan_allocations(invoices, payments):
+    """
+    PaymentAllocation rows for one batch of customers.
+    invoices: (pk, customer_id, total) in FIFO order
+    payments: (pk, customer_id, invoice_id, amount) in date order
+    """
+    remaining = {}
+    open_invoices = defaultdict(deque)
+    for pk, customer_id, total in invoices:
+        remaining[pk] = total or ZERO
+        open_invoices[customer_id].append(pk)
+
+    allocations = []
+    leftovers = []
+    for pk, customer_id, invoice_id, amount in payments:
+        amount = amount or ZERO
+        if invoice_id in remaining:
+            applied = min(amount, remaining[invoice_id])
+            if applied > 0:
+                allocations.append(PaymentAllocation(payment_id=pk, invoice_id=invoice_id, amount=applied))
+                remaining[invoice_id] -= applied
+                amount -= applied
+        if amount > 0:
+            leftovers.append((pk, customer_id, amount))
+
+    for pk, customer_id, amount in leftovers:
+        queue = open_invoices[customer_id]
+        while amount > 0 and queue:
+            invoice_id = queue[0]
+            applied = min(amount, remaining[invoice_id])
+            if applied > 0:
+                allocations.append(PaymentAllocation(payment_id=pk, invoice_id=invoice_id, amount=applied))
+                remaining[invoice_id] -= applied
+                amount -= applied
+            if remaining[invoice_id] <= 0:
+                queue.popleft()
+    return allocations
+
+
+def allocated_amount():
+    """Expression: amount allocated to the outer Invoice row"""
+    allocated = (
+        PaymentAllocation.objects.filter(invoice=OuterRef('pk')).order_by()
+        .values('invoice').annotate(total=Sum('amount')).values('total')
+    )
+    return Coalesce(Subquery(allocated, output_field=MONEY), Value(ZERO), output_field=MONEY)
+
+
+def update_invoice_statuses(invoices):
+    """Set status on every invoice in the queryset from its allocations (one UPDATE)"""
+    paid = allocated_amount()
+    return invoices.update(status=Case(
+        When(LessThanOrEqual(paid, Value(ZERO)), then=Value('open')),
+        When(GreaterThanOrEqual(paid, F('total')), then=Value('paid')),
+        default=Value('partially_paid'),
+        output_field=CharField(),
+    ))
+
+
+def update_amc_payments(amcs):
+    """Set total_amount_paid and amount_due on AMCs that have matching invoices (one UPDATE)"""
+    contract_invoices = Invoice.objects.filter(
+        customer=OuterRef('customer'),
+        amc_type=OuterRef('amc_type'),
+        start_date__gte=OuterRef('start_date'),
+        start_date__lte=OuterRef('end_date'),
+    )
+    allocated = (
+        PaymentAllocation.objects.filter(
+            invoice__customer=OuterRef('customer'),
+            invoice__amc_type=OuterRef('amc_type'),
+            invoice__start_date__gte=OuterRef('start_date'),
+            invoice__start_date__lte=OuterRef('end_date'),
+        ).order_by().values('invoice__customer').annotate(total=Sum('amount')).values('total')
+    )
+    paid = Coalesce(Subquery(allocated, output_field=MONEY), Value(ZERO), output_field=MONEY)
+    return amcs.filter(Exists(contract_invoices)).update(
+        total_amount_paid=paid,
+        amount_due=F('contract_amount') - paid,
+    )
+
+
+def allocate_customers(customer_ids):
+    """Rebuild allocations and derived fields for these customers; returns allocation count"""
+    customer_ids = sorted({pk for pk in customer_ids if pk})
+    if not customer_ids:
+        return 0
+    with transaction.atomic():
+        # Lock the customers' payments so concurrent allocations serialize
+        payments = list(
+            PaymentReceived.objects.select_for_update().filter(customer_id__in=customer_ids)
+            .order_by('date', 'pk').values_list('pk', 'customer_id', 'invoice_id', 'amount')
+        )
+        invoices = list(
+            Invoice.objects.filter(customer_id__in=customer_ids)
+            .order_by('due_date', 'start_date', 'pk').values_list('pk', 'customer_id', 'total')
+        )
+        PaymentAllocation.objects.filter(payment__customer_id__in=customer_ids).delete()
+        PaymentAllocation.objects.filter(invoice__customer_id__in=customer_ids).delete()
+        allocations = plan_allocations(invoices, payments)
+        PaymentAllocation.objects.bulk_create(allocations, batch_size=1000)
+        update_invoice_statuses(Invoice.objects.filter(customer_id__in=customer_ids))
+        update_amc_payments(AMC.objects.filter(customer_id__in=customer_ids))
+    invalidate_receivables()
+    invalidate_namespaces('payments', 'invoices', 'amcs')
+    return len(allocations)
+
+
+def reconcile_all(batch_size=DEFAULT_BATCH_SIZE, customer_ids=None):
+    """Allocate every customer with payments or invoices; returns (customers, allocations)"""
+    if customer_ids is None:
+        customer_ids = set(PaymentReceived.objects.values_list('customer_id', flat=True).distinct())
+        customer_ids |= set(Invoice.objects.exclude(customer=None).values_list('customer_id', flat=True).distinct())
+    customer_ids = sorted(customer_ids)
+    allocations = 0
+    for start in range(0, len(customer_ids), batch_size):
+        allocations += allocate_customers(customer_ids[start:start + batch_size])
+    return len(customer_ids), allocations
+
+
+def request_allocation(customer_ids):
+    """Allocate now, or at the end of the enclosing deferred_allocation() block"""
+    pending = _pending_customers.get()
+    if pending is not None:
+        pending.update(pk for pk in customer_ids if pk)
+        return
+    allocate_customers(customer_ids)
+
+
+@contextmanager
+def deferred_allocation():
+    """Collect allocation requests and run them once on exit"""
+    pending = set()
+    token = _pending_customers.set(pending)
+    try:
+        yield pending
+    finally:
+        _pending_customers.reset(token)
+        if pending:
+            allocate_customers(pending)
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class PaymentreceivedConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'PaymentReceived'
+
+    def ready(self):
+        import PaymentReceived.signals
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from PaymentReceived.allocation import DEFAULT_BATCH_SIZE, reconcile_all
+
+
+class Command(BaseCommand):
+    help = 'Rebuild payment allocations and recompute invoice statuses and AMC paid/due amounts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--customer', type=int, action='append', help='Customer id (repeatable)')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='Customers reconciled per transaction')
+
+    def handle(self, *args, **options):
+        customers, allocations = reconcile_all(
+            batch_size=max(options['batch_size'], 1), customer_ids=options['customer'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Reconciled {customers} customer(s), {allocations} payment allocation(s)'
+        ))
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:35
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('PaymentReceived', '0005_bulkimportpaymentreceived'),
+        ('invoice', '0007_recurring_invoice_link'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PaymentAllocation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('invoice', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='allocations', to='invoice.invoice')),
+                ('payment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='allocations', to='PaymentReceived.paymentreceived')),
+            ],
+        ),
+    ]
@@ -14,6 +14,8 @@ from django.shortcuts import redirect
 # Import related models
 from customer.models import Customer
 from invoice.models import Invoice
+from home.exports import ExportQuerysetMixin
+from home.filters import TypeaheadFilterMixin
 
 
 # ---------- MAIN MODEL ----------
@@ -126,8 +128,18 @@ class PaymentReceived(models.Model):
     invoice_value.short_description = "Invoice"
 
 
+class PaymentAllocation(models.Model):
+    """Part of a payment applied to an invoice (see PaymentReceived/allocation.py)"""
+    payment = models.ForeignKey(PaymentReceived, on_delete=models.CASCADE, related_name='allocations')
+    invoice = models.ForeignKey(Invoice, on_delete=models.CASCADE, related_name='allocations')
+    amount = models.DecimalField(max_digits=12, decimal_places=2)
+
+    def __str__(self):
+        return f"{self.payment} -> {self.invoice}: {self.amount}"
+
+
 # ---------- SNIPPET VIEWSET ----------
-class PaymentReceivedViewSet(SnippetViewSet):
+class PaymentReceivedViewSet(TypeaheadFilterMixin, SnippetViewSet):
     model = PaymentReceived
     icon = "group"
     menu_label = "Payments Received"
@@ -164,6 +176,7 @@ class PaymentReceivedViewSet(SnippetViewSet):
         "customer",
         "date",
     )
+    typeahead_filters = {"customer": "customers"}
 
     def get_add_url(self):
         return reverse("add_payment_received_custom")
@@ -179,7 +192,9 @@ class PaymentReceivedViewSet(SnippetViewSet):
         return redirect(self.get_edit_url(instance))
 
     # Custom IndexView to restrict export to superusers
-    class RestrictedIndexView(IndexView):
+    class RestrictedIndexView(ExportQuerysetMixin, IndexView):
+        export_select_related = ("customer", "invoice")
+
         def dispatch(self, request, *args, **kwargs):
             """Override dispatch to check export permissions"""
             export_format = request.GET.get('export')
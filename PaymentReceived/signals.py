@@ -0,0 +1,58 @@
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from invoice.models import Invoice, InvoiceItem
+from invoice.receivables import invalidate_receivables
+
+from .allocation import request_allocation
+from .models import PaymentAllocation, PaymentReceived
+
+
+def allocated_customer_ids(payment):
+    """Customers whose invoices currently hold part of this payment"""
+    return set(
+        PaymentAllocation.objects.filter(payment=payment).values_list('invoice__customer_id', flat=True)
+    )
+
+
+@receiver(post_save, sender=PaymentReceived)
+def allocate_saved_payment(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    # Includes the previous customer when the payment was moved
+    request_allocation(allocated_customer_ids(instance) | {instance.customer_id})
+
+
+@receiver(pre_delete, sender=PaymentReceived)
+def remember_payment_customers(sender, instance, **kwargs):
+    instance._allocation_customer_ids = allocated_customer_ids(instance) | {instance.customer_id}
+
+
+@receiver(post_delete, sender=PaymentReceived)
+def allocate_deleted_payment(sender, instance, **kwargs):
+    request_allocation(getattr(instance, '_allocation_customer_ids', {instance.customer_id}))
+
+
+# Invoice receivers run after invoice/signals.py has refreshed the stored
+# totals (the invoice app is installed, so connected, first)
+@receiver(post_save, sender=Invoice)
+@receiver(post_delete, sender=Invoice)
+def allocate_invoice_customer(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    request_allocation({instance.customer_id})
+
+
+@receiver(post_save, sender=InvoiceItem)
+@receiver(post_delete, sender=InvoiceItem)
+def allocate_invoice_item_customer(sender, instance, raw=False, origin=None, **kwargs):
+    if raw or isinstance(origin, Invoice):
+        return
+    customer_id = Invoice.objects.filter(pk=instance.invoice_id).values_list('customer_id', flat=True).first()
+    request_allocation({customer_id})
+
+
+@receiver(post_save, sender=PaymentReceived)
+@receiver(post_delete, sender=PaymentReceived)
+def invalidate_receivables_on_payment_write(sender, **kwargs):
+    invalidate_receivables()
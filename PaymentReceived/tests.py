@@ -1,3 +1,74 @@
+from datetime import date
+from decimal import Decimal
+
 from django.test import TestCase
 
-# Create your tests here.
+from amc.models import AMC, AMCType
+from customer.models import Customer
+from invoice.models import Invoice, InvoiceItem
+
+from .allocation import deferred_allocation, reconcile_all
+from .models import PaymentAllocation, PaymentReceived
+
+
+class PaymentAllocationTests(TestCase):
+    def setUp(self):
+        self.customer = Customer.objects.create(
+            site_name='Allocation Site', site_address='1 Test Street', email='alloc@example.com', phone='9123456784',
+        )
+        self.amc_type = AMCType.objects.create(name='Comprehensive')
+        self.first = self.create_invoice(date(2026, 1, 31), '1000.00')
+        self.second = self.create_invoice(date(2026, 2, 28), '500.00')
+
+    def create_invoice(self, due_date, rate):
+        invoice = Invoice.objects.create(
+            customer=self.customer, amc_type=self.amc_type, start_date=due_date.replace(day=1), due_date=due_date,
+        )
+        InvoiceItem.objects.create(invoice=invoice, rate=Decimal(rate), tax=Decimal('0'))
+        return invoice
+
+    def pay(self, amount, invoice=None):
+        return PaymentReceived.objects.create(
+            customer=self.customer, invoice=invoice, amount=Decimal(amount), date=date(2026, 3, 1),
+        )
+
+    def statuses(self):
+        return list(Invoice.objects.order_by('due_date').values_list('status', flat=True))
+
+    def test_linked_payment_updates_its_invoice(self):
+        self.pay('300.00', invoice=self.second)
+        self.assertEqual(self.statuses(), ['open', 'partially_paid'])
+        self.pay('200.00', invoice=self.second)
+        self.assertEqual(self.statuses(), ['open', 'paid'])
+
+    def test_unlinked_payment_is_applied_fifo(self):
+        payment = self.pay('1200.00')
+        self.assertEqual(self.statuses(), ['paid', 'partially_paid'])
+        self.assertEqual(
+            list(payment.allocations.order_by('invoice__due_date').values_list('amount', flat=True)),
+            [Decimal('1000.00'), Decimal('200.00')],
+        )
+        payment.delete()
+        self.assertEqual(self.statuses(), ['open', 'open'])
+
+    def test_amc_paid_follows_invoices_in_contract_period(self):
+        amc = AMC.objects.create(
+            customer=self.customer, amc_type=self.amc_type, start_date=date(2026, 1, 1), end_date=date(2026, 12, 31),
+            no_of_services=1, total_amount_paid=Decimal('99.00'),
+        )
+        self.pay('700.00')
+        amc.refresh_from_db()
+        self.assertEqual(amc.total_amount_paid, Decimal('700.00'))
+        self.assertEqual(amc.amount_due, Decimal('-700.00'))
+
+    def test_deferred_allocation_and_reconcile(self):
+        with deferred_allocation():
+            self.pay('1000.00', invoice=self.first)
+            self.pay('500.00')
+            self.assertFalse(PaymentAllocation.objects.exists())
+        self.assertEqual(self.statuses(), ['paid', 'paid'])
+
+        PaymentAllocation.objects.all().delete()
+        Invoice.objects.update(status='open')
+        self.assertEqual(reconcile_all(), (1, 2))
+        self.assertEqual(self.statuses(), ['paid', 'paid'])
@@ -7,6 +7,8 @@ from django.views.decorators.http import require_http_methods
 from django.views.decorators.csrf import csrf_exempt
 from django.core.exceptions import ValidationError
 from django.contrib import messages
+from home import typeahead
+from .allocation import deferred_allocation
 from .models import PaymentReceived
 from customer.models import Customer
 from invoice.models import Invoice
@@ -35,20 +37,28 @@ def edit_payment_received_custom(request, payment_number):
 
 @require_http_methods(["GET"])
 def get_customers(request):
+    """Customers matching ?q= (see home/typeahead.py), at most ?limit="""
     data = [{
-        'id': c.id,
-        'site_name': c.site_name,
-    } for c in Customer.objects.all().order_by('site_name')]
+        'id': c['id'],
+        'site_name': c['site_name'],
+        'job_no': c['job_no'],
+    } for c in typeahead.search(
+        'customers', request.GET.get('q', ''), user=request.user, limit=request.GET.get('limit'),
+    )]
     return JsonResponse(data, safe=False)
 
 
 @require_http_methods(["GET"])
 def get_invoices(request):
+    """Invoices matching ?q=, optionally of one ?customer=, at most ?limit="""
     data = [{
-        'id': i.id,
-        'number': getattr(i, 'reference_id', i.id),
-        'customer_id': i.customer_id if hasattr(i, 'customer_id') else None,
-    } for i in Invoice.objects.all().order_by('-id')]
+        'id': i['id'],
+        'number': i['reference_id'],
+        'customer_id': i['customer_id'],
+    } for i in typeahead.search(
+        'invoices', request.GET.get('q', ''), user=request.user, limit=request.GET.get('limit'),
+        filters=request.GET,
+    )]
     return JsonResponse(data, safe=False)
 
 
@@ -298,134 +308,136 @@ def bulk_import_view(request):
                 # If all parsing fails, return None (will be caught by error handling)
                 return None
             
-            for idx, row in enumerate(rows, start=2):  # Start from 2 (1 is header)
-                try:
-                    # Map CSV columns to model fields - handle None values and empty strings
-                    # Headers are normalized to lowercase with underscores
-                    
-                    # Required fields (from create_payment_received requirements)
-                    customer_value = row.get('customer', '') or row.get('customer_value', '') or ''
-                    customer_value = str(customer_value).strip() if customer_value else ''
+            # Allocate the imported payments once for the whole file, not per row
+            with deferred_allocation():
+                for idx, row in enumerate(rows, start=2):  # Start from 2 (1 is header)
+                    try:
+                        # Map CSV columns to model fields - handle None values and empty strings
+                        # Headers are normalized to lowercase with underscores
                     
-                    amount_value = row.get('amount', '') or ''
-                    amount_value = str(amount_value).strip() if amount_value else ''
+                        # Required fields (from create_payment_received requirements)
+                        customer_value = row.get('customer', '') or row.get('customer_value', '') or ''
+                        customer_value = str(customer_value).strip() if customer_value else ''
                     
-                    # Validate required fields (same as create_payment_received)
-                    if not customer_value:
-                        errors.append(f'Row {idx}: Customer is required.')
-                        error_count += 1
-                        continue
+                        amount_value = row.get('amount', '') or ''
+                        amount_value = str(amount_value).strip() if amount_value else ''
                     
-                    if not amount_value:
-                        errors.append(f'Row {idx}: Amount is required.')
-                        error_count += 1
-                        continue
-                    
-                    # Get customer by site_name
-                    customer = Customer.objects.filter(site_name=customer_value).first()
-                    if not customer:
-                        errors.append(f'Row {idx}: Customer "{customer_value}" not found. Please use an existing customer site name.')
-                        error_count += 1
-                        continue
-                    
-                    # Validate and parse amount
-                    try:
-                        amount = float(amount_value)
-                        if amount <= 0:
-                            errors.append(f'Row {idx}: Amount must be greater than 0.')
+                        # Validate required fields (same as create_payment_received)
+                        if not customer_value:
+                            errors.append(f'Row {idx}: Customer is required.')
                             error_count += 1
                             continue
-                    except (ValueError, TypeError):
-                        errors.append(f'Row {idx}: Amount must be a valid number.')
-                        error_count += 1
-                        continue
                     
-                    # Optional fields
-                    invoice_value = row.get('invoice', '') or row.get('invoice_value', '') or ''
-                    invoice_value = str(invoice_value).strip() if invoice_value else ''
+                        if not amount_value:
+                            errors.append(f'Row {idx}: Amount is required.')
+                            error_count += 1
+                            continue
                     
-                    invoice = None
-                    if invoice_value:
-                        invoice = Invoice.objects.filter(reference_id=invoice_value).first()
-                        if not invoice:
-                            errors.append(f'Row {idx}: Invoice "{invoice_value}" not found. Please use an existing invoice reference ID.')
+                        # Get customer by site_name
+                        customer = Customer.objects.filter(site_name=customer_value).first()
+                        if not customer:
+                            errors.append(f'Row {idx}: Customer "{customer_value}" not found. Please use an existing customer site name.')
                             error_count += 1
                             continue
                     
-                    # Handle date (optional but recommended)
-                    date_value = row.get('date', '') or row.get('date_str', '') or ''
-                    date_parsed = None
-                    if date_value:
-                        date_parsed = parse_date(date_value)
-                        if date_parsed is None:
-                            errors.append(f'Row {idx}: Invalid date format. Please use YYYY-MM-DD format.')
+                        # Validate and parse amount
+                        try:
+                            amount = float(amount_value)
+                            if amount <= 0:
+                                errors.append(f'Row {idx}: Amount must be greater than 0.')
+                                error_count += 1
+                                continue
+                        except (ValueError, TypeError):
+                            errors.append(f'Row {idx}: Amount must be a valid number.')
                             error_count += 1
                             continue
-                    else:
-                        # Date is required in the model, use today's date if not provided
-                        from django.utils import timezone
-                        date_parsed = timezone.now().date()
                     
-                    # Payment type (optional, default: 'cash')
-                    payment_type = row.get('payment_type', 'cash') or 'cash'
-                    valid_payment_types = ['cash', 'bank_transfer', 'cheque', 'neft']
-                    if payment_type not in valid_payment_types:
-                        payment_type = 'cash'
+                        # Optional fields
+                        invoice_value = row.get('invoice', '') or row.get('invoice_value', '') or ''
+                        invoice_value = str(invoice_value).strip() if invoice_value else ''
+                    
+                        invoice = None
+                        if invoice_value:
+                            invoice = Invoice.objects.filter(reference_id=invoice_value).first()
+                            if not invoice:
+                                errors.append(f'Row {idx}: Invoice "{invoice_value}" not found. Please use an existing invoice reference ID.')
+                                error_count += 1
+                                continue
                     
-                    # Tax deducted (optional, default: 'no')
-                    tax_deducted = row.get('tax_deducted', 'no') or 'no'
-                    valid_tax_options = ['no', 'yes_tds']
-                    if tax_deducted not in valid_tax_options:
-                        tax_deducted = 'no'
+                        # Handle date (optional but recommended)
+                        date_value = row.get('date', '') or row.get('date_str', '') or ''
+                        date_parsed = None
+                        if date_value:
+                            date_parsed = parse_date(date_value)
+                            if date_parsed is None:
+                                errors.append(f'Row {idx}: Invalid date format. Please use YYYY-MM-DD format.')
+                                error_count += 1
+                                continue
+                        else:
+                            # Date is required in the model, use today's date if not provided
+                            from django.utils import timezone
+                            date_parsed = timezone.now().date()
                     
-                    # Create payment (same structure as create_payment_received)
-                    payment = PaymentReceived.objects.create(
-                        customer=customer,
-                        invoice=invoice,
-                        amount=amount,
-                        date=date_parsed,
-                        payment_type=payment_type,
-                        tax_deducted=tax_deducted,
-                    )
+                        # Payment type (optional, default: 'cash')
+                        payment_type = row.get('payment_type', 'cash') or 'cash'
+                        valid_payment_types = ['cash', 'bank_transfer', 'cheque', 'neft']
+                        if payment_type not in valid_payment_types:
+                            payment_type = 'cash'
                     
-                    # Note: File uploads (uploads_files) cannot be handled in bulk import
-                    # Users need to upload files individually after import
+                        # Tax deducted (optional, default: 'no')
+                        tax_deducted = row.get('tax_deducted', 'no') or 'no'
+                        valid_tax_options = ['no', 'yes_tds']
+                        if tax_deducted not in valid_tax_options:
+                            tax_deducted = 'no'
                     
-                    # Validate and save (uses full_clean which applies all model validations)
-                    try:
-                        payment.full_clean()
-                        payment.save()
-                        success_count += 1
-                    except ValidationError as e:
-                        # Handle validation errors
-                        if e.message_dict:
-                            error_fields = ['customer', 'amount']
-                            error_msg = None
-                            for field in error_fields:
-                                if field in e.message_dict:
-                                    error_msg = f"Row {idx}: {e.message_dict[field][0]}"
-                                    break
-                            if not error_msg:
-                                error_msg = f"Row {idx}: {list(e.message_dict.values())[0][0]}"
-                        else:
-                            error_msg = f"Row {idx}: {str(e)}"
-                        errors.append(error_msg)
-                        error_count += 1
-                        continue
+                        # Create payment (same structure as create_payment_received)
+                        payment = PaymentReceived.objects.create(
+                            customer=customer,
+                            invoice=invoice,
+                            amount=amount,
+                            date=date_parsed,
+                            payment_type=payment_type,
+                            tax_deducted=tax_deducted,
+                        )
+                    
+                        # Note: File uploads (uploads_files) cannot be handled in bulk import
+                        # Users need to upload files individually after import
+                    
+                        # Validate and save (uses full_clean which applies all model validations)
+                        try:
+                            payment.full_clean()
+                            payment.save()
+                            success_count += 1
+                        except ValidationError as e:
+                            # Handle validation errors
+                            if e.message_dict:
+                                error_fields = ['customer', 'amount']
+                                error_msg = None
+                                for field in error_fields:
+                                    if field in e.message_dict:
+                                        error_msg = f"Row {idx}: {e.message_dict[field][0]}"
+                                        break
+                                if not error_msg:
+                                    error_msg = f"Row {idx}: {list(e.message_dict.values())[0][0]}"
+                            else:
+                                error_msg = f"Row {idx}: {str(e)}"
+                            errors.append(error_msg)
+                            error_count += 1
+                            continue
+                        except Exception as e:
+                            # Handle unique constraint violations and other database errors
+                            error_str = str(e).lower()
+                            if 'unique' in error_str or 'duplicate' in error_str or 'already exists' in error_str:
+                                errors.append(f'Row {idx}: Duplicate entry - {str(e)}')
+                            else:
+                                errors.append(f'Row {idx}: {str(e)}')
+                            error_count += 1
+                            continue
+                        
                     except Exception as e:
-                        # Handle unique constraint violations and other database errors
-                        error_str = str(e).lower()
-                        if 'unique' in error_str or 'duplicate' in error_str or 'already exists' in error_str:
-                            errors.append(f'Row {idx}: Duplicate entry - {str(e)}')
-                        else:
-                            errors.append(f'Row {idx}: {str(e)}')
+                        errors.append(f'Row {idx}: Unexpected error - {str(e)}')
                         error_count += 1
                         continue
-                        
-                except Exception as e:
-                    errors.append(f'Row {idx}: Unexpected error - {str(e)}')
-                    error_count += 1
-                    continue
             
             # Show results
             if success_count > 0:
@@ -4,6 +4,7 @@ from django.shortcuts import redirect
 from wagtail.admin.panels import FieldPanel, MultiFieldPanel
 from wagtail.snippets.models import register_snippet
 from wagtail.snippets.views.snippets import IndexView
+from home.exports import ExportQuerysetMixin
 from django.http import HttpResponseForbidden
 from modelcluster.models import ClusterableModel
 from authentication.models import CustomUser  # Corrected import
@@ -188,7 +189,10 @@ class QuotationViewSet(SnippetViewSet):
         return redirect(self.get_edit_url(instance))
 
     # Custom IndexView to restrict export to superusers
-    class RestrictedIndexView(IndexView):
+    class RestrictedIndexView(ExportQuerysetMixin, IndexView):
+        export_select_related = ("customer", "amc_type", "sales_service_executive")
+        export_prefetch_related = ("lifts",)
+
         def dispatch(self, request, *args, **kwargs):
             """Override dispatch to check export permissions"""
             # Check if this is an export request
@@ -28,10 +28,8 @@ def add_quotation_custom(request):
             preselected_customer = None
     
     context = {
-        'customers': Customer.objects.all().order_by('site_name'),
         'amc_types': AMCType.objects.all().order_by('name'),
         'users': CustomUser.objects.filter(groups__name='employee').order_by('username'),
-        'lifts': Lift.objects.all().order_by('name'),
         'is_edit': False,
         'selected_lift_ids': '',
         'preselected_customer_id': customer_id if preselected_customer else None,
@@ -44,10 +42,8 @@ def edit_quotation_custom(request, reference_id):
     selected_lift_ids = ','.join(str(lift.id) for lift in quotation.lifts.all())
     context = {
         'quotation': quotation,
-        'customers': Customer.objects.all().order_by('site_name'),
         'amc_types': AMCType.objects.all().order_by('name'),
         'users': CustomUser.objects.filter(groups__name='employee').order_by('username'),
-        'lifts': Lift.objects.all().order_by('name'),
         'is_edit': True,
         'selected_lift_ids': selected_lift_ids,
     }
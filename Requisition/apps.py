@@ -6,4 +6,5 @@ class RequisitionConfig(AppConfig):
     name = 'Requisition'
     
     def ready(self):
-        import Requisition.wagtail_hooks
\ No newline at end of file
+        import Requisition.wagtail_hooks
+        import Requisition.signals
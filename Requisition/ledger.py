@@ -0,0 +1,226 @@
+# Requisition/ledger.py
+"""
+Point-in-time stock: ledger with running balances, as-of positions and
+valuation.
+
+The ledger annotates each register entry with a running balance computed
+by a window function (SUM over the item's entries ordered by date,
+created_at, pk), plus the opening balance before the requested range.
+
+StockSnapshot rows hold every item's cumulative totals at a month end.
+An as-of-date position reads the nearest snapshot on or before the date
+and adds only the register entries after it, so the work is bounded by
+one month of entries rather than the full history. Snapshots are always
+a prefix of consecutive complete months: writing an entry dated on or
+before a snapshot deletes that snapshot and every later one (queries fall
+back to the previous snapshot), and stock_snapshots rebuilds them.
+"""
+import calendar
+from dataclasses import dataclass, field
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F, Max, Min, OuterRef, Subquery, Sum, Window
+from django.utils import timezone
+
+from .models import StockRegister, StockSnapshot
+
+LEDGER_ORDER = ('date', 'created_at', 'pk')
+ZERO = Decimal('0.00')
+
+
+def month_end(day):
+    return day.replace(day=calendar.monthrange(day.year, day.month)[1])
+
+
+def running_balance():
+    """Window expression: the item's available quantity after each entry"""
+    return Window(
+        Sum(F('inward_qty') - F('outward_qty')),
+        partition_by=[F('item_id')],
+        order_by=[F(name).asc() for name in LEDGER_ORDER],
+    )
+
+
+@dataclass
+class StockPosition:
+    inward_qty: int = 0
+    outward_qty: int = 0
+    unit_value: Decimal = None
+
+    @property
+    def available_qty(self):
+        return self.inward_qty - self.outward_qty
+
+
+def latest_snapshot_date(on_or_before=None):
+    snapshots = StockSnapshot.objects.all()
+    if on_or_before is not None:
+        snapshots = snapshots.filter(period_end__lte=on_or_before)
+    return snapshots.aggregate(latest=Max('period_end'))['latest']
+
+
+def stock_as_of(as_of, item_ids=None):
+    """
+    {item_id: StockPosition} at the end of as_of, from the nearest snapshot
+    plus the entries dated after it (two queries)
+    """
+    snapshot_date = latest_snapshot_date(as_of)
+    positions = {}
+    if snapshot_date is not None:
+        snapshots = StockSnapshot.objects.filter(period_end=snapshot_date)
+        if item_ids is not None:
+            snapshots = snapshots.filter(item_id__in=item_ids)
+        for item_id, inward, outward, unit_value in snapshots.values_list(
+            'item_id', 'inward_qty', 'outward_qty', 'unit_value',
+        ):
+            positions[item_id] = StockPosition(inward, outward, unit_value)
+
+    entries = StockRegister.objects.filter(date__lte=as_of)
+    if snapshot_date is not None:
+        entries = entries.filter(date__gt=snapshot_date)
+    if item_ids is not None:
+        entries = entries.filter(item_id__in=item_ids)
+    latest = (
+        StockRegister.objects.filter(item=OuterRef('item'), date__lte=as_of)
+        .order_by('-date', '-created_at', '-pk')
+    )
+    delta = (
+        entries.order_by().values('item')
+        .annotate(inward=Sum('inward_qty'), outward=Sum('outward_qty'), latest_value=Subquery(latest.values('unit_value')[:1]))
+    )
+    for row in delta:
+        position = positions.setdefault(row['item'], StockPosition())
+        position.inward_qty += row['inward'] or 0
+        position.outward_qty += row['outward'] or 0
+        position.unit_value = row['latest_value']
+    return positions
+
+
+def item_stock_as_of(item_id, as_of):
+    return stock_as_of(as_of, item_ids=[item_id]).get(item_id, StockPosition())
+
+
+@dataclass
+class Ledger:
+    item_id: int
+    start: object
+    end: object
+    opening: int = 0
+    entries: list = field(default_factory=list)
+
+    @property
+    def closing(self):
+        return self.entries[-1].balance if self.entries else self.opening
+
+
+def stock_ledger(item_id, start=None, end=None):
+    """Register entries for one item between start and end with running balances"""
+    opening = item_stock_as_of(item_id, start - timedelta(days=1)).available_qty if start else 0
+    entries = StockRegister.objects.filter(item_id=item_id)
+    if start:
+        entries = entries.filter(date__gte=start)
+    if end:
+        entries = entries.filter(date__lte=end)
+    entries = entries.annotate(running=running_balance()).order_by(*LEDGER_ORDER)
+
+    ledger = Ledger(item_id=item_id, start=start, end=end, opening=opening)
+    for entry in entries:
+        entry.balance = opening + entry.running
+        ledger.entries.append(entry)
+    return ledger
+
+
+@dataclass
+class ValuationRow:
+    item: object
+    quantity: int
+    unit_value: Decimal
+
+    @property
+    def value(self):
+        return self.quantity * self.unit_value
+
+
+@dataclass
+class Valuation:
+    as_of: object
+    rows: list = field(default_factory=list)
+    total_quantity: int = 0
+    total_value: Decimal = ZERO
+
+
+def stock_valuation(as_of):
+    """Available quantity and value of every item held at the end of as_of"""
+    from items.models import Item
+
+    positions = {item_id: position for item_id, position in stock_as_of(as_of).items() if position.available_qty}
+    valuation = Valuation(as_of=as_of)
+    items = Item.objects.filter(pk__in=positions).select_related('unit').order_by('name')
+    for item in items:
+        position = positions[item.pk]
+        # Unit value of the latest entry up to as_of, else the sale price
+        unit_value = position.unit_value if position.unit_value is not None else (item.sale_price or ZERO)
+        row = ValuationRow(item=item, quantity=position.available_qty, unit_value=unit_value)
+        valuation.rows.append(row)
+        valuation.total_quantity += row.quantity
+        valuation.total_value += row.value
+    return valuation
+
+
+def take_snapshot(period_end):
+    """Replace the snapshot rows for one month end; returns the row count"""
+    with transaction.atomic():
+        # Delete first so the totals build on the previous month, not on these rows
+        StockSnapshot.objects.filter(period_end__gte=period_end).delete()
+        snapshots = [
+            StockSnapshot(
+                item_id=item_id,
+                period_end=period_end,
+                inward_qty=position.inward_qty,
+                outward_qty=position.outward_qty,
+                available_qty=position.available_qty,
+                unit_value=position.unit_value,
+            )
+            for item_id, position in stock_as_of(period_end).items()
+        ]
+        StockSnapshot.objects.bulk_create(snapshots, batch_size=500)
+    return len(snapshots)
+
+
+def pending_periods(through=None):
+    """Month ends after the latest snapshot, up to the last complete month before through"""
+    through = through or timezone.localdate()
+    latest = latest_snapshot_date()
+    if latest is not None:
+        start = latest + timedelta(days=1)
+    else:
+        start = StockRegister.objects.aggregate(first=Min('date'))['first']
+    if start is None:
+        return []
+    periods = []
+    period = month_end(start)
+    while period < through:
+        periods.append(period)
+        period = month_end(period + timedelta(days=1))
+    return periods
+
+
+def build_snapshots(through=None, rebuild=False):
+    """Snapshot every complete month not yet snapshotted, oldest first; returns (months, rows)"""
+    if rebuild:
+        StockSnapshot.objects.all().delete()
+    periods = pending_periods(through)
+    rows = 0
+    for period in periods:
+        rows += take_snapshot(period)
+    return len(periods), rows
+
+
+def invalidate_snapshots(*dates):
+    """Drop snapshots that include entries on any of these dates"""
+    to_date = StockSnapshot._meta.get_field('period_end').to_python
+    dates = [to_date(day) for day in dates if day]
+    if dates:
+        StockSnapshot.objects.filter(period_end__gte=min(dates)).delete()
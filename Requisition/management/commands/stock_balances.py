@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from django.db.models import F
+
+from Requisition.models import StockBalance, StockRegister
+from Requisition.stock import low_stock_alerts, rebuild_balances
+
+
+class Command(BaseCommand):
+    help = 'Rebuild or check the materialized StockBalance rows against the stock register'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rebuild', action='store_true', help='Recompute every balance from the register')
+        parser.add_argument('--low-stock', action='store_true', help='List items at or below their threshold quantity')
+
+    def handle(self, *args, **options):
+        if options['low_stock']:
+            alerts = low_stock_alerts()
+            for alert in alerts:
+                self.stdout.write(self.style.WARNING(alert))
+            self.stdout.write(f'{len(alerts)} item(s) at or below threshold')
+            return
+
+        if options['rebuild']:
+            count = rebuild_balances(StockRegister, StockBalance)
+            self.stdout.write(self.style.SUCCESS(f'Rebuilt stock balances for {count} item(s)'))
+            return
+
+        inconsistent = StockBalance.objects.exclude(available_qty=F('inward_qty') - F('outward_qty')).count()
+        self.stdout.write(f'{StockBalance.objects.count()} stock balance row(s), {inconsistent} inconsistent')
+        if inconsistent:
+            self.stdout.write(self.style.WARNING('Run with --rebuild to recompute them from the register'))
@@ -0,0 +1,26 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from Requisition.ledger import build_snapshots, latest_snapshot_date
+
+
+class Command(BaseCommand):
+    help = 'Build month-end stock snapshots for every complete month not yet snapshotted'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--through', help='Snapshot complete months before this date (YYYY-MM-DD), default today')
+        parser.add_argument('--rebuild', action='store_true', help='Drop every snapshot and rebuild from the register')
+
+    def handle(self, *args, **options):
+        through = None
+        if options['through']:
+            try:
+                through = date.fromisoformat(options['through'])
+            except ValueError:
+                raise CommandError('--through must be a date in YYYY-MM-DD format')
+
+        months, rows = build_snapshots(through=through, rebuild=options['rebuild'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Snapshotted {months} month(s), {rows} row(s); latest snapshot: {latest_snapshot_date() or "none"}'
+        ))
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from Requisition.stock import rebuild_balances
+
+
+def backfill_balances(apps, schema_editor):
+    rebuild_balances(apps.get_model('Requisition', 'StockRegister'), apps.get_model('Requisition', 'StockBalance'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Requisition', '0004_bulkimportrequisition'),
+        ('items', '0006_bulkimportitem'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockBalance',
+            fields=[
+                ('item', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stock_balance', serialize=False, to='items.item')),
+                ('inward_qty', models.BigIntegerField(default=0)),
+                ('outward_qty', models.BigIntegerField(default=0)),
+                ('available_qty', models.BigIntegerField(default=0)),
+                ('unit_value', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('last_entry_date', models.DateField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Stock Balance',
+                'verbose_name_plural': 'Stock Balances',
+            },
+        ),
+        migrations.RunPython(backfill_balances, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Requisition', '0005_stockbalance'),
+        ('items', '0006_bulkimportitem'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period_end', models.DateField()),
+                ('inward_qty', models.BigIntegerField(default=0)),
+                ('outward_qty', models.BigIntegerField(default=0)),
+                ('available_qty', models.BigIntegerField(default=0)),
+                ('unit_value', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_snapshots', to='items.item')),
+            ],
+            options={
+                'verbose_name': 'Stock Snapshot',
+                'verbose_name_plural': 'Stock Snapshots',
+                'constraints': [models.UniqueConstraint(fields=('period_end', 'item'), name='stock_snapshot_period_item')],
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Requisition', '0006_stocksnapshot'),
+        ('delivery', '0004_bulkimportdeliverychallan'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='stockregister',
+            name='challan_item',
+            field=models.OneToOneField(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='stock_entry', to='delivery.deliverychallanitem'),
+        ),
+        migrations.AddField(
+            model_name='stockregister',
+            name='requisition',
+            field=models.OneToOneField(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='stock_entry', to='Requisition.requisition'),
+        ),
+    ]
@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from wagtail.admin.panels import FieldPanel, MultiFieldPanel
 from wagtail.snippets.models import register_snippet
 from wagtail.snippets.views.snippets import SnippetViewSet, SnippetViewSetGroup, IndexView
@@ -11,6 +11,8 @@ from authentication.models import CustomUser
 from items.models import Item
 from customer.models import Customer
 from amc.models import AMC
+from home.exports import ExportQuerysetMixin
+from home.filters import TypeaheadFilterMixin
 
 
 # ---------- MAIN MODEL ----------
@@ -79,7 +81,12 @@ class Requisition(models.Model):
                 self.reference_id = f'REQ{str(last_id + 1).zfill(3)}'
             else:
                 self.reference_id = 'REQ001'
-        super().save(*args, **kwargs)
+        from .posting import post_requisition
+
+        # Approval issues stock in the same transaction (see posting.py)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            post_requisition(self)
 
     def __str__(self):
         return f"{self.reference_id} - {self.item or 'No Item'}"
@@ -130,6 +137,14 @@ class StockRegister(models.Model):
     unit_value = models.DecimalField(max_digits=10, decimal_places=2, default=0.00, help_text="Value per unit")
     total_value = models.DecimalField(max_digits=12, decimal_places=2, default=0.00, editable=False)
     reference = models.CharField(max_length=100, blank=True, help_text="Reference document number")
+    # Source document of entries posted automatically (see posting.py)
+    requisition = models.OneToOneField(
+        Requisition, on_delete=models.CASCADE, null=True, blank=True, editable=False, related_name='stock_entry',
+    )
+    challan_item = models.OneToOneField(
+        'delivery.DeliveryChallanItem', on_delete=models.CASCADE, null=True, blank=True, editable=False,
+        related_name='stock_entry',
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -180,15 +195,62 @@ class StockRegister(models.Model):
 
     @staticmethod
     def get_available_stock(item):
-        """Calculate available stock for a specific item"""
-        entries = StockRegister.objects.filter(item=item)
-        total_inward = sum(entry.inward_qty for entry in entries)
-        total_outward = sum(entry.outward_qty for entry in entries)
-        return total_inward - total_outward
+        """Available stock for a specific item, read from its StockBalance row"""
+        available = StockBalance.objects.filter(item=item).values_list('available_qty', flat=True).first()
+        return available or 0
+
+
+class StockBalance(models.Model):
+    """
+    Running stock totals per item, kept in step with StockRegister entries
+    (see Requisition/stock.py). Rebuild with `manage.py stock_balances --rebuild`.
+    """
+    item = models.OneToOneField(Item, on_delete=models.CASCADE, primary_key=True, related_name='stock_balance')
+    inward_qty = models.BigIntegerField(default=0)
+    outward_qty = models.BigIntegerField(default=0)
+    available_qty = models.BigIntegerField(default=0)
+    # Unit value of the item's latest register entry
+    unit_value = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    last_entry_date = models.DateField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Stock Balance"
+        verbose_name_plural = "Stock Balances"
+
+    def __str__(self):
+        return f"{self.item}: {self.available_qty}"
+
+
+class StockSnapshot(models.Model):
+    """
+    Cumulative stock totals per item at a month end, so as-of-date queries
+    start from the nearest snapshot (see Requisition/ledger.py). Build with
+    `manage.py stock_snapshots`.
+    """
+    item = models.ForeignKey(Item, on_delete=models.CASCADE, related_name='stock_snapshots')
+    period_end = models.DateField()
+    inward_qty = models.BigIntegerField(default=0)
+    outward_qty = models.BigIntegerField(default=0)
+    available_qty = models.BigIntegerField(default=0)
+    # Unit value of the item's latest register entry on or before period_end
+    unit_value = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Stock Snapshot"
+        verbose_name_plural = "Stock Snapshots"
+        constraints = [
+            # Leads with period_end: serves per-period lookups as well
+            models.UniqueConstraint(fields=['period_end', 'item'], name='stock_snapshot_period_item'),
+        ]
+
+    def __str__(self):
+        return f"{self.item} @ {self.period_end}: {self.available_qty}"
 
 
 # ---------- SNIPPET VIEWSET ----------
-class RequisitionViewSet(SnippetViewSet):
+class RequisitionViewSet(TypeaheadFilterMixin, SnippetViewSet):
     model = Requisition
     icon = "form"
     menu_label = "Requisitions"
@@ -227,7 +289,8 @@ class RequisitionViewSet(SnippetViewSet):
 
     # ✅ Search and filters
     search_fields = ("reference_id", "item__name", "site__site_name", "employee__username")
-    list_filter = ("status", "approve_for", "date")
+    list_filter = ("status", "approve_for", "item", "site", "date")
+    typeahead_filters = {"item": "items", "site": "customers"}
 
     def get_add_url(self):
         return reverse("add_requisition_custom")
@@ -247,7 +310,9 @@ class RequisitionViewSet(SnippetViewSet):
             return render(request, '404.html', status=404)
 
     # Custom IndexView to restrict export to superusers
-    class RestrictedIndexView(IndexView):
+    class RestrictedIndexView(ExportQuerysetMixin, IndexView):
+        export_select_related = ("item", "site", "amc_id", "employee")
+
         def dispatch(self, request, *args, **kwargs):
             """Override dispatch to check export permissions"""
             export_format = request.GET.get('export')
@@ -305,7 +370,9 @@ class StockRegisterViewSet(SnippetViewSet):
     list_filter = ("transaction_type", "date", "item__type")
 
     # Custom IndexView to restrict export to superusers
-    class RestrictedIndexView(IndexView):
+    class RestrictedIndexView(ExportQuerysetMixin, IndexView):
+        export_select_related = ("item",)
+
         def dispatch(self, request, *args, **kwargs):
             """Override dispatch to check export permissions"""
             export_format = request.GET.get('export')
@@ -0,0 +1,131 @@
+# Requisition/posting.py
+"""
+Outward stock postings from documents.
+
+An approved requisition, and every delivery challan line, issues stock
+through one OUTWARD StockRegister entry linked to it. post_outward() runs
+inside the document's save transaction. It locks the item's StockBalance
+row (SELECT ... FOR UPDATE), checks the available quantity (adding back
+what the entry already issues) and then creates, updates or deletes the
+entry. Concurrent approvals for the same item wait on that lock, so two
+of them cannot both pass the check against the same stock. Deleting a
+document cascades to its entry, which returns the stock through the
+usual balance signals.
+
+Documents dated before settings.STOCK_POSTING_FROM are never posted, so
+stock already entered by hand for older documents is not issued twice.
+Nothing is posted until that go-live date is configured.
+"""
+from datetime import date
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from .models import StockBalance, StockRegister
+
+
+def get_posting_from():
+    value = getattr(settings, 'STOCK_POSTING_FROM', None)
+    return date.fromisoformat(value) if isinstance(value, str) else value
+
+
+def allow_negative():
+    return getattr(settings, 'STOCK_ALLOW_NEGATIVE', False)
+
+
+def posts_on(day):
+    """Whether documents dated day issue stock (never while STOCK_POSTING_FROM is unset)"""
+    posting_from = get_posting_from()
+    day = StockRegister._meta.get_field('date').to_python(day)
+    return posting_from is not None and day is not None and day >= posting_from
+
+
+def whole_units(qty):
+    """Stock is counted in whole units"""
+    return int(Decimal(str(qty or 0)).quantize(Decimal('1'), rounding=ROUND_HALF_UP))
+
+
+def lock_balances(item_ids):
+    """StockBalance rows for these items, locked in item order (avoids lock-order deadlocks)"""
+    item_ids = sorted({pk for pk in item_ids if pk})
+    for item_id in item_ids:
+        StockBalance.objects.get_or_create(item_id=item_id)
+    return {
+        balance.item_id: balance
+        for balance in StockBalance.objects.select_for_update().filter(item_id__in=item_ids).order_by('item_id')
+    }
+
+
+def post_outward(source, item_id, qty, day, reference, description='', field='qty'):
+    """
+    Make the document's OUTWARD entry issue qty of item_id on day.
+    source: the entry's link to the document, e.g. {'requisition': requisition}.
+    A missing item or zero qty removes the entry. Raises ValidationError
+    (keyed by field) when the item does not have enough stock.
+    """
+    with transaction.atomic():
+        entry = StockRegister.objects.select_for_update().filter(**source).first()
+        if not item_id or qty <= 0 or not posts_on(day):
+            if entry is not None:
+                entry.delete()
+            return None
+
+        balances = lock_balances([item_id, entry.item_id if entry else None])
+        balance = balances[item_id]
+        available = balance.available_qty
+        if entry is not None and entry.item_id == item_id:
+            available += entry.outward_qty
+        if qty > available and not allow_negative():
+            from items.models import Item
+
+            item = Item.objects.filter(pk=item_id).only('name').first()
+            raise ValidationError({
+                field: f'Insufficient stock for {item.name if item else "item"}: '
+                       f'{max(available, 0)} available, {qty} requested.'
+            })
+
+        if entry is None:
+            entry = StockRegister(transaction_type='OUTWARD', **source)
+        entry.item_id = item_id
+        entry.date = day
+        entry.outward_qty = qty
+        if balance.unit_value is not None:
+            entry.unit_value = balance.unit_value
+        entry.reference = reference
+        entry.description = description
+        entry.save()
+    return entry
+
+
+def post_requisition(requisition):
+    """Issue an approved requisition's quantity; withdraw it otherwise"""
+    approved = requisition.approve_for == 'APPROVED'
+    return post_outward(
+        {'requisition': requisition},
+        requisition.item_id if approved else None,
+        int(requisition.qty or 0),
+        requisition.date,
+        requisition.reference_id,
+        description=f'Requisition {requisition.reference_id}',
+    )
+
+
+def post_challan_item(line):
+    challan = line.challan
+    return post_outward(
+        {'challan_item': line},
+        line.item_id,
+        whole_units(line.qty),
+        challan.date,
+        challan.reference_id,
+        description=f'Delivery challan {challan.reference_id}',
+        field='items',
+    )
+
+
+def post_challan(challan):
+    """Re-post every line of a saved challan (after its date changes)"""
+    for line in challan.items.select_related('challan'):
+        post_challan_item(line)
@@ -0,0 +1,30 @@
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from items.models import Item
+
+from .ledger import invalidate_snapshots
+from .models import StockRegister
+from .stock import entry_deleted, entry_saved, remember_loaded_entry
+
+
+@receiver(post_init, sender=StockRegister)
+def track_stock_entry(sender, instance, **kwargs):
+    remember_loaded_entry(instance)
+
+
+@receiver(post_save, sender=StockRegister)
+def update_stock_balance(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    invalidate_snapshots(instance.date, None if created else instance._loaded_date)
+    entry_saved(instance, created)
+
+
+@receiver(post_delete, sender=StockRegister)
+def release_stock_balance(sender, instance, origin=None, **kwargs):
+    # Deleting the item removes its balance row too
+    if isinstance(origin, Item):
+        return
+    invalidate_snapshots(instance._loaded_date)
+    entry_deleted(instance)
@@ -0,0 +1,125 @@
+# Requisition/stock.py
+"""
+Materialized stock balances.
+
+StockBalance holds inward, outward and available quantities per item so
+the Stock Register page reads one joined query instead of aggregating
+the register for every item. Each StockRegister write applies its
+quantity delta with an F() expression UPDATE, so concurrent entries for
+the same item cannot lose updates. The values an entry was loaded with
+are remembered on the instance, so edits (including moving an entry to
+another item) apply the difference. rebuild_balances() recomputes every
+row from the register in a fixed number of queries. low_stock_items()
+finds every item at or below its threshold_qty in one query.
+"""
+from django.db import transaction
+from django.db.models import F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def remember_loaded_entry(entry):
+    """Snapshot the fields balances depend on, without touching deferred fields"""
+    entry._loaded_stock = (
+        entry.__dict__.get('item_id'),
+        entry.__dict__.get('inward_qty') or 0,
+        entry.__dict__.get('outward_qty') or 0,
+    )
+    # Month-end snapshots from this date on depend on the entry (see ledger.py)
+    entry._loaded_date = entry.__dict__.get('date')
+
+
+def apply_delta(item_id, inward, outward):
+    from .models import StockBalance
+
+    if not item_id or (not inward and not outward):
+        return
+    StockBalance.objects.get_or_create(item_id=item_id)
+    StockBalance.objects.filter(item_id=item_id).update(
+        inward_qty=F('inward_qty') + inward,
+        outward_qty=F('outward_qty') + outward,
+        available_qty=F('available_qty') + inward - outward,
+    )
+
+
+def refresh_unit_value(item_id):
+    """Take unit_value and last_entry_date from the item's latest register entry"""
+    from .models import StockBalance, StockRegister
+
+    latest = StockRegister.objects.filter(item_id=item_id).order_by('-date', '-created_at', '-pk')
+    latest = latest.values('unit_value', 'date').first() or {'unit_value': None, 'date': None}
+    StockBalance.objects.filter(item_id=item_id).update(
+        unit_value=latest['unit_value'], last_entry_date=latest['date'],
+    )
+
+
+def entry_saved(entry, created):
+    old_item_id, old_inward, old_outward = (None, 0, 0) if created else entry._loaded_stock
+    with transaction.atomic():
+        if old_item_id and old_item_id != entry.item_id:
+            apply_delta(old_item_id, -old_inward, -old_outward)
+            refresh_unit_value(old_item_id)
+            old_inward = old_outward = 0
+        apply_delta(entry.item_id, entry.inward_qty - old_inward, entry.outward_qty - old_outward)
+        refresh_unit_value(entry.item_id)
+    remember_loaded_entry(entry)
+
+
+def entry_deleted(entry):
+    item_id, inward, outward = entry._loaded_stock
+    with transaction.atomic():
+        apply_delta(item_id, -inward, -outward)
+        refresh_unit_value(item_id)
+
+
+def rebuild_balances(register_model, balance_model):
+    """
+    Replace every StockBalance row with totals recomputed from the register.
+    Takes the models as arguments so migrations can pass historical ones.
+    """
+    latest = register_model.objects.filter(item=OuterRef('item')).order_by('-date', '-created_at', '-pk')
+    rows = (
+        register_model.objects.order_by().values('item')
+        .annotate(
+            inward=Sum('inward_qty'),
+            outward=Sum('outward_qty'),
+            latest_value=Subquery(latest.values('unit_value')[:1]),
+            latest_date=Subquery(latest.values('date')[:1]),
+        )
+    )
+    balances = [
+        balance_model(
+            item_id=row['item'],
+            inward_qty=row['inward'] or 0,
+            outward_qty=row['outward'] or 0,
+            available_qty=(row['inward'] or 0) - (row['outward'] or 0),
+            unit_value=row['latest_value'],
+            last_entry_date=row['latest_date'],
+        )
+        for row in rows
+    ]
+    with transaction.atomic():
+        balance_model.objects.all().delete()
+        balance_model.objects.bulk_create(balances, batch_size=500)
+    return len(balances)
+
+
+def low_stock_items(item_ids=None):
+    """Items whose available stock is at or below their threshold_qty (one query)"""
+    from items.models import Item
+
+    items = Item.objects.filter(threshold_qty__isnull=False)
+    if item_ids is not None:
+        items = items.filter(pk__in=item_ids)
+    return (
+        items.annotate(available_stock=Coalesce('stock_balance__available_qty', Value(0)))
+        .filter(available_stock__lte=F('threshold_qty'))
+        .order_by('name')
+    )
+
+
+def low_stock_alerts(item_ids=None):
+    """Alert messages for low_stock_items()"""
+    return [
+        f'Low stock: {item.name} has {item.available_stock} left (threshold {item.threshold_qty})'
+        for item in low_stock_items(item_ids)
+    ]
@@ -1,3 +1,217 @@
-from django.test import TestCase
+from datetime import date
+from decimal import Decimal
 
-# Create your tests here.
+from django.core.exceptions import ValidationError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from customer.models import Customer
+from delivery.models import DeliveryChallan, DeliveryChallanItem
+from items.models import Item, Make, Type, Unit
+
+from .ledger import build_snapshots, stock_as_of, stock_ledger, stock_valuation
+from .models import Requisition, StockBalance, StockRegister, StockSnapshot
+from .stock import low_stock_items, rebuild_balances
+
+
+class StockBalanceTests(TestCase):
+    def setUp(self):
+        parts = {
+            'make': Make.objects.create(value='Generic'),
+            'type': Type.objects.create(value='Spare'),
+            'unit': Unit.objects.create(value='Nos'),
+        }
+        self.item = Item.objects.create(name='Door Sensor', model='DS-1', capacity='1', **parts)
+        self.other = Item.objects.create(name='Brake Pad', model='BP-1', capacity='1', **parts)
+
+    def entry(self, transaction_type, qty, item=None, unit_value='10.00', **kwargs):
+        return StockRegister.objects.create(
+            date=kwargs.pop('date', date(2026, 1, 1)), item=item or self.item, transaction_type=transaction_type,
+            inward_qty=qty if transaction_type == 'INWARD' else 0,
+            outward_qty=qty if transaction_type == 'OUTWARD' else 0,
+            unit_value=Decimal(unit_value), **kwargs,
+        )
+
+    def balance(self, item=None):
+        return StockBalance.objects.get(item=item or self.item)
+
+    def test_entries_update_balance(self):
+        self.entry('INWARD', 10)
+        outward = self.entry('OUTWARD', 3, unit_value='12.00', date=date(2026, 1, 2))
+        balance = self.balance()
+        self.assertEqual((balance.inward_qty, balance.outward_qty, balance.available_qty), (10, 3, 7))
+        self.assertEqual(balance.unit_value, Decimal('12.00'))
+        self.assertEqual(StockRegister.get_available_stock(self.item), 7)
+
+        outward.outward_qty = 5
+        outward.save()
+        self.assertEqual(self.balance().available_qty, 5)
+
+        outward.delete()
+        balance = self.balance()
+        self.assertEqual(balance.available_qty, 10)
+        self.assertEqual(balance.unit_value, Decimal('10.00'))
+
+    def test_moving_entry_to_another_item(self):
+        entry = self.entry('INWARD', 4)
+        entry = StockRegister.objects.get(pk=entry.pk)
+        entry.item = self.other
+        entry.save()
+        self.assertEqual(self.balance().available_qty, 0)
+        self.assertEqual(self.balance(self.other).available_qty, 4)
+
+    def test_rebuild(self):
+        self.entry('INWARD', 8)
+        self.entry('OUTWARD', 2)
+        StockBalance.objects.all().delete()
+        self.assertEqual(rebuild_balances(StockRegister, StockBalance), 1)
+        self.assertEqual(self.balance().available_qty, 6)
+
+    def test_deleting_item_removes_balance(self):
+        self.entry('INWARD', 1)
+        self.item.delete()
+        self.assertFalse(StockBalance.objects.exists())
+
+
+class StockLedgerTests(TestCase):
+    def setUp(self):
+        parts = {
+            'make': Make.objects.create(value='Generic'),
+            'type': Type.objects.create(value='Spare'),
+            'unit': Unit.objects.create(value='Nos'),
+        }
+        self.item = Item.objects.create(name='Door Sensor', model='DS-1', capacity='1', **parts)
+        self.entry(date(2026, 1, 5), inward=10, unit_value='10.00')
+        self.entry(date(2026, 1, 20), outward=4)
+        self.entry(date(2026, 2, 10), inward=5, unit_value='12.00')
+        self.entry(date(2026, 3, 3), outward=6)
+
+    def entry(self, day, inward=0, outward=0, unit_value='10.00'):
+        return StockRegister.objects.create(
+            date=day, item=self.item, transaction_type='INWARD' if inward else 'OUTWARD',
+            inward_qty=inward, outward_qty=outward, unit_value=Decimal(unit_value),
+        )
+
+    def available(self, day):
+        return stock_as_of(day)[self.item.pk].available_qty
+
+    def test_ledger_running_balances(self):
+        ledger = stock_ledger(self.item.pk)
+        self.assertEqual([entry.balance for entry in ledger.entries], [10, 6, 11, 5])
+
+        ledger = stock_ledger(self.item.pk, start=date(2026, 2, 1), end=date(2026, 2, 28))
+        self.assertEqual(ledger.opening, 6)
+        self.assertEqual([entry.balance for entry in ledger.entries], [11])
+        self.assertEqual(ledger.closing, 11)
+
+    def test_as_of_matches_with_and_without_snapshots(self):
+        expected = {day: self.available(day) for day in (date(2026, 1, 31), date(2026, 2, 15), date(2026, 3, 31))}
+        self.assertEqual(list(expected.values()), [6, 11, 5])
+
+        self.assertEqual(build_snapshots(through=date(2026, 3, 15)), (2, 2))
+        self.assertEqual(
+            list(StockSnapshot.objects.values_list('period_end', 'available_qty')),
+            [(date(2026, 1, 31), 6), (date(2026, 2, 28), 11)],
+        )
+        self.assertEqual({day: self.available(day) for day in expected}, expected)
+
+    def test_backdated_entry_invalidates_later_snapshots(self):
+        build_snapshots(through=date(2026, 3, 15))
+        self.entry(date(2026, 2, 1), inward=3)
+        self.assertEqual(list(StockSnapshot.objects.values_list('period_end', flat=True)), [date(2026, 1, 31)])
+        self.assertEqual(self.available(date(2026, 2, 28)), 14)
+
+        build_snapshots(through=date(2026, 3, 15))
+        self.assertEqual(StockSnapshot.objects.get(period_end=date(2026, 2, 28)).available_qty, 14)
+
+    def test_valuation_uses_latest_unit_value(self):
+        valuation = stock_valuation(date(2026, 1, 31))
+        self.assertEqual((valuation.rows[0].quantity, valuation.total_value), (6, Decimal('60.00')))
+        valuation = stock_valuation(date(2026, 2, 28))
+        self.assertEqual((valuation.rows[0].quantity, valuation.total_value), (11, Decimal('132.00')))
+
+    def test_reports_require_login(self):
+        for name in ('stock_register', 'stock_ledger', 'stock_valuation'):
+            response = self.client.get(reverse(name))
+            self.assertEqual(response.status_code, 302, name)
+
+
+@override_settings(STOCK_POSTING_FROM='2026-01-01')
+class StockPostingTests(TestCase):
+    def setUp(self):
+        parts = {
+            'make': Make.objects.create(value='Generic'),
+            'type': Type.objects.create(value='Spare'),
+            'unit': Unit.objects.create(value='Nos'),
+        }
+        self.item = Item.objects.create(name='Door Sensor', model='DS-1', capacity='1', threshold_qty=3, **parts)
+        StockRegister.objects.create(
+            date=date(2026, 1, 1), item=self.item, transaction_type='INWARD', inward_qty=10, unit_value=Decimal('25.00'),
+        )
+
+    def available(self):
+        return StockRegister.get_available_stock(self.item)
+
+    def test_approval_posts_and_withdraws_outward_entry(self):
+        requisition = Requisition.objects.create(date=date(2026, 2, 1), item=self.item, qty=4)
+        self.assertEqual(self.available(), 10)
+
+        requisition.approve_for = 'APPROVED'
+        requisition.save()
+        entry = requisition.stock_entry
+        self.assertEqual((entry.transaction_type, entry.outward_qty, entry.unit_value), ('OUTWARD', 4, Decimal('25.00')))
+        self.assertEqual(self.available(), 6)
+
+        requisition.qty = 6
+        requisition.save()
+        self.assertEqual((StockRegister.objects.count(), self.available()), (2, 4))
+
+        requisition.approve_for = 'REJECTED'
+        requisition.save()
+        self.assertEqual(self.available(), 10)
+
+    def test_approval_beyond_available_stock_is_refused(self):
+        requisition = Requisition.objects.create(date=date(2026, 2, 1), item=self.item, qty=11)
+        requisition.approve_for = 'APPROVED'
+        with self.assertRaises(ValidationError):
+            requisition.save()
+        self.assertEqual(Requisition.objects.get(pk=requisition.pk).approve_for, 'PENDING')
+        self.assertEqual(self.available(), 10)
+
+        with override_settings(STOCK_ALLOW_NEGATIVE=True):
+            requisition.save()
+        self.assertEqual(self.available(), -1)
+
+    @override_settings(STOCK_POSTING_FROM=None)
+    def test_nothing_is_posted_without_a_go_live_date(self):
+        Requisition.objects.create(date=date(2026, 2, 1), item=self.item, qty=4, approve_for='APPROVED')
+        self.assertEqual(self.available(), 10)
+
+    @override_settings(STOCK_POSTING_FROM='2026-03-01')
+    def test_documents_before_cutover_are_not_posted(self):
+        Requisition.objects.create(date=date(2026, 2, 1), item=self.item, qty=4, approve_for='APPROVED')
+        self.assertEqual(self.available(), 10)
+
+    def test_challan_lines_post_outward_entries(self):
+        customer = Customer.objects.create(
+            site_name='Challan Site', site_address='1 Test Street', email='challan@example.com', phone='9123456790',
+        )
+        challan = DeliveryChallan.objects.create(customer=customer, date=date(2026, 2, 1))
+        line = DeliveryChallanItem.objects.create(
+            challan=challan, item=self.item, rate=Decimal('30.00'), qty=Decimal('8'), tax=Decimal('0'),
+        )
+        self.assertEqual(self.available(), 2)
+        self.assertEqual([item.pk for item in low_stock_items()], [self.item.pk])
+
+        challan.date = date(2026, 2, 5)
+        challan.save()
+        self.assertEqual(StockRegister.objects.get(challan_item=line).date, date(2026, 2, 5))
+
+        with self.assertRaises(ValidationError):
+            DeliveryChallanItem.objects.create(
+                challan=challan, item=self.item, rate=Decimal('30.00'), qty=Decimal('3'), tax=Decimal('0'),
+            )
+        self.assertEqual(challan.items.count(), 1)
+
+        challan.delete()
+        self.assertEqual(self.available(), 10)
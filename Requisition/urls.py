@@ -12,6 +12,8 @@ urlpatterns = [
     
     # Stock Register
     path('stock-register/', views.stock_register_view, name='stock_register'),
+    path('stock-ledger/', views.stock_ledger_view, name='stock_ledger'),
+    path('stock-valuation/', views.stock_valuation_view, name='stock_valuation'),
 ]
 
 
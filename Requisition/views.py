@@ -9,9 +9,12 @@ from django.contrib import messages
 from django.core.exceptions import ValidationError
 from django.urls import reverse
 from django.contrib.auth.decorators import login_required
-from django.db.models import Sum, Q
+from django.db.models import F, Q, Sum, Value
+from django.db.models.functions import Coalesce
 from django.views.decorators.http import require_http_methods
+from .ledger import stock_ledger, stock_valuation
 from .models import Requisition, StockRegister
+from .stock import low_stock_alerts
 from items.models import Item
 from customer.models import Customer
 from amc.models import AMC
@@ -19,9 +22,6 @@ from authentication.models import CustomUser
 
 def add_requisition_custom(request):
     """Custom add requisition page"""
-    items = Item.objects.all()
-    customers = Customer.objects.all()
-    amcs = AMC.objects.all()
     employees = CustomUser.objects.filter(groups__name='employee')
 
     if request.method == 'POST':
@@ -61,14 +61,18 @@ def add_requisition_custom(request):
                 status=data.get('status', 'OPEN'),
                 approve_for=data.get('approve_for', 'PENDING')
             )
-            return JsonResponse({'success': True, 'message': 'Requisition created successfully'})
+            return JsonResponse({
+                'success': True,
+                'message': 'Requisition created successfully',
+                'low_stock': low_stock_alerts([item.pk]),
+            })
+        except ValidationError as e:
+            # e.g. approving more than the available stock
+            return JsonResponse({'success': False, 'error': ' '.join(e.messages)})
         except Exception as e:
             return JsonResponse({'success': False, 'error': str(e)})
 
     return render(request, 'requisition/add_requisition_custom.html', {
-        'items': items,
-        'customers': customers,
-        'amcs': amcs,
         'employees': employees,
         'is_edit': False
     })
@@ -81,9 +85,6 @@ def edit_requisition_custom(request, reference_id):
         messages.error(request, 'Requisition not found')
         return render(request, '404.html')
 
-    items = Item.objects.all()
-    customers = Customer.objects.all()
-    amcs = AMC.objects.all()
     employees = CustomUser.objects.filter(groups__name='employee')
 
     if request.method == 'POST':
@@ -122,15 +123,18 @@ def edit_requisition_custom(request, reference_id):
             requisition.approve_for = data.get('approve_for', 'PENDING')
             requisition.save()
 
-            return JsonResponse({'success': True, 'message': 'Requisition updated successfully'})
+            return JsonResponse({
+                'success': True,
+                'message': 'Requisition updated successfully',
+                'low_stock': low_stock_alerts([item.pk]),
+            })
+        except ValidationError as e:
+            return JsonResponse({'success': False, 'error': ' '.join(e.messages)})
         except Exception as e:
             return JsonResponse({'success': False, 'error': str(e)})
 
     return render(request, 'requisition/add_requisition_custom.html', {
         'requisition': requisition,
-        'items': items,
-        'customers': customers,
-        'amcs': amcs,
         'employees': employees,
         'is_edit': True
     })
@@ -179,50 +183,86 @@ def get_customers(request):
 def stock_register_view(request):
     """Display Stock Register with calculated available stock"""
     
-    # Get all items
-    items = Item.objects.all()
-    
-    # Prepare stock data for each item
+    # One query: items joined to their materialized StockBalance rows
+    items = (
+        Item.objects.select_related('unit', 'type')
+        .annotate(
+            inward_stock=Coalesce('stock_balance__inward_qty', Value(0)),
+            outward_stock=Coalesce('stock_balance__outward_qty', Value(0)),
+            available_stock=Coalesce('stock_balance__available_qty', Value(0)),
+            latest_unit_value=F('stock_balance__unit_value'),
+        )
+    )
+
     stock_data = []
-    
     for idx, item in enumerate(items, start=1):
-        # Calculate total inward and outward for this item
-        stock_entries = StockRegister.objects.filter(item=item)
-        
-        total_inward = stock_entries.aggregate(
-            total=Sum('inward_qty')
-        )['total'] or 0
-        
-        total_outward = stock_entries.aggregate(
-            total=Sum('outward_qty')
-        )['total'] or 0
-        
-        available_stock = total_inward - total_outward
-        
-        # Calculate total value (using latest unit value if available)
-        latest_entry = stock_entries.order_by('-date').first()
-        unit_value = latest_entry.unit_value if latest_entry else item.sale_price
-        
         stock_data.append({
             'no': idx,
             'item': item,
             'unit': item.unit.value if item.unit else 'N/A',
             'description': item.description or '-',
             'type': item.type.value if item.type else 'N/A',
-            'value': unit_value,
-            'inward_stock': total_inward,
-            'outward_stock': total_outward,
-            'available_stock': available_stock,
+            # Unit value of the latest register entry, else the sale price
+            'value': item.latest_unit_value if item.latest_unit_value is not None else item.sale_price,
+            'inward_stock': item.inward_stock,
+            'outward_stock': item.outward_stock,
+            'available_stock': item.available_stock,
+            'low_stock': item.threshold_qty is not None and item.available_stock <= item.threshold_qty,
         })
     
     context = {
         'stock_data': stock_data,
+        'low_stock_count': sum(1 for row in stock_data if row['low_stock']),
         'title': 'Stock Register'
     }
     
     return render(request, 'requisition/stock_register.html', context)
 
 
+def parse_report_date(value, default=None):
+    """Date from a YYYY-MM-DD query parameter, else the default"""
+    try:
+        return date.fromisoformat(value) if value else default
+    except ValueError:
+        return default
+
+
+@login_required
+def stock_ledger_view(request):
+    """Register entries of one item with opening and running balances"""
+    item_id = request.GET.get('item', '')
+    start = parse_report_date(request.GET.get('from'))
+    end = parse_report_date(request.GET.get('to'))
+
+    ledger = None
+    selected_item = None
+    if item_id.isdigit():
+        selected_item = Item.objects.filter(pk=item_id).select_related('unit').first()
+    if selected_item:
+        ledger = stock_ledger(selected_item.pk, start=start, end=end)
+
+    context = {
+        'selected_item': selected_item,
+        'ledger': ledger,
+        'start': start,
+        'end': end,
+        'title': 'Stock Ledger',
+    }
+    return render(request, 'requisition/stock_ledger.html', context)
+
+
+@login_required
+def stock_valuation_view(request):
+    """Quantity and value of stock held at the end of a given date"""
+    as_of = parse_report_date(request.GET.get('as_of'), default=date.today())
+    context = {
+        'valuation': stock_valuation(as_of),
+        'as_of': as_of,
+        'title': 'Stock Valuation',
+    }
+    return render(request, 'requisition/stock_valuation.html', context)
+
+
 def bulk_import_view(request):
     """View for bulk importing requisitions from CSV/Excel"""
     if request.method == 'POST':
@@ -1,4 +1,5 @@
 from django.utils import timezone
+from home.caching import invalidate_namespaces
 from .models import RoutineService
 
 def update_overdue_routine_services():
@@ -9,7 +10,7 @@ def update_overdue_routine_services():
     today = timezone.now().date()
     
     # Update RoutineService (uses 'pending')
-    RoutineService.objects.filter(
+    updated = RoutineService.objects.filter(
         service_date__lt=today,
         status='pending'
     ).update(status='overdue')
@@ -17,9 +18,13 @@ def update_overdue_routine_services():
     # Update AMCRoutineService if available (uses 'due')
     try:
         from amc.models import AMCRoutineService
-        AMCRoutineService.objects.filter(
+        updated += AMCRoutineService.objects.filter(
             service_date__lt=today,
             status='due'
         ).update(status='overdue')
     except ImportError:
         pass
+
+    # Queryset updates send no signals; cached service listings must not keep 'due'
+    if updated:
+        invalidate_namespaces('routine_services')
@@ -0,0 +1,134 @@
+# amc/certificates.py
+"""
+Bulk routine service certificate generation.
+
+Services are selected with one query (relations preloaded). The admin's
+bulk download page queues build_certificate_bundle (amc/tasks.py), which
+renders in the task worker's own process and stores the file for the page
+to fetch. Only the bulk_certificates command renders across a process
+pool: forking a web worker mid-request is not safe. The pool workers never
+touch the database; each one receives pickled service instances with
+their related AMC, customer and employee already attached.
+"""
+import multiprocessing
+import os
+import uuid
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connections
+from django.utils import timezone
+
+from .pdf import routine_service_certificate
+
+# Below this many certificates a process pool costs more than it saves
+PARALLEL_THRESHOLD = 20
+CHUNK_SIZE = 25
+BUNDLE_DIR = 'amc/certificate_bundles'
+# Downloaded bundles older than this are deleted when the next one is stored
+BUNDLE_RETENTION = timedelta(days=1)
+
+
+def get_max_certificates():
+    return getattr(settings, 'BULK_CERTIFICATE_MAX', 2000)
+
+
+def get_render_workers():
+    return getattr(settings, 'BULK_CERTIFICATE_WORKERS', min(4, os.cpu_count() or 1))
+
+
+def filter_routine_services(month=None, route=None, customer=None, amc=None):
+    """
+    AMC routine services matching the bulk certificate filters.
+    month is a (year, month) tuple; route, customer and amc are ids.
+    """
+    queryset = routine_service_certificate.get_queryset()
+    if month:
+        year, month_number = month
+        queryset = queryset.filter(service_date__year=year, service_date__month=month_number)
+    if route:
+        queryset = queryset.filter(amc__customer__routes_id=route)
+    if customer:
+        queryset = queryset.filter(amc__customer_id=customer)
+    if amc:
+        queryset = queryset.filter(amc_id=amc)
+    return queryset.order_by('service_date', 'amc__reference_id', 'id')
+
+
+def _render_chunk(services):
+    """Process pool worker: render a chunk of certificates to (filename, bytes)"""
+    return [
+        (routine_service_certificate.get_filename(service), pdf_bytes)
+        for service, pdf_bytes in routine_service_certificate.render_many(services)
+    ]
+
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def render_certificates(services, workers=1):
+    """
+    Render one certificate per service, across workers processes for larger
+    batches (management commands only). Returns a list of (filename,
+    pdf_bytes) in the order of services.
+    """
+    services = list(services)
+    if workers <= 1 or len(services) < PARALLEL_THRESHOLD:
+        return _render_chunk(services)
+
+    # Forked workers must not inherit open database sockets. Inside a
+    # transaction the connection has to stay open; workers never query anyway.
+    if not any(conn.in_atomic_block for conn in connections.all()):
+        connections.close_all()
+    context = multiprocessing.get_context('fork') if 'fork' in multiprocessing.get_all_start_methods() else None
+    results = []
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+        for chunk_result in executor.map(_render_chunk, _chunks(services, CHUNK_SIZE)):
+            results.extend(chunk_result)
+    return results
+
+
+def build_certificates_zip(services, workers=1):
+    """ZIP archive containing one certificate PDF per service"""
+    buffer = BytesIO()
+    used_names = set()
+    services = list(services)
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for service, (filename, pdf_bytes) in zip(services, render_certificates(services, workers)):
+            # Two visits for the same AMC on the same day share a filename
+            if filename in used_names:
+                base, ext = os.path.splitext(filename)
+                filename = f'{base}_{service.pk}{ext}'
+            used_names.add(filename)
+            archive.writestr(filename, pdf_bytes)
+    return buffer.getvalue()
+
+
+def build_certificates_pdf(services):
+    """Single PDF containing every certificate, one after another"""
+    return routine_service_certificate.render_merged(services)
+
+
+def save_bundle(content, extension):
+    """Store a rendered bundle for download; returns its storage name"""
+    prune_bundles()
+    return default_storage.save(f'{BUNDLE_DIR}/{uuid.uuid4().hex}.{extension}', ContentFile(content))
+
+
+def prune_bundles():
+    cutoff = timezone.now() - BUNDLE_RETENTION
+    try:
+        _, names = default_storage.listdir(BUNDLE_DIR)
+    except FileNotFoundError:
+        return
+    for name in names:
+        path = f'{BUNDLE_DIR}/{name}'
+        if default_storage.get_modified_time(path) < cutoff:
+            default_storage.delete(path)
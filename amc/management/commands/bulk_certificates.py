@@ -0,0 +1,50 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from amc.certificates import build_certificates_pdf, build_certificates_zip, filter_routine_services, get_render_workers
+
+
+class Command(BaseCommand):
+    help = 'Generate routine service certificates in bulk as a ZIP of PDFs or one merged PDF'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--month', type=str, help='Service month in YYYY-MM format')
+        parser.add_argument('--route', type=int, help='Customer route id')
+        parser.add_argument('--customer', type=int, help='Customer id')
+        parser.add_argument('--amc', type=int, help='AMC id')
+        parser.add_argument('--format', choices=['zip', 'pdf'], default='zip', help='Output format (default: zip)')
+        parser.add_argument('--workers', type=int, help='Render processes (default: BULK_CERTIFICATE_WORKERS)')
+        parser.add_argument('--output', type=str, required=True, help='Path of the file to write')
+
+    def handle(self, *args, **options):
+        month = None
+        if options['month']:
+            try:
+                parsed = datetime.strptime(options['month'], '%Y-%m')
+            except ValueError:
+                raise CommandError('--month must be in YYYY-MM format')
+            month = (parsed.year, parsed.month)
+
+        if not any([month, options['route'], options['customer'], options['amc']]):
+            raise CommandError('Give at least one of --month, --route, --customer or --amc')
+
+        services = list(filter_routine_services(
+            month=month,
+            route=options['route'],
+            customer=options['customer'],
+            amc=options['amc'],
+        ))
+        if not services:
+            self.stdout.write(self.style.WARNING('No routine services match the given filters'))
+            return
+
+        self.stdout.write(f'Rendering {len(services)} certificate(s)...')
+        if options['format'] == 'pdf':
+            content = build_certificates_pdf(services)
+        else:
+            content = build_certificates_zip(services, workers=options['workers'] or get_render_workers())
+
+        with open(options['output'], 'wb') as f:
+            f.write(content)
+        self.stdout.write(self.style.SUCCESS(f'Wrote {len(services)} certificate(s) to {options["output"]}'))
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:03
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('amc', '0009_bulkimportamc'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BulkCertificateAMCRoutineService',
+            fields=[
+            ],
+            options={
+                'verbose_name': 'Bulk Certificates',
+                'verbose_name_plural': 'Bulk Certificates',
+                'proxy': True,
+                'indexes': [],
+                'constraints': [],
+            },
+            bases=('amc.amcroutineservice',),
+        ),
+    ]
@@ -13,6 +13,8 @@ import re
 from customer.models import Customer
 from items.models import Item
 from django.conf import settings
+from home.exports import ExportQuerysetMixin
+from home.filters import TypeaheadFilterMixin
 
 
 # ---------- Dropdown Snippets ----------
@@ -127,7 +129,18 @@ class AMC(models.Model):
         if self.start_date and not self.end_date:
             self.end_date = self.start_date + timedelta(days=365)
 
-        # Totals
+        self.calculate_totals()
+        self.status = self.get_period_status()
+
+        super().save(*args, **kwargs)
+        
+        # Auto-generate routine services if no_of_services is set and dates are available
+        # This ensures services are created automatically based on AMC configuration
+        if self.no_of_services and self.start_date and self.end_date:
+            self._auto_generate_routine_services()
+
+    def calculate_totals(self):
+        """Set total, contract_amount and amount_due from price, lifts and GST"""
         price = Decimal(str(self.price or 0))
         lifts = Decimal(str(self.no_of_lifts or 0))
         gst = Decimal(str(self.gst_percentage or 0))
@@ -141,20 +154,14 @@ class AMC(models.Model):
         self.contract_amount = self.total
         self.amount_due = self.contract_amount - total_paid
 
-        today = timezone.now().date()
+    def get_period_status(self, today=None):
+        """Status implied by the contract dates"""
+        today = today or timezone.now().date()
         if self.end_date and today > self.end_date:
-            self.status = "expired"
+            return "expired"
         elif self.start_date > today:
-            self.status = "on_hold"
-        else:
-            self.status = "active"
-
-        super().save(*args, **kwargs)
-        
-        # Auto-generate routine services if no_of_services is set and dates are available
-        # This ensures services are created automatically based on AMC configuration
-        if self.no_of_services and self.start_date and self.end_date:
-            self._auto_generate_routine_services()
+            return "on_hold"
+        return "active"
 
     def _auto_generate_routine_services(self):
         """Auto-generate routine services based on AMC dates and number of services"""
@@ -463,7 +470,7 @@ class PaymentTermsViewSet(SnippetViewSet):
     list_display = ("name",)
 
 
-class AMCViewSet(SnippetViewSet):
+class AMCViewSet(TypeaheadFilterMixin, SnippetViewSet):
     model = AMC
     icon = "calendar"
     menu_label = "All AMCs"
@@ -552,9 +559,12 @@ class AMCViewSet(SnippetViewSet):
         "is_generate_contract",
         "created",
     )
+    typeahead_filters = {"customer": "customers"}
 
     # Custom IndexView to restrict export to superusers
-    class RestrictedIndexView(IndexView):
+    class RestrictedIndexView(ExportQuerysetMixin, IndexView):
+        export_select_related = ("customer", "amc_type", "payment_terms", "amc_service_item")
+
         def dispatch(self, request, *args, **kwargs):
             """Override dispatch to check export permissions"""
             # Check if this is an export request
@@ -616,6 +626,34 @@ class BulkImportAMCViewSet(SnippetViewSet):
     index_view_class = BulkImportIndexView
 
 
+# ---------- Proxy model for Bulk Certificates ----------
+class BulkCertificateAMCRoutineService(AMCRoutineService):
+    """Proxy model used only for menu structure - redirects to bulk certificate view"""
+    class Meta:
+        proxy = True
+        verbose_name = "Bulk Certificates"
+        verbose_name_plural = "Bulk Certificates"
+
+
+class BulkCertificateViewSet(SnippetViewSet):
+    """Custom ViewSet for bulk routine service certificate downloads"""
+    model = BulkCertificateAMCRoutineService
+    menu_label = "Bulk Certificates"
+    icon = "doc-full"
+    menu_order = 210
+    add_view_enabled = False
+    edit_view_enabled = False
+    delete_view_enabled = False
+    inspect_view_enabled = False
+
+    class BulkCertificateIndexView(IndexView):
+        def dispatch(self, request, *args, **kwargs):
+            from amc import views
+            return views.bulk_routine_service_certificates(request)
+
+    index_view_class = BulkCertificateIndexView
+
+
 class AMCExpiringThisMonth(AMC):
     class Meta:
         proxy = True
@@ -884,6 +922,7 @@ class AMCManagementGroup(SnippetViewSetGroup):
     items = (
         AMCViewSet,
         BulkImportAMCViewSet,
+        BulkCertificateViewSet,
         AMCExpiringThisMonthViewSet,  # Visible in menu
         AMCExpiringLastMonthViewSet,  # Visible in menu
         AMCExpiringNextMonthViewSet,  # Hidden from menu via wagtail_hooks
@@ -0,0 +1,55 @@
+# amc/pdf.py
+from home.pdf import Details, Lines, PDFDocument, Section, Signature
+
+from .models import AMCRoutineService
+
+
+class RoutineServiceCertificate(PDFDocument):
+    """Certificate of a routine service visit under an AMC"""
+    title = "CERTIFICATE OF ROUTINE SERVICE VISIT"
+
+    def get_queryset(self):
+        return AMCRoutineService.objects.select_related('amc__customer', 'employee_assign')
+
+    def get_filename(self, service):
+        amc_no = service.amc.reference_id if service.amc else 'N/A'
+        return f'Routine_Service_Certificate_{amc_no}_{service.service_date.strftime("%Y%m%d")}.pdf'
+
+    def get_layout(self, service):
+        amc = service.amc
+        customer = amc.customer if amc else None
+        employee = service.employee_assign
+        if employee:
+            assign_to = f"{employee.first_name} {employee.last_name}".strip() or employee.username
+        else:
+            assign_to = "Unassigned"
+
+        return [
+            Details([
+                ('AMC No.:', amc.reference_id if amc else 'N/A'),
+                ('Service Date:', service.service_date.strftime('%d/%m/%Y')),
+                ('Service Month:', service.service_date.strftime('%B')),
+            ]),
+            Section("Customer Information"),
+            Details([
+                ('Site Name:', customer.site_name if customer else 'N/A'),
+                ('Site Address:', customer.site_address if customer and customer.site_address else 'N/A'),
+                ('Note:', ''),
+            ]),
+            Section("Service Details"),
+            Lines([
+                ('Assign To', assign_to),
+                ('Technician Remark', ''),
+                ('Service Provided', ''),
+                ('Customer Remark', ''),
+                ('Service', ''),
+                ('Attend Date & Time', ''),
+                ('Service Status', service.get_status_display() if service.status != 'due' else 'Due'),
+            ]),
+            Section("Signatures"),
+            Signature("Customer Signature"),
+            Signature("Technician Signature"),
+        ]
+
+
+routine_service_certificate = RoutineServiceCertificate()
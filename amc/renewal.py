@@ -0,0 +1,109 @@
+# amc/renewal.py
+"""
+Batch renewal of expiring AMCs.
+
+Renewal follows the admin "Renew AMC" flow: the contract is renewed in
+place with the new period starting the day after the old end date and
+running for a year. The sweep selects every contract expiring in a window
+with one query, computes the new period, totals and status in memory,
+writes them back with one bulk_update, and raises an "AMC Renewal
+Quotation" per renewed contract with one bulk_create so sales can follow
+up on pricing. A renewed contract leaves the window, so re-running the
+sweep over the same window renews nothing twice.
+"""
+from dataclasses import dataclass, field
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from home.caching import invalidate_namespaces
+
+from .models import AMC
+
+RENEWAL_TERM = timedelta(days=365)
+RENEWAL_QUOTATION_TYPE = 'AMC Renewal Quotation'
+
+
+@dataclass
+class RenewalResult:
+    label: str
+    renewed: list = field(default_factory=list)  # (reference_id, old_end_date, new_end_date)
+    quotations: int = 0
+
+
+def renewal_period(end_date):
+    """(start_date, end_date) of the contract period following end_date"""
+    start_date = end_date + timedelta(days=1)
+    return start_date, start_date + RENEWAL_TERM
+
+
+def expiring_amcs(window_start, window_end):
+    return (
+        AMC.objects.filter(end_date__range=(window_start, window_end))
+        .exclude(status='cancelled')
+        .select_related('customer')
+        .order_by('end_date', 'pk')
+    )
+
+
+def next_quotation_numbers(count):
+    """Quotation reference ids continuing the sequence used by Quotation.save()"""
+    from Quotation.models import Quotation
+
+    prefix = Quotation.REFERENCE_PREFIX
+    last = Quotation.objects.order_by('id').only('reference_id').last()
+    last_id = int(last.reference_id.replace(prefix, '')) if last and last.reference_id.startswith(prefix) else 1000
+    return [f'{prefix}{last_id + offset}' for offset in range(1, count + 1)]
+
+
+def build_renewal_quotations(contracts):
+    """Unsaved renewal quotations for renewed contracts that have a customer"""
+    from Quotation.models import Quotation
+
+    contracts = [contract for contract in contracts if contract.customer_id]
+    references = next_quotation_numbers(len(contracts))
+    return [
+        Quotation(
+            reference_id=reference_id,
+            customer_id=contract.customer_id,
+            amc_type_id=contract.amc_type_id,
+            type=RENEWAL_QUOTATION_TYPE,
+            remark=f'Renewal of {contract.reference_id} for {contract.start_date:%d-%m-%Y} to {contract.end_date:%d-%m-%Y}',
+        )
+        for reference_id, contract in zip(references, contracts)
+    ]
+
+
+def renew_expiring_amcs(window_start, window_end, dry_run=False, create_quotations=True):
+    """Renew every AMC whose end date falls in the window; returns a RenewalResult"""
+    from Quotation.models import Quotation
+
+    today = timezone.now().date()
+    result = RenewalResult(label='AMC')
+    with transaction.atomic():
+        queryset = expiring_amcs(window_start, window_end)
+        if not dry_run:
+            queryset = queryset.select_for_update(of=('self',))
+        contracts = list(queryset)
+        for contract in contracts:
+            old_end_date = contract.end_date
+            contract.start_date, contract.end_date = renewal_period(old_end_date)
+            contract.calculate_totals()
+            contract.status = contract.get_period_status(today)
+            result.renewed.append((contract.reference_id, old_end_date, contract.end_date))
+        if dry_run or not contracts:
+            result.quotations = sum(1 for contract in contracts if contract.customer_id) if create_quotations else 0
+            return result
+
+        AMC.objects.bulk_update(
+            contracts,
+            ['start_date', 'end_date', 'total', 'contract_amount', 'amount_due', 'status'],
+            batch_size=500,
+        )
+        if create_quotations:
+            quotations = build_renewal_quotations(contracts)
+            Quotation.objects.bulk_create(quotations, batch_size=500)
+            result.quotations = len(quotations)
+        invalidate_namespaces('amcs', 'quotations')
+    return result
@@ -0,0 +1,29 @@
+import logging
+
+from django_tasks import task
+
+from .certificates import (
+    build_certificates_pdf, build_certificates_zip, filter_routine_services, get_max_certificates, save_bundle,
+)
+
+logger = logging.getLogger(__name__)
+
+
+@task()
+def build_certificate_bundle(user_id, output_format='zip', month=None, route=None, customer=None, amc=None):
+    """
+    Render the bulk download page's certificates into storage.
+    Returns {'path': storage name, 'count': certificates}; user_id is who may download it.
+    """
+    services = list(filter_routine_services(
+        month=tuple(month) if month else None, route=route, customer=customer, amc=amc,
+    )[:get_max_certificates()])
+    try:
+        if output_format == 'pdf':
+            path = save_bundle(build_certificates_pdf(services), 'pdf')
+        else:
+            path = save_bundle(build_certificates_zip(services), 'zip')
+    except Exception as e:
+        logger.error(f"Error generating bulk routine service certificates: {e}", exc_info=True)
+        raise
+    return {'path': path, 'count': len(services)}
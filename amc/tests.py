@@ -1,3 +1,149 @@
-from django.test import TestCase
+import shutil
+import tempfile
+import zipfile
+from datetime import date
+from decimal import Decimal
+from io import BytesIO
 
-# Create your tests here.
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django_tasks.backends.database.models import DBTaskResult
+
+from Quotation.models import Quotation
+from customer.models import Customer, Route
+
+from .certificates import PARALLEL_THRESHOLD, build_certificates_zip, filter_routine_services
+from .models import AMC
+from .renewal import renew_expiring_amcs
+
+
+class BulkCertificateTests(TestCase):
+    def setUp(self):
+        self.route = Route.objects.create(value='North')
+        customer = Customer.objects.create(
+            site_name='Test Site', site_address='1 Test Street', email='site@example.com',
+            phone='9123456780', routes=self.route, job_no='J1',
+        )
+        other = Customer.objects.create(
+            site_name='Other Site', site_address='2 Test Street', email='other@example.com', phone='9123456781', job_no='J2',
+        )
+        self.amc = AMC.objects.create(customer=customer, start_date=date(2026, 1, 1), no_of_services=PARALLEL_THRESHOLD)
+        AMC.objects.create(customer=other, start_date=date(2026, 1, 1), no_of_services=12)
+
+    def test_filters(self):
+        self.assertEqual(filter_routine_services(route=self.route.pk).count(), PARALLEL_THRESHOLD)
+        self.assertEqual(filter_routine_services(month=(2026, 1)).count(), 4)
+
+    def test_zip_rendered_in_parallel_matches_serial(self):
+        services = list(filter_routine_services(amc=self.amc.pk))
+
+        parallel = zipfile.ZipFile(BytesIO(build_certificates_zip(services, workers=2)))
+        serial = zipfile.ZipFile(BytesIO(build_certificates_zip(services, workers=1)))
+
+        self.assertEqual(len(parallel.namelist()), len(services))
+        self.assertEqual(parallel.namelist(), serial.namelist())
+        self.assertTrue(parallel.read(parallel.namelist()[0]).startswith(b'%PDF'))
+
+    def test_download_page_renders_on_the_task_worker(self):
+        from authentication.models import CustomUser
+        from home.benchmarks import session_client
+
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        admin = CustomUser.objects.create_superuser(
+            email='admin@example.com', password='x', first_name='Admin', last_name='User',
+        )
+        client = session_client(admin)
+        url = reverse('bulk_routine_service_certificates')
+
+        with override_settings(MEDIA_ROOT=media_root, SQL_PROFILE_SAMPLE_RATE=0):
+            with self.captureOnCommitCallbacks(execute=True):
+                response = client.get(url, {'download': '1', 'amc': self.amc.pk})
+            self.assertEqual(response.status_code, 302)
+            job_url = response['Location']
+            self.assertContains(client.get(job_url), 'Generating certificates')
+
+            # What db_worker does (it cannot run inside a test transaction on SQLite)
+            db_result = DBTaskResult.objects.get()
+            db_result.claim('test-worker')
+            db_result.set_succeeded(db_result.task.call(*db_result.args_kwargs['args'], **db_result.args_kwargs['kwargs']))
+            self.assertContains(client.get(job_url), f'{PARALLEL_THRESHOLD} certificates ready')
+            response = client.get(job_url + '&fetch=1')
+            archive = zipfile.ZipFile(BytesIO(b''.join(response.streaming_content)))
+            self.assertEqual(len(archive.namelist()), PARALLEL_THRESHOLD)
+
+    def test_non_numeric_filters_are_rejected(self):
+        from authentication.models import CustomUser
+        from home.benchmarks import session_client
+
+        admin = CustomUser.objects.create_superuser(
+            email='admin@example.com', password='x', first_name='Admin', last_name='User',
+        )
+        client = session_client(admin)
+        url = reverse('bulk_routine_service_certificates')
+        with override_settings(SQL_PROFILE_SAMPLE_RATE=0):
+            for params in ({'amc': 'abc'}, {'customer': '\u00b2'}, {'route': '1;2', 'amc': self.amc.pk}):
+                response = client.get(url, {'download': '1', **params})
+                self.assertEqual(response.status_code, 400, params)
+        self.assertFalse(DBTaskResult.objects.exists())
+
+
+class AMCRenewalSweepTests(TestCase):
+    def setUp(self):
+        customer = Customer.objects.create(
+            site_name='Renewal Site', site_address='3 Test Street', email='renew@example.com', phone='9123456782', job_no='J3',
+        )
+        self.expiring = AMC.objects.create(
+            customer=customer, start_date=date(2025, 11, 1), end_date=date(2026, 10, 31), no_of_services=1,
+            is_generate_contract=True, price=Decimal('1000.00'), no_of_lifts=2,
+        )
+        self.later = AMC.objects.create(
+            customer=customer, start_date=date(2026, 6, 1), end_date=date(2027, 5, 31), no_of_services=1,
+        )
+
+    def test_renews_contracts_in_window_and_raises_quotations(self):
+        result = renew_expiring_amcs(date(2026, 10, 1), date(2026, 10, 31))
+        self.assertEqual([row[0] for row in result.renewed], [self.expiring.reference_id])
+        self.assertEqual(result.quotations, 1)
+
+        self.expiring.refresh_from_db()
+        self.assertEqual(self.expiring.start_date, date(2026, 11, 1))
+        self.assertEqual(self.expiring.end_date, date(2027, 11, 1))
+        self.assertEqual(self.expiring.contract_amount, Decimal('2000.00'))
+        quotation = Quotation.objects.get()
+        self.assertEqual(quotation.type, 'AMC Renewal Quotation')
+        self.assertTrue(quotation.reference_id.startswith(Quotation.REFERENCE_PREFIX))
+
+        self.assertFalse(renew_expiring_amcs(date(2026, 10, 1), date(2026, 10, 31)).renewed)
+
+    def test_dry_run_writes_nothing(self):
+        result = renew_expiring_amcs(date(2026, 10, 1), date(2026, 10, 31), dry_run=True)
+        self.assertEqual(len(result.renewed), 1)
+        self.expiring.refresh_from_db()
+        self.assertEqual(self.expiring.end_date, date(2026, 10, 31))
+        self.assertFalse(Quotation.objects.exists())
+
+
+class AMCExportTests(TestCase):
+    def test_export_query_count_does_not_grow_with_rows(self):
+        from django.contrib.messages.storage.fallback import FallbackStorage
+        from django.contrib.sessions.backends.db import SessionStore
+        from django.test import RequestFactory
+
+        from authentication.models import CustomUser
+
+        for index in range(5):
+            customer = Customer.objects.create(
+                site_name=f'Export Site {index}', site_address='4 Test Street', email=f'export{index}@example.com',
+                phone=f'91234000{index}', job_no=f'E{index}',
+            )
+            AMC.objects.create(customer=customer, start_date=date(2026, 1, 1), end_date=date(2026, 12, 31))
+
+        request = RequestFactory().get('/', {'export': 'csv'})
+        request.user = CustomUser.objects.create_superuser(email='export@example.com', password='x', first_name='Ex', last_name='Port')
+        request.session = SessionStore()
+        request._messages = FallbackStorage(request)
+        with self.assertNumQueries(2):
+            response = AMC.snippet_viewset.index_view(request)
+            content = b''.join(response.streaming_content).decode()
+        self.assertIn('Export Site 4', content)
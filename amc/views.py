@@ -1,12 +1,6 @@
 # amc/views.py
 from django.shortcuts import get_object_or_404
-from django.http import HttpResponse, JsonResponse
-from io import BytesIO
-from reportlab.lib.pagesizes import letter
-from reportlab.lib import colors
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, KeepTogether
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
+from django.http import Http404, HttpResponse, JsonResponse
 import logging
 import json
 import csv
@@ -28,6 +22,8 @@ from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
 from django.contrib.auth import get_user_model
 from .serializers import AMCCreateSerializer, AMCListSerializer, AMCRoutineServiceSerializer
+from .pdf import routine_service_certificate
+from home.caching import cached_response
 
 logger = logging.getLogger(__name__)
 
@@ -110,6 +106,7 @@ def customer_form(request, pk):
 # API endpoints for AMC types
 @require_http_methods(["GET", "POST"])
 @csrf_exempt
+@cached_response('lookups', per_user=False)
 def amc_types_list(request):
     """API for listing and creating AMC types"""
     if request.method == 'GET':
@@ -145,6 +142,7 @@ def amc_types_detail(request, amc_type_id):
 # API endpoints for payment terms (stubs - payment terms may be disabled)
 @require_http_methods(["GET", "POST"])
 @csrf_exempt
+@cached_response('lookups', per_user=False)
 def payment_terms_list(request):
     """API for listing payment terms"""
     return JsonResponse([], safe=False)
@@ -185,10 +183,11 @@ def get_next_amc_reference(request):
 # Mobile app API endpoints
 @api_view(['GET'])
 @csrf_exempt
+@cached_response('amcs', 'customers', 'lookups')
 def list_amcs_mobile(request):
     """Mobile API to list AMCs"""
     try:
-        amcs = AMC.objects.select_related('customer', 'amc_type').all()
+        amcs = AMC.objects.select_related('customer', 'amc_type', 'payment_terms').all()
         serializer = AMCListSerializer(amcs, many=True)
         return Response({'amcs': serializer.data})
     except Exception as e:
@@ -221,6 +220,7 @@ def create_amc_mobile(request):
 
 @api_view(['GET'])
 @csrf_exempt
+@cached_response('lookups', per_user=False)
 def list_amc_types_mobile(request):
     """Mobile API to list AMC types"""
     try:
@@ -250,6 +250,7 @@ def create_amc_type_mobile(request):
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 @csrf_exempt
+@cached_response('routine_services', 'amcs', 'customers')
 def get_employee_routine_services(request):
     """
     Mobile API to get routine services assigned to a specific employee/user.
@@ -476,130 +477,123 @@ def export_amc_routine_services_xlsx(request, pk):
 def print_routine_service_certificate(request, pk):
     """Generate and download a PDF certificate for a routine service visit"""
     try:
-        service = get_object_or_404(
-            AMCRoutineService.objects.select_related('amc__customer', 'employee_assign'),
-            pk=pk
-        )
-        
-        amc = service.amc
-        customer = amc.customer
-        
-        # Prepare context data (matching complaint PDF format)
-        context = {
-            'company_name': 'Atom Lifts India Pvt Ltd',
-            'address': 'No.87B, Pillayar Koil Street, Mannurpet, Ambattur Indus Estate, Chennai 50., CHENNAI',
-            'phone': '9600087456',
-            'email': 'admin@atomlifts.com',
-            'amc_no': amc.reference_id if amc else 'N/A',
-            'service_date': service.service_date.strftime('%d/%m/%Y'),
-            'service_month': service.service_date.strftime('%B'),
-            'site_name': customer.site_name if customer else 'N/A',
-            'site_address': customer.site_address if customer and customer.site_address else 'N/A',
-            'assign_to': (
-                f"{service.employee_assign.first_name} {service.employee_assign.last_name}".strip()
-                or service.employee_assign.username
-                if service.employee_assign else "Unassigned"
-            ),
-            'technician_remark': '',
-            'service_provided': '',
-            'customer_remark': '',
-            'service': '',
-            'attend_date_time': '',
-            'service_status': service.get_status_display() if service.status != 'due' else 'Due',
-        }
-        
-        # Build PDF (matching complaint PDF format)
-        buffer = BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=letter, rightMargin=72, leftMargin=72, topMargin=72, bottomMargin=72)
-        styles = getSampleStyleSheet()
-        story = []
-        
-        # Header (matching complaint format)
-        header_style = ParagraphStyle(
-            name='HeaderStyle',
-            parent=styles['Heading1'],
-            fontSize=18,
-            alignment=1  # Center
-        )
-        story.append(Paragraph(context['company_name'], header_style))
-        story.append(Paragraph(context['address'], styles['Normal']))
-        story.append(Paragraph(f"Phone: {context['phone']} | Email: {context['email']}", styles['Normal']))
-        story.append(Spacer(1, 12))
-        
-        # Certificate Title
-        story.append(Paragraph("CERTIFICATE OF ROUTINE SERVICE VISIT", header_style))
-        story.append(Spacer(1, 12))
-        
-        # Service Information (matching complaint format)
-        data = [
-            ['AMC No.:', context['amc_no']],
-            ['Service Date:', context['service_date']],
-            ['Service Month:', context['service_month']],
-        ]
-        table = Table(data, colWidths=[100, 400])
-        table.setStyle(TableStyle([
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black),
-        ]))
-        story.append(table)
-        story.append(Spacer(1, 12))
-        
-        # Customer Information (matching complaint format)
-        story.append(Paragraph("Customer Information", styles['Heading2']))
-        cust_data = [
-            ['Site Name:', context['site_name']],
-            ['Site Address:', context['site_address']],
-            ['Note:', ''],
-        ]
-        cust_table = Table(cust_data, colWidths=[100, 400])
-        cust_table.setStyle(TableStyle([
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black),
-        ]))
-        story.append(cust_table)
-        story.append(Spacer(1, 12))
-        
-        # Service Details (matching complaint format)
-        story.append(Paragraph("Service Details", styles['Heading2']))
-        story.append(Paragraph(f"Assign To: {context['assign_to']}", styles['Normal']))
-        story.append(Paragraph(f"Technician Remark: {context['technician_remark']}", styles['Normal']))
-        story.append(Paragraph(f"Service Provided: {context['service_provided']}", styles['Normal']))
-        story.append(Paragraph(f"Customer Remark: {context['customer_remark']}", styles['Normal']))
-        story.append(Paragraph(f"Service: {context['service']}", styles['Normal']))
-        story.append(Paragraph(f"Attend Date & Time: {context['attend_date_time']}", styles['Normal']))
-        story.append(Paragraph(f"Service Status: {context['service_status']}", styles['Normal']))
-        story.append(Spacer(1, 12))
-        
-        # Signatures (matching complaint format)
-        story.append(Paragraph("Signatures", styles['Heading2']))
-        
-        # Customer Signature
-        story.append(Paragraph("Customer Signature:", styles['Normal']))
-        story.append(Paragraph("___________________________", styles['Normal']))
-        story.append(Spacer(1, 12))
-        
-        # Technician Signature
-        story.append(Paragraph("Technician Signature:", styles['Normal']))
-        story.append(Paragraph("___________________________", styles['Normal']))
-        story.append(Spacer(1, 12))
-        
-        story.append(Spacer(1, 12))
-        
-        # Build and return
-        doc.build(story)
-        buffer.seek(0)
-        response = HttpResponse(buffer, content_type='application/pdf')
-        filename = f'Routine_Service_Certificate_{context["amc_no"]}_{service.service_date.strftime("%Y%m%d")}.pdf'
-        response['Content-Disposition'] = f'attachment; filename="{filename}"'
-        return response
+        service = get_object_or_404(routine_service_certificate.get_queryset(), pk=pk)
+        return routine_service_certificate.response(service)
         
+    except Http404:
+        raise
     except Exception as e:
         logger.error(f"Error generating routine service certificate PDF: {str(e)}")
         return HttpResponse(f"Error generating PDF: {str(e)}", status=500)
 
 
+def bulk_routine_service_certificates(request):
+    """
+    Download routine service certificates in bulk, filtered by month, route,
+    customer and AMC, as a ZIP of PDFs or one merged PDF.
+
+    The certificates are rendered by a background task (amc/tasks.py); the
+    page then polls ?job=<task result id> until the file is ready.
+    """
+    from django.core.files.storage import default_storage
+    from django.http import FileResponse
+    from django.shortcuts import redirect
+    from django_tasks import ResultStatus
+    from django_tasks.exceptions import ResultDoesNotExist
+    from customer.models import Route
+    from .certificates import filter_routine_services, get_max_certificates
+    from .tasks import build_certificate_bundle
+
+    filters = {
+        'month': request.GET.get('month', ''),
+        'route': request.GET.get('route', ''),
+        'customer': request.GET.get('customer', ''),
+        'amc': request.GET.get('amc', ''),
+        'format': request.GET.get('format', 'zip'),
+    }
+    ids, invalid = {}, []
+    for name in ('route', 'customer', 'amc'):
+        try:
+            ids[name] = int(filters[name]) if filters[name] else None
+        except ValueError:
+            ids[name] = None
+            invalid.append(name)
+    context = {
+        'filters': filters,
+        'routes': Route.objects.order_by('value'),
+        # Only the chosen rows; the pick lists search as the user types
+        'selected_customer': Customer.objects.filter(pk=ids['customer']).only('id', 'site_name').first() if ids['customer'] else None,
+        'selected_amc': AMC.objects.select_related('customer').filter(pk=ids['amc']).only('id', 'reference_id', 'customer__site_name').first() if ids['amc'] else None,
+        'max_certificates': get_max_certificates(),
+    }
+
+    if 'job' in request.GET:
+        try:
+            result = build_certificate_bundle.get_result(request.GET['job'])
+        except ResultDoesNotExist:
+            raise Http404
+        if result.kwargs.get('user_id') != request.user.pk and not request.user.is_superuser:
+            raise Http404
+        if result.status == ResultStatus.FAILED:
+            messages.error(request, 'Generating the certificates failed. Try again or narrow the filters.')
+            return render(request, 'amc/bulk_certificates.html', context)
+        if result.status != ResultStatus.SUCCEEDED:
+            context['job'] = {'id': result.id, 'pending': True}
+            return render(request, 'amc/bulk_certificates.html', context)
+        bundle = result.return_value
+        if 'fetch' in request.GET:
+            if not default_storage.exists(bundle['path']):
+                raise Http404
+            extension = bundle['path'].rsplit('.', 1)[-1]
+            stamp = result.finished_at.strftime('%Y%m%d_%H%M%S')
+            return FileResponse(
+                default_storage.open(bundle['path'], 'rb'),
+                as_attachment=True,
+                filename=f'Routine_Service_Certificates_{stamp}.{extension}',
+                content_type='application/pdf' if extension == 'pdf' else 'application/zip',
+            )
+        context['job'] = {'id': result.id, 'count': bundle['count']}
+        return render(request, 'amc/bulk_certificates.html', context)
+
+    if 'download' not in request.GET:
+        return render(request, 'amc/bulk_certificates.html', context)
+
+    month = None
+    if filters['month']:
+        try:
+            parsed = datetime.strptime(filters['month'], '%Y-%m')
+            month = (parsed.year, parsed.month)
+        except ValueError:
+            messages.error(request, 'Month must be in YYYY-MM format.')
+            return render(request, 'amc/bulk_certificates.html', context, status=400)
+
+    if invalid:
+        messages.error(request, f'Invalid {" and ".join(invalid)} id.')
+        return render(request, 'amc/bulk_certificates.html', context, status=400)
+
+    criteria = {'month': month, **ids}
+
+    if not any(criteria.values()):
+        messages.error(request, 'Select at least one filter (month, route, customer or AMC).')
+        return render(request, 'amc/bulk_certificates.html', context)
+    count = filter_routine_services(**criteria).count()
+    if not count:
+        messages.error(request, 'No routine services match the selected filters.')
+        return render(request, 'amc/bulk_certificates.html', context)
+    if count > get_max_certificates():
+        messages.error(
+            request,
+            f'More than {get_max_certificates()} certificates match. Narrow the filters or use '
+            f'"python manage.py bulk_certificates".'
+        )
+        return render(request, 'amc/bulk_certificates.html', context)
+
+    result = build_certificate_bundle.enqueue(
+        user_id=request.user.pk, output_format='pdf' if filters['format'] == 'pdf' else 'zip', **criteria,
+    )
+    return redirect(f'{request.path}?job={result.id}')
+
+
 def bulk_import_view(request):
     """View for bulk importing AMCs from CSV/Excel"""
     if request.method == 'POST':
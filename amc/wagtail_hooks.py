@@ -29,6 +29,7 @@ def register_amc_form_url():
         path('amc/view-custom/<int:pk>/', view_amc_custom, name='view_amc_custom'),
         path('amc/routine-services/<int:pk>/', edit_amc_routine_services, name='edit_amc_routine_services'),
         path('amc/routine-service-certificate/<int:pk>/', views.print_routine_service_certificate, name='print_routine_service_certificate'),
+        path('amc/routine-service-certificates/bulk/', views.bulk_routine_service_certificates, name='bulk_routine_service_certificates'),
         path('amc/export-routine-services/<int:pk>/', views.export_amc_routine_services_xlsx, name='export_amc_routine_services_xlsx'),
         path('api/amc/routine-services/generate/', generate_amc_routine_services, name='generate_amc_routine_services'),
         path('api/amc/routine-services/save/', save_amc_routine_services, name='save_amc_routine_services'),
@@ -238,10 +239,8 @@ def add_amc_custom(request):
     
     context = {
         'is_edit': False,
-        'customers': Customer.objects.all(),
         'amc_types': AMCType.objects.all(),
         'payment_terms': [],
-        'items': Item.objects.all(),
         'selected_customer': selected_customer,
         'customer_id': customer_id,  # Fixed: changed from customer_id_param to customer_id
     }
@@ -403,10 +402,8 @@ def edit_amc_custom(request, pk):
     context = {
         'is_edit': True,
         'amc': amc,
-        'customers': Customer.objects.all(),
         'amc_types': AMCType.objects.all(),
         'payment_terms': [],
-        'items': Item.objects.all(),
     }
     return render(request, 'amc/edit_amc_custom.html', context)
 
@@ -0,0 +1,71 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from attendance.models import AttendanceRecord
+from attendance.tasks import process_attendance_selfie
+from attendance.utils import get_selfie_retention_days
+from home.caching import invalidate_namespaces
+
+
+class Command(BaseCommand):
+    help = 'Process pending attendance selfies and prune old original uploads'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--process-pending', action='store_true', help='Queue compression for selfies without a thumbnail')
+        parser.add_argument('--prune-originals', action='store_true', help='Delete original selfies older than the retention window')
+        parser.add_argument('--days', type=int, help='Retention window in days (default: ATTENDANCE_SELFIE_RETENTION_DAYS)')
+        parser.add_argument('--dry-run', action='store_true', help='Report what would change without touching files')
+
+    def handle(self, *args, **options):
+        if not options['process_pending'] and not options['prune_originals']:
+            self.stdout.write('Nothing to do. Use --process-pending and/or --prune-originals.')
+            return
+
+        if options['process_pending']:
+            self.process_pending(options['dry_run'])
+        if options['prune_originals']:
+            days = options['days'] if options['days'] is not None else get_selfie_retention_days()
+            self.prune_originals(days, options['dry_run'])
+
+    def process_pending(self, dry_run):
+        pending_ids = list(
+            AttendanceRecord.objects.filter(selfie_processed_at__isnull=True)
+            .exclude(check_in_selfie='')
+            .exclude(check_in_selfie__isnull=True)
+            .values_list('pk', flat=True)
+        )
+        self.stdout.write(f'{len(pending_ids)} selfie(s) pending processing')
+        if dry_run:
+            return
+
+        for pk in pending_ids:
+            process_attendance_selfie.enqueue(pk)
+        self.stdout.write(self.style.SUCCESS(f'Queued {len(pending_ids)} selfie(s) for processing'))
+
+    def prune_originals(self, days, dry_run):
+        cutoff = timezone.now().date() - timedelta(days=days)
+        # Only prune originals that already have a compressed master to fall back on
+        queryset = (
+            AttendanceRecord.objects.filter(check_in_date__lt=cutoff)
+            .exclude(check_in_selfie='')
+            .exclude(check_in_selfie__isnull=True)
+            .exclude(check_in_selfie_master='')
+            .exclude(check_in_selfie_master__isnull=True)
+            .only('pk', 'check_in_selfie')
+        )
+
+        pruned_ids = []
+        for record in queryset.iterator(chunk_size=500):
+            if not dry_run:
+                record.check_in_selfie.delete(save=False)
+            pruned_ids.append(record.pk)
+
+        if dry_run:
+            self.stdout.write(f'{len(pruned_ids)} original selfie(s) older than {cutoff} would be pruned')
+            return
+
+        AttendanceRecord.objects.filter(pk__in=pruned_ids).update(check_in_selfie='')
+        invalidate_namespaces('attendance')
+        self.stdout.write(self.style.SUCCESS(f'Pruned {len(pruned_ids)} original selfie(s) older than {cutoff}'))
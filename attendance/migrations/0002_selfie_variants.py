@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:52
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attendancerecord',
+            name='check_in_selfie_master',
+            field=models.ImageField(blank=True, null=True, upload_to='attendance/selfies/compressed/', verbose_name='Check-In Selfie (Compressed)'),
+        ),
+        migrations.AddField(
+            model_name='attendancerecord',
+            name='check_in_selfie_thumbnail',
+            field=models.ImageField(blank=True, null=True, upload_to='attendance/selfies/thumbnails/', verbose_name='Check-In Selfie Thumbnail'),
+        ),
+        migrations.AddField(
+            model_name='attendancerecord',
+            name='selfie_processed_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Selfie Processed At'),
+        ),
+        migrations.AddIndex(
+            model_name='attendancerecord',
+            index=models.Index(fields=['selfie_processed_at'], name='attendance_selfie_proc_idx'),
+        ),
+    ]
@@ -23,6 +23,20 @@ class AttendanceRecord(models.Model):
         blank=True,
         verbose_name='Check-In Selfie'
     )
+    # Generated from check_in_selfie by attendance.tasks.process_attendance_selfie
+    check_in_selfie_master = models.ImageField(
+        upload_to='attendance/selfies/compressed/',
+        null=True,
+        blank=True,
+        verbose_name='Check-In Selfie (Compressed)'
+    )
+    check_in_selfie_thumbnail = models.ImageField(
+        upload_to='attendance/selfies/thumbnails/',
+        null=True,
+        blank=True,
+        verbose_name='Check-In Selfie Thumbnail'
+    )
+    selfie_processed_at = models.DateTimeField(null=True, blank=True, verbose_name='Selfie Processed At')
     check_in_location = models.CharField(
         max_length=255,
         blank=True,
@@ -63,6 +77,9 @@ class AttendanceRecord(models.Model):
         verbose_name = "Attendance Record"
         verbose_name_plural = "Attendance Records"
         unique_together = [['user', 'check_in_date']]  # One record per user per day
+        indexes = [
+            models.Index(fields=['selfie_processed_at'], name='attendance_selfie_proc_idx'),
+        ]
     
     # Admin panels for Wagtail
     panels = [
@@ -97,6 +114,23 @@ class AttendanceRecord(models.Model):
         check_out_str = self.check_out_time.strftime('%Y-%m-%d %H:%M') if self.check_out_time else 'N/A'
         return f"{self.user.get_full_name()} - {check_in_str} / {check_out_str}"
     
+    def get_selfie_image(self):
+        """Best available full-size selfie: compressed master, else the original upload"""
+        return self.check_in_selfie_master or self.check_in_selfie or None
+
+    def selfie_thumbnail(self):
+        """Selfie thumbnail for admin listings"""
+        from django.utils.html import format_html
+
+        image = self.check_in_selfie_thumbnail
+        if not image:
+            return "—"
+        return format_html(
+            '<img src="{}" alt="Selfie" loading="lazy" width="40" height="40" style="border-radius:50%;object-fit:cover;">',
+            image.url
+        )
+    selfie_thumbnail.short_description = "Selfie"
+
     def calculate_work_duration(self):
         """Calculate work duration in hours if both check-in and check-out are available"""
         if self.check_in_time and self.check_out_time:
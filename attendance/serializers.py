@@ -30,6 +30,7 @@ class AttendanceRecordSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'user', 'user_detail',
             'check_in_time', 'check_in_date', 'check_in_selfie', 
+            'check_in_selfie_master', 'check_in_selfie_thumbnail',
             'check_in_location', 'check_in_note',
             'check_out_time', 'check_out_date', 
             'check_out_location', 'check_out_note',
@@ -39,6 +40,7 @@ class AttendanceRecordSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = [
             'id', 'check_in_time', 'check_in_date',
+            'check_in_selfie_master', 'check_in_selfie_thumbnail',
             'check_out_time', 'check_out_date',
             'is_checked_in', 'is_checked_out',
             'created_at', 'updated_at'
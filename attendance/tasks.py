@@ -0,0 +1,28 @@
+import logging
+
+from django.utils import timezone
+from django_tasks import task
+
+from .models import AttendanceRecord
+from .utils import process_selfie
+
+logger = logging.getLogger(__name__)
+
+
+@task()
+def process_attendance_selfie(attendance_record_id):
+    """Compress an uploaded check-in selfie and build its listing thumbnail"""
+    attendance_record = AttendanceRecord.objects.filter(pk=attendance_record_id).first()
+    if not attendance_record:
+        return
+
+    try:
+        if process_selfie(attendance_record):
+            attendance_record.selfie_processed_at = timezone.now()
+            attendance_record.save(update_fields=[
+                'check_in_selfie_master',
+                'check_in_selfie_thumbnail',
+                'selfie_processed_at',
+            ])
+    except Exception as e:
+        logger.error(f"Error processing selfie for attendance {attendance_record_id}: {e}", exc_info=True)
@@ -1,3 +1,149 @@
-from django.test import TestCase
+import shutil
+import tempfile
+from datetime import date, timedelta
+from io import BytesIO, StringIO
 
-# Create your tests here.
+from django.contrib.auth.models import Group
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django_tasks.backends.database.models import DBTaskResult
+from PIL import Image
+from rest_framework.test import APIClient
+
+from authentication.models import CustomUser
+
+from .models import AttendanceRecord
+from .tasks import process_attendance_selfie
+from .utils import SELFIE_MASTER_MAX_SIZE, SELFIE_THUMBNAIL_SIZE, build_selfie_variants
+
+
+def make_jpeg(size=(1200, 1600)):
+    buffer = BytesIO()
+    Image.new('RGB', size, color='white').save(buffer, format='JPEG')
+    return buffer.getvalue()
+
+
+class SelfieVariantTests(TestCase):
+    def _make_image(self, size, mode='RGB', fmt='JPEG'):
+        buffer = BytesIO()
+        Image.new(mode, size, color='white').save(buffer, format=fmt)
+        buffer.seek(0)
+        return buffer
+
+    def test_variants_are_downscaled_jpegs(self):
+        master_bytes, thumbnail_bytes = build_selfie_variants(self._make_image((3000, 4000)))
+
+        with Image.open(BytesIO(master_bytes)) as master:
+            self.assertEqual(master.format, 'JPEG')
+            self.assertEqual(max(master.size), SELFIE_MASTER_MAX_SIZE)
+
+        with Image.open(BytesIO(thumbnail_bytes)) as thumbnail:
+            self.assertLessEqual(thumbnail.size[0], SELFIE_THUMBNAIL_SIZE[0])
+            self.assertLessEqual(thumbnail.size[1], SELFIE_THUMBNAIL_SIZE[1])
+
+    def test_transparent_png_is_converted(self):
+        master_bytes, _ = build_selfie_variants(self._make_image((200, 200), mode='RGBA', fmt='PNG'))
+
+        with Image.open(BytesIO(master_bytes)) as master:
+            self.assertEqual(master.mode, 'RGB')
+            self.assertEqual(master.size, (200, 200))
+
+
+class SelfieProcessingTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=media_root, SQL_PROFILE_SAMPLE_RATE=0)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        self.user = CustomUser.objects.create_user(username='tech', email='tech@example.com', password='x')
+        self.user.groups.add(Group.objects.create(name='employee'))
+
+    def make_record(self, check_in_date=None, processed=False):
+        record = AttendanceRecord.objects.create(user=self.user, check_in_date=check_in_date or date.today())
+        record.check_in_selfie.save('selfie.jpg', ContentFile(make_jpeg()), save=True)
+        if processed:
+            process_attendance_selfie.call(record.pk)
+            record.refresh_from_db()
+        return record
+
+    def queued_selfies(self):
+        return DBTaskResult.objects.filter(task_path=process_attendance_selfie.module_path)
+
+    def worker_run(self):
+        """What db_worker does (it cannot run inside a test transaction on SQLite)"""
+        for db_result in self.queued_selfies():
+            db_result.claim('test-worker')
+            db_result.set_succeeded(db_result.task.call(*db_result.args_kwargs['args'], **db_result.args_kwargs['kwargs']))
+
+    def test_task_saves_variants_and_keeps_the_original(self):
+        record = self.make_record()
+        process_attendance_selfie.call(record.pk)
+
+        record.refresh_from_db()
+        self.assertIsNotNone(record.selfie_processed_at)
+        self.assertTrue(default_storage.exists(record.check_in_selfie.name))
+        with default_storage.open(record.check_in_selfie_master.name) as master:
+            self.assertEqual(max(Image.open(master).size), SELFIE_MASTER_MAX_SIZE)
+        self.assertTrue(default_storage.exists(record.check_in_selfie_thumbnail.name))
+
+    def test_task_skips_missing_records_and_files(self):
+        process_attendance_selfie.call(0)
+        record = AttendanceRecord.objects.create(user=self.user, check_in_date=date.today())
+        process_attendance_selfie.call(record.pk)
+        record.refresh_from_db()
+        self.assertIsNone(record.selfie_processed_at)
+
+    def test_check_in_queues_the_selfie(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = client.post(
+                reverse('mark_attendance_in'),
+                {'selfie': SimpleUploadedFile('selfie.jpg', make_jpeg(), 'image/jpeg'), 'location': '12.97,77.59'},
+            )
+        self.assertEqual(response.status_code, 201)
+        record = AttendanceRecord.objects.get()
+        self.assertIsNone(record.selfie_processed_at)
+        self.assertFalse(record.check_in_selfie_thumbnail)
+
+        db_result = self.queued_selfies().get()
+        self.assertEqual(db_result.args_kwargs['args'], [record.pk])
+        self.worker_run()
+        record.refresh_from_db()
+        self.assertIsNotNone(record.selfie_processed_at)
+        self.assertTrue(record.check_in_selfie_thumbnail)
+
+    def test_command_queues_pending_selfies(self):
+        pending = self.make_record()
+        self.make_record(check_in_date=date.today() - timedelta(days=1), processed=True)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('attendance_selfies', '--process-pending', stdout=StringIO())
+        self.assertEqual([result.args_kwargs['args'] for result in self.queued_selfies()], [[pending.pk]])
+        self.worker_run()
+        pending.refresh_from_db()
+        self.assertIsNotNone(pending.selfie_processed_at)
+
+    def test_command_prunes_old_processed_originals(self):
+        old = self.make_record(check_in_date=date.today() - timedelta(days=40), processed=True)
+        unprocessed = self.make_record(check_in_date=date.today() - timedelta(days=41))
+        recent = self.make_record(processed=True)
+        old_original = old.check_in_selfie.name
+
+        call_command('attendance_selfies', '--prune-originals', '--days', '30', '--dry-run', stdout=StringIO())
+        self.assertTrue(default_storage.exists(old_original))
+
+        call_command('attendance_selfies', '--prune-originals', '--days', '30', stdout=StringIO())
+        old.refresh_from_db()
+        self.assertFalse(old.check_in_selfie)
+        self.assertFalse(default_storage.exists(old_original))
+        self.assertTrue(default_storage.exists(old.check_in_selfie_master.name))
+        for record in (unprocessed, recent):
+            record.refresh_from_db()
+            self.assertTrue(default_storage.exists(record.check_in_selfie.name))
@@ -0,0 +1,75 @@
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+# Longest edge of the compressed master kept for every selfie
+SELFIE_MASTER_MAX_SIZE = 1280
+SELFIE_MASTER_QUALITY = 75
+
+# Bounding box of the thumbnail served in listings
+SELFIE_THUMBNAIL_SIZE = (160, 160)
+SELFIE_THUMBNAIL_QUALITY = 70
+
+
+def get_selfie_retention_days():
+    """Number of days original (uncompressed) selfies are kept before pruning"""
+    return getattr(settings, 'ATTENDANCE_SELFIE_RETENTION_DAYS', 30)
+
+
+def _encode_jpeg(image, quality):
+    buffer = BytesIO()
+    image.save(buffer, format='JPEG', quality=quality, optimize=True, progressive=True)
+    return buffer.getvalue()
+
+
+def build_selfie_variants(fileobj):
+    """
+    Build the compressed master and thumbnail for an uploaded selfie.
+    Returns a tuple of (master_bytes, thumbnail_bytes), both JPEG encoded.
+    """
+    with Image.open(fileobj) as source:
+        # Phones store rotation in EXIF; apply it before the metadata is dropped
+        image = ImageOps.exif_transpose(source)
+        if image.mode != 'RGB':
+            image = image.convert('RGB')
+
+        master = image.copy()
+        master.thumbnail((SELFIE_MASTER_MAX_SIZE, SELFIE_MASTER_MAX_SIZE), Image.LANCZOS)
+
+        thumbnail = master.copy()
+        thumbnail.thumbnail(SELFIE_THUMBNAIL_SIZE, Image.LANCZOS)
+
+        return (
+            _encode_jpeg(master, SELFIE_MASTER_QUALITY),
+            _encode_jpeg(thumbnail, SELFIE_THUMBNAIL_QUALITY),
+        )
+
+
+def process_selfie(attendance_record):
+    """
+    Generate and store the compressed master and thumbnail for a record's selfie.
+    Returns True when new variants were written.
+    """
+    selfie = attendance_record.check_in_selfie
+    if not selfie or not selfie.storage.exists(selfie.name):
+        return False
+
+    selfie.open('rb')
+    try:
+        master_bytes, thumbnail_bytes = build_selfie_variants(selfie)
+    finally:
+        selfie.close()
+
+    base_name = os.path.splitext(os.path.basename(selfie.name))[0]
+
+    # Replace any variants left over from a previous upload on the same day
+    for old_file in (attendance_record.check_in_selfie_master, attendance_record.check_in_selfie_thumbnail):
+        if old_file:
+            old_file.delete(save=False)
+
+    attendance_record.check_in_selfie_master.save(f'{base_name}.jpg', ContentFile(master_bytes), save=False)
+    attendance_record.check_in_selfie_thumbnail.save(f'{base_name}_thumb.jpg', ContentFile(thumbnail_bytes), save=False)
+    return True
@@ -8,6 +8,7 @@ from django.db.models import Q
 from django.utils import timezone
 from datetime import date, datetime
 from .models import AttendanceRecord
+from .tasks import process_attendance_selfie
 from .serializers import (
     AttendanceRecordSerializer,
     CheckInSerializer,
@@ -15,6 +16,7 @@ from .serializers import (
     CheckOutSerializer
 )
 import logging
+from home.caching import cached_response
 
 logger = logging.getLogger(__name__)
 
@@ -64,8 +66,10 @@ def mark_attendance_in(request):
                 attendance_record.is_checked_in = True
             
             # Update check-in details
-            if 'selfie' in request.FILES:
+            selfie_uploaded = 'selfie' in request.FILES
+            if selfie_uploaded:
                 attendance_record.check_in_selfie = request.FILES['selfie']
+                attendance_record.selfie_processed_at = None
             if serializer.validated_data.get('location'):
                 attendance_record.check_in_location = serializer.validated_data['location']
             if serializer.validated_data.get('note'):
@@ -73,6 +77,11 @@ def mark_attendance_in(request):
             
             attendance_record.save()
             
+            # Compression and thumbnailing are queued for the db_worker process
+            # (TASKS setting), off this request
+            if selfie_uploaded:
+                process_attendance_selfie.enqueue(attendance_record.pk)
+            
             # Return attendance record
             response_serializer = AttendanceRecordSerializer(attendance_record)
             return Response(
@@ -235,6 +244,7 @@ def check_out(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@cached_response('attendance', 'users')
 def get_user_attendance(request):
     """
     Get attendance records for the authenticated user (Mobile app).
@@ -304,6 +314,7 @@ def get_user_attendance(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@cached_response('attendance', 'users')
 def get_today_attendance(request):
     """
     Get today's attendance record for the authenticated user (Mobile app).
@@ -394,6 +405,7 @@ def get_attendance_detail(request, pk):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@cached_response('attendance', 'users')
 def list_all_attendance(request):
     """
     List all attendance records (Admin only).
@@ -37,6 +37,7 @@ class AttendanceRecordViewSet(SnippetViewSet):
     # Standard list display using model fields
     list_display = [
         "id",
+        "selfie_thumbnail",
         "user",
         "check_in_date",
         "check_in_time",
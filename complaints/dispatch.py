@@ -0,0 +1,180 @@
+# complaints/dispatch.py
+"""
+Nearest-available-technician dispatch for new complaints.
+
+Candidates are fetched in one query with everything scoring needs
+annotated on each row (open complaint count, checked in today, on
+approved leave, last check-in location, current job coordinates), then
+scored in a single pass in Python. Lower scores are better:
+
+    score = distance_km * distance_weight + open_complaints * load_weight
+"""
+import math
+import re
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.db.models import Count, Exists, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from attendance.models import AttendanceRecord
+from authentication.models import CustomUser
+from employeeleave.models import LeaveRequest
+
+from .models import Complaint
+
+DEFAULT_DISPATCH_SETTINGS = {
+    'auto_assign': False,
+    'require_check_in': True,
+    'distance_weight': 1.0,
+    'load_weight': 5.0,
+    # Distance assumed when neither side has usable coordinates
+    'unknown_distance_km': 50.0,
+}
+
+OPEN_STATUSES = ('open', 'in_progress')
+EARTH_RADIUS_KM = 6371.0
+COORDINATES_RE = re.compile(r'(-?\d{1,3}(?:\.\d+)?)\s*,\s*(-?\d{1,3}(?:\.\d+)?)')
+
+
+def get_dispatch_settings():
+    options = dict(DEFAULT_DISPATCH_SETTINGS)
+    options.update(getattr(settings, 'COMPLAINT_DISPATCH', {}))
+    return options
+
+
+@dataclass
+class Candidate:
+    technician: CustomUser
+    distance_km: float
+    open_complaints: int
+    checked_in: bool
+    score: float
+
+    def as_dict(self):
+        technician = self.technician
+        return {
+            'id': technician.id,
+            'full_name': f"{technician.first_name or ''} {technician.last_name or ''}".strip() or technician.username,
+            'distance_km': round(self.distance_km, 1),
+            'open_complaints': self.open_complaints,
+            'checked_in': self.checked_in,
+            'score': round(self.score, 2),
+        }
+
+
+def parse_coordinates(value):
+    """(lat, lng) from a 'lat,lng' location string, or None"""
+    if not value:
+        return None
+    match = COORDINATES_RE.search(str(value))
+    if not match:
+        return None
+    lat, lng = float(match.group(1)), float(match.group(2))
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        return None
+    return lat, lng
+
+
+def haversine_km(origin, lat, lng):
+    """Great-circle distance; origin is (lat, lng) already in radians"""
+    origin_lat, origin_lng = origin
+    lat, lng = math.radians(lat), math.radians(lng)
+    a = (math.sin((lat - origin_lat) / 2) ** 2
+         + math.cos(origin_lat) * math.cos(lat) * math.sin((lng - origin_lng) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def candidate_queryset(today=None, exclude_complaint=None):
+    """Employees annotated with every value scoring reads, in one query"""
+    today = today or timezone.localdate()
+    open_complaints = Complaint.objects.filter(assign_to=OuterRef('pk'), status__in=OPEN_STATUSES)
+    if exclude_complaint is not None:
+        open_complaints = open_complaints.exclude(pk=exclude_complaint.pk)
+    open_count = (
+        open_complaints.order_by().values('assign_to')
+        .annotate(total=Count('pk')).values('total')
+    )
+    last_check_in = AttendanceRecord.objects.filter(user=OuterRef('pk')).exclude(
+        check_in_location__isnull=True
+    ).exclude(check_in_location='').order_by('-check_in_date', '-check_in_time')
+    current_job = Complaint.objects.filter(
+        assign_to=OuterRef('pk'), status='in_progress', customer__latitude__isnull=False,
+    ).order_by('-updated')
+
+    return (
+        CustomUser.objects.filter(groups__name='employee', is_active=True)
+        .annotate(
+            open_complaints=Coalesce(Subquery(open_count, output_field=IntegerField()), Value(0)),
+            checked_in_today=Exists(AttendanceRecord.objects.filter(
+                user=OuterRef('pk'), check_in_date=today, is_checked_in=True, is_checked_out=False,
+            )),
+            on_leave=Exists(LeaveRequest.objects.filter(
+                user=OuterRef('pk'), status='approved', from_date__lte=today, to_date__gte=today,
+            )),
+            last_check_in_location=Subquery(last_check_in.values('check_in_location')[:1]),
+            job_latitude=Subquery(current_job.values('customer__latitude')[:1]),
+            job_longitude=Subquery(current_job.values('customer__longitude')[:1]),
+        )
+        .filter(on_leave=False)
+        .only('id', 'username', 'first_name', 'last_name')
+    )
+
+
+def rank_technicians(customer, limit=None, exclude_complaint=None, options=None):
+    """Candidates for a customer's site, best first"""
+    options = options or get_dispatch_settings()
+    queryset = candidate_queryset(exclude_complaint=exclude_complaint)
+    if options['require_check_in']:
+        queryset = queryset.filter(checked_in_today=True)
+
+    site = None
+    if customer is not None and customer.latitude is not None and customer.longitude is not None:
+        site = (math.radians(float(customer.latitude)), math.radians(float(customer.longitude)))
+
+    distance_weight = options['distance_weight']
+    load_weight = options['load_weight']
+    unknown_distance = options['unknown_distance_km']
+    candidates = []
+    for technician in queryset:
+        distance = unknown_distance
+        if site is not None:
+            # A technician on a job is near that job; otherwise use where they checked in
+            if technician.job_latitude is not None and technician.job_longitude is not None:
+                position = (float(technician.job_latitude), float(technician.job_longitude))
+            else:
+                position = parse_coordinates(technician.last_check_in_location)
+            if position is not None:
+                distance = haversine_km(site, *position)
+        candidates.append(Candidate(
+            technician=technician,
+            distance_km=distance,
+            open_complaints=technician.open_complaints,
+            checked_in=technician.checked_in_today,
+            score=distance * distance_weight + technician.open_complaints * load_weight,
+        ))
+
+    candidates.sort(key=lambda candidate: (candidate.score, candidate.technician.id))
+    return candidates[:limit] if limit else candidates
+
+
+def suggest_technician(complaint):
+    """Best candidate for a complaint, or None"""
+    ranked = rank_technicians(complaint.customer, limit=1, exclude_complaint=complaint)
+    return ranked[0] if ranked else None
+
+
+def dispatch_new_complaint(complaint):
+    """
+    Assign an unassigned complaint to the best candidate when
+    COMPLAINT_DISPATCH['auto_assign'] is on. Returns the candidate or None.
+    """
+    if complaint.assign_to_id or not get_dispatch_settings()['auto_assign']:
+        return None
+    candidate = suggest_technician(complaint)
+    if candidate is None:
+        return None
+    complaint.assign_to = candidate.technician
+    complaint.save(update_fields=['assign_to', 'updated'])
+    return candidate
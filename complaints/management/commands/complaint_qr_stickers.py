@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from complaints.qr import qr_sticker_sheet
+from customer.models import Customer
+
+
+class Command(BaseCommand):
+    help = 'Render a printable sheet of complaint QR stickers for a route or branch'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--route', type=int, help='Route id')
+        parser.add_argument('--branch', type=int, help='Branch id')
+        parser.add_argument('--customer', type=int, action='append', help='Customer id (repeatable)')
+        parser.add_argument('--output', default='complaint_qr_stickers.pdf', help='Output PDF path')
+
+    def handle(self, *args, **options):
+        customers = Customer.objects.only('pk', 'site_name', 'job_no').order_by('site_name', 'pk')
+        if options['route']:
+            customers = customers.filter(routes_id=options['route'])
+        if options['branch']:
+            customers = customers.filter(branch_id=options['branch'])
+        if options['customer']:
+            customers = customers.filter(pk__in=options['customer'])
+
+        customers = list(customers)
+        if not customers:
+            raise CommandError('No customers match the given filters')
+
+        with open(options['output'], 'wb') as f:
+            f.write(qr_sticker_sheet.render(customers))
+        self.stdout.write(self.style.SUCCESS(f"Wrote {len(customers)} sticker(s) to {options['output']}"))
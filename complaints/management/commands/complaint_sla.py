@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from complaints.models import Complaint
+from complaints.sla import mark_overdue, rebuild_sla
+
+
+class Command(BaseCommand):
+    help = 'Maintain precomputed complaint SLA metrics'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rebuild', action='store_true', help='Recompute SLA rows for every complaint from history')
+        parser.add_argument('--mark-overdue', action='store_true', help='Flag open complaints past their response/resolution due time')
+        parser.add_argument('--batch-size', type=int, default=500, help='Complaints per bulk insert when rebuilding')
+
+    def handle(self, *args, **options):
+        if not options['rebuild'] and not options['mark_overdue']:
+            self.stdout.write('Nothing to do. Use --rebuild and/or --mark-overdue.')
+            return
+
+        if options['rebuild']:
+            count = rebuild_sla(Complaint.objects.all(), batch_size=options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(f'Rebuilt SLA metrics for {count} complaint(s)'))
+        if options['mark_overdue']:
+            response, resolution = mark_overdue()
+            self.stdout.write(self.style.SUCCESS(
+                f'Flagged {response} response breach(es) and {resolution} resolution breach(es)'
+            ))
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('complaints', '0011_bulkimportcomplaint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ComplaintSLA',
+            fields=[
+                ('complaint', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='sla', serialize=False, to='complaints.complaint')),
+                ('opened_at', models.DateTimeField()),
+                ('response_due_at', models.DateTimeField()),
+                ('resolution_due_at', models.DateTimeField()),
+                ('first_assigned_at', models.DateTimeField(blank=True, null=True)),
+                ('first_response_at', models.DateTimeField(blank=True, null=True)),
+                ('closed_at', models.DateTimeField(blank=True, null=True)),
+                ('time_to_assign', models.DurationField(blank=True, null=True)),
+                ('time_to_first_response', models.DurationField(blank=True, null=True)),
+                ('resolution_time', models.DurationField(blank=True, null=True)),
+                ('assignment_count', models.PositiveIntegerField(default=0)),
+                ('reopen_count', models.PositiveIntegerField(default=0)),
+                ('response_breached', models.BooleanField(default=False)),
+                ('resolution_breached', models.BooleanField(default=False)),
+                ('updated', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Complaint SLA',
+                'verbose_name_plural': 'Complaint SLAs',
+                'indexes': [models.Index(fields=['opened_at'], name='complaint_sla_opened_idx'), models.Index(fields=['response_breached', 'resolution_breached'], name='complaint_sla_breach_idx')],
+            },
+        ),
+    ]
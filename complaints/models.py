@@ -8,6 +8,8 @@ from wagtail.snippets.models import register_snippet
 from wagtail.admin.panels import FieldPanel, MultiFieldPanel, TabbedInterface, ObjectList
 from customer.models import Customer
 from authentication.models import CustomUser
+from home.exports import ExportQuerysetMixin
+from home.filters import TypeaheadFilterMixin
 
 
 # ---------- Dropdown Snippets ----------
@@ -219,6 +221,66 @@ class ComplaintStatusHistory(models.Model):
         return f"{self.complaint.reference}: {self.old_status} → {self.new_status}"
 
 
+class ComplaintSLA(models.Model):
+    """
+    Precomputed SLA metrics, one row per complaint. Maintained from the
+    lifecycle events in complaints/sla.py; rebuild with
+    `manage.py complaint_sla --rebuild`.
+    """
+    complaint = models.OneToOneField(Complaint, on_delete=models.CASCADE, primary_key=True, related_name="sla")
+    opened_at = models.DateTimeField()
+    response_due_at = models.DateTimeField()
+    resolution_due_at = models.DateTimeField()
+    first_assigned_at = models.DateTimeField(blank=True, null=True)
+    first_response_at = models.DateTimeField(blank=True, null=True)
+    closed_at = models.DateTimeField(blank=True, null=True)
+    time_to_assign = models.DurationField(blank=True, null=True)
+    time_to_first_response = models.DurationField(blank=True, null=True)
+    resolution_time = models.DurationField(blank=True, null=True)
+    assignment_count = models.PositiveIntegerField(default=0)
+    reopen_count = models.PositiveIntegerField(default=0)
+    response_breached = models.BooleanField(default=False)
+    resolution_breached = models.BooleanField(default=False)
+    updated = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Complaint SLA"
+        verbose_name_plural = "Complaint SLAs"
+        indexes = [
+            models.Index(fields=["opened_at"], name="complaint_sla_opened_idx"),
+            models.Index(fields=["response_breached", "resolution_breached"], name="complaint_sla_breach_idx"),
+        ]
+
+    def __str__(self):
+        return f"SLA {self.complaint_id}"
+
+    @property
+    def first_response_display(self):
+        return format_duration(self.time_to_first_response)
+
+    @property
+    def resolution_display(self):
+        return format_duration(self.resolution_time)
+
+    @property
+    def is_breached(self):
+        return self.response_breached or self.resolution_breached
+
+
+def format_duration(value):
+    """Compact duration for reports, e.g. '2d 3h' or '45m'"""
+    if value is None:
+        return ""
+    minutes = int(value.total_seconds() // 60)
+    days, minutes = divmod(minutes, 60 * 24)
+    hours, minutes = divmod(minutes, 60)
+    if days:
+        return f"{days}d {hours}h"
+    if hours:
+        return f"{hours}h {minutes}m"
+    return f"{minutes}m"
+
+
 # ---------- Wagtail Admin ViewSets ----------
 
 class ComplaintTypeViewSet(SnippetViewSet):
@@ -235,7 +297,7 @@ class ComplaintPriorityViewSet(SnippetViewSet):
     list_display = ("name",)
 
 
-class ComplaintViewSet(SnippetViewSet):
+class ComplaintViewSet(TypeaheadFilterMixin, SnippetViewSet):
     model = Complaint
     icon = "info-circle"
     menu_label = "All Complaints"
@@ -305,9 +367,11 @@ class ComplaintViewSet(SnippetViewSet):
         "status",
         "priority",
         "complaint_type",
+        "customer",
         "assign_to",
         "date",
     )
+    typeahead_filters = {"customer": "customers", "assign_to": "executives"}
 
     # Use custom add/edit pages
     def get_add_url(self):
@@ -335,7 +399,9 @@ class ComplaintViewSet(SnippetViewSet):
         return redirect(self.get_view_url(instance))
 
     # Custom IndexView to restrict export to superusers
-    class RestrictedIndexView(IndexView):
+    class RestrictedIndexView(ExportQuerysetMixin, IndexView):
+        export_select_related = ("customer", "complaint_type", "assign_to", "priority")
+
         def dispatch(self, request, *args, **kwargs):
             """Override dispatch to check export permissions"""
             # Check if this is an export request
@@ -0,0 +1,121 @@
+# complaints/pdf.py
+"""
+Complaint service report PDFs.
+
+Rendered documents are cached in default storage, keyed by complaint id,
+the complaint's ``updated`` timestamp and the report's layout and company
+header (PDFDocument.get_version()), so repeat downloads of an unchanged
+complaint are served straight from storage.
+"""
+import posixpath
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+from home.pdf import Details, Lines, PDFDocument, Section, Signature
+
+from .models import Complaint
+
+PDF_CACHE_DIR = 'complaints/pdfs'
+
+
+class ComplaintReport(PDFDocument):
+    """Service report for a complaint"""
+
+    def get_queryset(self):
+        return Complaint.objects.select_related('customer', 'assign_to', 'complaint_type', 'priority')
+
+    def get_filename(self, complaint):
+        return f'complaint_{complaint.reference or complaint.pk}.pdf'
+
+    def get_layout(self, complaint):
+        customer = complaint.customer
+        assign_to = complaint.assign_to
+        if assign_to:
+            assigned_to = f"{assign_to.first_name} {assign_to.last_name}".strip() or assign_to.username
+        else:
+            assigned_to = "Unassigned"
+
+        return [
+            Details([
+                ('Ticket No:', complaint.reference or ''),
+                ('Date:', complaint.date.strftime('%d/%m/%Y') if complaint.date else ''),
+                ('Type:', complaint.complaint_type.name if complaint.complaint_type else ''),
+                ('Priority:', complaint.priority.name if complaint.priority else ''),
+            ]),
+            Section("Customer Details"),
+            Details([
+                ('Customer Name:', getattr(customer, 'site_name', '') if customer else ''),
+                ('Site Address:', getattr(customer, 'site_address', '') if customer else ''),
+                ('Contact Person:', getattr(customer, 'contact_person_name', '') or complaint.contact_person_name or ''),
+                ('Contact Mobile:', getattr(customer, 'phone', '') or complaint.contact_person_mobile or ''),
+                ('Block/Wing:', complaint.block_wing or ''),
+            ]),
+            Section("Complaint Details"),
+            Lines([
+                ('Subject', complaint.subject or ''),
+                ('Message', complaint.message or ''),
+                ('Assigned To', assigned_to),
+            ]),
+            Section("Resolution"),
+            Lines([
+                ('Technician Remark', complaint.technician_remark or ''),
+                ('Solution', complaint.solution or ''),
+            ]),
+            Section("Signatures"),
+            Signature("Technician Signature", complaint.technician_signature),
+            Signature("Customer Signature", complaint.customer_signature),
+        ]
+
+
+complaint_report = ComplaintReport()
+
+
+def get_pdf_version(complaint):
+    """Version tag of the complaint's current PDF (changes when it is saved, or the layout or company details change)"""
+    updated = complaint.updated.strftime('%Y%m%d%H%M%S%f') if complaint.updated else '0'
+    return f'{updated}-{complaint_report.get_version()}'
+
+
+def get_pdf_cache_path(complaint):
+    return posixpath.join(PDF_CACHE_DIR, str(complaint.pk), f'{get_pdf_version(complaint)}.pdf')
+
+
+def get_pdf_filename(complaint):
+    return complaint_report.get_filename(complaint)
+
+
+def render_complaint_pdf(complaint):
+    """Build the service report PDF for a complaint and return its bytes"""
+    return complaint_report.render(complaint)
+
+
+def delete_cached_pdfs(complaint_id, keep_path=None):
+    """Remove cached PDFs for a complaint, optionally keeping one version"""
+    directory = posixpath.join(PDF_CACHE_DIR, str(complaint_id))
+    try:
+        _, files = default_storage.listdir(directory)
+    except FileNotFoundError:
+        return
+    for name in files:
+        path = posixpath.join(directory, name)
+        if path != keep_path:
+            default_storage.delete(path)
+
+
+def get_or_render_complaint_pdf(complaint):
+    """
+    Return the storage path of the complaint's current PDF, rendering and
+    caching it first if this version has not been rendered yet.
+    """
+    path = get_pdf_cache_path(complaint)
+    if default_storage.exists(path):
+        return path
+
+    pdf_bytes = render_complaint_pdf(complaint)
+    # Storage may rename on collision with a concurrent render; use what it returns
+    saved_path = default_storage.save(path, ContentFile(pdf_bytes))
+    if saved_path != path:
+        default_storage.delete(saved_path)
+    delete_cached_pdfs(complaint.pk, keep_path=path)
+    return path
@@ -0,0 +1,143 @@
+# complaints/qr.py
+"""
+QR codes linking to each customer's public complaint form.
+
+PNGs are stored once per customer under complaints/qr/<customer id>/.
+The file name is a hash of the encoded URL and the QR render settings,
+so a file never changes once written and can be cached indefinitely. A
+new image is generated only when the URL scheme changes. Browsers get the
+images from get_qr_image_url(), which serves them with a year-long
+immutable Cache-Control.
+"""
+import hashlib
+import posixpath
+from io import BytesIO
+
+import qrcode
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.urls import reverse
+from reportlab.lib.pagesizes import A4
+from reportlab.platypus import Image, Paragraph, Table, TableStyle
+
+from home.pdf import STYLES, Block, PDFDocument, read_storage_bytes
+
+QR_DIR = 'complaints/qr'
+
+# Bump when the QR rendering parameters below change
+QR_RENDER_VERSION = 1
+QR_BOX_SIZE = 10
+QR_BORDER = 4
+# Content-addressed, so browsers may keep them as long as they like
+QR_CACHE_MAX_AGE = 365 * 24 * 60 * 60
+
+
+def get_public_complaint_base_url():
+    """Base URL printed into QR codes (stable, independent of the request host)"""
+    base_url = getattr(settings, 'PUBLIC_COMPLAINT_BASE_URL', None) or settings.WAGTAILADMIN_BASE_URL
+    return base_url.rstrip('/')
+
+
+def get_public_complaint_url(customer_id):
+    return get_public_complaint_base_url() + reverse('public_complaint_form', args=[customer_id])
+
+
+def get_qr_path(customer_id, url):
+    digest = hashlib.sha1(f'{QR_RENDER_VERSION}:{url}'.encode()).hexdigest()[:16]
+    return posixpath.join(QR_DIR, str(customer_id), f'{digest}.png')
+
+
+def get_qr_image_url(path):
+    """URL of a stored QR PNG, served by complaints.views.customer_complaint_qr_image"""
+    customer_id, name = path.split('/')[-2:]
+    return reverse('complaint_qr_image', args=[int(customer_id), posixpath.splitext(name)[0]])
+
+
+def render_qr_png(url):
+    qr = qrcode.QRCode(
+        version=1,
+        error_correction=qrcode.constants.ERROR_CORRECT_L,
+        box_size=QR_BOX_SIZE,
+        border=QR_BORDER,
+    )
+    qr.add_data(url)
+    qr.make(fit=True)
+    buffer = BytesIO()
+    qr.make_image(fill_color="black", back_color="white").save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def get_or_create_customer_qr(customer_id):
+    """
+    Storage path of the customer's QR PNG, generating it on first use or
+    after the URL scheme changed. Returns (path, url).
+    """
+    url = get_public_complaint_url(customer_id)
+    path = get_qr_path(customer_id, url)
+    if default_storage.exists(path):
+        return path, url
+
+    saved_path = default_storage.save(path, ContentFile(render_qr_png(url)))
+    if saved_path != path:
+        # A concurrent request wrote the same content first
+        default_storage.delete(saved_path)
+
+    # Drop images for previous URL schemes
+    _, files = default_storage.listdir(posixpath.dirname(path))
+    for name in files:
+        old_path = posixpath.join(posixpath.dirname(path), name)
+        if old_path != path:
+            default_storage.delete(old_path)
+    return path, url
+
+
+# ---------- Printable sticker sheets ----------
+
+class StickerGrid(Block):
+    """Customers laid out as a grid of QR stickers"""
+
+    def __init__(self, customers, columns=3, qr_size=150):
+        self.customers = customers
+        self.columns = columns
+        self.qr_size = qr_size
+
+    def _sticker(self, customer):
+        path, _ = get_or_create_customer_qr(customer.pk)
+        image = Image(BytesIO(read_storage_bytes(path)), width=self.qr_size, height=self.qr_size)
+        label = customer.site_name
+        if customer.job_no:
+            label = f"{label}<br/>Job No: {customer.job_no}"
+        return [image, Paragraph(f"<para alignment='center'>{label}<br/>Scan to raise a complaint</para>", STYLES['Normal'])]
+
+    def flowables(self):
+        stickers = [self._sticker(customer) for customer in self.customers]
+        if not stickers:
+            return []
+        rows = [stickers[i:i + self.columns] for i in range(0, len(stickers), self.columns)]
+        rows[-1] += [''] * (self.columns - len(rows[-1]))
+        table = Table(rows, colWidths=[self.qr_size + 30] * self.columns)
+        table.setStyle(TableStyle([
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+            ('BOX', (0, 0), (-1, -1), 0.25, '#BBBBBB'),
+            ('INNERGRID', (0, 0), (-1, -1), 0.25, '#BBBBBB'),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
+        ]))
+        return [table]
+
+
+class QRStickerSheet(PDFDocument):
+    """Multi-up sheet of complaint QR stickers for a set of customers"""
+    show_company_header = False
+    pagesize = A4
+    margins = (36, 36, 36, 36)
+
+    def get_filename(self, customers):
+        return 'complaint_qr_stickers.pdf'
+
+    def get_layout(self, customers):
+        return [StickerGrid(customers)]
+
+
+qr_sticker_sheet = QRStickerSheet()
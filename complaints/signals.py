@@ -0,0 +1,35 @@
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from .models import Complaint
+from .sla import collect_events, record_events, remember_loaded_values
+
+
+@receiver(post_init, sender=Complaint)
+def track_complaint_changes(sender, instance, **kwargs):
+    remember_loaded_values(instance)
+
+
+@receiver(post_save, sender=Complaint)
+def record_complaint_events(sender, instance, created, raw=False, **kwargs):
+    """Write status/assignment history and update SLA metrics"""
+    if raw:
+        return
+    events = collect_events(instance, created)
+    if events:
+        record_events(instance, events)
+    remember_loaded_values(instance)
+
+
+@receiver(post_save, sender=Complaint)
+def prerender_closed_complaint_pdf(sender, instance, **kwargs):
+    """Closed complaints rarely change, so render their PDF ahead of the first download"""
+    if instance.status == 'closed':
+        from .tasks import render_complaint_pdf_task
+        render_complaint_pdf_task.enqueue(instance.pk)
+
+
+@receiver(post_delete, sender=Complaint)
+def delete_complaint_pdfs(sender, instance, **kwargs):
+    from .pdf import delete_cached_pdfs
+    delete_cached_pdfs(instance.pk)
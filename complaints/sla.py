@@ -0,0 +1,199 @@
+# complaints/sla.py
+"""
+Complaint lifecycle events and SLA metrics.
+
+Status and assignment changes are detected on save (the values loaded
+from the database are remembered on the instance) and written to the
+history tables in one bulk insert per save. Each event is also applied
+to the complaint's ComplaintSLA row, so reports read precomputed
+durations and breach flags instead of replaying history.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from home.caching import invalidate_namespaces
+
+DEFAULT_SLA_HOURS = {'response': 4, 'resolution': 48}
+
+STATUS_EVENT = 'status'
+ASSIGNMENT_EVENT = 'assignment'
+
+
+def get_sla_hours():
+    hours = dict(DEFAULT_SLA_HOURS)
+    hours.update(getattr(settings, 'COMPLAINT_SLA_HOURS', {}))
+    return hours
+
+
+# ---------- Change tracking ----------
+
+def remember_loaded_values(complaint):
+    """Snapshot status and assignee as loaded, without touching deferred fields"""
+    complaint._loaded_status = complaint.__dict__.get('status')
+    complaint._loaded_assign_to_id = complaint.__dict__.get('assign_to_id')
+
+
+def collect_events(complaint, created):
+    """(kind, old, new) tuples for what changed in this save"""
+    events = []
+    old_status = None if created else getattr(complaint, '_loaded_status', None)
+    old_assignee = None if created else getattr(complaint, '_loaded_assign_to_id', None)
+    if 'status' in complaint.__dict__ and complaint.status != old_status:
+        events.append((STATUS_EVENT, old_status, complaint.status))
+    if 'assign_to_id' in complaint.__dict__ and complaint.assign_to_id != old_assignee and complaint.assign_to_id:
+        events.append((ASSIGNMENT_EVENT, old_assignee, complaint.assign_to_id))
+    return events
+
+
+def record_events(complaint, events, at=None):
+    """
+    Write history rows for the events and update the SLA row.
+    The saving view can set complaint._changed_by and
+    complaint._changed_from_mobile before save().
+    """
+    from .models import ComplaintAssignmentHistory, ComplaintSLA, ComplaintStatusHistory
+
+    at = at or timezone.now()
+    changed_by = getattr(complaint, '_changed_by', None)
+    from_mobile = getattr(complaint, '_changed_from_mobile', False)
+
+    status_rows = []
+    assignment_rows = []
+    for kind, old, new in events:
+        if kind == STATUS_EVENT:
+            status_rows.append(ComplaintStatusHistory(
+                complaint=complaint,
+                old_status=old,
+                new_status=new,
+                changed_by=changed_by,
+                technician_remark=complaint.technician_remark,
+                solution=complaint.solution,
+                changed_from_mobile=from_mobile,
+            ))
+        else:
+            assignment_rows.append(ComplaintAssignmentHistory(
+                complaint=complaint,
+                assigned_to_id=new,
+                assigned_by=changed_by,
+                assignment_date=at,
+                subject=complaint.subject,
+                message=complaint.message,
+            ))
+    if status_rows:
+        ComplaintStatusHistory.objects.bulk_create(status_rows)
+    if assignment_rows:
+        ComplaintAssignmentHistory.objects.bulk_create(assignment_rows)
+
+    sla = ComplaintSLA.objects.filter(complaint=complaint).first()
+    if sla is None:
+        sla = new_sla(complaint)
+    for kind, old, new in events:
+        apply_event(sla, kind, old, new, at)
+    sla.save()
+
+
+# ---------- SLA metrics ----------
+
+def new_sla(complaint):
+    from .models import ComplaintSLA
+
+    hours = get_sla_hours()
+    opened_at = complaint.created or timezone.now()
+    return ComplaintSLA(
+        complaint=complaint,
+        opened_at=opened_at,
+        response_due_at=opened_at + timedelta(hours=hours['response']),
+        resolution_due_at=opened_at + timedelta(hours=hours['resolution']),
+    )
+
+
+def apply_event(sla, kind, old, new, at):
+    """Fold one lifecycle event into the SLA row (in memory)"""
+    if kind == ASSIGNMENT_EVENT:
+        sla.assignment_count += 1
+        if sla.first_assigned_at is None:
+            sla.first_assigned_at = at
+            sla.time_to_assign = at - sla.opened_at
+        return
+
+    if old is not None and new != 'open' and sla.first_response_at is None:
+        sla.first_response_at = at
+        sla.time_to_first_response = at - sla.opened_at
+        sla.response_breached = at > sla.response_due_at
+    if new == 'closed':
+        sla.closed_at = at
+        sla.resolution_time = at - sla.opened_at
+        sla.resolution_breached = at > sla.resolution_due_at
+        if sla.first_response_at is None:
+            sla.first_response_at = at
+            sla.time_to_first_response = at - sla.opened_at
+            sla.response_breached = at > sla.response_due_at
+    elif old == 'closed':
+        sla.reopen_count += 1
+        sla.closed_at = None
+        sla.resolution_time = None
+
+
+def mark_overdue(now=None):
+    """
+    Flag complaints that passed a due time without a response or closure.
+    Returns (response_flagged, resolution_flagged).
+    """
+    from .models import ComplaintSLA
+
+    now = now or timezone.now()
+    response = ComplaintSLA.objects.filter(
+        first_response_at__isnull=True, response_due_at__lt=now, response_breached=False,
+    ).update(response_breached=True)
+    resolution = ComplaintSLA.objects.filter(
+        closed_at__isnull=True, resolution_due_at__lt=now, resolution_breached=False,
+    ).update(resolution_breached=True)
+    if response or resolution:
+        invalidate_namespaces('complaints')
+    return response, resolution
+
+
+def rebuild_sla(complaints, batch_size=500):
+    """
+    Recompute SLA rows from the history tables. Complaints from before
+    history was recorded are approximated from their current assignee and,
+    if no longer open, a status change at their last update.
+    """
+    complaints = complaints.prefetch_related('status_history', 'assignment_history').order_by('pk')
+    count = 0
+    batch = []
+    for complaint in complaints.iterator(chunk_size=batch_size):
+        sla = new_sla(complaint)
+        events = [
+            (row.changed_at, STATUS_EVENT, row.old_status, row.new_status)
+            for row in complaint.status_history.all()
+        ] + [
+            (row.assignment_date, ASSIGNMENT_EVENT, None, row.assigned_to_id)
+            for row in complaint.assignment_history.all()
+        ]
+        if not events:
+            if complaint.assign_to_id:
+                events.append((complaint.created, ASSIGNMENT_EVENT, None, complaint.assign_to_id))
+            if complaint.status != 'open':
+                events.append((complaint.updated, STATUS_EVENT, 'open', complaint.status))
+        for at, kind, old, new in sorted(events, key=lambda event: event[0]):
+            apply_event(sla, kind, old, new, at)
+        batch.append(sla)
+        if len(batch) >= batch_size:
+            count += _replace_sla_rows(batch)
+            batch = []
+    if batch:
+        count += _replace_sla_rows(batch)
+    mark_overdue()
+    return count
+
+
+def _replace_sla_rows(rows):
+    from .models import ComplaintSLA
+
+    ComplaintSLA.objects.filter(complaint_id__in=[row.complaint_id for row in rows]).delete()
+    ComplaintSLA.objects.bulk_create(rows)
+    invalidate_namespaces('complaints')
+    return len(rows)
@@ -0,0 +1,24 @@
+import logging
+
+from django_tasks import task
+
+from .models import Complaint
+from .pdf import get_or_render_complaint_pdf
+
+logger = logging.getLogger(__name__)
+
+
+@task()
+def render_complaint_pdf_task(complaint_id):
+    """Pre-render and cache the PDF for a complaint's current version"""
+    complaint = (
+        Complaint.objects.select_related('customer', 'assign_to', 'complaint_type', 'priority')
+        .filter(pk=complaint_id)
+        .first()
+    )
+    if not complaint:
+        return
+    try:
+        get_or_render_complaint_pdf(complaint)
+    except Exception as e:
+        logger.error(f"Error pre-rendering PDF for complaint {complaint_id}: {e}", exc_info=True)
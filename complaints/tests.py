@@ -1,3 +1,224 @@
-from django.test import TestCase
+import shutil
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import Group
+from django.core.files.storage import default_storage
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from attendance.models import AttendanceRecord
+from authentication.models import CustomUser
+from employeeleave.models import LeaveRequest
+
+from customer.models import Customer
+
+from .dispatch import dispatch_new_complaint, rank_technicians
+from .models import Complaint, ComplaintSLA
+from .pdf import get_pdf_cache_path
+from .qr import get_or_create_customer_qr, qr_sticker_sheet
+from .sla import mark_overdue, rebuild_sla
+from .views import download_complaint_pdf
+
+IMMEDIATE_TASKS = {'default': {'BACKEND': 'django_tasks.backends.immediate.ImmediateBackend'}}
+
+
+@override_settings(TASKS=IMMEDIATE_TASKS)
+class ComplaintPdfCacheTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=self.media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        self.customer = Customer.objects.create(
+            site_name='Test Site', site_address='1 Test Street', email='site@example.com', phone='9123456780'
+        )
+        self.complaint = Complaint.objects.create(customer=self.customer, subject='Lift stuck', message='Stuck on 3rd floor')
+
+    def download(self, **headers):
+        request = RequestFactory().get('/', **headers)
+        return download_complaint_pdf(request, pk=self.complaint.pk)
+
+    def test_closing_prerenders_pdf(self):
+        self.complaint.status = 'closed'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.complaint.save()
+        self.assertTrue(default_storage.exists(get_pdf_cache_path(self.complaint)))
+
+    def test_download_is_cached_and_revalidated(self):
+        response = self.download()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertTrue(b''.join(response.streaming_content).startswith(b'%PDF'))
+        self.assertTrue(default_storage.exists(get_pdf_cache_path(self.complaint)))
+
+        response = self.download(HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_edit_replaces_cached_version(self):
+        self.download()
+        old_path = get_pdf_cache_path(self.complaint)
+
+        self.complaint.solution = 'Reset controller'
+        self.complaint.save()
+        self.download()
+
+        self.assertFalse(default_storage.exists(old_path))
+        self.assertTrue(default_storage.exists(get_pdf_cache_path(self.complaint)))
+
+    def test_company_details_change_replaces_cached_version(self):
+        etag = self.download()['ETag']
+        old_path = get_pdf_cache_path(self.complaint)
+
+        with override_settings(COMPANY_DETAILS={**settings.COMPANY_DETAILS, 'name': 'Renamed Lifts'}):
+            response = self.download(HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotEqual(response['ETag'], etag)
+            self.assertFalse(default_storage.exists(old_path))
+
+
+class CustomerQRTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=self.media_root, PUBLIC_COMPLAINT_BASE_URL='https://crm.example.com/')
+        override.enable()
+        self.addCleanup(override.disable)
+
+        self.customer = Customer.objects.create(
+            site_name='QR Site', site_address='2 Test Street', email='qr@example.com', phone='9123456781'
+        )
+
+    def test_qr_is_stored_once(self):
+        path, url = get_or_create_customer_qr(self.customer.pk)
+        self.assertTrue(url.startswith('https://crm.example.com/'))
+        self.assertTrue(default_storage.exists(path))
+        self.assertEqual(get_or_create_customer_qr(self.customer.pk)[0], path)
+
+    def test_base_url_change_replaces_image(self):
+        old_path, _ = get_or_create_customer_qr(self.customer.pk)
+        with override_settings(PUBLIC_COMPLAINT_BASE_URL='https://new.example.com'):
+            new_path, _ = get_or_create_customer_qr(self.customer.pk)
+        self.assertNotEqual(old_path, new_path)
+        self.assertFalse(default_storage.exists(old_path))
+
+    def test_sticker_sheet_renders(self):
+        self.assertTrue(qr_sticker_sheet.render([self.customer]).startswith(b'%PDF'))
+
+    def test_image_is_served_as_immutable(self):
+        data = self.client.get(reverse('generate_complaint_qr', args=[self.customer.pk])).json()
+        response = self.client.get(data['qr_code'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'image/png')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertIn('max-age=31536000', response['Cache-Control'])
+        self.assertEqual(self.client.get(data['qr_code'].replace('.png', '0.png')).status_code, 404)
+
+
+class ComplaintSLATests(TestCase):
+    def setUp(self):
+        self.technician = CustomUser.objects.create_user(
+            email='tech@example.com', first_name='Tech', last_name='One', phone_number='9123456782'
+        )
+        customer = Customer.objects.create(
+            site_name='SLA Site', site_address='3 Test Street', email='sla@example.com', phone='9123456783'
+        )
+        self.complaint = Complaint.objects.create(
+            customer=customer, subject='Door fault', message='Door not closing', assign_to=self.technician
+        )
+
+    def test_creation_records_history_and_sla(self):
+        self.assertEqual(self.complaint.status_history.count(), 1)
+        self.assertEqual(self.complaint.assignment_history.count(), 1)
+        sla = ComplaintSLA.objects.get(complaint=self.complaint)
+        self.assertEqual(sla.assignment_count, 1)
+        self.assertIsNotNone(sla.first_assigned_at)
+        self.assertIsNone(sla.first_response_at)
+
+    def test_status_changes_update_sla(self):
+        complaint = Complaint.objects.get(pk=self.complaint.pk)
+        complaint.status = 'in_progress'
+        complaint.save()
+        complaint.status = 'closed'
+        complaint.save()
+        complaint.status = 'open'
+        complaint.save()
+        # Saving without a change records nothing
+        complaint.save()
+
+        self.assertEqual(complaint.status_history.count(), 4)
+        sla = ComplaintSLA.objects.get(complaint=complaint)
+        self.assertIsNotNone(sla.first_response_at)
+        self.assertEqual(sla.reopen_count, 1)
+        self.assertIsNone(sla.closed_at)
+
+    def test_rebuild_and_overdue(self):
+        self.complaint.status = 'closed'
+        self.complaint.save()
+        ComplaintSLA.objects.all().delete()
+
+        self.assertEqual(rebuild_sla(Complaint.objects.all()), 1)
+        sla = ComplaintSLA.objects.get(complaint=self.complaint)
+        self.assertIsNotNone(sla.closed_at)
+
+        sla.closed_at = None
+        sla.save()
+        self.assertEqual(mark_overdue(now=timezone.now() + timedelta(days=30)), (0, 1))
+
+
+class ComplaintDispatchTests(TestCase):
+    def setUp(self):
+        employees = Group.objects.create(name='employee')
+        today = timezone.localdate()
+        self.technicians = {}
+        # name -> check-in location ("lat,lng")
+        for index, (name, location) in enumerate([
+            ('near', '13.1000,80.2000'),
+            ('far', '12.9000,79.9000'),
+            ('away', '13.1000,80.2000'),
+        ]):
+            user = CustomUser.objects.create_user(
+                email=f'{name}@example.com', first_name=name, phone_number=f'912345679{index}'
+            )
+            user.groups.add(employees)
+            AttendanceRecord.objects.create(
+                user=user, check_in_date=today, check_in_time=timezone.now(),
+                check_in_location=location, is_checked_in=True,
+            )
+            self.technicians[name] = user
+        LeaveRequest.objects.create(
+            user=self.technicians['away'], leave_type='casual', from_date=today, to_date=today,
+            email='away@example.com', status='approved',
+        )
+        self.customer = Customer.objects.create(
+            site_name='Dispatch Site', site_address='4 Test Street', email='dispatch@example.com',
+            phone='9123456784', latitude=Decimal('13.100000'), longitude=Decimal('80.210000'),
+        )
+        self.complaint = Complaint.objects.create(customer=self.customer, subject='Noise', message='Noisy car')
+
+    def test_ranks_nearest_available_technician_first(self):
+        with self.assertNumQueries(1):
+            ranked = rank_technicians(self.customer, exclude_complaint=self.complaint)
+        self.assertEqual([c.technician for c in ranked], [self.technicians['near'], self.technicians['far']])
+        self.assertLess(ranked[0].distance_km, 2)
+
+    def test_workload_outweighs_small_distance(self):
+        for number in range(10):
+            Complaint.objects.create(
+                customer=self.customer, subject=f'Job {number}', message='m', assign_to=self.technicians['near']
+            )
+        ranked = rank_technicians(self.customer, exclude_complaint=self.complaint)
+        self.assertEqual(ranked[0].technician, self.technicians['far'])
+
+    def test_auto_assign_only_when_enabled(self):
+        self.assertIsNone(dispatch_new_complaint(self.complaint))
+        with override_settings(COMPLAINT_DISPATCH={'auto_assign': True}):
+            candidate = dispatch_new_complaint(self.complaint)
+        self.complaint.refresh_from_db()
+        self.assertEqual(self.complaint.assign_to, candidate.technician)
+        self.assertEqual(self.complaint.assignment_history.count(), 1)
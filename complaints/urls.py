@@ -16,6 +16,7 @@ urlpatterns = [
 
     # QR Code & Public Complaint
     path('qr/<int:customer_id>/', views.generate_customer_complaint_qr, name='generate_complaint_qr'),
+    path('qr/<int:customer_id>/<slug:digest>.png', views.customer_complaint_qr_image, name='complaint_qr_image'),
     path('public/<int:customer_id>/', views.public_complaint_form, name='public_complaint_form'),
     path('public/<int:customer_id>/submit/', views.submit_public_complaint, name='submit_public_complaint'),
 
@@ -26,6 +27,7 @@ urlpatterns = [
     path('api/complaints/executives/', views.get_executives, name='complaints_api_executives'),
     path('api/complaints/next-reference/', views.get_next_complaint_reference, name='complaints_api_next_reference'),
     path('api/complaints/assigned/', views.get_assigned_complaints, name='complaints_api_assigned'),
+    path('api/complaints/<str:reference>/dispatch-suggestions/', views.get_dispatch_suggestions, name='complaints_api_dispatch_suggestions'),
 
     # Quick create/update/delete endpoints for Type and Priority (for + icon)
     path('api/complaints/types/create/', views.create_complaint_type, name='complaints_api_types_create'),
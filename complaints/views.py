@@ -3,18 +3,14 @@ import csv
 import io
 from datetime import datetime, date
 from django.shortcuts import get_object_or_404, render
-from django.http import HttpResponse, JsonResponse
-from django.views.decorators.http import require_http_methods
+from django.http import FileResponse, Http404, HttpResponse, JsonResponse
+from django.core.files.storage import default_storage
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition, require_http_methods
 from django.views.decorators.csrf import csrf_exempt
-from django.urls import reverse
 from django.contrib import messages
 from django.core.exceptions import ValidationError
 from io import BytesIO
-from reportlab.lib.pagesizes import letter
-from reportlab.lib import colors
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-import qrcode
 import base64
 import logging
 import re
@@ -25,8 +21,12 @@ except ImportError:
     ImageDraw = None
 
 from .models import Complaint, ComplaintType, ComplaintPriority
+from .pdf import get_or_render_complaint_pdf, get_pdf_filename, get_pdf_version
+from .dispatch import dispatch_new_complaint, rank_technicians
+from .qr import QR_CACHE_MAX_AGE, QR_DIR, get_or_create_customer_qr, get_qr_image_url
 from customer.models import Customer
 from authentication.models import CustomUser
+from home.caching import cached_response
 
 logger = logging.getLogger(__name__)
 
@@ -96,10 +96,19 @@ def svg_to_png_base64(svg_string, width=300, height=100):
         logger.error(f"Error converting SVG to PNG: {str(e)}")
         return None
 
+def _complaint_pdf_etag(request, pk):
+    complaint = Complaint.objects.filter(pk=pk).only('id', 'updated').first()
+    return f"complaint-{pk}-{get_pdf_version(complaint)}" if complaint else None
+
+
+# ETag only: the PDF also changes with the layout and company details, which
+# a Last-Modified date taken from the complaint would not reflect
+@condition(etag_func=_complaint_pdf_etag)
 def download_complaint_pdf(request, pk):
     """
-    Generate and download a PDF for a specific complaint.
-    Accessible via Wagtail admin custom button.
+    Download the PDF for a specific complaint.
+    Accessible via Wagtail admin custom button. The PDF is rendered once per
+    complaint version and served from storage afterwards.
     """
     try:
         complaint = get_object_or_404(
@@ -107,167 +116,19 @@ def download_complaint_pdf(request, pk):
             pk=pk
         )
 
-        # --- Prepare data ---
-        context = {
-            'company_name': 'Atom Lifts India Pvt Ltd',
-            'address': 'No.87B, Pillayar Koll Street, Mannurpet, Ambattur Indus Estate, Chennai 50, CHENNAI',
-            'phone': '9600087456',
-            'email': 'admin@atomlifts.com',
-            'ticket_no': complaint.reference or '',
-            'ticket_date': complaint.date.strftime('%d/%m/%Y') if complaint.date else '',
-            'ticket_type': complaint.complaint_type.name if complaint.complaint_type else '',
-            'priority': complaint.priority.name if complaint.priority else '',
-            'customer_name': getattr(complaint.customer, 'site_name', '') if complaint.customer else '',
-            'site_address': getattr(complaint.customer, 'site_address', '') if complaint.customer else '',
-            'contact_person': getattr(complaint.customer, 'contact_person_name', '') or complaint.contact_person_name or '',
-            'contact_mobile': getattr(complaint.customer, 'phone', '') or complaint.contact_person_mobile or '',
-            'block_wing': complaint.block_wing or '',
-            'subject': complaint.subject or '',
-            'message': complaint.message or '',
-             'assigned_to': (
-        f"{complaint.assign_to.first_name} {complaint.assign_to.last_name}".strip()
-        or complaint.assign_to.username
-        if complaint.assign_to else "Unassigned"
-    ),
-            'technician_remark': complaint.technician_remark or '',
-            'solution': complaint.solution or '',
-            'technician_signature': complaint.technician_signature.url if complaint.technician_signature else '',
-            'customer_signature': complaint.customer_signature.url if complaint.customer_signature else '',
-            'technician_signature_file': complaint.technician_signature if complaint.technician_signature else None,
-            'customer_signature_file': complaint.customer_signature if complaint.customer_signature else None,
-        }
-
-        # --- Create PDF ---
-        buffer = BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=letter, rightMargin=72, leftMargin=72, topMargin=72, bottomMargin=72)
-        styles = getSampleStyleSheet()
-        story = []
-
-        # Header
-        header_style = ParagraphStyle(
-            name='HeaderStyle',
-            parent=styles['Heading1'],
-            fontSize=18,
-            alignment=1  # Center
+        pdf_path = get_or_render_complaint_pdf(complaint)
+        response = FileResponse(
+            default_storage.open(pdf_path, 'rb'),
+            content_type='application/pdf',
+            as_attachment=True,
+            filename=get_pdf_filename(complaint),
         )
-        story.append(Paragraph(context['company_name'], header_style))
-        story.append(Paragraph(context['address'], styles['Normal']))
-        story.append(Paragraph(f"Phone: {context['phone']} | Email: {context['email']}", styles['Normal']))
-        story.append(Spacer(1, 12))
-
-        # Complaint Info
-        data = [
-            ['Ticket No:', context['ticket_no']],
-            ['Date:', context['ticket_date']],
-            ['Type:', context['ticket_type']],
-            ['Priority:', context['priority']],
-        ]
-        table = Table(data, colWidths=[100, 400])
-        table.setStyle(TableStyle([
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black),
-        ]))
-        story.append(table)
-        story.append(Spacer(1, 12))
-
-        # Customer Details
-        story.append(Paragraph("Customer Details", styles['Heading2']))
-        cust_data = [
-            ['Customer Name:', context['customer_name']],
-            ['Site Address:', context['site_address']],
-            ['Contact Person:', context['contact_person']],
-            ['Contact Mobile:', context['contact_mobile']],
-            ['Block/Wing:', context['block_wing']],
-        ]
-        cust_table = Table(cust_data, colWidths=[100, 400])
-        cust_table.setStyle(TableStyle([
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black),
-        ]))
-        story.append(cust_table)
-        story.append(Spacer(1, 12))
-
-        # Complaint Details
-        story.append(Paragraph("Complaint Details", styles['Heading2']))
-        story.append(Paragraph(f"Subject: {context['subject']}", styles['Normal']))
-        story.append(Paragraph(f"Message: {context['message']}", styles['Normal']))
-        story.append(Paragraph(f"Assigned To: {context['assigned_to']}", styles['Normal']))
-        story.append(Spacer(1, 12))
-
-        # Resolution
-        story.append(Paragraph("Resolution", styles['Heading2']))
-        story.append(Paragraph(f"Technician Remark: {context['technician_remark']}", styles['Normal']))
-        story.append(Paragraph(f"Solution: {context['solution']}", styles['Normal']))
-        story.append(Spacer(1, 12))
-
-        # Signatures
-        story.append(Paragraph("Signatures", styles['Heading2']))
-
-        # Technician Signature
-        story.append(Paragraph("Technician Signature:", styles['Normal']))
-        if context.get('technician_signature_file'):
-            try:
-                # Use image file directly - Django ImageField
-                sig_file = context['technician_signature_file']
-                if hasattr(sig_file, 'path'):
-                    # ImageField has a path attribute
-                    with open(sig_file.path, 'rb') as f:
-                        img_buffer = BytesIO(f.read())
-                elif hasattr(sig_file, 'read'):
-                    # File object
-                    img_buffer = BytesIO(sig_file.read())
-                    sig_file.seek(0)  # Reset file pointer
-                else:
-                    # Fallback: try to open as file path string
-                    with open(sig_file, 'rb') as f:
-                        img_buffer = BytesIO(f.read())
-                sig_img = Image(img_buffer, width=200, height=60)
-                story.append(sig_img)
-            except Exception as e:
-                logger.error(f"Error embedding technician signature image: {str(e)}")
-                story.append(Paragraph("[Signature captured digitally]", styles['Italic']))
-        else:
-            story.append(Paragraph("___________________________", styles['Normal']))
-        story.append(Spacer(1, 12))
-
-        # Customer Signature
-        story.append(Paragraph("Customer Signature:", styles['Normal']))
-        if context.get('customer_signature_file'):
-            try:
-                # Use image file directly - Django ImageField
-                sig_file = context['customer_signature_file']
-                if hasattr(sig_file, 'path'):
-                    # ImageField has a path attribute
-                    with open(sig_file.path, 'rb') as f:
-                        img_buffer = BytesIO(f.read())
-                elif hasattr(sig_file, 'read'):
-                    # File object
-                    img_buffer = BytesIO(sig_file.read())
-                    sig_file.seek(0)  # Reset file pointer
-                else:
-                    # Fallback: try to open as file path string
-                    with open(sig_file, 'rb') as f:
-                        img_buffer = BytesIO(f.read())
-                sig_img = Image(img_buffer, width=200, height=60)
-                story.append(sig_img)
-            except Exception as e:
-                logger.error(f"Error embedding customer signature image: {str(e)}")
-                story.append(Paragraph("[Signature captured digitally]", styles['Italic']))
-        else:
-            story.append(Paragraph("___________________________", styles['Normal']))
-        story.append(Spacer(1, 12))
-
-        story.append(Spacer(1, 12))
-
-        # Build and return
-        doc.build(story)
-        buffer.seek(0)
-        response = HttpResponse(buffer, content_type='application/pdf')
-        response['Content-Disposition'] = f'attachment; filename=complaint_{context["ticket_no"] or complaint.pk}.pdf'
+        # The ETag changes with every edit, so clients only need to revalidate
+        patch_cache_control(response, private=True, no_cache=True)
         return response
 
+    except Http404:
+        raise
     except Exception as e:
         logger.error(f"Error generating complaint PDF: {str(e)}")
         return HttpResponse(f"Error generating PDF: {str(e)}", status=500)
@@ -316,6 +177,7 @@ def view_complaint_custom(request, reference):
 
 
 @require_http_methods(["GET"])
+@cached_response('customers', per_user=False)
 def get_customers(request):
     customers = Customer.objects.all().order_by('site_name')
     data = [{
@@ -334,12 +196,14 @@ def get_customers(request):
 
 
 @require_http_methods(["GET"])
+@cached_response('lookups', per_user=False)
 def get_complaint_types(request):
     types = ComplaintType.objects.all().order_by('name')
     return JsonResponse([{'id': t.id, 'name': t.name} for t in types], safe=False)
 
 
 @require_http_methods(["GET"])
+@cached_response('lookups', per_user=False)
 def get_priorities(request):
     priorities = ComplaintPriority.objects.all().order_by('name')
     return JsonResponse([{'id': p.id, 'name': p.name} for p in priorities], safe=False)
@@ -438,6 +302,7 @@ def delete_complaint_priority(request, pk):
 
 
 @require_http_methods(["GET"])
+@cached_response('users', per_user=False)
 def get_executives(request):
     users = CustomUser.objects.filter(groups__name='employee').order_by('first_name', 'last_name')
     return JsonResponse([
@@ -461,6 +326,7 @@ def get_next_complaint_reference(request):
 
 
 @require_http_methods(["GET"])
+@cached_response('complaints', 'customers', 'lookups', 'users')
 def get_assigned_complaints(request):
     """
     Get complaints assigned to the authenticated user
@@ -550,11 +416,39 @@ def create_complaint(request):
             technician_remark=data.get('technician_remark', ''),
             solution=data.get('solution', ''),
         )
+        _auto_dispatch(complaint)
         return JsonResponse({'success': True, 'message': f'Complaint {complaint.reference} created successfully'})
     except Exception as e:
         return JsonResponse({'success': False, 'error': str(e)}, status=400)
 
 
+def _auto_dispatch(complaint):
+    """Auto-assign a new complaint; a dispatch failure must not lose the complaint"""
+    try:
+        dispatch_new_complaint(complaint)
+    except Exception as e:
+        logger.error(f"Error dispatching complaint {complaint.reference}: {str(e)}")
+
+
+@require_http_methods(["GET"])
+def get_dispatch_suggestions(request, reference):
+    """Technicians ranked for a complaint, best first (distance, workload, availability)"""
+    complaint = get_object_or_404(Complaint.objects.select_related('customer'), reference=reference)
+    try:
+        limit = int(request.GET.get('limit', 5))
+    except ValueError:
+        limit = 5
+    try:
+        candidates = rank_technicians(complaint.customer, limit=limit, exclude_complaint=complaint)
+        return JsonResponse({
+            'reference': complaint.reference,
+            'suggestions': [candidate.as_dict() for candidate in candidates],
+        })
+    except Exception as e:
+        logger.error(f"Error ranking technicians: {str(e)}")
+        return JsonResponse({'error': 'Internal server error'}, status=500)
+
+
 @csrf_exempt
 @require_http_methods(["POST"])
 def update_complaint(request, reference):
@@ -592,6 +486,8 @@ def update_complaint(request, reference):
         if 'customer_signature' in request.FILES:
             complaint.customer_signature = request.FILES['customer_signature']
         
+        if request.user.is_authenticated:
+            complaint._changed_by = request.user
         complaint.save()
         return JsonResponse({'success': True, 'message': f'Complaint {complaint.reference} updated successfully'})
     except Exception as e:
@@ -706,6 +602,8 @@ def update_complaint_status(request, reference):
                 except Exception:
                     pass
 
+        complaint._changed_by = user
+        complaint._changed_from_mobile = True
         complaint.save()
 
         return JsonResponse({
@@ -729,38 +627,16 @@ def update_complaint_status(request, reference):
 def generate_customer_complaint_qr(request, customer_id):
     """
     Generate a QR code that links to the public complaint form for a specific customer.
-    Returns the QR code as base64 image.
+    Returns the URL of the stored QR code image.
     """
     try:
         customer = get_object_or_404(Customer, id=customer_id)
         
-        # Generate the public complaint URL
-        public_url = request.build_absolute_uri(
-            reverse('public_complaint_form', args=[customer_id])
-        )
-        
-        # Create QR code
-        qr = qrcode.QRCode(
-            version=1,
-            error_correction=qrcode.constants.ERROR_CORRECT_L,
-            box_size=10,
-            border=4,
-        )
-        qr.add_data(public_url)
-        qr.make(fit=True)
-        
-        # Create image
-        img = qr.make_image(fill_color="black", back_color="white")
-        
-        # Convert to base64
-        buffer = BytesIO()
-        img.save(buffer, format='PNG')
-        buffer.seek(0)
-        img_str = base64.b64encode(buffer.getvalue()).decode()
-        
+        path, public_url = get_or_create_customer_qr(customer.pk)
+
         return JsonResponse({
             'success': True,
-            'qr_code': f'data:image/png;base64,{img_str}',
+            'qr_code': get_qr_image_url(path),
             'url': public_url,
             'customer_name': customer.site_name
         })
@@ -769,6 +645,16 @@ def generate_customer_complaint_qr(request, customer_id):
         return JsonResponse({'success': False, 'error': str(e)}, status=500)
 
 
+def customer_complaint_qr_image(request, customer_id, digest):
+    """A stored QR PNG. Its name is a hash of its content, so it is cached as immutable."""
+    path = f'{QR_DIR}/{customer_id}/{digest}.png'
+    if not default_storage.exists(path):
+        raise Http404("QR code not found")
+    response = FileResponse(default_storage.open(path, 'rb'), content_type='image/png')
+    patch_cache_control(response, public=True, max_age=QR_CACHE_MAX_AGE, immutable=True)
+    return response
+
+
 # Public Complaint Form (No Authentication Required)
 from django.views.decorators.cache import never_cache
 
@@ -854,6 +740,7 @@ def submit_public_complaint(request, customer_id):
             subject=templates_text or "Lift Complaint",
             message=final_message,
         )
+        _auto_dispatch(complaint)
         
         return JsonResponse({
             'success': True, 
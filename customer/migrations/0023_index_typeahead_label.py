@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customer', '0022_customerlicense_license_ref_no_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='customer',
+            name='site_name',
+            field=models.CharField(db_index=True, max_length=100),
+        ),
+    ]
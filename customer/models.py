@@ -4,6 +4,7 @@ from datetime import date, timedelta
 from wagtail.admin.panels import FieldPanel, MultiFieldPanel
 from wagtail.snippets.models import register_snippet
 from wagtail.snippets.views.snippets import SnippetViewSet, SnippetViewSetGroup, IndexView
+from home.exports import ExportQuerysetMixin
 from django.http import HttpResponseForbidden
 from django.db.models.signals import post_save
 from django.dispatch import receiver
@@ -64,7 +65,7 @@ class Customer(models.Model):
     reference_id = models.CharField(max_length=10, unique=True, editable=False)
     # site_id = models.CharField(max_length=30)  # Don't need
     job_no = models.CharField(max_length=50, blank=True, unique=True)
-    site_name = models.CharField(max_length=100)
+    site_name = models.CharField(max_length=100, db_index=True)
     site_address = models.TextField()
     email = models.EmailField(unique=True)
     phone = models.CharField(max_length=15, unique=True)
@@ -609,7 +610,9 @@ class CustomerViewSet(SnippetViewSet):
         return reverse('add_customer_custom')
 
     # Custom IndexView to restrict export to superusers
-    class RestrictedIndexView(IndexView):
+    class RestrictedIndexView(ExportQuerysetMixin, IndexView):
+        export_select_related = ("province_state", "city", "routes", "branch")
+
         def dispatch(self, request, *args, **kwargs):
             """Override dispatch to check export permissions"""
             # Check if this is an export request
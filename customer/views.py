@@ -17,6 +17,7 @@ from rest_framework import status
 from rest_framework.pagination import PageNumberPagination
 from django.db.models import Q
 from .serializers import CustomerCreateSerializer, CustomerListSerializer
+from home.caching import cached_response
 
 def customer_details(request, pk):
     try:
@@ -30,6 +31,7 @@ def customer_details(request, pk):
 
 # API endpoints for fetching dropdown options
 @require_http_methods(["GET"])
+@cached_response('lookups', per_user=False)
 def get_states(request):
     """Get all states/provinces"""
     try:
@@ -43,6 +45,7 @@ def get_states(request):
         return JsonResponse({"error": str(e)}, status=500)
 
 @require_http_methods(["GET"])
+@cached_response('lookups', per_user=False)
 def get_routes(request):
     """Get all routes"""
     try:
@@ -56,6 +59,7 @@ def get_routes(request):
         return JsonResponse({"error": str(e)}, status=500)
 
 @require_http_methods(["GET"])
+@cached_response('lookups', per_user=False)
 def get_branches(request):
     """Get all branches"""
     try:
@@ -69,6 +73,7 @@ def get_branches(request):
         return JsonResponse({"error": str(e)}, status=500)
 
 @require_http_methods(["GET"])
+@cached_response('lookups', per_user=False)
 def get_cities(request):
     """Get all cities"""
     try:
@@ -129,6 +134,7 @@ def create_customer_mobile(request):
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
+@cached_response('customers', 'lookups')
 def list_customers_mobile(request):
     """List customers for mobile app with pagination and filters."""
     try:
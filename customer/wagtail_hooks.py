@@ -339,7 +339,7 @@ def view_customer_custom(request, pk):
         lifts = Lift.objects.filter(lift_code=customer.job_no)
     
     # Get invoices for this customer
-    invoices = Invoice.objects.filter(customer=customer).select_related('customer').prefetch_related('items').order_by('-start_date')
+    invoices = Invoice.objects.filter(customer=customer).select_related('customer').order_by('-start_date')
     
     # Get AMCs for this customer
     try:
@@ -1,10 +1,11 @@
-from django.db import models
+from django.db import models, transaction
 from django.urls import reverse
 from django.shortcuts import redirect
 from django.core.exceptions import ValidationError
 from wagtail.admin.panels import FieldPanel, MultiFieldPanel, InlinePanel
 from wagtail.snippets.models import register_snippet
 from wagtail.snippets.views.snippets import SnippetViewSet, SnippetViewSetGroup, IndexView
+from home.exports import ExportQuerysetMixin
 from django.http import HttpResponseForbidden
 from modelcluster.fields import ParentalKey
 from modelcluster.models import ClusterableModel
@@ -117,7 +118,16 @@ class DeliveryChallan(ClusterableModel):
             else:
                 next_num = 1
             self.reference_id = f'{self.REFERENCE_PREFIX}{next_num}'
-        super().save(*args, **kwargs)
+        from Requisition.posting import post_challan
+
+        with transaction.atomic():
+            redated = self.pk and DeliveryChallanItem.objects.filter(
+                challan=self, stock_entry__isnull=False,
+            ).exclude(stock_entry__date=self.date).exists()
+            super().save(*args, **kwargs)
+            # Lines post stock as they are saved; move them when the date changes
+            if redated:
+                post_challan(self)
     
     def get_subtotal(self):
         """Calculate subtotal from all items"""
@@ -189,7 +199,12 @@ class DeliveryChallanItem(models.Model):
     def save(self, *args, **kwargs):
         # Calculate total: (rate * qty) * (1 + tax/100)
         self.total = self.rate * self.qty * (1 + (self.tax / 100))
-        super().save(*args, **kwargs)
+        from Requisition.posting import post_challan_item
+
+        # Each line issues its stock in the same transaction (see Requisition/posting.py)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            post_challan_item(self)
     
     def __str__(self):
         return f"Item for {self.challan.reference_id}"
@@ -245,7 +260,9 @@ class DeliveryChallanViewSet(SnippetViewSet):
         return redirect(self.get_edit_url(instance))
 
     # Custom IndexView to restrict export to superusers
-    class RestrictedIndexView(IndexView):
+    class RestrictedIndexView(ExportQuerysetMixin, IndexView):
+        export_select_related = ('customer', 'place_of_supply')
+
         def dispatch(self, request, *args, **kwargs):
             """Override dispatch to check export permissions"""
             export_format = request.GET.get('export')
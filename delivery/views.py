@@ -7,15 +7,20 @@ from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.contrib import messages
 from django.core.exceptions import ValidationError
+from django.db import transaction
+from Requisition.stock import low_stock_alerts
 from .models import DeliveryChallan, DeliveryChallanItem, PlaceOfSupply
+from home.caching import cached_response
+
+
+def challan_low_stock(challan):
+    """Low-stock alerts for the items on a challan (one query)"""
+    return low_stock_alerts(DeliveryChallanItem.objects.filter(challan=challan).values('item_id'))
 
 
 @csrf_exempt
 def add_delivery_challan_custom(request):
     """Create a new delivery challan"""
-    from customer.models import Customer
-    from items.models import Item
-    
     if request.method == 'POST':
         try:
             # Handle FormData with JSON data
@@ -32,40 +37,43 @@ def add_delivery_challan_custom(request):
                 }, status=400)
             
             # Create delivery challan
-            challan = DeliveryChallan.objects.create(
-                customer_id=data.get('customer'),
-                place_of_supply_id=data.get('place_of_supply') or None,
-                date=data.get('date'),
-                challan_type=data.get('challan_type', 'Supply of Liquid Gas'),
-                currency=data.get('currency', 'INR'),
-                discount_amount=data.get('discount_amount', 0),
-                discount_percentage=data.get('discount_percentage', 0),
-                adjustment=data.get('adjustment', 0),
-                customer_note=data.get('customer_note', ''),
-                terms_conditions=data.get('terms_conditions', ''),
-            )
-            
-            # Handle file upload if present
-            if 'uploads_files' in request.FILES:
-                challan.uploads_files = request.FILES['uploads_files']
-                challan.save()
-            
-            # Create challan items
-            for item_data in data.get('items', []):
-                if not item_data.get('item'):
-                    continue
-                DeliveryChallanItem.objects.create(
-                    challan=challan,
-                    item_id=item_data.get('item'),
-                    rate=item_data.get('rate', 0),
-                    qty=item_data.get('qty', 1),
-                    tax=item_data.get('tax', 0),
+            # Challan and lines (with their stock postings) are saved together
+            with transaction.atomic():
+                challan = DeliveryChallan.objects.create(
+                    customer_id=data.get('customer'),
+                    place_of_supply_id=data.get('place_of_supply') or None,
+                    date=data.get('date'),
+                    challan_type=data.get('challan_type', 'Supply of Liquid Gas'),
+                    currency=data.get('currency', 'INR'),
+                    discount_amount=data.get('discount_amount', 0),
+                    discount_percentage=data.get('discount_percentage', 0),
+                    adjustment=data.get('adjustment', 0),
+                    customer_note=data.get('customer_note', ''),
+                    terms_conditions=data.get('terms_conditions', ''),
                 )
             
+                # Handle file upload if present
+                if 'uploads_files' in request.FILES:
+                    challan.uploads_files = request.FILES['uploads_files']
+                    challan.save()
+            
+                # Create challan items
+                for item_data in data.get('items', []):
+                    if not item_data.get('item'):
+                        continue
+                    DeliveryChallanItem.objects.create(
+                        challan=challan,
+                        item_id=item_data.get('item'),
+                        rate=item_data.get('rate', 0),
+                        qty=item_data.get('qty', 1),
+                        tax=item_data.get('tax', 0),
+                    )
+
             return JsonResponse({
                 'success': True,
                 'message': 'Delivery challan created successfully',
-                'challan_id': challan.reference_id
+                'challan_id': challan.reference_id,
+                'low_stock': challan_low_stock(challan),
             })
             
         except ValidationError as e:
@@ -86,14 +94,10 @@ def add_delivery_challan_custom(request):
                 'error': str(e)
             }, status=400)
     
-    # GET: render form
-    customers = Customer.objects.all().order_by('site_name')
-    items = Item.objects.all().order_by('name')
+    # GET: render form (customers and items are searched as the user types)
     places_of_supply = PlaceOfSupply.objects.all().order_by('value')
     
     return render(request, 'delivery/add_delivery_challan_custom.html', {
-        'customers': customers,
-        'items': items,
         'places_of_supply': places_of_supply,
         'is_edit': False
     })
@@ -101,17 +105,14 @@ def add_delivery_challan_custom(request):
 
 def edit_delivery_challan_custom(request, reference_id):
     """Edit an existing delivery challan"""
-    from customer.models import Customer
-    from items.models import Item
-    
     try:
-        challan = DeliveryChallan.objects.get(reference_id=reference_id)
+        challan = DeliveryChallan.objects.select_related('customer').prefetch_related('items__item').get(
+            reference_id=reference_id
+        )
     except DeliveryChallan.DoesNotExist:
         messages.error(request, 'Delivery challan not found')
         return render(request, '404.html')
     
-    customers = Customer.objects.all().order_by('site_name')
-    items = Item.objects.all().order_by('name')
     places_of_supply = PlaceOfSupply.objects.all().order_by('value')
     
     if request.method == 'POST':
@@ -145,24 +146,26 @@ def edit_delivery_challan_custom(request, reference_id):
             if 'uploads_files' in request.FILES:
                 challan.uploads_files = request.FILES['uploads_files']
             
-            challan.save()
-            
-            # Update items - delete existing and create new ones
-            challan.items.all().delete()
-            for item_data in data.get('items', []):
-                if not item_data.get('item'):
-                    continue
-                DeliveryChallanItem.objects.create(
-                    challan=challan,
-                    item_id=item_data.get('item'),
-                    rate=item_data.get('rate', 0),
-                    qty=item_data.get('qty', 1),
-                    tax=item_data.get('tax', 0),
-                )
+            with transaction.atomic():
+                challan.save()
             
+                # Update items - delete existing and create new ones
+                challan.items.all().delete()
+                for item_data in data.get('items', []):
+                    if not item_data.get('item'):
+                        continue
+                    DeliveryChallanItem.objects.create(
+                        challan=challan,
+                        item_id=item_data.get('item'),
+                        rate=item_data.get('rate', 0),
+                        qty=item_data.get('qty', 1),
+                        tax=item_data.get('tax', 0),
+                    )
+
             return JsonResponse({
                 'success': True,
-                'message': 'Delivery challan updated successfully'
+                'message': 'Delivery challan updated successfully',
+                'low_stock': challan_low_stock(challan),
             })
             
         except ValidationError as e:
@@ -185,8 +188,6 @@ def edit_delivery_challan_custom(request, reference_id):
     
     return render(request, 'delivery/add_delivery_challan_custom.html', {
         'challan': challan,
-        'customers': customers,
-        'items': items,
         'places_of_supply': places_of_supply,
         'is_edit': True
     })
@@ -221,6 +222,7 @@ def get_next_challan_number(request):
 
 
 @csrf_exempt
+@cached_response('lookups', per_user=False)
 def manage_place_of_supply(request):
     """API for managing place of supply: GET list, POST create"""
     if request.method == 'GET':
@@ -545,13 +547,17 @@ def bulk_import_view(request):
                                 tax = float(item_data.get('tax', 0))
                                 
                                 if item_obj:
-                                    DeliveryChallanItem.objects.create(
-                                        challan=challan,
-                                        item=item_obj,
-                                        rate=rate,
-                                        qty=qty,
-                                        tax=tax,
-                                    )
+                                    try:
+                                        DeliveryChallanItem.objects.create(
+                                            challan=challan,
+                                            item=item_obj,
+                                            rate=rate,
+                                            qty=qty,
+                                            tax=tax,
+                                        )
+                                    except ValidationError as e:
+                                        # Not enough stock to post the line
+                                        errors.append(f'Row {idx}: {" ".join(e.messages)} Skipping this item.')
                     
                     # Note: File uploads (uploads_files) cannot be handled in bulk import
                     # Users need to upload files individually after import
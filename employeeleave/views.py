@@ -17,6 +17,7 @@ from .serializers import (
     LeaveRequestUserUpdateSerializer,
     LeaveRequestUpdateSerializer
 )
+from home.caching import cached_response
 
 logger = logging.getLogger(__name__)
 
@@ -175,6 +176,7 @@ def create_leave_request(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@cached_response('leave', 'users')
 def list_user_leave_requests(request):
     """
     List all leave requests for the authenticated user (mobile app).
@@ -413,6 +415,7 @@ def delete_user_leave_request(request, pk):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@cached_response('leave', 'users')
 def list_all_leave_requests(request):
     """
     List all leave requests (Admin only).
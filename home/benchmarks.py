@@ -0,0 +1,182 @@
+# home/benchmarks.py
+"""
+Timings and query-count budgets of the hot endpoints.
+
+run() requests each benchmark in BENCHMARKS through the test client (the
+whole middleware stack, as a superuser or, for the mobile APIs, an
+employee's token), with response caching switched off so every run does
+the work an uncached request does. Streamed exports are read to the end.
+Each result has the query count, the fastest and median time and whether
+the endpoint stayed within its query budget.
+
+Budgets are absolute query counts and do not grow with the data: a
+listing that runs a query per row fails once the dataset has more rows
+than the budget allows. Run against a seeded database (see synthetic.py):
+
+    python manage.py seed_synthetic_data --scale small
+    python manage.py run_benchmarks
+"""
+import statistics
+import time
+from dataclasses import dataclass, field
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.db import connection
+from django.test import Client, RequestFactory
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+from authentication.models import CustomUser
+
+BENCHMARK_EMAIL = 'benchmark.admin@example.com'
+
+UNCACHED = {
+    'CACHES': {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}},
+    'ALLOWED_HOSTS': ['*'],
+    'SQL_PROFILE_SAMPLE_RATE': 0,
+    'PROFILE_SAMPLE_RATE': 0,
+}
+
+
+@dataclass
+class Benchmark:
+    name: str
+    # URL name to GET, or a callable taking (request) for code that is not a view
+    target: object
+    budget: int
+    params: dict = field(default_factory=dict)
+    # 'admin' (superuser session) or 'employee' (an employee's API token)
+    user: str = 'admin'
+
+
+def dashboard_metrics(request):
+    from .context_processors import dashboard_metrics
+
+    return dashboard_metrics(request)
+
+
+# Routine_services listing (snippet model name) -> query budget
+ROUTINE_SERVICE_LISTINGS = {
+    'routineservice': 60,
+    'routineservicetoday': 60,
+    'routineservicethismonth': 60,
+    'routineservicepending': 60,
+    'routineservicethismonthoverdue': 60,
+    'routineservicelastmonthoverdue': 60,
+    'routineservicethismonthcompleted': 60,
+    'routineservicethismonthexpiring': 100,
+}
+
+BENCHMARKS = [
+    Benchmark('dashboard metrics', dashboard_metrics, 25),
+    *[
+        Benchmark(f'routine services: {name}', f'wagtailsnippets_Routine_services_{name}:list', budget)
+        for name, budget in ROUTINE_SERVICE_LISTINGS.items()
+    ],
+    Benchmark('report: complaints', 'reports:complaints_report', 35),
+    Benchmark('report: invoices', 'reports:invoice_report', 35),
+    Benchmark('report: payments', 'reports:payment_report', 35),
+    Benchmark('report: AMCs', 'reports:amc_report', 35),
+    Benchmark('report: routine services', 'reports:routine_service_report', 35),
+    Benchmark('report: receivables', 'reports:receivables_report', 35),
+    Benchmark('report export: complaints csv', 'reports:export_complaints_csv', 8),
+    Benchmark('report export: AMCs xlsx', 'reports:export_amc_xlsx', 8),
+    Benchmark('report export: receivables xlsx', 'reports:export_receivables_xlsx', 8),
+    Benchmark('export: customers csv', 'wagtailsnippets_customer_customer:list', 8, {'export': 'csv'}),
+    Benchmark('export: AMCs csv', 'wagtailsnippets_amc_amc:list', 8, {'export': 'csv'}),
+    Benchmark('export: complaints csv', 'wagtailsnippets_complaints_complaint:list', 8, {'export': 'csv'}),
+    Benchmark('export: invoices xlsx', 'wagtailsnippets_invoice_invoice:list', 8, {'export': 'xlsx'}),
+    # One page of customers; the serializer still reads related rows per customer
+    Benchmark('mobile: customers', 'list_customers_mobile', 90, user='employee'),
+    Benchmark('mobile: AMCs', 'list_amcs_mobile', 5, user='employee'),
+    Benchmark('mobile: assigned complaints', 'complaints_api_assigned', 6, user='employee'),
+    Benchmark('mobile: routine services', 'get_employee_routine_services', 6, user='employee'),
+    Benchmark('stock register', 'stock_register', 35),
+]
+
+
+def get_admin():
+    user = CustomUser.objects.filter(email=BENCHMARK_EMAIL).first()
+    if user is None:
+        user = CustomUser.objects.create_superuser(
+            email=BENCHMARK_EMAIL, password=None, first_name='Benchmark', last_name='Admin',
+        )
+    return user
+
+
+def get_employee():
+    """The employee with the most routine services, so the mobile lists are not empty"""
+    from django.db.models import Count
+
+    return (
+        CustomUser.objects.filter(groups__name='employee')
+        .annotate(services=Count('assigned_amc_routine_services'))
+        .order_by('-services', 'pk')
+        .first()
+    )
+
+
+def session_client(user):
+    """A test client logged in as user, without the login signal (its receivers expect a real request)"""
+    client = Client()
+    engine = import_module(settings.SESSION_ENGINE)
+    session = engine.SessionStore()
+    session[SESSION_KEY] = user._meta.pk.value_to_string(user)
+    session[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+    session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+    session.save()
+    client.cookies[settings.SESSION_COOKIE_NAME] = session.session_key
+    return client
+
+
+def token_client(user):
+    from rest_framework.authtoken.models import Token
+
+    token, _ = Token.objects.get_or_create(user=user)
+    return Client(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+
+def request_once(benchmark, clients, users):
+    if callable(benchmark.target):
+        request = RequestFactory().get('/admin/')
+        request.user = users[benchmark.user]
+        benchmark.target(request)
+        return 200
+    response = clients[benchmark.user].get(reverse(benchmark.target), benchmark.params)
+    if response.streaming:
+        for _ in response.streaming_content:
+            pass
+    return response.status_code
+
+
+def run(benchmarks=BENCHMARKS, repeat=3, names=None):
+    """Time each benchmark repeat times; returns one result dict per benchmark"""
+    users = {'admin': get_admin(), 'employee': get_employee()}
+    if users['employee'] is None:
+        raise ValueError('No user in the employee group; seed data first (seed_synthetic_data)')
+    clients = {'admin': session_client(users['admin']), 'employee': token_client(users['employee'])}
+    results = []
+    with override_settings(**UNCACHED):
+        for benchmark in benchmarks:
+            if names and not any(name.lower() in benchmark.name.lower() for name in names):
+                continue
+            timings, queries, statuses = [], 0, set()
+            for _ in range(max(repeat, 1)):
+                with CaptureQueriesContext(connection) as captured:
+                    started = time.perf_counter()
+                    statuses.add(request_once(benchmark, clients, users))
+                    timings.append((time.perf_counter() - started) * 1000)
+                queries = max(queries, len(captured))
+            status = max(statuses)
+            results.append({
+                'name': benchmark.name,
+                'status': status,
+                'queries': queries,
+                'budget': benchmark.budget,
+                'min_ms': min(timings),
+                'median_ms': statistics.median(timings),
+                'ok': status == 200 and queries <= benchmark.budget,
+            })
+    return results
@@ -0,0 +1,216 @@
+# home/caching.py
+"""
+Cached reads shared by every worker process.
+
+CACHES (settings/base.py) points all gunicorn workers at one store, so a
+result computed by one worker is served by the others. Entries are
+grouped in namespaces, one per family of models (NAMESPACES). Each
+namespace has a version number kept in the cache; keys embed the
+versions of the namespaces they read, so saving or deleting a row of any
+model in a namespace bumps its version (see home/signals.py) and every
+entry built from it is simply never read again. Keys also carry the
+current date, so figures such as "today" or "overdue" roll over at
+midnight without a write.
+
+- cached_response() caches GET responses of read endpoints (JSON views,
+  DRF views and file exports), keyed on the user, their role and the
+  query parameters.
+- get_or_set() caches any computed value (e.g. the dashboard figures).
+
+Queryset .update(), bulk_create() and bulk_update() bypass the signals.
+Call invalidate_namespaces() after such writes to cached models.
+"""
+import hashlib
+import time
+from functools import wraps
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils import timezone
+from django.utils.http import urlencode
+
+# Namespace -> models whose writes invalidate it
+NAMESPACES = {
+    'lookups': (
+        'lift.FloorID', 'lift.Brand', 'lift.LiftType', 'lift.MachineType', 'lift.MachineBrand',
+        'lift.DoorType', 'lift.DoorBrand', 'lift.ControllerBrand', 'lift.Cabin',
+        'customer.ProvinceState', 'customer.Route', 'customer.Branch', 'customer.City',
+        'items.Type', 'items.Make', 'items.Unit',
+        'amc.AMCType', 'amc.PaymentTerms',
+        'complaints.ComplaintType', 'complaints.ComplaintPriority',
+        'delivery.PlaceOfSupply',
+    ),
+    'users': ('authentication.CustomUser',),
+    'customers': ('customer.Customer',),
+    'amcs': ('amc.AMC',),
+    'complaints': ('complaints.Complaint', 'complaints.ComplaintSLA'),
+    'invoices': ('invoice.Invoice', 'invoice.InvoiceItem'),
+    'payments': ('PaymentReceived.PaymentReceived', 'PaymentReceived.PaymentAllocation'),
+    'quotations': ('Quotation.Quotation',),
+    'routine_services': ('Routine_services.RoutineService', 'amc.AMCRoutineService'),
+    'leave': ('employeeleave.LeaveRequest',),
+    'attendance': ('attendance.AttendanceRecord',),
+}
+
+# Fields whose changes alone leave cached results valid (e.g. each login sets last_login)
+IGNORED_FIELDS = {
+    'authentication.customuser': {'last_login'},
+}
+
+
+def get_cache_seconds():
+    return getattr(settings, 'RESPONSE_CACHE_SECONDS', 300)
+
+
+def namespaces_for_model(model):
+    label = model._meta.label_lower
+    return [name for name, labels in NAMESPACES.items() if label in {lbl.lower() for lbl in labels}]
+
+
+def namespace_models():
+    return {apps.get_model(label) for labels in NAMESPACES.values() for label in labels}
+
+
+def version_key(namespace):
+    return f'cache-version:{namespace}'
+
+
+def new_version():
+    # Never reuses a number, even after the version key was evicted
+    return time.time_ns() // 1000
+
+
+def get_versions(namespaces):
+    keys = [version_key(name) for name in namespaces]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, new_version(), None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def bump_namespaces(*namespaces):
+    for name in namespaces:
+        try:
+            cache.incr(version_key(name))
+        except ValueError:
+            cache.set(version_key(name), new_version(), None)
+
+
+def invalidate_namespaces(*namespaces):
+    """Invalidate after a write that sends no signals (queryset update, bulk insert)"""
+    bump_namespaces(*namespaces)
+    # Again at commit, in case a concurrent request cached the pre-commit rows meanwhile
+    transaction.on_commit(lambda: bump_namespaces(*namespaces))
+
+
+def make_key(namespaces, *parts):
+    versions = '.'.join(f'{name}{version}' for name, version in zip(namespaces, get_versions(namespaces)))
+    return ':'.join(['cached', versions, timezone.localdate().isoformat(), *map(str, parts)])
+
+
+def get_or_set(namespaces, name, build, timeout=None):
+    """build(), cached until a write to namespaces (or the date) changes"""
+    key = make_key(namespaces, name)
+    value = cache.get(key)
+    if value is None:
+        value = build()
+        cache.set(key, value, get_cache_seconds() if timeout is None else timeout)
+    return value
+
+
+def get_role(user):
+    if user is None or not user.is_authenticated:
+        return 'anonymous'
+    if user.is_superuser:
+        return 'superuser'
+    groups = sorted(user.groups.values_list('name', flat=True))
+    return '+'.join((['staff'] if user.is_staff else []) + groups) or 'user'
+
+
+def get_identity(request):
+    """
+    Who the response is for: the logged-in user, or the owner of the API
+    token of token-only views. None for a token that is unknown, revoked
+    or of an inactive user: the view must answer (and reject) it, not the cache.
+    """
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return f'user{user.pk}'
+    authorization = request.META.get('HTTP_AUTHORIZATION', '')
+    if authorization:
+        from rest_framework.authtoken.models import Token
+
+        keyword, _, key = authorization.partition(' ')
+        user_id = None
+        if keyword == 'Token' and key:
+            user_id = Token.objects.filter(key=key.strip(), user__is_active=True).values_list('user_id', flat=True).first()
+        return f'user{user_id}' if user_id else None
+    return 'anonymous'
+
+
+def freeze(response):
+    """What to cache of a response, or None when it must not be cached"""
+    if response.status_code != 200 or response.cookies:
+        return None
+    if hasattr(response, 'data') and not getattr(response, 'is_rendered', True):
+        # DRF Response, rendered later by the API view
+        return ('data', response.data)
+    if response.streaming:
+        return None
+    headers = {name: response[name] for name in ('Content-Type', 'Content-Disposition') if response.has_header(name)}
+    return ('content', response.content, headers)
+
+
+def thaw(entry):
+    if entry[0] == 'data':
+        from rest_framework.response import Response
+
+        return Response(entry[1])
+    response = HttpResponse(entry[1])
+    for name, value in entry[2].items():
+        response[name] = value
+    return response
+
+
+def cached_response(*namespaces, per_user=True, timeout=None):
+    """
+    Cache a read endpoint's GET responses until a write to namespaces.
+
+    Responses are keyed on the user (unless per_user is False, for
+    endpoints returning the same rows to everyone), their role and the
+    query parameters. Only 200 responses are cached; other methods, and
+    requests with an invalid API token, pass through. Put it directly on
+    the view function, under @api_view for DRF views.
+    """
+    def decorator(view):
+        name = f'{view.__module__}.{view.__qualname__}'
+
+        @wraps(view)
+        def wrapped(request, *args, **kwargs):
+            identity = get_identity(request) if per_user else 'shared'
+            if request.method != 'GET' or identity is None:
+                return view(request, *args, **kwargs)
+            params = urlencode(sorted(request.GET.lists()), doseq=True)
+            key = make_key(
+                namespaces,
+                name,
+                # Host too: paginated DRF responses hold absolute next/previous links
+                hashlib.sha256(f'{request.get_host()}{args}{sorted(kwargs.items())}{params}'.encode()).hexdigest()[:32],
+                identity,
+                get_role(getattr(request, 'user', None)),
+            )
+            entry = cache.get(key)
+            if entry is not None:
+                return thaw(entry)
+            response = view(request, *args, **kwargs)
+            entry = freeze(response)
+            if entry is not None:
+                cache.set(key, entry, get_cache_seconds() if timeout is None else timeout)
+            return response
+        return wrapped
+    return decorator
@@ -4,15 +4,25 @@ from amc.models import AMC
 from invoice.models import Invoice
 from PaymentReceived.models import PaymentReceived
 from Routine_services.models import RoutineService
-from django.db.models import Sum, Count
+from django.db.models import Count, Q, Sum
 from datetime import datetime, timedelta
 from django.utils import timezone
 
+from .caching import get_or_set
+
+# Models the dashboard figures read (see home/caching.py)
+DASHBOARD_NAMESPACES = ('customers', 'complaints', 'amcs', 'invoices', 'payments', 'routine_services', 'users')
+
 
 def dashboard_metrics(request):
     """
     Context processor to add dashboard metrics to admin templates.
+    Shared by all users and workers until a write to the models behind them.
     """
+    return get_or_set(DASHBOARD_NAMESPACES, 'dashboard-metrics', build_dashboard_metrics)
+
+
+def build_dashboard_metrics():
     total_customers = Customer.objects.count()
     total_complaints = Complaint.objects.count()
     # Count complaints where status is 'open' or 'in_progress' (not 'closed')
@@ -20,12 +30,18 @@ def dashboard_metrics(request):
     total_amc_due = AMC.objects.filter(status='active').aggregate(total=Sum('amount_due'))['total'] or 0
     # Assuming Income is sum of contract_amount paid or total payments
     total_income = PaymentReceived.objects.aggregate(total=Sum('amount'))['total'] or 0
-    # Open Invoices: invoices that are not paid
-    total_invoices = Invoice.objects.count()
-    open_invoices = Invoice.objects.filter(status__in=['open', 'partially_paid']).count()
+    # Open Invoices: invoices that are not paid (counts and value in one query)
+    open_invoice_filter = Q(status__in=['open', 'partially_paid'])
+    invoice_totals = Invoice.objects.aggregate(
+        total_invoices=Count('pk'),
+        open_invoices=Count('pk', filter=open_invoice_filter),
+        open_invoice_amount=Sum('total', filter=open_invoice_filter),
+    )
+    total_invoices = invoice_totals['total_invoices']
+    open_invoices = invoice_totals['open_invoices']
 
     # Recent complaints for dashboard table
-    recent_complaints = Complaint.objects.select_related('assign_to').order_by('-created')[:5]
+    recent_complaints = list(Complaint.objects.select_related('assign_to').order_by('-created')[:5])
 
     # Weekly payment received data for the graph - using PaymentReceived model
     today = timezone.now().date()
@@ -64,6 +80,7 @@ def dashboard_metrics(request):
         'total_income': total_income,
         'open_invoices': open_invoices,
         'total_invoices': total_invoices,
+        'open_invoice_amount': invoice_totals['open_invoice_amount'] or 0,
         'recent_complaints': recent_complaints,
         'weekly_payments': weekly_payments,
         'weekly_services': weekly_services,
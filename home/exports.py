@@ -0,0 +1,54 @@
+# home/exports.py
+"""
+CSV/XLSX exports of snippet listings without a query per row.
+
+list_export mostly names *_value helpers that read a ForeignKey (e.g.
+AMC.customer_value reads self.customer.site_name). Iterating a plain
+queryset runs one query per row per ForeignKey. ExportQuerysetMixin adds
+the declared select_related/prefetch_related to the export query only, so
+an export is one query (plus one per prefetched relation for each chunk).
+Rows are read in chunks of export_chunk_size while the spreadsheet is
+written, instead of all model instances being held at once.
+
+    class RestrictedIndexView(ExportQuerysetMixin, IndexView):
+        export_select_related = ("customer", "amc_type")
+        export_prefetch_related = ("lifts",)
+"""
+
+
+class ExportRows:
+    """An export queryset, iterated in chunks instead of being loaded whole"""
+
+    def __init__(self, queryset, chunk_size):
+        self.queryset = queryset
+        self.chunk_size = chunk_size
+
+    @property
+    def model(self):
+        # Spreadsheet headings read the model's field labels
+        return self.queryset.model
+
+    def __iter__(self):
+        if hasattr(self.queryset, 'iterator'):
+            return self.queryset.iterator(chunk_size=self.chunk_size)
+        return iter(self.queryset)
+
+
+class ExportQuerysetMixin:
+    """IndexView mixin loading the related rows list_export reads with the export query"""
+
+    export_select_related = ()
+    export_prefetch_related = ()
+    export_chunk_size = 2000
+
+    def get_base_queryset(self):
+        queryset = super().get_base_queryset()
+        if self.is_export:
+            if self.export_select_related:
+                queryset = queryset.select_related(*self.export_select_related)
+            if self.export_prefetch_related:
+                queryset = queryset.prefetch_related(*self.export_prefetch_related)
+        return queryset
+
+    def as_spreadsheet(self, queryset, spreadsheet_format):
+        return super().as_spreadsheet(ExportRows(queryset, self.export_chunk_size), spreadsheet_format)
@@ -0,0 +1,92 @@
+# home/filters.py
+"""
+Typeahead filters for snippet listings.
+
+Wagtail renders a ForeignKey in list_filter as a <select> holding every
+related row, so each listing render loaded the whole Customer (or Item,
+user...) table. TypeaheadFilterMixin renders the foreign keys named in
+typeahead_filters as search boxes backed by the typeahead endpoint (see
+home/typeahead.py): the page holds only the selected row, and
+home/static/home/js/typeahead.js searches the rest as the user types.
+
+    class AMCViewSet(TypeaheadFilterMixin, SnippetViewSet):
+        list_filter = ("status", "customer", "start_date")
+        typeahead_filters = {"customer": "customers"}
+
+Filtering is unchanged: the selected id is validated with one primary-key
+lookup and applied as before.
+"""
+import django_filters
+from django import forms
+from django.core.exceptions import ValidationError
+from django.utils.functional import cached_property
+from django_filters.filterset import remote_queryset
+from wagtail.admin.filters import WagtailFilterSet
+
+
+class TypeaheadSelect(forms.Select):
+    """A <select> rendering only its selected option; typeahead.js searches the rest"""
+
+    def __init__(self, source, attrs=None):
+        super().__init__(attrs={'data-typeahead': source, **(attrs or {})})
+        self.source = source
+
+    @property
+    def media(self):
+        return forms.Media(js=['home/js/typeahead.js'], css={'all': ['home/css/typeahead.css']})
+
+    def selected_choices(self, value):
+        field = self.choices.field
+        ids = [pk for pk in value if pk not in (None, '')]
+        try:
+            rows = list(field.queryset.filter(pk__in=ids)) if ids else []
+        except (ValueError, ValidationError):
+            rows = []  # not an id; the form reports the invalid choice
+        return [('', field.empty_label or '')] + [
+            (field.prepare_value(row), field.label_from_instance(row)) for row in rows
+        ]
+
+    def optgroups(self, name, value, attrs=None):
+        choices = self.choices
+        self.choices = self.selected_choices(value)
+        try:
+            return super().optgroups(name, value, attrs)
+        finally:
+            self.choices = choices
+
+
+class TypeaheadModelChoiceFilter(django_filters.ModelChoiceFilter):
+    def __init__(self, *args, source, **kwargs):
+        kwargs.setdefault('widget', TypeaheadSelect(source))
+        super().__init__(*args, **kwargs)
+
+
+def typeahead_filterset(model, fields, typeahead_filters):
+    """
+    WagtailFilterSet over list_filter fields, with the foreign keys in
+    typeahead_filters (field name -> typeahead source) as typeahead filters
+    """
+    declared = {
+        name: TypeaheadModelChoiceFilter(
+            field_name=name,
+            queryset=remote_queryset(model._meta.get_field(name)),
+            source=source,
+        )
+        for name, source in typeahead_filters.items()
+    }
+    meta = type('Meta', (), {'model': model, 'fields': list(fields)})
+    filterset = type(f'{model.__name__}FilterSet', (WagtailFilterSet,), {'Meta': meta, **declared})
+    # Keep list_filter's order; django-filter appends declared filters last
+    filterset.base_filters = {name: filterset.base_filters[name] for name in fields}
+    return filterset
+
+
+class TypeaheadFilterMixin:
+    """SnippetViewSet mixin rendering the foreign keys in typeahead_filters as typeahead filters"""
+
+    # list_filter field name -> home.typeahead.SOURCES key
+    typeahead_filters = {}
+
+    @cached_property
+    def filterset_class(self):
+        return typeahead_filterset(self.model, self.list_filter, self.typeahead_filters)
@@ -0,0 +1,255 @@
+# home/load_simulation.py
+"""
+Morning-rush load simulation of the technician mobile app.
+
+simulate() runs one thread per simulated technician against a running
+server (runserver, or gunicorn with the worker count being sized). Each
+technician checks in with a selfie (mark_attendance_in), then until the
+run ends repeatedly picks a call from the weighted mix (assigned
+complaints, routine services, today's attendance...) and waits a random
+think time. Technicians authenticate with their API tokens, so the
+server only sees the mobile API traffic.
+
+summarize() reports throughput, latency percentiles and error rates per
+call. On MySQL the InnoDB row lock waits during the run are reported too
+(lock_counters()); SQLite does not expose them, and its lock timeouts
+show up as 500 responses instead.
+
+    python manage.py seed_synthetic_data --employees 300
+    gunicorn CRM_LIFT_ATOM.wsgi -w 4 &
+    python manage.py simulate_mobile_load --technicians 300 --duration 120
+"""
+import io
+import json
+import math
+import os
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from dataclasses import dataclass
+
+from django.db import connection
+from django.urls import reverse
+
+
+@dataclass
+class Call:
+    method: str
+    url_name: str
+    upload_selfie: bool = False
+
+
+CALLS = {
+    'check_in': Call('POST', 'mark_attendance_in', upload_selfie=True),
+    'assigned_complaints': Call('GET', 'complaints_api_assigned'),
+    'routine_services': Call('GET', 'get_employee_routine_services'),
+    'today_attendance': Call('GET', 'get_today_attendance'),
+    'attendance_list': Call('GET', 'get_user_attendance'),
+    'customers': Call('GET', 'list_customers_mobile'),
+    'leave_counts': Call('GET', 'get_user_leave_counts'),
+}
+
+# Relative weights of the calls technicians repeat after checking in
+DEFAULT_MIX = {
+    'assigned_complaints': 4,
+    'routine_services': 4,
+    'today_attendance': 2,
+    'customers': 1,
+    'leave_counts': 1,
+}
+
+
+def parse_mix(value):
+    """'assigned_complaints=4,routine_services=2' -> {name: weight}"""
+    mix = {}
+    for part in filter(None, (part.strip() for part in value.split(','))):
+        name, _, weight = part.partition('=')
+        if name not in CALLS:
+            raise ValueError(f"Unknown call '{name}'; choose from {', '.join(CALLS)}")
+        try:
+            mix[name] = float(weight or 1)
+        except ValueError:
+            raise ValueError(f"Weight of '{name}' must be a number")
+    if not mix or not any(mix.values()):
+        raise ValueError('The mix needs at least one call with a positive weight')
+    return mix
+
+
+def make_selfie(width=480, height=640):
+    """A noisy JPEG about the size of a compressed phone selfie"""
+    from PIL import Image
+
+    image = Image.frombytes('RGB', (width // 4, height // 4), os.urandom(width * height * 3 // 16))
+    output = io.BytesIO()
+    image.resize((width, height)).save(output, 'JPEG', quality=80)
+    return output.getvalue()
+
+
+def multipart(fields, files):
+    boundary = uuid.uuid4().hex
+    body = io.BytesIO()
+    for name, value in fields.items():
+        body.write(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode())
+    for name, (filename, content, content_type) in files.items():
+        body.write(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+            f'Content-Type: {content_type}\r\n\r\n'.encode()
+        )
+        body.write(content)
+        body.write(b'\r\n')
+    body.write(f'--{boundary}--\r\n'.encode())
+    return body.getvalue(), f'multipart/form-data; boundary={boundary}'
+
+
+class Technician(threading.Thread):
+    def __init__(self, base_url, token, mix, deadline, start_delay, think_time, timeout, check_in, selfie, seed):
+        super().__init__(daemon=True)
+        self.base_url = base_url.rstrip('/')
+        self.token = token
+        self.mix = mix
+        self.deadline = deadline
+        self.start_delay = start_delay
+        self.think_time = think_time
+        self.timeout = timeout
+        self.check_in = check_in
+        self.selfie = selfie
+        self.random = random.Random(seed)
+        # (call name, latency in seconds, HTTP status or exception name)
+        self.records = []
+
+    def run(self):
+        time.sleep(self.start_delay)
+        if self.check_in:
+            self.call('check_in')
+        names, weights = list(self.mix), list(self.mix.values())
+        while time.monotonic() < self.deadline:
+            self.call(self.random.choices(names, weights)[0])
+            if self.think_time:
+                time.sleep(self.random.uniform(0, 2 * self.think_time))
+
+    def call(self, name):
+        call = CALLS[name]
+        headers = {'Authorization': f'Token {self.token}', 'Accept': 'application/json'}
+        data = None
+        if call.upload_selfie:
+            data, headers['Content-Type'] = multipart(
+                {'location': '12.9716,77.5946', 'note': 'Load test check-in'},
+                {'selfie': ('selfie.jpg', self.selfie, 'image/jpeg')},
+            )
+        request = urllib.request.Request(self.base_url + reverse(call.url_name), data=data, headers=headers, method=call.method)
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                response.read()
+                outcome = response.status
+        except urllib.error.HTTPError as e:
+            e.read()
+            outcome = e.code
+        except Exception as e:
+            outcome = type(e).__name__
+        self.records.append((name, time.perf_counter() - started, outcome))
+
+
+def technician_tokens(count, reset_attendance=True):
+    """API tokens of the first count employees; reset_attendance deletes today's records so they can check in again"""
+    from datetime import date
+
+    from rest_framework.authtoken.models import Token
+
+    from attendance.models import AttendanceRecord
+    from authentication.models import CustomUser
+
+    users = list(CustomUser.objects.filter(groups__name='employee', is_active=True).distinct().order_by('pk')[:count])
+    if len(users) < count:
+        raise ValueError(
+            f'Only {len(users)} active employee(s) to simulate {count} technicians; '
+            f'seed more (seed_synthetic_data --employees {count})'
+        )
+    if reset_attendance:
+        AttendanceRecord.objects.filter(user__in=users, check_in_date=date.today()).delete()
+    return [Token.objects.get_or_create(user=user)[0].key for user in users]
+
+
+def lock_counters():
+    """InnoDB row lock waits and wait time (ms) so far, or None when the database does not report them"""
+    if connection.vendor != 'mysql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute("SHOW GLOBAL STATUS WHERE Variable_name IN ('Innodb_row_lock_waits', 'Innodb_row_lock_time')")
+        return {name: int(value) for name, value in cursor.fetchall()}
+
+
+def simulate(base_url, tokens, mix=None, duration=60, think_time=1.0, ramp_up=10, timeout=30, check_in=True, seed=None):
+    """Run one technician per token against base_url; returns the summary (see summarize())"""
+    mix = mix or DEFAULT_MIX
+    selfie = make_selfie() if check_in else None
+    locks_before = lock_counters()
+    started = time.monotonic()
+    deadline = started + ramp_up + duration
+    technicians = [
+        Technician(
+            base_url, token, mix, deadline, ramp_up * index / max(len(tokens), 1), think_time, timeout,
+            check_in, selfie, None if seed is None else seed + index,
+        )
+        for index, token in enumerate(tokens)
+    ]
+    for technician in technicians:
+        technician.start()
+    for technician in technicians:
+        technician.join()
+    elapsed = time.monotonic() - started
+    locks_after = lock_counters()
+
+    records = [record for technician in technicians for record in technician.records]
+    summary = summarize(records, elapsed)
+    summary['technicians'] = len(tokens)
+    if locks_before is not None and locks_after is not None:
+        summary['lock_waits'] = locks_after.get('Innodb_row_lock_waits', 0) - locks_before.get('Innodb_row_lock_waits', 0)
+        summary['lock_wait_ms'] = locks_after.get('Innodb_row_lock_time', 0) - locks_before.get('Innodb_row_lock_time', 0)
+    return summary
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of sorted values"""
+    if not values:
+        return 0.0
+    # round() first: 0.99 * 100 is 99.00000000000001
+    return values[min(len(values), max(1, math.ceil(round(fraction * len(values), 9)))) - 1]
+
+
+def summarize(records, elapsed):
+    """Throughput, latency percentiles (ms) and errors, overall and per call"""
+    def stats(rows):
+        latencies = sorted(latency * 1000 for _, latency, _ in rows)
+        errors = [outcome for _, _, outcome in rows if not (isinstance(outcome, int) and outcome < 400)]
+        outcomes = {}
+        for _, _, outcome in rows:
+            outcomes[str(outcome)] = outcomes.get(str(outcome), 0) + 1
+        return {
+            'requests': len(rows),
+            'throughput': len(rows) / elapsed if elapsed else 0.0,
+            'errors': len(errors),
+            'error_rate': len(errors) / len(rows) if rows else 0.0,
+            'p50_ms': percentile(latencies, 0.50),
+            'p90_ms': percentile(latencies, 0.90),
+            'p95_ms': percentile(latencies, 0.95),
+            'p99_ms': percentile(latencies, 0.99),
+            'max_ms': latencies[-1] if latencies else 0.0,
+            'outcomes': outcomes,
+        }
+
+    by_call = {}
+    for record in records:
+        by_call.setdefault(record[0], []).append(record)
+    return {
+        'elapsed_s': elapsed,
+        'total': stats(records),
+        'calls': {name: stats(rows) for name, rows in sorted(by_call.items())},
+    }
+
+
+def to_json(summary):
+    return json.dumps(summary, indent=2, default=str)
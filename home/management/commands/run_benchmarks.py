@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from home.benchmarks import run
+from home.synthetic import is_local_database
+
+
+class Command(BaseCommand):
+    help = 'Time the hot endpoints against the current database and fail when one exceeds its query budget'
+
+    def add_arguments(self, parser):
+        parser.add_argument('names', nargs='*', help='Only benchmarks whose name contains one of these')
+        parser.add_argument('--repeat', type=int, default=3, help='Requests per benchmark (default: 3)')
+        parser.add_argument('--allow-remote', action='store_true', help='Benchmark a database that is not SQLite or local MySQL')
+
+    def handle(self, *args, **options):
+        if not is_local_database() and not options['allow_remote']:
+            raise CommandError('Refusing to benchmark a remote database; point DJANGO_SETTINGS_MODULE at SQLite or a local MySQL')
+        try:
+            results = run(repeat=options['repeat'], names=options['names'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(f'{"benchmark":<48} {"status":>6} {"queries":>8} {"budget":>7} {"min ms":>9} {"median ms":>10}')
+        for result in results:
+            line = (
+                f'{result["name"]:<48} {result["status"]:>6} {result["queries"]:>8} {result["budget"]:>7} '
+                f'{result["min_ms"]:>9.1f} {result["median_ms"]:>10.1f}'
+            )
+            self.stdout.write(line if result['ok'] else self.style.ERROR(line))
+
+        failed = [result['name'] for result in results if not result['ok']]
+        if failed:
+            raise CommandError(f'{len(failed)} benchmark(s) over budget or failing: {", ".join(failed)}')
+        self.stdout.write(self.style.SUCCESS(f'{len(results)} benchmark(s) within budget'))
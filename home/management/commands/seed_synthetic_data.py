@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from home.synthetic import SCALES, is_local_database, seed
+
+
+class Command(BaseCommand):
+    help = 'Append a synthetic dataset (customers, lifts, AMCs, services, complaints, invoices, ...) for benchmarks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', choices=list(SCALES), default='small', help='Dataset size (default: small)')
+        for name in SCALES['tiny']:
+            parser.add_argument(f'--{name.replace("_", "-")}', type=int, dest=name, help=f'Override the number of {name.replace("_", " ")}')
+        parser.add_argument('--seed', type=int, help='Random seed, for a repeatable dataset')
+        parser.add_argument('--allow-remote', action='store_true', help='Seed a database that is not SQLite or local MySQL')
+
+    def handle(self, *args, **options):
+        if not is_local_database() and not options['allow_remote']:
+            raise CommandError('Refusing to seed a remote database; point DJANGO_SETTINGS_MODULE at SQLite or a local MySQL')
+
+        counts = {name: options[name] for name in SCALES['tiny']}
+        created = seed(options['scale'], seed=options['seed'], log=self.stdout.write, **counts)
+        for name, count in created.items():
+            self.stdout.write(f'{count:>8}  {name.replace("_", " ")}')
+        self.stdout.write(self.style.SUCCESS(f'Seeded the {options["scale"]} synthetic dataset'))
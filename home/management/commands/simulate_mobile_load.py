@@ -0,0 +1,71 @@
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+from home.load_simulation import DEFAULT_MIX, parse_mix, simulate, technician_tokens, to_json
+from home.synthetic import is_local_database
+
+LOCAL_HOSTS = ('localhost', '127.0.0.1', '::1')
+
+
+class Command(BaseCommand):
+    help = 'Replay the technician mobile app traffic (check-in with selfie, then a mix of API calls) against a running server'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000', help='Server to load (default: http://127.0.0.1:8000)')
+        parser.add_argument('--technicians', type=int, default=20, help='Concurrent technicians (default: 20)')
+        parser.add_argument('--duration', type=float, default=60, help='Seconds to run after the ramp-up (default: 60)')
+        parser.add_argument('--ramp-up', type=float, default=10, help='Seconds over which technicians start (default: 10)')
+        parser.add_argument('--think-time', type=float, default=1.0, help='Mean seconds between calls of a technician (default: 1)')
+        parser.add_argument('--timeout', type=float, default=30, help='Seconds before a request counts as failed (default: 30)')
+        parser.add_argument(
+            '--mix', default=','.join(f'{name}={weight}' for name, weight in DEFAULT_MIX.items()),
+            help='Weighted calls after check-in, e.g. "assigned_complaints=4,routine_services=2"',
+        )
+        parser.add_argument('--no-check-in', action='store_true', help='Skip the selfie check-in each technician starts with')
+        parser.add_argument('--keep-attendance', action='store_true', help="Keep today's attendance (checked-in technicians then get 400s)")
+        parser.add_argument('--seed', type=int, help='Random seed, for a repeatable sequence of calls')
+        parser.add_argument('--json', action='store_true', help='Print the summary as JSON')
+        parser.add_argument('--allow-remote', action='store_true', help='Load a server or database that is not local')
+
+    def handle(self, *args, **options):
+        if not options['allow_remote'] and (
+            not is_local_database() or urlsplit(options['url']).hostname not in LOCAL_HOSTS
+        ):
+            raise CommandError('Refusing to load a remote server or database; use a local server and SQLite or local MySQL')
+        try:
+            mix = parse_mix(options['mix'])
+            tokens = technician_tokens(
+                options['technicians'], reset_attendance=not (options['keep_attendance'] or options['no_check_in'])
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(
+            f'{len(tokens)} technician(s) against {options["url"]} for {options["ramp_up"]:.0f}s ramp-up '
+            f'+ {options["duration"]:.0f}s...'
+        )
+        summary = simulate(
+            options['url'], tokens, mix=mix, duration=options['duration'], think_time=options['think_time'],
+            ramp_up=options['ramp_up'], timeout=options['timeout'], check_in=not options['no_check_in'],
+            seed=options['seed'],
+        )
+        if options['json']:
+            self.stdout.write(to_json(summary))
+            return
+
+        self.stdout.write(
+            f'{"call":<22} {"requests":>9} {"req/s":>7} {"errors":>7} {"p50 ms":>8} {"p90 ms":>8} '
+            f'{"p95 ms":>8} {"p99 ms":>8} {"max ms":>8}  outcomes'
+        )
+        for name, stats in [*summary['calls'].items(), ('total', summary['total'])]:
+            line = (
+                f'{name:<22} {stats["requests"]:>9} {stats["throughput"]:>7.1f} {stats["error_rate"]:>7.1%} '
+                f'{stats["p50_ms"]:>8.0f} {stats["p90_ms"]:>8.0f} {stats["p95_ms"]:>8.0f} {stats["p99_ms"]:>8.0f} '
+                f'{stats["max_ms"]:>8.0f}  {", ".join(f"{k}: {v}" for k, v in sorted(stats["outcomes"].items()))}'
+            )
+            self.stdout.write(self.style.ERROR(line) if stats['errors'] else line)
+        if 'lock_waits' in summary:
+            self.stdout.write(f'InnoDB row lock waits: {summary["lock_waits"]} ({summary["lock_wait_ms"]} ms waiting)')
+        else:
+            self.stdout.write('Row lock waits: not reported by this database')
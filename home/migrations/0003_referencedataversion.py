@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0002_create_homepage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReferenceDataVersion',
+            fields=[
+                ('bundle', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('version', models.PositiveBigIntegerField(default=1)),
+            ],
+        ),
+    ]
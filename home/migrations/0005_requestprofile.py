@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:19
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0004_typeaheaduse'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RequestProfile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+                ('method', models.CharField(max_length=10)),
+                ('endpoint', models.CharField(max_length=200)),
+                ('path', models.CharField(max_length=500)),
+                ('status', models.PositiveSmallIntegerField()),
+                ('duration_ms', models.FloatField()),
+                ('queries', models.PositiveIntegerField()),
+                ('sql_ms', models.FloatField()),
+                ('duplicate_queries', models.PositiveIntegerField()),
+                ('details', models.JSONField(default=dict)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['endpoint', 'created_at'], name='request_profile_endpoint')],
+            },
+        ),
+    ]
@@ -1,4 +1,6 @@
+from django.conf import settings
 from django.db import models
+from django.utils import timezone
 
 from wagtail.models import Page
 from customer.models import Customer
@@ -12,3 +14,51 @@ class HomePage(Page):
         context['total_complaints'] = Complaint.objects.count()
         context['open_complaints'] = Complaint.objects.filter(status__in=['open', 'in_progress']).count()
         return context
+
+
+class ReferenceDataVersion(models.Model):
+    """Version of a reference-data bundle, bumped by writes to its lookup models (see reference_data.py)"""
+    bundle = models.CharField(max_length=50, primary_key=True)
+    version = models.PositiveBigIntegerField(default=1)
+
+    def __str__(self):
+        return f"{self.bundle} v{self.version}"
+
+
+class TypeaheadUse(models.Model):
+    """When a user last picked a row in a typeahead source; recent picks rank first (see typeahead.py)"""
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='typeahead_uses')
+    source = models.CharField(max_length=20)
+    object_id = models.PositiveBigIntegerField()
+    used_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'source', 'object_id'], name='typeahead_use_user_source_object'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} {self.source}:{self.object_id}"
+
+
+class RequestProfile(models.Model):
+    """SQL profile of one sampled request (see sql_instrumentation.py)"""
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+    method = models.CharField(max_length=10)
+    endpoint = models.CharField(max_length=200)
+    path = models.CharField(max_length=500)
+    status = models.PositiveSmallIntegerField()
+    duration_ms = models.FloatField()
+    queries = models.PositiveIntegerField()
+    sql_ms = models.FloatField()
+    duplicate_queries = models.PositiveIntegerField()
+    # Most repeated statement fingerprints and slowest statements
+    details = models.JSONField(default=dict)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['endpoint', 'created_at'], name='request_profile_endpoint'),
+        ]
+
+    def __str__(self):
+        return f"{self.method} {self.path} ({self.queries} queries)"
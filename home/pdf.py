@@ -0,0 +1,268 @@
+# home/pdf.py
+"""
+Shared ReportLab rendering for printed documents (complaint reports,
+invoices, routine service certificates).
+
+Styles are built once at import, the company header comes from
+settings.COMPANY_DETAILS so every document changes together, and image
+bytes are cached by storage name and modified time. Each document type
+subclasses PDFDocument and declares its layout as a list of blocks;
+get_version() identifies the header and layout for caching rendered copies.
+"""
+import hashlib
+import json
+import logging
+from functools import lru_cache
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.http import HttpResponse
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.platypus import Image, PageBreak, Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+logger = logging.getLogger(__name__)
+
+# ---------- Precompiled styles ----------
+
+STYLES = getSampleStyleSheet()
+TITLE_STYLE = ParagraphStyle(
+    name='HeaderStyle',
+    parent=STYLES['Heading1'],
+    fontSize=18,
+    alignment=1  # Center
+)
+DETAIL_TABLE_STYLE = TableStyle([
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('FONTSIZE', (0, 0), (-1, -1), 10),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black),
+])
+ITEM_TABLE_STYLE = TableStyle([
+    ('GRID', (0, 0), (-1, -1), 1, colors.black),
+    ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
+    ('ALIGN', (1, 1), (-1, -1), 'RIGHT'),
+])
+DETAIL_COL_WIDTHS = [100, 400]
+SIGNATURE_LINE = "___________________________"
+
+
+def get_company_details():
+    """Company details printed in every document header"""
+    return settings.COMPANY_DETAILS
+
+
+# ---------- Image cache ----------
+
+def read_storage_bytes(name):
+    """
+    Bytes of a file in default storage, cached by name and modified time
+    so a file replaced under the same name is read again.
+    """
+    try:
+        modified = default_storage.get_modified_time(name)
+    except (NotImplementedError, OSError):
+        # No modified time from this storage: read it every time
+        return _read_storage_bytes(name)
+    return _read_cached_storage_bytes(name, modified)
+
+
+def _read_storage_bytes(name):
+    with default_storage.open(name, 'rb') as f:
+        return f.read()
+
+
+@lru_cache(maxsize=128)
+def _read_cached_storage_bytes(name, modified):
+    return _read_storage_bytes(name)
+
+
+def read_image_bytes(field_file):
+    """Bytes of an uploaded image (see read_storage_bytes)"""
+    return read_storage_bytes(field_file.name)
+
+
+# ---------- Layout blocks ----------
+
+class Block:
+    """A piece of document layout that expands into ReportLab flowables"""
+
+    def flowables(self):
+        raise NotImplementedError
+
+
+class Title(Block):
+    def __init__(self, text):
+        self.text = text
+
+    def flowables(self):
+        return [Paragraph(self.text, TITLE_STYLE), Spacer(1, 12)]
+
+
+class Section(Block):
+    """Section heading"""
+
+    def __init__(self, text, style='Heading2'):
+        self.text = text
+        self.style = style
+
+    def flowables(self):
+        return [Paragraph(self.text, STYLES[self.style])]
+
+
+class Details(Block):
+    """Two-column label/value grid"""
+
+    def __init__(self, rows, col_widths=None):
+        self.rows = rows
+        self.col_widths = col_widths or DETAIL_COL_WIDTHS
+
+    def flowables(self):
+        table = Table([[label, value if value is not None else ''] for label, value in self.rows], colWidths=self.col_widths)
+        table.setStyle(DETAIL_TABLE_STYLE)
+        return [table, Spacer(1, 12)]
+
+
+class Lines(Block):
+    """Label/value pairs printed as paragraphs"""
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    def flowables(self):
+        items = [Paragraph(f"{label}: {value if value is not None else ''}", STYLES['Normal']) for label, value in self.rows]
+        return items + [Spacer(1, 12)]
+
+
+class ItemsTable(Block):
+    """Line-item grid with a shaded header row"""
+
+    def __init__(self, header, rows, col_widths):
+        self.header = header
+        self.rows = rows
+        self.col_widths = col_widths
+
+    def flowables(self):
+        table = Table([self.header] + list(self.rows), colWidths=self.col_widths)
+        table.setStyle(ITEM_TABLE_STYLE)
+        return [table, Spacer(1, 12)]
+
+
+class Text(Block):
+    def __init__(self, text, style='Normal'):
+        self.text = text
+        self.style = style
+
+    def flowables(self):
+        return [Paragraph(self.text, STYLES[self.style])]
+
+
+class Signature(Block):
+    """Signature label followed by the captured image, or a blank line"""
+
+    def __init__(self, label, image=None, width=200, height=60):
+        self.label = label
+        self.image = image
+        self.width = width
+        self.height = height
+
+    def flowables(self):
+        items = [Paragraph(f"{self.label}:", STYLES['Normal'])]
+        if self.image:
+            try:
+                items.append(Image(BytesIO(read_image_bytes(self.image)), width=self.width, height=self.height))
+            except Exception as e:
+                logger.error(f"Error embedding {self.label} image: {str(e)}")
+                items.append(Paragraph("[Signature captured digitally]", STYLES['Italic']))
+        else:
+            items.append(Paragraph(SIGNATURE_LINE, STYLES['Normal']))
+        items.append(Spacer(1, 12))
+        return items
+
+
+def company_header():
+    """Company name, address and contact line"""
+    company = get_company_details()
+    return [
+        Paragraph(company['name'], TITLE_STYLE),
+        Paragraph(company['address'], STYLES['Normal']),
+        Paragraph(f"Phone: {company['phone']} | Email: {company['email']}", STYLES['Normal']),
+        Spacer(1, 12),
+    ]
+
+
+# ---------- Documents ----------
+
+class PDFDocument:
+    """
+    Base class for a printed document type. Subclasses implement
+    get_layout(obj) returning a list of blocks, and get_filename(obj).
+    """
+    title = None
+    show_company_header = True
+    # Bump when get_layout() or the styles change, so cached copies are re-rendered
+    layout_version = 1
+    pagesize = letter
+    margins = (72, 72, 72, 72)  # left, right, top, bottom
+
+    def get_layout(self, obj):
+        raise NotImplementedError
+
+    def get_filename(self, obj):
+        raise NotImplementedError
+
+    def get_queryset(self):
+        """Queryset with the relations get_layout() reads, for batch rendering"""
+        raise NotImplementedError
+
+    def get_version(self):
+        """Digest of the layout version and company header, for keys of cached renders"""
+        header = json.dumps(get_company_details(), sort_keys=True, default=str) if self.show_company_header else ''
+        return hashlib.sha256(f'{self.layout_version}:{header}'.encode()).hexdigest()[:12]
+
+    def build_story(self, obj):
+        story = company_header() if self.show_company_header else []
+        if self.title:
+            story.extend(Title(self.title).flowables())
+        for block in self.get_layout(obj):
+            story.extend(block.flowables())
+        return story
+
+    def _build(self, story):
+        buffer = BytesIO()
+        left, right, top, bottom = self.margins
+        doc = SimpleDocTemplate(
+            buffer, pagesize=self.pagesize,
+            leftMargin=left, rightMargin=right, topMargin=top, bottomMargin=bottom,
+        )
+        doc.build(story)
+        return buffer.getvalue()
+
+    def render(self, obj):
+        """Render a single document and return the PDF bytes"""
+        return self._build(self.build_story(obj))
+
+    def render_many(self, objs):
+        """Render each object to its own PDF; yields (obj, pdf_bytes)"""
+        for obj in objs:
+            yield obj, self.render(obj)
+
+    def render_merged(self, objs):
+        """Render several objects into one PDF, one document per page run"""
+        story = []
+        for obj in objs:
+            if story:
+                story.append(PageBreak())
+            story.extend(self.build_story(obj))
+        return self._build(story) if story else b''
+
+    def response(self, obj):
+        """HttpResponse with the rendered PDF as a download"""
+        return pdf_response(self.render(obj), self.get_filename(obj))
+
+
+def pdf_response(pdf_bytes, filename):
+    response = HttpResponse(pdf_bytes, content_type='application/pdf')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
@@ -0,0 +1,177 @@
+# home/profiling.py
+"""
+On-demand cProfile of requests.
+
+ProfilingMiddleware runs a request under cProfile when a superuser asks
+for it (an "X-Profile: 1" header or a "_profile=1" query parameter) or,
+for anyone, at the PROFILE_SAMPLE_RATE share of requests. The stats are
+saved with pstats' dump_stats() under PROFILE_DIR/<url name>/, next to a
+JSON file describing the request, and the response carries an
+X-Profile-Id header naming the file. Only the PROFILE_KEEP slowest
+sampled profiles of each URL name are kept; requested ones stay until
+deleted from the directory.
+
+The superuser-only "Profiles" admin page lists them slowest first, shows
+the top functions of one and downloads the .prof file for snakeviz or
+python -m pstats.
+"""
+import cProfile
+import io
+import json
+import os
+import pstats
+import random
+import re
+import time
+
+from django.conf import settings
+from django.utils import timezone
+
+_NAME = re.compile(r'[^A-Za-z0-9_.-]+')
+_PROFILE_ID = re.compile(r'^[A-Za-z0-9_-][A-Za-z0-9_.-]*/[0-9T]+-[0-9]+-[0-9]+\.prof$')
+
+SORTS = {
+    'cumulative': 'Cumulative time',
+    'tottime': 'Own time',
+    'ncalls': 'Calls',
+}
+
+
+def get_profile_dir():
+    return getattr(settings, 'PROFILE_DIR', os.path.join('/var/tmp', 'crm_lift_atom_profiles'))
+
+
+def get_url_name(request):
+    match = getattr(request, 'resolver_match', None)
+    name = (match.view_name or match.route) if match else 'unresolved'
+    return _NAME.sub('_', name or 'unresolved').strip('._')[:100] or 'unresolved'
+
+
+def is_requested(request):
+    if request.headers.get('X-Profile') == '1' or request.GET.get('_profile') == '1':
+        user = getattr(request, 'user', None)
+        return user is not None and user.is_superuser
+    return False
+
+
+class ProfilingMiddleware:
+    """Profile requests asked for by superusers or sampled at PROFILE_SAMPLE_RATE; needs request.user"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not (is_requested(request) or random.random() < getattr(settings, 'PROFILE_SAMPLE_RATE', 0)):
+            return self.get_response(request)
+
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        profiler.enable()
+        try:
+            response = self.get_response(request)
+        finally:
+            profiler.disable()
+
+        profile_id = new_profile_id(request, started)
+        requested = is_requested(request)
+        response['X-Profile-Id'] = profile_id
+        if response.streaming:
+            response.streaming_content = self.stream(request, response, profiler, started, profile_id, requested)
+        else:
+            save(profile_id, profiler, request, response, time.perf_counter() - started, requested)
+        return response
+
+    def stream(self, request, response, profiler, started, profile_id, requested):
+        # Profile the rows being produced, not the server writing them out
+        chunks = iter(response.streaming_content)
+        try:
+            while True:
+                profiler.enable()
+                try:
+                    chunk = next(chunks)
+                except StopIteration:
+                    break
+                finally:
+                    profiler.disable()
+                yield chunk
+        finally:
+            save(profile_id, profiler, request, response, time.perf_counter() - started, requested)
+
+
+def new_profile_id(request, started):
+    stamp = timezone.now().strftime('%Y%m%dT%H%M%S')
+    return f'{get_url_name(request)}/{stamp}-{int(started * 1000) % 1000000}-{os.getpid()}.prof'
+
+
+def save(profile_id, profiler, request, response, duration, requested=False):
+    path = os.path.join(get_profile_dir(), profile_id)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    profiler.dump_stats(path)
+    meta = {
+        'id': profile_id,
+        'method': request.method,
+        'path': request.get_full_path()[:500],
+        'status': response.status_code,
+        'duration_ms': round(duration * 1000, 2),
+        'user': getattr(getattr(request, 'user', None), 'pk', None),
+        'requested': requested,
+        'created_at': timezone.now().isoformat(),
+    }
+    with open(f'{path}.json', 'w') as meta_file:
+        json.dump(meta, meta_file)
+    prune(os.path.dirname(path))
+
+
+def prune(directory):
+    """Keep the PROFILE_KEEP slowest sampled profiles of a URL name"""
+    keep = getattr(settings, 'PROFILE_KEEP', 20)
+    sampled = [meta for meta in read_meta(directory) if not meta.get('requested')]
+    profiles = sorted(sampled, key=lambda meta: meta['duration_ms'], reverse=True)
+    for meta in profiles[keep:]:
+        for path in (resolve(meta['id']), f"{resolve(meta['id'])}.json"):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+def read_meta(directory):
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return []
+    profiles = []
+    for name in names:
+        if name.endswith('.prof.json'):
+            try:
+                with open(os.path.join(directory, name)) as meta_file:
+                    profiles.append(json.load(meta_file))
+            except (OSError, ValueError):
+                continue
+    return profiles
+
+
+def list_profiles(limit=100):
+    """Saved profiles of every URL name, slowest first"""
+    root = get_profile_dir()
+    try:
+        names = os.listdir(root)
+    except FileNotFoundError:
+        return []
+    profiles = [meta for name in names for meta in read_meta(os.path.join(root, name))]
+    return sorted(profiles, key=lambda meta: meta['duration_ms'], reverse=True)[:limit]
+
+
+def resolve(profile_id):
+    """The file of a profile id, or None when it is not one (ids come from the query string)"""
+    if not _PROFILE_ID.match(profile_id or ''):
+        return None
+    return os.path.join(get_profile_dir(), profile_id)
+
+
+def top_functions(profile_id, sort='cumulative', limit=40):
+    """pstats' report of the top functions of a saved profile"""
+    output = io.StringIO()
+    stats = pstats.Stats(resolve(profile_id), stream=output)
+    stats.strip_dirs().sort_stats(sort if sort in SORTS else 'cumulative').print_stats(limit)
+    return output.getvalue()
@@ -0,0 +1,135 @@
+# home/reference_data.py
+"""
+Reference-data bundles: all lookup tables an add/edit form needs, in one response.
+
+BUNDLES maps a bundle name (one per form family) to its tables. Each
+bundle has a version number, kept in ReferenceDataVersion so every worker
+process sees the same value. Saving or deleting a row of any model in the
+bundle bumps the version with one F() UPDATE (see home/signals.py).
+Bundles are cached under their version, and the endpoint sends the
+version as an ETag. A form reopened with an unchanged bundle costs one
+indexed version lookup and gets 304 Not Modified.
+
+Queryset .update() and bulk_create() bypass the signals. Call
+bump_version() after such writes to lookup models.
+"""
+from dataclasses import dataclass, field
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+
+
+@dataclass(frozen=True)
+class LookupTable:
+    model: str
+    fields: tuple = ('id', 'value')
+    order_by: tuple = ('value',)
+    filters: dict = field(default_factory=dict)
+    # Optional row transform, for tables whose rows are not plain field values
+    row: object = None
+
+    def get_model(self):
+        return apps.get_model(self.model)
+
+    def rows(self):
+        queryset = self.get_model().objects.filter(**self.filters).order_by(*self.order_by)
+        if self.filters:
+            queryset = queryset.distinct()
+        rows = queryset.values(*self.fields)
+        return [self.row(row) for row in rows] if self.row else list(rows)
+
+
+def executive_row(user):
+    full_name = f"{user['first_name'] or ''} {user['last_name'] or ''}".strip() or user['username']
+    return {'id': user['id'], 'full_name': full_name}
+
+
+# Table keys and row shapes match the per-table endpoints they replace
+BUNDLES = {
+    'lift': {
+        'floorids': LookupTable('lift.FloorID'),
+        'brands': LookupTable('lift.Brand'),
+        'lifttypes': LookupTable('lift.LiftType'),
+        'machinetypes': LookupTable('lift.MachineType'),
+        'machinebrands': LookupTable('lift.MachineBrand'),
+        'doortypes': LookupTable('lift.DoorType'),
+        'doorbrands': LookupTable('lift.DoorBrand'),
+        'controllerbrands': LookupTable('lift.ControllerBrand'),
+        'cabins': LookupTable('lift.Cabin'),
+    },
+    'customer': {
+        'states': LookupTable('customer.ProvinceState'),
+        'routes': LookupTable('customer.Route'),
+        'branches': LookupTable('customer.Branch'),
+        'cities': LookupTable('customer.City'),
+    },
+    'items': {
+        'types': LookupTable('items.Type'),
+        'makes': LookupTable('items.Make'),
+        'units': LookupTable('items.Unit'),
+    },
+    'complaints': {
+        'types': LookupTable('complaints.ComplaintType', fields=('id', 'name'), order_by=('name',)),
+        'priorities': LookupTable('complaints.ComplaintPriority', fields=('id', 'name'), order_by=('name',)),
+        'executives': LookupTable(
+            'authentication.CustomUser',
+            fields=('id', 'first_name', 'last_name', 'username'),
+            order_by=('first_name', 'last_name'),
+            filters={'groups__name': 'employee'},
+            row=executive_row,
+        ),
+    },
+}
+
+
+def get_cache_seconds():
+    return getattr(settings, 'REFERENCE_DATA_CACHE_SECONDS', 3600)
+
+
+def bundles_for_model(model):
+    """Bundle names, and the fields they read, for a model class"""
+    label = model._meta.label_lower
+    return {
+        name: {field for table in tables.values() if table.model.lower() == label for field in table.fields}
+        for name, tables in BUNDLES.items()
+        if any(table.model.lower() == label for table in tables.values())
+    }
+
+
+def lookup_models():
+    return {table.get_model() for tables in BUNDLES.values() for table in tables.values()}
+
+
+def get_version(bundle):
+    from .models import ReferenceDataVersion
+
+    return ReferenceDataVersion.objects.filter(bundle=bundle).values_list('version', flat=True).first() or 0
+
+
+def bump_version(*bundles):
+    from .models import ReferenceDataVersion
+
+    for bundle in bundles:
+        if not ReferenceDataVersion.objects.filter(bundle=bundle).update(version=F('version') + 1):
+            ReferenceDataVersion.objects.get_or_create(bundle=bundle)
+
+
+def build_bundle(bundle):
+    return {key: table.rows() for key, table in BUNDLES[bundle].items()}
+
+
+def get_bundle(bundle, version=None):
+    """(version, tables) for a bundle, from the cache when that version was built before"""
+    version = get_version(bundle) if version is None else version
+    key = f'reference-data:{bundle}:{version}'
+    tables = cache.get(key)
+    if tables is None:
+        tables = build_bundle(bundle)
+        cache.set(key, tables, get_cache_seconds())
+    return version, tables
+
+
+def bundle_etag(bundle, version):
+    return f'{bundle}-{version}'
@@ -0,0 +1,52 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+from .caching import IGNORED_FIELDS, bump_namespaces, invalidate_namespaces, namespace_models, namespaces_for_model
+from .reference_data import bump_version, bundles_for_model, lookup_models
+
+
+def bump_bundles(sender, update_fields=None, raw=False, **kwargs):
+    bundles = bundles_for_model(sender)
+    if update_fields is not None:
+        # e.g. a login only updating last_login leaves the executives table unchanged
+        bundles = {name: fields for name, fields in bundles.items() if fields & set(update_fields)}
+    bump_version(*bundles)
+
+
+def bump_group_membership(sender, instance, action, reverse, model, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        # reverse: users were added to or removed from a group
+        bump_version(*bundles_for_model(model if reverse else type(instance)))
+
+
+def invalidate_cached(sender, update_fields=None, **kwargs):
+    ignored = IGNORED_FIELDS.get(sender._meta.label_lower, set())
+    if update_fields is not None and set(update_fields) <= ignored:
+        return
+    invalidate_namespaces(*namespaces_for_model(sender))
+
+
+def invalidate_group_membership(sender, instance, action, reverse, model, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        bump_namespaces(*namespaces_for_model(model if reverse else type(instance)))
+
+
+def connect_signals():
+    for model in lookup_models():
+        uid = f'reference_data_{model._meta.label_lower}'
+        post_save.connect(bump_bundles, sender=model, dispatch_uid=f'{uid}_save')
+        post_delete.connect(bump_bundles, sender=model, dispatch_uid=f'{uid}_delete')
+        if hasattr(model, 'groups'):
+            # Executive lists filter users by group
+            m2m_changed.connect(
+                bump_group_membership, sender=model.groups.through, dispatch_uid=f'{uid}_groups',
+            )
+
+    for model in namespace_models():
+        uid = f'cached_{model._meta.label_lower}'
+        post_save.connect(invalidate_cached, sender=model, dispatch_uid=f'{uid}_save')
+        post_delete.connect(invalidate_cached, sender=model, dispatch_uid=f'{uid}_delete')
+        if hasattr(model, 'groups'):
+            # Roles are group memberships
+            m2m_changed.connect(
+                invalidate_group_membership, sender=model.groups.through, dispatch_uid=f'{uid}_groups',
+            )
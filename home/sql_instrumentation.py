@@ -0,0 +1,231 @@
+# home/sql_instrumentation.py
+"""
+Per-request SQL instrumentation.
+
+SQLInstrumentationMiddleware profiles a sample of requests
+(SQL_PROFILE_SAMPLE_RATE): every statement run on the default database
+is timed and fingerprinted (the SQL with its parameters and IN lists
+collapsed), so a statement repeated once per row of a listing shows up
+as one fingerprint run many times. For each sampled request it
+
+- adds a Server-Timing header (db and app durations, query counts),
+  shown in the browser's network panel;
+- logs one JSON line on the "home.sql_instrumentation" logger;
+- stores a RequestProfile row, summarised per endpoint over the last
+  hours on the superuser-only "SQL report" admin page (worst_endpoints()).
+
+Queries run while a streamed response (e.g. a CSV export) is sent are
+counted too; its Server-Timing header only covers the view.
+"""
+import json
+import logging
+import random
+import re
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, connection
+from django.db.models import Avg, Count, Max, Sum
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+STATEMENT_CHARS = 500
+
+_STRING = re.compile(r"'(?:[^'\\]|\\.|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST = re.compile(r'\bIN\s*\((?:\s*(?:%s|\?)\s*,?)+\)', re.IGNORECASE)
+_SPACE = re.compile(r'\s+')
+
+
+def fingerprint(sql):
+    """The statement with literals and IN lists collapsed, the same for every row a loop fetches"""
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = sql.replace('%s', '?')
+    sql = _IN_LIST.sub('IN (...)', sql)
+    return _SPACE.sub(' ', sql).strip()
+
+
+class QueryRecorder:
+    """connection.execute_wrapper() recording the time of each statement by fingerprint"""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.statements = defaultdict(lambda: {'count': 0, 'seconds': 0.0})
+        self.slowest = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.record(sql, time.perf_counter() - started)
+
+    def record(self, sql, seconds):
+        self.count += 1
+        self.seconds += seconds
+        statement = self.statements[fingerprint(sql)]
+        statement['count'] += 1
+        statement['seconds'] += seconds
+        self.slowest.append((seconds, sql))
+        if len(self.slowest) > 4 * get_setting('SQL_PROFILE_SLOWEST', 5):
+            self.trim_slowest()
+
+    @property
+    def duplicate_queries(self):
+        # Statements beyond the first run of each fingerprint: N+1 suspects
+        return sum(s['count'] - 1 for s in self.statements.values())
+
+    def trim_slowest(self):
+        self.slowest = sorted(self.slowest, key=lambda item: item[0], reverse=True)[:get_setting('SQL_PROFILE_SLOWEST', 5)]
+
+    def summary(self):
+        self.trim_slowest()
+        repeated = sorted(
+            ((sql, s) for sql, s in self.statements.items() if s['count'] > 1),
+            key=lambda item: (item[1]['count'], item[1]['seconds']),
+            reverse=True,
+        )
+        return {
+            'queries': self.count,
+            'sql_ms': round(self.seconds * 1000, 2),
+            'duplicate_queries': self.duplicate_queries,
+            'duplicates': [
+                {'sql': sql[:STATEMENT_CHARS], 'count': s['count'], 'ms': round(s['seconds'] * 1000, 2)}
+                for sql, s in repeated[:get_setting('SQL_PROFILE_SLOWEST', 5)]
+            ],
+            'slowest': [
+                {'sql': sql[:STATEMENT_CHARS], 'ms': round(seconds * 1000, 2)} for seconds, sql in self.slowest
+            ],
+        }
+
+
+def get_setting(name, default):
+    return getattr(settings, name, default)
+
+
+def get_endpoint(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return request.path[:200]
+    return (match.view_name or match.route or request.path)[:200]
+
+
+class SQLInstrumentationMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if random.random() >= get_setting('SQL_PROFILE_SAMPLE_RATE', 0):
+            return self.get_response(request)
+
+        recorder = QueryRecorder()
+        started = time.perf_counter()
+        connection.execute_wrappers.append(recorder)
+        try:
+            response = self.get_response(request)
+        except BaseException:
+            connection.execute_wrappers.remove(recorder)
+            raise
+
+        duration = time.perf_counter() - started
+        response['Server-Timing'] = ', '.join([
+            f'db;dur={recorder.seconds * 1000:.1f};desc="{recorder.count} queries, '
+            f'{recorder.duplicate_queries} repeated"',
+            f'app;dur={duration * 1000:.1f}',
+        ])
+        if response.streaming:
+            # Run when the server closes the response: after the last chunk,
+            # or without it being read at all (HEAD, client gone)
+            response._resource_closers.append(lambda: self.finish(request, response, recorder, started))
+        else:
+            connection.execute_wrappers.remove(recorder)
+            self.save(request, response, recorder, duration)
+        return response
+
+    def finish(self, request, response, recorder, started):
+        if recorder not in connection.execute_wrappers:
+            return
+        connection.execute_wrappers.remove(recorder)
+        self.save(request, response, recorder, time.perf_counter() - started)
+
+    def save(self, request, response, recorder, duration):
+        from .models import RequestProfile
+
+        profile = {
+            'method': request.method,
+            'endpoint': get_endpoint(request),
+            'path': request.path[:500],
+            'status': response.status_code,
+            'duration_ms': round(duration * 1000, 2),
+            **recorder.summary(),
+        }
+        logger.info(json.dumps({'event': 'sql_profile', **profile}))
+        try:
+            RequestProfile.objects.create(
+                method=profile['method'],
+                endpoint=profile['endpoint'],
+                path=profile['path'],
+                status=profile['status'],
+                duration_ms=profile['duration_ms'],
+                queries=profile['queries'],
+                sql_ms=profile['sql_ms'],
+                duplicate_queries=profile['duplicate_queries'],
+                details={'duplicates': profile['duplicates'], 'slowest': profile['slowest']},
+            )
+            if random.random() < 0.01:
+                prune()
+        except DatabaseError:
+            logger.exception('Could not store the SQL profile of %s', profile['path'])
+
+
+def prune():
+    """Delete profiles older than SQL_PROFILE_RETENTION_HOURS"""
+    from .models import RequestProfile
+
+    cutoff = timezone.now() - timedelta(hours=get_setting('SQL_PROFILE_RETENTION_HOURS', 168))
+    RequestProfile.objects.filter(created_at__lt=cutoff).delete()
+
+
+SORTS = {
+    'sql': '-total_sql_ms',
+    'queries': '-avg_queries',
+    'duplicates': '-avg_duplicate_queries',
+    'duration': '-avg_duration_ms',
+}
+
+
+def worst_endpoints(hours=24, sort='sql', limit=25):
+    """Sampled endpoints of the last hours, worst first, each with its worst sample's repeated statements"""
+    from .models import RequestProfile
+
+    profiles = RequestProfile.objects.filter(created_at__gte=timezone.now() - timedelta(hours=hours))
+    rows = list(
+        profiles.values('method', 'endpoint')
+        .annotate(
+            requests=Count('id'),
+            avg_queries=Avg('queries'),
+            max_queries=Max('queries'),
+            avg_duplicate_queries=Avg('duplicate_queries'),
+            avg_sql_ms=Avg('sql_ms'),
+            total_sql_ms=Sum('sql_ms'),
+            avg_duration_ms=Avg('duration_ms'),
+            max_duration_ms=Max('duration_ms'),
+        )
+        .order_by(SORTS.get(sort, SORTS['sql']))[:limit]
+    )
+    for row in rows:
+        worst = (
+            profiles.filter(method=row['method'], endpoint=row['endpoint'])
+            .order_by('-duplicate_queries', '-sql_ms')
+            .only('path', 'details')
+            .first()
+        )
+        row['worst_path'] = worst.path
+        row['duplicates'] = worst.details.get('duplicates', [])
+        row['slowest'] = worst.details.get('slowest', [])
+    return rows
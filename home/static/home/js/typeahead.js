@@ -0,0 +1,252 @@
+/*
+ * Typeahead pick lists backed by /home/api/typeahead/<source>/ (see home/typeahead.py).
+ *
+ * Typeahead.search(source, term, params)  -> Promise of matching rows
+ * Typeahead.fetch(source, ids)            -> Promise of the rows with these ids
+ * Typeahead.recordUse(source, id)         ranks the row first in the user's next searches
+ * Typeahead.attach(select, options)       turns a <select> into a search box
+ *
+ * Selects marked data-typeahead="<source>" are attached on load and when
+ * added to the page later (e.g. listing filters, see home/filters.py).
+ *
+ * An attached <select> stays in the form, hidden, and holds only the chosen
+ * option, so existing submit code keeps reading select.value. Picking a row
+ * sets that option (row values are copied to its data-* attributes, e.g.
+ * data-sale_price), stores the row on select.typeaheadRow and fires 'change'.
+ */
+(function () {
+  const BASE_URL = '/home/api/typeahead/';
+  const DELAY = 200;
+
+  function csrfToken() {
+    const input = document.querySelector('[name=csrfmiddlewaretoken]');
+    if (input) return input.value;
+    const match = document.cookie.match(/(?:^|;\s*)csrftoken=([^;]+)/);
+    return match ? decodeURIComponent(match[1]) : '';
+  }
+
+  function query(source, params) {
+    const search = new URLSearchParams();
+    Object.entries(params || {}).forEach(([key, value]) => {
+      if (value !== null && value !== undefined && value !== '') search.append(key, value);
+    });
+    return fetch(`${BASE_URL}${source}/?${search}`, { headers: { 'Accept': 'application/json' } })
+      .then(response => {
+        if (!response.ok) throw new Error(`Failed to search ${source}`);
+        return response.json();
+      })
+      .then(data => data.results);
+  }
+
+  function search(source, term, params) {
+    return query(source, Object.assign({}, params, { q: term || '' }));
+  }
+
+  function fetchRows(source, ids) {
+    ids = (ids || []).filter(id => id !== null && id !== undefined && id !== '');
+    return ids.length ? query(source, { ids: ids.join(',') }) : Promise.resolve([]);
+  }
+
+  function recordUse(source, id) {
+    const body = new URLSearchParams({ id: id });
+    return fetch(`${BASE_URL}${source}/use/`, {
+      method: 'POST',
+      headers: { 'X-CSRFToken': csrfToken() },
+      body: body,
+    }).catch(() => {});
+  }
+
+  function debounce(fn, delay) {
+    let timer = null;
+    return function (...args) {
+      clearTimeout(timer);
+      timer = setTimeout(() => fn.apply(this, args), delay === undefined ? DELAY : delay);
+    };
+  }
+
+  function escapeHtml(value) {
+    return String(value === null || value === undefined ? '' : value)
+      .replace(/&/g, '&amp;').replace(/</g, '&lt;').replace(/>/g, '&gt;').replace(/"/g, '&quot;');
+  }
+
+  const LABELS = {
+    customers: row => row.site_name,
+    items: row => row.name,
+    amcs: row => row.customer_name ? `${row.reference_id} - ${row.customer_name}` : row.reference_id,
+    invoices: row => row.reference_id,
+    lifts: row => row.name,
+    executives: row => `${row.first_name || ''} ${row.last_name || ''}`.trim() || `#${row.id}`,
+  };
+
+  const DETAILS = {
+    customers: row => [row.reference_id, row.job_no].filter(Boolean).join(' · '),
+    items: row => [row.item_number, row.sale_price ? `₹${row.sale_price}` : ''].filter(Boolean).join(' · '),
+    amcs: row => row.end_date ? `Ends ${row.end_date}` : '',
+    invoices: row => row.customer_name || '',
+    lifts: row => [row.reference_id, row.brand_name || row.brand].filter(Boolean).join(' · '),
+  };
+
+  function setOption(select, row, label) {
+    select.innerHTML = '';
+    const option = document.createElement('option');
+    option.value = row ? row.id : '';
+    option.textContent = row ? label : '';
+    if (row) {
+      Object.entries(row).forEach(([key, value]) => {
+        if (value !== null && typeof value !== 'object') option.dataset[key] = value;
+      });
+    }
+    option.selected = true;
+    select.appendChild(option);
+    select.typeaheadRow = row || null;
+  }
+
+  function attach(select, options) {
+    if (select.typeahead) return select.typeahead;
+    options = Object.assign({}, options);
+    const source = options.source || select.dataset.typeahead;
+    const label = options.label || LABELS[source] || (row => row.name || row.reference_id || row.id);
+    const detail = options.detail || DETAILS[source] || (() => '');
+
+    const wrapper = document.createElement('div');
+    wrapper.className = 'typeahead';
+    const input = document.createElement('input');
+    input.type = 'text';
+    input.autocomplete = 'off';
+    input.className = options.inputClass || select.className.replace('form-select', '').trim() || 'form-input';
+    input.placeholder = options.placeholder || select.dataset.placeholder || 'Type to search...';
+    const menu = document.createElement('div');
+    menu.className = 'typeahead-menu';
+    menu.hidden = true;
+
+    select.parentNode.insertBefore(wrapper, select);
+    wrapper.appendChild(input);
+    wrapper.appendChild(menu);
+    wrapper.appendChild(select);
+    select.style.display = 'none';
+
+    // Keep only the saved option, if any
+    const current = select.options[select.selectedIndex];
+    if (current && current.value) {
+      input.value = current.textContent.trim();
+      Array.from(select.options).forEach(option => { if (option !== current) option.remove(); });
+    } else {
+      setOption(select, null);
+    }
+
+    let results = [];
+    let active = -1;
+    let requestId = 0;
+
+    function render() {
+      if (!results.length) {
+        menu.innerHTML = '<div class="typeahead-empty">No matches found</div>';
+      } else {
+        menu.innerHTML = results.map((row, index) => `
+          <div class="typeahead-option${index === active ? ' active' : ''}" data-index="${index}">
+            <div class="typeahead-label">${escapeHtml(label(row))}</div>
+            ${detail(row) ? `<div class="typeahead-detail">${escapeHtml(detail(row))}</div>` : ''}
+          </div>`).join('');
+      }
+      menu.hidden = false;
+    }
+
+    function load() {
+      const id = ++requestId;
+      const params = options.params ? options.params() : {};
+      search(source, input.value.trim(), params).then(rows => {
+        if (id !== requestId) return;  // a newer search is under way
+        results = rows;
+        active = -1;
+        render();
+      }).catch(error => console.error(error));
+    }
+
+    // picked: chosen by the user (recorded as a recent use), not set by the page
+    function choose(row, picked = true) {
+      setOption(select, row, row ? label(row) : '');
+      input.value = row ? label(row) : '';
+      menu.hidden = true;
+      if (row && picked) recordUse(source, row.id);
+      select.dispatchEvent(new Event('change', { bubbles: true }));
+      if (options.onSelect) options.onSelect(row, select);
+    }
+
+    const delayedLoad = debounce(load);
+    input.addEventListener('input', () => {
+      if (!input.value.trim() && select.value) choose(null, false);
+      delayedLoad();
+    });
+    // Only the select's value belongs to the form: keep the search text's
+    // events from auto-submitting forms (e.g. Wagtail listing filters)
+    ['input', 'change'].forEach(type => input.addEventListener(type, event => event.stopPropagation()));
+    input.addEventListener('focus', load);
+    input.addEventListener('keydown', event => {
+      if (menu.hidden || !results.length) return;
+      if (event.key === 'ArrowDown' || event.key === 'ArrowUp') {
+        event.preventDefault();
+        const step = event.key === 'ArrowDown' ? 1 : -1;
+        active = (active + step + results.length) % results.length;
+        render();
+      } else if (event.key === 'Enter' && active >= 0) {
+        event.preventDefault();
+        choose(results[active]);
+      } else if (event.key === 'Escape') {
+        menu.hidden = true;
+      }
+    });
+    // mousedown fires before the input's blur hides the menu
+    menu.addEventListener('mousedown', event => {
+      const option = event.target.closest('.typeahead-option');
+      if (option) {
+        event.preventDefault();
+        choose(results[Number(option.dataset.index)]);
+      }
+    });
+    input.addEventListener('blur', () => {
+      menu.hidden = true;
+      // Typed text that was not picked does not change the value
+      const option = select.options[select.selectedIndex];
+      input.value = option && option.value ? option.textContent.trim() : '';
+    });
+
+    select.typeahead = {
+      input: input,
+      select: select,
+      // Show a row the page already has (e.g. from another endpoint)
+      set(row) { choose(row, false); },
+      // Show the row with this id (e.g. from ?customerId=)
+      setValue(id) {
+        return fetchRows(source, [id]).then(rows => {
+          if (rows.length) choose(rows[0], false);
+          return rows[0] || null;
+        });
+      },
+      clear() { choose(null, false); },
+    };
+    return select.typeahead;
+  }
+
+  function attachAll(root) {
+    (root || document).querySelectorAll('select[data-typeahead]').forEach(select => attach(select));
+  }
+
+  document.addEventListener('DOMContentLoaded', () => {
+    attachAll();
+    // Wagtail listings re-render their filters after each search
+    new MutationObserver(mutations => {
+      if (mutations.some(mutation => mutation.addedNodes.length)) attachAll();
+    }).observe(document.body, { childList: true, subtree: true });
+  });
+
+  window.Typeahead = {
+    search: search,
+    fetch: fetchRows,
+    recordUse: recordUse,
+    debounce: debounce,
+    escapeHtml: escapeHtml,
+    attach: attach,
+    attachAll: attachAll,
+    labels: LABELS,
+  };
+})();
@@ -0,0 +1,357 @@
+# home/synthetic.py
+"""
+Synthetic data at production-like volumes, for benchmarks (see
+home/benchmarks.py) and for trying changes against realistic tables.
+
+seed() bulk-inserts customers with their lifts and licenses, AMCs with
+their AMCRoutineService schedules, routine services, complaints,
+invoices with items, payments, stock register entries and attendance of
+a set of employees. Rows go in with bulk_create(), which skips save() and
+the post_save signals, so seed() fills in what those would (reference
+numbers, totals) and finishes the way the maintenance commands do:
+invoice_totals, reconcile_payments and stock_balances --rebuild, then a
+bump of every cache namespace.
+
+Seeding appends to whatever is in the database; it is meant for SQLite
+or a local MySQL, never the production host (see is_local_database()).
+"""
+import random
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group
+from django.db import connections, transaction
+from django.utils import timezone
+
+from amc.models import AMC, AMCRoutineService, AMCType, PaymentTerms
+from attendance.models import AttendanceRecord
+from authentication.models import CustomUser
+from complaints.models import Complaint, ComplaintPriority, ComplaintType
+from customer.models import Branch, City, Customer, CustomerLicense, ProvinceState, Route
+from invoice.models import Invoice, InvoiceItem
+from invoice.totals import recalculate_totals
+from items.models import Item, Make, Type, Unit
+from lift.models import Brand, Lift, LiftType, MachineType
+from PaymentReceived.allocation import reconcile_all
+from PaymentReceived.models import PaymentReceived
+from Requisition.models import StockBalance, StockRegister
+from Requisition.stock import rebuild_balances
+from Routine_services.models import RoutineService
+
+from .caching import NAMESPACES, bump_namespaces
+
+BATCH_SIZE = 1000
+
+# Rows per model at each scale; AMC schedules have services_per_amc services each
+SCALES = {
+    'tiny': {
+        'customers': 30, 'amcs': 20, 'services_per_amc': 4, 'routine_services': 30, 'complaints': 40,
+        'invoices': 30, 'payments': 20, 'items': 20, 'stock_entries': 60, 'employees': 5, 'attendance_days': 5,
+    },
+    'small': {
+        'customers': 2000, 'amcs': 1500, 'services_per_amc': 4, 'routine_services': 2000, 'complaints': 3000,
+        'invoices': 2000, 'payments': 1500, 'items': 200, 'stock_entries': 2000, 'employees': 20, 'attendance_days': 30,
+    },
+    'large': {
+        'customers': 20000, 'amcs': 15000, 'services_per_amc': 4, 'routine_services': 20000, 'complaints': 30000,
+        'invoices': 20000, 'payments': 15000, 'items': 500, 'stock_entries': 20000, 'employees': 50, 'attendance_days': 90,
+    },
+}
+
+CITIES = ('Bengaluru', 'Mysuru', 'Chennai', 'Hyderabad', 'Pune', 'Mumbai')
+ROUTES = ('North', 'South', 'East', 'West', 'Central')
+
+
+def is_local_database(alias='default'):
+    """SQLite, or MySQL on this machine: never seed or benchmark the shared production database"""
+    connection = connections[alias]
+    if connection.vendor == 'sqlite':
+        return True
+    return connection.settings_dict.get('HOST') in ('', 'localhost', '127.0.0.1', '::1')
+
+
+def next_number(model, field, prefix, default=0):
+    """The number after the last reference model.save() would have generated"""
+    last = model.objects.filter(**{f'{field}__startswith': prefix}).order_by('id').values_list(field, flat=True).last()
+    try:
+        return int(last[len(prefix):]) + 1 if last else default + 1
+    except ValueError:
+        return model.objects.count() + default + 1
+
+
+def insert(model, rows, key):
+    """bulk_create rows; returns {key value: pk} (MySQL does not set pks on bulk-created rows)"""
+    model.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+    values = [getattr(row, key) for row in rows]
+    pks = {}
+    for start in range(0, len(values), BATCH_SIZE):
+        chunk = values[start:start + BATCH_SIZE]
+        pks.update(model.objects.filter(**{f'{key}__in': chunk}).values_list(key, 'pk'))
+    return pks
+
+
+def lookups(model, values, field='value'):
+    return [
+        model.objects.filter(**{field: value}).first() or model.objects.create(**{field: value})
+        for value in values
+    ]
+
+
+class Seeder:
+    def __init__(self, counts, seed=None, log=None):
+        self.counts = counts
+        self.random = random.Random(seed)
+        self.log = log or (lambda message: None)
+        self.today = timezone.localdate()
+
+    def days_ago(self, most, least=0):
+        return self.today - timedelta(days=self.random.randint(least, most))
+
+    def money(self, low, high):
+        return Decimal(self.random.randrange(low * 100, high * 100)) / 100
+
+    def run(self):
+        self.lookups()
+        with transaction.atomic():
+            self.employees()
+            self.customers()
+            self.amcs()
+            self.routine_services()
+            self.complaints()
+            self.items()
+            self.invoices()
+            self.payments()
+            self.stock()
+            self.attendance()
+        self.log('Recomputing invoice totals, payment allocations and stock balances')
+        recalculate_totals(Invoice.objects.filter(pk__gte=min(self.invoice_pks.values(), default=0)))
+        reconcile_all(customer_ids=set(self.customer_ids))
+        rebuild_balances(StockRegister, StockBalance)
+        # bulk_create() skipped the signals that invalidate cached reads
+        bump_namespaces(*NAMESPACES)
+        return {name: count for name, count in self.created.items()}
+
+    def lookups(self):
+        self.states = lookups(ProvinceState, ('Karnataka', 'Tamil Nadu', 'Telangana', 'Maharashtra'))
+        self.cities = lookups(City, CITIES)
+        self.routes = lookups(Route, ROUTES)
+        self.branches = lookups(Branch, ('Head Office', 'Branch 1', 'Branch 2'))
+        self.brands = lookups(Brand, ('Atom', 'Kone', 'Otis', 'Schindler'))
+        self.lift_types = lookups(LiftType, ('Passenger', 'Goods', 'Hospital'))
+        self.machine_types = lookups(MachineType, ('Geared', 'Gearless'))
+        self.amc_types = lookups(AMCType, ('Comprehensive', 'Non-Comprehensive'), 'name')
+        self.payment_terms = lookups(PaymentTerms, ('Advance', 'Quarterly'), 'name')
+        self.complaint_types = lookups(ComplaintType, ('Breakdown', 'Noise', 'Door Fault', 'Entrapment'), 'name')
+        self.priorities = lookups(ComplaintPriority, ('High', 'Medium', 'Low'), 'name')
+        self.makes = lookups(Make, ('Atom', 'Bosch', 'Siemens'))
+        self.types = lookups(Type, ('Spare', 'Consumable', 'Service'))
+        self.units = lookups(Unit, ('Nos', 'Mtr', 'Ltr'))
+        self.created = {}
+
+    def employees(self):
+        group, _ = Group.objects.get_or_create(name='employee')
+        start = CustomUser.objects.filter(email__startswith='synthetic.tech').count() + 1
+        password = make_password(None)
+        users = [
+            CustomUser(
+                email=f'synthetic.tech{n}@example.com', username=f'synthetic.tech{n}', password=password,
+                first_name='Tech', last_name=f'{n:04d}', phone_number=f'6{n:09d}',
+            )
+            for n in range(start, start + self.counts['employees'])
+        ]
+        self.employee_ids = list(insert(CustomUser, users, 'email').values())
+        CustomUser.groups.through.objects.bulk_create(
+            [CustomUser.groups.through(customuser_id=pk, group_id=group.pk) for pk in self.employee_ids],
+            batch_size=BATCH_SIZE,
+        )
+        self.created['employees'] = len(self.employee_ids)
+
+    def customers(self):
+        start = next_number(Customer, 'reference_id', 'ATOM')
+        customers = []
+        for n in range(start, start + self.counts['customers']):
+            city = self.random.randrange(len(CITIES))
+            customers.append(Customer(
+                reference_id=f'ATOM{n:03d}', job_no=f'SYN{n}', site_name=f'{CITIES[city]} Residency {n}',
+                site_address=f'{n} Main Road, {CITIES[city]}', email=f'synthetic.site{n}@example.com',
+                phone=f'7{n:09d}', contact_person_name=f'Contact {n}', sector=self.random.choice(('private', 'government')),
+                province_state=self.random.choice(self.states), city=self.cities[city],
+                routes=self.random.choice(self.routes), branch=self.random.choice(self.branches),
+                latitude=Decimal('12.9') + self.money(0, 1) / 10, longitude=Decimal('77.5') + self.money(0, 1) / 10,
+            ))
+        self.customer_pks = insert(Customer, customers, 'reference_id')
+        self.customer_ids = list(self.customer_pks.values())
+
+        year = datetime.now().year
+        lift_start = Lift.objects.filter(reference_id__startswith=f'LIFT-{year}-').count() + 1
+        lifts = [
+            Lift(
+                reference_id=f'LIFT-{year}-{lift_start + index:04d}', lift_code=f'{customer.job_no}-L1',
+                name=f'Lift {customer.job_no}', model='Standard', no_of_passengers=8, load_kg=544, speed='1 mps',
+                brand=self.random.choice(self.brands), lift_type=self.random.choice(self.lift_types),
+                machine_type=self.random.choice(self.machine_types),
+            )
+            for index, customer in enumerate(customers)
+        ]
+        lift_pks = insert(Lift, lifts, 'lift_code')
+        self.lift_by_customer = {
+            self.customer_pks[customer.reference_id]: lift_pks[lift.lift_code] for customer, lift in zip(customers, lifts)
+        }
+
+        license_start = next_number(CustomerLicense, 'license_ref_no', 'LIC')
+        CustomerLicense.objects.bulk_create([
+            CustomerLicense(
+                license_ref_no=f'LIC{license_start + index:04d}', customer_id=customer_id, lift_id=lift_id,
+                period_start=self.days_ago(300), period_end=self.today + timedelta(days=self.random.randint(-60, 365)),
+            )
+            for index, (customer_id, lift_id) in enumerate(self.lift_by_customer.items())
+        ], batch_size=BATCH_SIZE)
+        self.created.update(customers=len(customers), lifts=len(lifts), licenses=len(lifts))
+
+    def amcs(self):
+        start = next_number(AMC, 'reference_id', 'AMC')
+        amcs = []
+        for n in range(start, start + self.counts['amcs']):
+            start_date = self.days_ago(540)
+            amc = AMC(
+                reference_id=f'AMC{n:02d}', customer_id=self.random.choice(self.customer_ids),
+                amc_type=self.random.choice(self.amc_types), payment_terms=self.random.choice(self.payment_terms),
+                start_date=start_date, end_date=start_date + timedelta(days=365),
+                no_of_services=self.counts['services_per_amc'], price=self.money(8000, 40000), no_of_lifts=1,
+                gst_percentage=Decimal('18.00'), is_generate_contract=True,
+            )
+            amc.calculate_totals()
+            amc.status = amc.get_period_status(self.today)
+            amcs.append(amc)
+        amc_pks = insert(AMC, amcs, 'reference_id')
+
+        services = []
+        for amc in amcs:
+            interval = 365 / amc.no_of_services
+            for index in range(amc.no_of_services):
+                service_date = amc.start_date + timedelta(days=int(interval * index))
+                done = service_date < self.today and self.random.random() < 0.7
+                services.append(AMCRoutineService(
+                    amc_id=amc_pks[amc.reference_id], service_date=service_date,
+                    employee_assign_id=self.random.choice(self.employee_ids),
+                    status='completed' if done else ('due' if service_date >= self.today else 'overdue'),
+                ))
+        AMCRoutineService.objects.bulk_create(services, batch_size=BATCH_SIZE)
+        self.created.update(amcs=len(amcs), amc_routine_services=len(services))
+
+    def routine_services(self):
+        services = []
+        for _ in range(self.counts['routine_services']):
+            customer_id = self.random.choice(self.customer_ids)
+            service_date = self.today + timedelta(days=self.random.randint(-60, 60))
+            status = 'pending' if service_date >= self.today else self.random.choice(('completed', 'overdue', 'completed'))
+            services.append(RoutineService(
+                customer_id=customer_id, lift_id=self.lift_by_customer[customer_id], service_date=service_date,
+                service_type='Routine Check', status=status, assigned_technician_id=self.random.choice(self.employee_ids),
+                completed_at=timezone.now() if status == 'completed' else None,
+            ))
+        RoutineService.objects.bulk_create(services, batch_size=BATCH_SIZE)
+        self.created['routine_services'] = len(services)
+
+    def complaints(self):
+        start = next_number(Complaint, 'reference', 'CMP', default=1000)
+        complaints = [
+            Complaint(
+                reference=f'CMP{n}', customer_id=self.random.choice(self.customer_ids), date=self.days_ago(365),
+                complaint_type=self.random.choice(self.complaint_types), priority=self.random.choice(self.priorities),
+                assign_to_id=self.random.choice(self.employee_ids), subject='Lift not working',
+                message='Reported by the site contact.', status=self.random.choice(('open', 'in_progress', 'closed', 'closed')),
+            )
+            for n in range(start, start + self.counts['complaints'])
+        ]
+        Complaint.objects.bulk_create(complaints, batch_size=BATCH_SIZE)
+        self.created['complaints'] = len(complaints)
+
+    def items(self):
+        start = next_number(Item, 'item_number', 'SYI')
+        items = [
+            Item(
+                item_number=f'SYI{n:05d}', name=f'Spare part {n}', model=f'M{n}', capacity='Standard',
+                make=self.random.choice(self.makes), type=self.random.choice(self.types), unit=self.random.choice(self.units),
+                threshold_qty=self.random.randint(0, 10), sale_price=self.money(100, 5000), purchase_price=self.money(50, 4000),
+            )
+            for n in range(start, start + self.counts['items'])
+        ]
+        self.items_by_number = insert(Item, items, 'item_number')
+        self.item_prices = {self.items_by_number[item.item_number]: item.sale_price for item in items}
+        self.created['items'] = len(items)
+
+    def invoices(self):
+        start = next_number(Invoice, 'reference_id', Invoice.REFERENCE_PREFIX)
+        invoices = []
+        for n in range(start, start + self.counts['invoices']):
+            start_date = self.days_ago(365)
+            invoices.append(Invoice(
+                reference_id=f'{Invoice.REFERENCE_PREFIX}{n:03d}', customer_id=self.random.choice(self.customer_ids),
+                amc_type=self.random.choice(self.amc_types), start_date=start_date, due_date=start_date + timedelta(days=30),
+            ))
+        self.invoice_pks = insert(Invoice, invoices, 'reference_id')
+        self.invoice_customers = {self.invoice_pks[invoice.reference_id]: invoice.customer_id for invoice in invoices}
+
+        rows = []
+        item_ids = list(self.item_prices)
+        for invoice_id in self.invoice_pks.values():
+            for item_id in self.random.sample(item_ids, min(2, len(item_ids))):
+                rate, qty, tax = self.item_prices[item_id], self.random.randint(1, 4), Decimal('18.00')
+                rows.append(InvoiceItem(invoice_id=invoice_id, item_id=item_id, rate=rate, qty=qty, tax=tax,
+                                        total=rate * qty * (1 + tax / 100)))
+        InvoiceItem.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+        self.created.update(invoices=len(invoices), invoice_items=len(rows))
+
+    def payments(self):
+        start = next_number(PaymentReceived, 'payment_number', PaymentReceived.REFERENCE_PREFIX)
+        invoice_ids = list(self.invoice_customers)
+        payments = []
+        for n in range(start, start + self.counts['payments']):
+            invoice_id = self.random.choice(invoice_ids)
+            payments.append(PaymentReceived(
+                payment_number=f'{PaymentReceived.REFERENCE_PREFIX}{n:03d}', customer_id=self.invoice_customers[invoice_id],
+                invoice_id=invoice_id, amount=self.money(500, 20000), date=self.days_ago(300),
+                payment_type=self.random.choice(('cash', 'bank_transfer', 'cheque', 'neft')),
+            ))
+        PaymentReceived.objects.bulk_create(payments, batch_size=BATCH_SIZE)
+        self.created['payments'] = len(payments)
+
+    def stock(self):
+        start = next_number(StockRegister, 'register_no', 'STK')
+        item_ids = list(self.item_prices)
+        entries = []
+        for n in range(start, start + self.counts['stock_entries']):
+            item_id = self.random.choice(item_ids)
+            inward = self.random.random() < 0.6
+            qty, unit_value = self.random.randint(1, 20), self.item_prices[item_id]
+            entries.append(StockRegister(
+                register_no=f'STK{n:04d}', date=self.days_ago(365), item_id=item_id,
+                transaction_type='INWARD' if inward else 'OUTWARD',
+                inward_qty=qty if inward else 0, outward_qty=0 if inward else qty,
+                unit_value=unit_value, total_value=qty * unit_value,
+            ))
+        StockRegister.objects.bulk_create(entries, batch_size=BATCH_SIZE)
+        self.created['stock_entries'] = len(entries)
+
+    def attendance(self):
+        records = []
+        for user_id in self.employee_ids:
+            for days in range(self.counts['attendance_days']):
+                day = self.today - timedelta(days=days)
+                check_in = timezone.make_aware(datetime.combine(day, time(9, self.random.randint(0, 45))))
+                checked_out = days > 0
+                records.append(AttendanceRecord(
+                    user_id=user_id, check_in_date=day, check_in_time=check_in, check_in_location='12.97,77.59',
+                    is_checked_in=not checked_out, is_checked_out=checked_out,
+                    check_out_date=day if checked_out else None,
+                    check_out_time=check_in + timedelta(hours=8) if checked_out else None,
+                ))
+        AttendanceRecord.objects.bulk_create(records, batch_size=BATCH_SIZE)
+        self.created['attendance_records'] = len(records)
+
+
+def seed(scale='small', seed=None, log=None, **counts):
+    """Insert a synthetic dataset of the given scale (counts override single models); returns rows created"""
+    return Seeder({**SCALES[scale], **{name: value for name, value in counts.items() if value is not None}}, seed, log).run()
@@ -1,5 +1,10 @@
+from datetime import date
+
+from django.conf import settings
+from django.test import TestCase, override_settings
 from django.urls import reverse
 from home.models import HomePage
+from home.pdf import company_header
 
 from wagtail.models import Page
 from wagtail.test.utils import WagtailPageTestCase
@@ -41,3 +46,482 @@ class HomeTests(WagtailPageTestCase):
     def test_homepage_template_used(self):
         response = self.client.get(reverse("home"))
         self.assertTemplateUsed(response, "home/home_page.html")
+
+
+class PDFEngineTests(TestCase):
+    """
+    Tests for the shared ReportLab document engine.
+    """
+
+    def setUp(self):
+        from customer.models import Customer
+        from amc.models import AMC
+
+        customer = Customer.objects.create(
+            site_name='Test Site', site_address='1 Test Street', email='site@example.com', phone='9123456780'
+        )
+        self.amc = AMC.objects.create(customer=customer, start_date=date(2026, 1, 1), no_of_services=3)
+
+    def test_company_details_come_from_settings(self):
+        with override_settings(COMPANY_DETAILS={**settings.COMPANY_DETAILS, 'name': 'Renamed Lifts'}):
+            story = company_header()
+        self.assertEqual(story[0].text, 'Renamed Lifts')
+
+    def test_replaced_storage_file_is_read_again(self):
+        import os
+        import shutil
+        import tempfile
+
+        from django.core.files.base import ContentFile
+        from django.core.files.storage import default_storage
+
+        from home.pdf import read_storage_bytes
+
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, True)
+        with override_settings(MEDIA_ROOT=media_root):
+            name = default_storage.save('logos/logo.png', ContentFile(b'old'))
+            self.assertEqual(read_storage_bytes(name), b'old')
+            with default_storage.open(name, 'wb') as f:
+                f.write(b'new')
+            os.utime(default_storage.path(name), (0, 0))
+            self.assertEqual(read_storage_bytes(name), b'new')
+
+    def test_certificate_renders_single_and_merged(self):
+        from amc.pdf import routine_service_certificate
+
+        services = list(routine_service_certificate.get_queryset().filter(amc=self.amc))
+        self.assertEqual(len(services), 3)
+
+        single = routine_service_certificate.render(services[0])
+        merged = routine_service_certificate.render_merged(services)
+        self.assertTrue(single.startswith(b'%PDF'))
+        self.assertTrue(merged.startswith(b'%PDF'))
+        self.assertGreater(len(merged), len(single))
+
+
+class ReferenceDataTests(TestCase):
+    """
+    Tests for the versioned reference-data bundle endpoint.
+    """
+
+    def setUp(self):
+        from django.core.cache import cache
+
+        cache.clear()
+        self.url = reverse('reference_data', args=['lift'])
+
+    def test_bundle_returns_all_tables_and_revalidates(self):
+        from lift.models import Brand
+
+        Brand.objects.create(value='Otis')
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        payload = response.json()
+        self.assertEqual(len(payload['tables']), 9)
+        self.assertEqual([row['value'] for row in payload['tables']['brands']], ['Otis'])
+
+        etag = response['ETag']
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        Brand.objects.create(value='Kone')
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual([row['value'] for row in response.json()['tables']['brands']], ['Kone', 'Otis'])
+
+    def test_only_lookup_changes_bump_the_version(self):
+        from django.contrib.auth.models import Group
+
+        from authentication.models import CustomUser
+        from home.reference_data import get_version
+
+        user = CustomUser.objects.create_user(username='tech', email='tech@example.com', password='x')
+        version = get_version('complaints')
+        user.save(update_fields=['last_login'])
+        self.assertEqual(get_version('complaints'), version)
+
+        user.groups.add(Group.objects.create(name='employee'))
+        self.assertEqual(get_version('complaints'), version + 1)
+        self.assertEqual(get_version('lift'), 0)
+
+    def test_unknown_bundle(self):
+        self.assertEqual(self.client.get(reverse('reference_data', args=['nope'])).status_code, 404)
+
+
+class TypeaheadTests(TestCase):
+    """
+    Tests for the typeahead search endpoints.
+    """
+
+    def setUp(self):
+        from customer.models import Customer
+
+        for index, name in enumerate(['Gamma Alpha', 'Alpha Tower', 'Beta Heights']):
+            Customer.objects.create(
+                site_name=name, job_no=f'JOB{index}', site_address='Road',
+                email=f'site{index}@example.com', phone=f'98450{index}',
+            )
+        self.url = reverse('typeahead_search', args=['customers'])
+        self.client = self.login()
+
+    def login(self):
+        from authentication.models import CustomUser
+        from home.benchmarks import session_client
+
+        user = CustomUser.objects.create_user(username='reader', email='reader@example.com', password='x')
+        return session_client(user)
+
+    def test_requires_login(self):
+        from django.test import Client
+
+        self.assertEqual(Client().get(self.url).status_code, 401)
+
+    def test_executives_expose_names_only(self):
+        from django.contrib.auth.models import Group
+        from authentication.models import CustomUser
+
+        employee = CustomUser.objects.create_user(
+            username='tech1', email='tech1@example.com', password='x', first_name='Ravi', last_name='Kumar',
+        )
+        employee.groups.add(Group.objects.get_or_create(name='employee')[0])
+        response = self.client.get(reverse('typeahead_search', args=['executives']), {'q': 'ravi'})
+        self.assertEqual(response.json()['results'], [{'id': employee.pk, 'first_name': 'Ravi', 'last_name': 'Kumar'}])
+
+    def test_prefix_matches_rank_before_infix_matches(self):
+        response = self.client.get(self.url, {'q': 'alpha'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['site_name'] for row in response.json()['results']], ['Alpha Tower', 'Gamma Alpha'])
+
+        response = self.client.get(self.url, {'q': '', 'limit': 2})
+        self.assertEqual([row['site_name'] for row in response.json()['results']], ['Alpha Tower', 'Beta Heights'])
+
+    def test_recent_picks_rank_first(self):
+        from authentication.models import CustomUser
+        from customer.models import Customer
+        from home.typeahead import record_use, search
+
+        user = CustomUser.objects.create_user(username='clerk', email='clerk@example.com', password='x')
+        record_use('customers', user, Customer.objects.get(site_name='Gamma Alpha').pk)
+        # Prefix matches still come first; recent picks lead each group and the empty search
+        self.assertEqual([row['site_name'] for row in search('customers', 'alpha', user=user)], ['Alpha Tower', 'Gamma Alpha'])
+        self.assertEqual(search('customers', '', user=user)[0]['site_name'], 'Gamma Alpha')
+
+    def test_unknown_source(self):
+        self.assertEqual(self.client.get(reverse('typeahead_search', args=['nope'])).status_code, 404)
+
+    def test_listing_filter_renders_only_the_selected_customer(self):
+        from amc.models import AMC
+        from customer.models import Customer
+
+        customer = Customer.objects.get(site_name='Beta Heights')
+        filterset = AMC.snippet_viewset.filterset_class(data={'customer': customer.pk}, queryset=AMC.objects.all())
+        html = str(filterset.form['customer'])
+        self.assertIn('data-typeahead="customers"', html)
+        self.assertIn('Beta Heights', html)
+        self.assertNotIn('Alpha Tower', html)
+        self.assertTrue(filterset.is_valid())
+
+
+@override_settings(SQL_PROFILE_SAMPLE_RATE=0)
+class CachedResponseTests(TestCase):
+    """
+    Tests for cached read endpoints and their invalidation.
+    """
+
+    def setUp(self):
+        from django.core.cache import cache
+
+        cache.clear()
+
+    def test_lookup_is_served_from_cache_until_a_write(self):
+        from customer.models import ProvinceState
+
+        ProvinceState.objects.create(value='Karnataka')
+        url = reverse('get_states')
+        self.assertEqual([row['value'] for row in self.client.get(url).json()], ['Karnataka'])
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(url).status_code, 200)
+
+        ProvinceState.objects.create(value='Goa')
+        self.assertEqual(sorted(row['value'] for row in self.client.get(url).json()), ['Goa', 'Karnataka'])
+
+    def test_responses_are_keyed_on_the_caller(self):
+        from django.http import JsonResponse
+        from django.test import RequestFactory
+        from rest_framework.authtoken.models import Token
+
+        from authentication.models import CustomUser
+        from home.caching import cached_response
+
+        a, b = (
+            f"Token {Token.objects.create(user=CustomUser.objects.create_user(username=name, email=f'{name}@example.com', password='x')).key}"
+            for name in ('a', 'b')
+        )
+        calls = []
+
+        @cached_response('customers')
+        def view(request):
+            calls.append(request.META.get('HTTP_AUTHORIZATION'))
+            return JsonResponse({'calls': len(calls)})
+
+        factory = RequestFactory()
+        for token in (a, a, b, 'Token unknown', 'Token unknown'):
+            view(factory.get('/', HTTP_AUTHORIZATION=token))
+        view(factory.get('/', {'page': 2}, HTTP_AUTHORIZATION=a))
+        self.assertEqual(calls, [a, b, 'Token unknown', 'Token unknown', a])
+
+    def test_revoked_token_is_not_served_from_cache(self):
+        from django.contrib.auth.models import Group
+        from rest_framework.authtoken.models import Token
+
+        from authentication.models import CustomUser
+
+        user = CustomUser.objects.create_user(username='tech', email='tech@example.com', password='x')
+        user.groups.add(Group.objects.create(name='employee'))
+        token = Token.objects.create(user=user)
+        url = reverse('complaints_api_assigned')
+        self.assertEqual(self.client.get(url, HTTP_AUTHORIZATION=f'Token {token.key}').status_code, 200)
+
+        token.delete()
+        self.assertEqual(self.client.get(url, HTTP_AUTHORIZATION=f'Token {token.key}').status_code, 401)
+
+
+class ConnectionPoolTests(TestCase):
+    """
+    Tests for the pooled MySQL backend's connection pool.
+    """
+
+    class FakeConnection:
+        def __init__(self):
+            self.alive = True
+            self.closed = False
+
+        def ping(self, reconnect=False):
+            if not self.alive:
+                raise OSError('gone away')
+
+        def rollback(self):
+            pass
+
+        def close(self):
+            self.closed = True
+
+    def make_pool(self, **options):
+        from CRM_LIFT_ATOM.mysql_pool.pool import ConnectionPool
+
+        return ConnectionPool(self.FakeConnection, **options)
+
+    def test_connections_are_reused_and_dead_ones_replaced(self):
+        pool = self.make_pool(max_size=2)
+        first = pool.checkout()
+        pool.checkin(first)
+        self.assertIs(pool.checkout(), first)
+
+        pool.checkin(first)
+        first.alive = False
+        second = pool.checkout()
+        self.assertIsNot(second, first)
+        self.assertTrue(first.closed)
+        stats = pool.stats()
+        self.assertEqual((stats['opened'], stats['failed_pings'], stats['size'], stats['in_use']), (2, 1, 1, 1))
+
+    def test_checkout_waits_for_a_free_connection_then_times_out(self):
+        from CRM_LIFT_ATOM.mysql_pool.pool import PoolTimeout
+
+        pool = self.make_pool(max_size=1, timeout=0.05)
+        pool.checkout()
+        with self.assertRaises(PoolTimeout):
+            pool.checkout()
+        stats = pool.stats()
+        self.assertEqual((stats['waits'], stats['timeouts']), (1, 1))
+        self.assertGreaterEqual(stats['wait_seconds_max'], 0)
+
+    def test_old_and_idle_connections_are_evicted(self):
+        pool = self.make_pool(max_lifetime=60, max_idle=0)
+        idle = pool.checkout()
+        pool.checkin(idle)
+        self.assertIsNot(pool.checkout(), idle)
+        self.assertEqual(pool.stats()['idled_out'], 1)
+
+        pool = self.make_pool(max_lifetime=0)
+        old = pool.checkout()
+        pool.checkin(old)
+        self.assertTrue(old.closed)
+        self.assertEqual(pool.stats()['expired'], 1)
+
+    def test_new_connection_params_retire_the_old_pool(self):
+        from CRM_LIFT_ATOM.mysql_pool import pool as pools
+
+        self.addCleanup(pools._pools.pop, 'pool-test', None)
+        key = pools.pool_key({'db': 'atom', 'host': 'rds'})
+        pool = pools.get_pool('pool-test', key, self.FakeConnection)
+        self.assertIs(pools.get_pool('pool-test', pools.pool_key({'host': 'rds', 'db': 'atom'}), self.FakeConnection), pool)
+        idle, in_use = pool.checkout(), pool.checkout()
+        pool.checkin(idle)
+
+        renamed = pools.get_pool('pool-test', pools.pool_key({'db': 'test_atom', 'host': 'rds'}), self.FakeConnection)
+        self.assertIsNot(renamed, pool)
+        self.assertTrue(idle.closed)
+        pool.checkin(in_use)
+        self.assertTrue(in_use.closed)
+        self.assertEqual(pool.stats()['size'], 0)
+        self.assertIsNot(renamed.checkout(), in_use)
+
+
+class SQLInstrumentationTests(TestCase):
+    """
+    Tests for the per-request SQL profiling middleware and report.
+    """
+
+    def test_fingerprint_collapses_parameters_and_in_lists(self):
+        from home.sql_instrumentation import fingerprint
+
+        self.assertEqual(
+            fingerprint('SELECT * FROM "customer" WHERE "id" = %s AND "route_id" IN (%s, %s, %s)'),
+            fingerprint("SELECT * FROM  \"customer\" WHERE \"id\" = 42 AND \"route_id\" IN (%s)"),
+        )
+
+    @override_settings(SQL_PROFILE_SAMPLE_RATE=1)
+    def test_sampled_request_reports_repeated_queries(self):
+        from django.http import HttpResponse
+        from django.test import RequestFactory
+
+        from customer.models import ProvinceState
+        from home.models import RequestProfile
+        from home.sql_instrumentation import SQLInstrumentationMiddleware, worst_endpoints
+
+        states = [ProvinceState.objects.create(value=name).pk for name in ('Goa', 'Kerala', 'Punjab')]
+
+        def view(request):
+            for pk in states:
+                ProvinceState.objects.get(pk=pk)
+            return HttpResponse('ok')
+
+        with self.assertLogs('home.sql_instrumentation', 'INFO'):
+            response = SQLInstrumentationMiddleware(view)(RequestFactory().get('/states/'))
+        self.assertIn('desc="3 queries, 2 repeated"', response['Server-Timing'])
+
+        profile = RequestProfile.objects.get()
+        self.assertEqual((profile.queries, profile.duplicate_queries), (3, 2))
+        self.assertEqual(profile.details['duplicates'][0]['count'], 3)
+        [row] = worst_endpoints(hours=1)
+        self.assertEqual((row['endpoint'], row['requests'], row['max_queries']), ('/states/', 1, 3))
+
+    @override_settings(SQL_PROFILE_SAMPLE_RATE=1)
+    def test_unread_streamed_response_detaches_the_recorder(self):
+        from django.core.signals import request_finished
+        from django.db import close_old_connections, connection
+        from django.http import StreamingHttpResponse
+        from django.test import RequestFactory
+
+        from home.models import RequestProfile
+        from home.sql_instrumentation import SQLInstrumentationMiddleware
+
+        # As the test client does: keep the test transaction's connection open
+        request_finished.disconnect(close_old_connections)
+        self.addCleanup(request_finished.connect, close_old_connections)
+        wrappers = list(connection.execute_wrappers)
+        response = SQLInstrumentationMiddleware(
+            lambda request: StreamingHttpResponse(iter(['a', 'b']))
+        )(RequestFactory().head('/export/'))
+        self.assertEqual(len(connection.execute_wrappers), len(wrappers) + 1)
+
+        with self.assertLogs('home.sql_instrumentation', 'INFO'):
+            response.close()
+        self.assertEqual(connection.execute_wrappers, wrappers)
+        self.assertEqual(RequestProfile.objects.get().path, '/export/')
+
+
+class ProfilingTests(TestCase):
+    """
+    Tests for on-demand request profiling.
+    """
+
+    def setUp(self):
+        import shutil
+        import tempfile
+
+        self.profile_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.profile_dir, True)
+
+    def profiled(self, user, query='_profile=1'):
+        from types import SimpleNamespace
+
+        from django.http import HttpResponse
+        from django.test import RequestFactory
+
+        from home.profiling import ProfilingMiddleware
+
+        request = RequestFactory().get(f'/reports/?{query}')
+        request.user = user
+        request.resolver_match = SimpleNamespace(view_name='reports:export', route='reports/')
+        with override_settings(PROFILE_DIR=self.profile_dir, PROFILE_SAMPLE_RATE=0):
+            return ProfilingMiddleware(lambda request: HttpResponse('ok'))(request)
+
+    def test_superuser_can_request_a_profile(self):
+        from types import SimpleNamespace
+
+        from home import profiling
+
+        response = self.profiled(SimpleNamespace(is_superuser=True, pk=1))
+        profile_id = response['X-Profile-Id']
+        self.assertTrue(profile_id.startswith('reports_export/'))
+        with override_settings(PROFILE_DIR=self.profile_dir):
+            [meta] = profiling.list_profiles()
+            self.assertEqual((meta['id'], meta['path'], meta['requested']), (profile_id, '/reports/?_profile=1', True))
+            self.assertIn('function calls', profiling.top_functions(profile_id))
+            self.assertIsNone(profiling.resolve('../' + profile_id.split('/')[1]))
+
+    def test_others_cannot_request_a_profile(self):
+        from types import SimpleNamespace
+
+        response = self.profiled(SimpleNamespace(is_superuser=False, pk=2))
+        self.assertFalse(response.has_header('X-Profile-Id'))
+
+
+@override_settings(SQL_PROFILE_SAMPLE_RATE=0)
+class BenchmarkTests(TestCase):
+    """
+    The hot endpoints stay within their query budgets on a synthetic dataset.
+    """
+
+    def test_hot_endpoints_stay_within_query_budgets(self):
+        from home.benchmarks import run
+        from home.synthetic import seed
+
+        # More customers, AMCs and complaints than fit on one page, so per-row queries show
+        seed('tiny', seed=1)
+        results = run(repeat=1)
+        self.assertTrue(results)
+        over = [f"{result['name']}: {result['queries']} queries (budget {result['budget']}), status {result['status']}"
+                for result in results if not result['ok']]
+        self.assertEqual(over, [])
+
+
+class LoadSimulationTests(TestCase):
+    """
+    The load simulator's call mix and summary.
+    """
+
+    def test_parse_mix(self):
+        from home.load_simulation import parse_mix
+
+        self.assertEqual(parse_mix('assigned_complaints=3, customers'), {'assigned_complaints': 3.0, 'customers': 1.0})
+        with self.assertRaises(ValueError):
+            parse_mix('unknown=1')
+        with self.assertRaises(ValueError):
+            parse_mix('customers=0')
+
+    def test_summarize_counts_errors_and_percentiles(self):
+        from home.load_simulation import summarize
+
+        records = [('customers', i / 1000, 200) for i in range(1, 101)]
+        records += [('check_in', 0.5, 400), ('check_in', 0.2, 'TimeoutError')]
+        summary = summarize(records, elapsed=10)
+        customers = summary['calls']['customers']
+        self.assertEqual((customers['p50_ms'], customers['p99_ms'], customers['max_ms']), (50, 99, 100))
+        self.assertEqual(summary['calls']['check_in']['errors'], 2)
+        self.assertEqual(summary['total']['requests'], 102)
+        self.assertAlmostEqual(summary['total']['throughput'], 10.2)
+        self.assertEqual(summary['calls']['check_in']['outcomes'], {'400': 1, 'TimeoutError': 1})
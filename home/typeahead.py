@@ -0,0 +1,167 @@
+# home/typeahead.py
+"""
+Typeahead search over the large pick lists (customers, items, AMCs,
+invoices, lifts, executives).
+
+Forms used to render or fetch every row of these tables as dropdown
+options. They now ask for at most `limit` rows matching what the user
+typed, so a form page costs the same however large the catalog grows.
+
+search() runs one query per keystroke batch:
+- rows whose label starts with the term rank first (a prefix match on
+  the indexed label column), then rows containing the term in any search
+  field (infix);
+- within each group, rows the user picked most recently come first
+  (TypeaheadUse, one row per user and picked object), then by label;
+- an empty term returns the user's recent picks, then the first rows by
+  label.
+
+SOURCES maps the endpoint's source name to its model, fields and the
+filters a form may pass (e.g. a customer's invoices).
+"""
+from dataclasses import dataclass, field
+
+from django.apps import apps
+from django.conf import settings
+from django.db.models import Case, F, IntegerField, OuterRef, Q, Subquery, Value, When
+from django.utils import timezone
+
+
+@dataclass(frozen=True)
+class TypeaheadSource:
+    model: str
+    # Label column: prefix matches on it rank first, and it orders the results
+    label: str
+    # Columns matched anywhere in their value
+    search: tuple
+    # Row values returned; expressions holds computed ones (e.g. related names)
+    fields: tuple
+    expressions: dict = field(default_factory=dict)
+    # Query parameters a form may filter on, mapped to model lookups
+    filters: dict = field(default_factory=dict)
+    # Order within a match group; defaults to the label
+    ordering: tuple = ()
+    # Lookups every row must match (e.g. only employees)
+    limit_to: dict = field(default_factory=dict)
+
+    def get_model(self):
+        return apps.get_model(self.model)
+
+    def values(self, queryset):
+        return queryset.values(*self.fields, **{name: F(path) for name, path in self.expressions.items()})
+
+
+SOURCES = {
+    'customers': TypeaheadSource(
+        'customer.Customer',
+        label='site_name',
+        search=('site_name', 'job_no', 'reference_id'),
+        fields=(
+            'id', 'reference_id', 'site_name', 'job_no', 'site_address', 'email', 'phone', 'mobile',
+            'pin_code', 'country', 'latitude', 'longitude',
+        ),
+        expressions={'city_name': 'city__value', 'province_state_name': 'province_state__value'},
+    ),
+    'items': TypeaheadSource(
+        'items.Item',
+        label='name',
+        search=('name', 'item_number', 'model'),
+        fields=('id', 'item_number', 'name', 'sale_price', 'gst'),
+    ),
+    'amcs': TypeaheadSource(
+        'amc.AMC',
+        label='reference_id',
+        search=('reference_id', 'customer__site_name', 'equipment_no'),
+        fields=('id', 'reference_id', 'customer_id', 'end_date'),
+        expressions={'customer_name': 'customer__site_name'},
+        filters={'customer': 'customer_id'},
+    ),
+    'invoices': TypeaheadSource(
+        'invoice.Invoice',
+        label='reference_id',
+        search=('reference_id', 'customer__site_name'),
+        fields=('id', 'reference_id', 'customer_id', 'start_date', 'status'),
+        expressions={'customer_name': 'customer__site_name'},
+        filters={'customer': 'customer_id'},
+        ordering=('-start_date', '-pk'),
+    ),
+    'lifts': TypeaheadSource(
+        'lift.Lift',
+        label='name',
+        search=('name', 'reference_id', 'lift_code'),
+        fields=('id', 'reference_id', 'name', 'lift_code'),
+        expressions={'brand_name': 'brand__value'},
+        filters={'lift_code': 'lift_code'},
+    ),
+    'executives': TypeaheadSource(
+        'authentication.CustomUser',
+        label='first_name',
+        # Display names only: no login names or emails in pick lists
+        search=('first_name', 'last_name'),
+        fields=('id', 'first_name', 'last_name'),
+        limit_to={'groups__name': 'employee'},
+        ordering=('first_name', 'last_name', 'pk'),
+    ),
+}
+
+
+def get_default_limit():
+    return getattr(settings, 'TYPEAHEAD_LIMIT', 20)
+
+
+def get_max_limit():
+    return getattr(settings, 'TYPEAHEAD_MAX_LIMIT', 50)
+
+
+def parse_limit(value):
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        return get_default_limit()
+    return max(1, min(limit, get_max_limit()))
+
+
+def recent_use(source, user):
+    """Subquery: when user last picked each row of source (NULL if never)"""
+    from .models import TypeaheadUse
+
+    uses = TypeaheadUse.objects.filter(user=user, source=source, object_id=OuterRef('pk'))
+    return Subquery(uses.values('used_at')[:1])
+
+
+def search(source, term='', user=None, limit=None, filters=None, ids=None):
+    """Up to limit rows of source matching term, best match first (one query)"""
+    config = SOURCES[source]
+    queryset = config.get_model().objects.filter(**config.limit_to)
+    for param, value in (filters or {}).items():
+        if param in config.filters and value not in (None, ''):
+            queryset = queryset.filter(**{config.filters[param]: value})
+    if ids is not None:
+        # Rows a form already holds (e.g. the saved value on an edit page)
+        queryset = queryset.filter(pk__in=ids)
+
+    term = (term or '').strip()
+    order = []
+    if term:
+        queryset = queryset.filter(Q.create([(f'{name}__icontains', term) for name in config.search], connector=Q.OR))
+        queryset = queryset.annotate(match_rank=Case(
+            When(**{f'{config.label}__istartswith': term}, then=Value(0)),
+            default=Value(1),
+            output_field=IntegerField(),
+        ))
+        order.append('match_rank')
+    if user is not None and user.is_authenticated:
+        queryset = queryset.annotate(last_used=recent_use(source, user))
+        order.append(F('last_used').desc(nulls_last=True))
+    order += config.ordering or (config.label, 'pk')
+    return list(config.values(queryset.order_by(*order))[:parse_limit(limit)])
+
+
+def record_use(source, user, object_id):
+    """Rank object_id first in the user's future searches of source"""
+    from .models import TypeaheadUse
+
+    now = timezone.now()
+    lookup = {'user': user, 'source': source, 'object_id': object_id}
+    if not TypeaheadUse.objects.filter(**lookup).update(used_at=now):
+        TypeaheadUse.objects.get_or_create(**lookup, defaults={'used_at': now})
@@ -4,4 +4,8 @@ from . import views
 urlpatterns = [
     path('lionsol/', views.lionsol_homepage, name='lionsol_homepage'),
     path('dashboard/', views.custom_dashboard, name='custom_dashboard'),
+    path('api/reference-data/<str:bundle>/', views.reference_data, name='reference_data'),
+    path('api/typeahead/<str:source>/', views.typeahead_search, name='typeahead_search'),
+    path('api/typeahead/<str:source>/use/', views.typeahead_use, name='typeahead_use'),
+    path('api/db-pool/', views.db_pool_stats, name='db_pool_stats'),
 ]
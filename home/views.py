@@ -1,7 +1,15 @@
+import os
+
+from django.http import HttpResponse, JsonResponse
 from django.shortcuts import render
+from django.views.decorators.http import etag, require_http_methods
+from CRM_LIFT_ATOM.mysql_pool.pool import pool_stats
 from customer.models import Customer
 from complaints.models import Complaint
 
+from . import typeahead
+from .reference_data import BUNDLES, bundle_etag, get_bundle, get_version
+
 def lionsol_homepage(request):
     """View for the Lionsol homepage"""
     total_customers = Customer.objects.count()
@@ -17,4 +25,77 @@ def lionsol_homepage(request):
 
 def custom_dashboard(request):
     """View for the custom dashboard"""
-    return render(request, 'custom_dashboard.html')
\ No newline at end of file
+    return render(request, 'custom_dashboard.html')
+
+
+def reference_data_etag(request, bundle):
+    if bundle in BUNDLES:
+        request.reference_data_version = get_version(bundle)
+        return bundle_etag(bundle, request.reference_data_version)
+    return None
+
+
+@require_http_methods(["GET"])
+@etag(reference_data_etag)
+def reference_data(request, bundle):
+    """All lookup tables for a form in one response; 304 while the bundle version is unchanged"""
+    if bundle not in BUNDLES:
+        return JsonResponse({"error": f"Unknown reference data bundle '{bundle}'"}, status=404)
+    version, tables = get_bundle(bundle, request.reference_data_version)
+    response = JsonResponse({"bundle": bundle, "version": version, "tables": tables})
+    # Browsers may keep the bundle but must revalidate it (cheap thanks to the ETag)
+    response["Cache-Control"] = "private, no-cache"
+    return response
+
+
+@require_http_methods(["GET"])
+def typeahead_search(request, source):
+    """
+    Rows of a pick list matching ?q= (prefix matches, then infix), the
+    user's recent picks first, at most ?limit= rows. ?ids=1,2 returns
+    those rows (e.g. to show a saved value); other parameters filter the
+    source where it allows (e.g. ?customer= for AMCs and invoices).
+    Logged-in users only.
+    """
+    if not request.user.is_authenticated:
+        return JsonResponse({"error": "Authentication required"}, status=401)
+    if source not in typeahead.SOURCES:
+        return JsonResponse({"error": f"Unknown typeahead source '{source}'"}, status=404)
+    ids = None
+    if request.GET.get('ids'):
+        try:
+            ids = [int(pk) for pk in request.GET['ids'].split(',') if pk.strip()]
+        except ValueError:
+            return JsonResponse({"error": "ids must be comma-separated integers"}, status=400)
+    results = typeahead.search(
+        source,
+        request.GET.get('q', ''),
+        user=request.user,
+        limit=len(ids) if ids else request.GET.get('limit'),
+        filters=request.GET,
+        ids=ids,
+    )
+    return JsonResponse({"source": source, "results": results})
+
+
+@require_http_methods(["POST"])
+def typeahead_use(request, source):
+    """Record that the user picked ?id= from a pick list, so it ranks first next time"""
+    if not request.user.is_authenticated:
+        return JsonResponse({"error": "Authentication required"}, status=401)
+    if source not in typeahead.SOURCES:
+        return JsonResponse({"error": f"Unknown typeahead source '{source}'"}, status=404)
+    try:
+        object_id = int(request.POST.get('id', ''))
+    except ValueError:
+        return JsonResponse({"error": "id is required"}, status=400)
+    typeahead.record_use(source, request.user, object_id)
+    return HttpResponse(status=204)
+
+
+@require_http_methods(["GET"])
+def db_pool_stats(request):
+    """Database connection pool size and checkout wait times of this worker process (superusers only)"""
+    if not request.user.is_superuser:
+        return JsonResponse({"error": "Forbidden"}, status=403)
+    return JsonResponse({"pid": os.getpid(), "pools": pool_stats()})
@@ -1,8 +1,13 @@
+import os
+
 from wagtail.snippets.models import register_snippet
 from wagtail.snippets.views.snippets import SnippetViewSet, SnippetViewSetGroup
 from wagtail import hooks
 from wagtail.admin.menu import MenuItem
-from django.urls import reverse
+from django.core.exceptions import PermissionDenied
+from django.http import FileResponse, Http404
+from django.shortcuts import render
+from django.urls import path, reverse
 from wagtail.admin.ui.components import Component
 from django.template.loader import render_to_string
 from customer.models import Customer
@@ -16,6 +21,8 @@ from PaymentReceived.models import PaymentGroup
 from invoice.models import InvoiceGroup
 from recurringInvoice.models import RecurringInvoiceGroup
 from delivery.models import DeliveryChallanGroup
+from home import profiling
+from home.sql_instrumentation import SORTS, worst_endpoints
 
 
 
@@ -57,6 +64,69 @@ def register_main_admin_menu_item():
     )
 
 
+class SuperuserMenuItem(MenuItem):
+    def is_shown(self, request):
+        return request.user.is_superuser
+
+
+@hooks.register('register_settings_menu_item')
+def register_sql_report_menu_item():
+    return SuperuserMenuItem('SQL report', reverse('sql_report'), icon_name='table', order=900)
+
+
+@hooks.register('register_settings_menu_item')
+def register_profiles_menu_item():
+    return SuperuserMenuItem('Profiles', reverse('request_profiles'), icon_name='time', order=901)
+
+
+@hooks.register('register_admin_urls')
+def register_sql_report_url():
+    return [
+        path('sql-report/', sql_report, name='sql_report'),
+        path('profiles/', request_profiles, name='request_profiles'),
+    ]
+
+
+def sql_report(request):
+    """Sampled endpoints of the last ?hours= hours, worst first by ?sort= (superusers only)"""
+    if not request.user.is_superuser:
+        raise PermissionDenied
+    try:
+        hours = max(1, min(int(request.GET.get('hours', 24)), 24 * 30))
+    except ValueError:
+        hours = 24
+    sort = request.GET.get('sort') if request.GET.get('sort') in SORTS else 'sql'
+    return render(request, 'home/sql_report.html', {
+        'title': 'SQL report',
+        'hours': hours,
+        'sort': sort,
+        'sorts': {'sql': 'Total SQL time', 'queries': 'Queries', 'duplicates': 'Repeated queries', 'duration': 'Response time'},
+        'endpoints': worst_endpoints(hours=hours, sort=sort),
+    })
+
+
+def request_profiles(request):
+    """Saved cProfiles slowest first; ?id= shows one's top functions, with &download=1 its .prof file (superusers only)"""
+    if not request.user.is_superuser:
+        raise PermissionDenied
+    profile_id = request.GET.get('id')
+    if profile_id:
+        path = profiling.resolve(profile_id)
+        if path is None or not os.path.exists(path):
+            raise Http404('No such profile')
+        if request.GET.get('download'):
+            return FileResponse(open(path, 'rb'), as_attachment=True, filename=profile_id.replace('/', '-'))
+    sort = request.GET.get('sort') if request.GET.get('sort') in profiling.SORTS else 'cumulative'
+    return render(request, 'home/request_profiles.html', {
+        'title': 'Profiles',
+        'profiles': profiling.list_profiles(),
+        'profile_id': profile_id,
+        'sort': sort,
+        'sorts': profiling.SORTS,
+        'report': profiling.top_functions(profile_id, sort) if profile_id else None,
+    })
+
+
 # ======================================================
 #  SALES GROUP
 # ======================================================
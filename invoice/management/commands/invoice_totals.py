@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from invoice.models import Invoice
+from invoice.totals import recalculate_totals
+
+
+class Command(BaseCommand):
+    help = 'Recompute stored invoice subtotal, discount and total columns from invoice items'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reference', help='Only this invoice reference (e.g. INV001)')
+
+    def handle(self, *args, **options):
+        invoices = Invoice.objects.all()
+        if options['reference']:
+            invoices = invoices.filter(reference_id=options['reference'])
+        count = recalculate_totals(invoices)
+        self.stdout.write(self.style.SUCCESS(f'Recalculated totals for {count} invoice(s)'))
@@ -0,0 +1,61 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:16
+
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.db import migrations, models
+from django.db.models import Sum
+
+# Frozen copy of invoice.totals as of this migration
+CENT = Decimal('0.01')
+ZERO = Decimal('0.00')
+BATCH_SIZE = 500
+
+
+def apply_discount(subtotal, discount):
+    """(discount_amount, total) for a subtotal and a percentage discount"""
+    discount_amount = (subtotal * Decimal(discount or 0) / 100).quantize(CENT, rounding=ROUND_HALF_UP)
+    return discount_amount, subtotal - discount_amount
+
+
+def backfill_totals(apps, schema_editor):
+    Invoice = apps.get_model('invoice', 'Invoice')
+    InvoiceItem = apps.get_model('invoice', 'InvoiceItem')
+    subtotals = dict(
+        InvoiceItem.objects.order_by().values('invoice').annotate(total=Sum('total')).values_list('invoice', 'total')
+    )
+    batch = []
+    for invoice in Invoice.objects.only('pk', 'discount').iterator(chunk_size=BATCH_SIZE):
+        invoice.subtotal = (subtotals.get(invoice.pk) or ZERO).quantize(CENT, rounding=ROUND_HALF_UP)
+        invoice.discount_amount, invoice.total = apply_discount(invoice.subtotal, invoice.discount)
+        batch.append(invoice)
+        if len(batch) >= BATCH_SIZE:
+            Invoice.objects.bulk_update(batch, ['subtotal', 'discount_amount', 'total'])
+            batch = []
+    if batch:
+        Invoice.objects.bulk_update(batch, ['subtotal', 'discount_amount', 'total'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invoice', '0005_bulkimportinvoice'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='invoice',
+            name='discount_amount',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=12),
+        ),
+        migrations.AddField(
+            model_name='invoice',
+            name='subtotal',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=12),
+        ),
+        migrations.AddField(
+            model_name='invoice',
+            name='total',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=12),
+        ),
+        migrations.RunPython(backfill_totals, migrations.RunPython.noop),
+    ]
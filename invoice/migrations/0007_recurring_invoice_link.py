@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('amc', '0010_bulkcertificateamcroutineservice'),
+        ('customer', '0022_customerlicense_license_ref_no_and_more'),
+        ('invoice', '0006_stored_totals'),
+        ('recurringInvoice', '0004_generation_schedule'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='invoice',
+            name='recurring_invoice',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='generated_invoices', to='recurringInvoice.recurringinvoice'),
+        ),
+        migrations.AddField(
+            model_name='invoice',
+            name='recurring_period',
+            field=models.DateField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='invoice',
+            constraint=models.UniqueConstraint(fields=('recurring_invoice', 'recurring_period'), name='invoice_unique_recurring_period'),
+        ),
+    ]
@@ -10,6 +10,8 @@ from modelcluster.models import ClusterableModel
 # from customer.models import Customer
 # from authentication.models import Item (Required for InvoiceItem)
 
+from .totals import apply_discount, item_subtotal
+
 
 class Invoice(ClusterableModel):
     REFERENCE_PREFIX = 'INV'
@@ -29,6 +31,23 @@ class Invoice(ClusterableModel):
     STATUS_CHOICES = [('open', 'Open'), ('paid', 'Paid'), ('partially_paid', 'Partially Paid')]
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='open')
 
+    # Set when generated from a recurring invoice; one invoice per contract per period
+    recurring_invoice = models.ForeignKey(
+        'recurringInvoice.RecurringInvoice', on_delete=models.SET_NULL, null=True, blank=True,
+        related_name='generated_invoices', editable=False,
+    )
+    recurring_period = models.DateField(null=True, blank=True, editable=False)
+
+    # Stored totals, kept current from InvoiceItem writes (see invoice/totals.py)
+    subtotal = models.DecimalField(max_digits=12, decimal_places=2, default=0, editable=False)
+    discount_amount = models.DecimalField(max_digits=12, decimal_places=2, default=0, editable=False)
+    total = models.DecimalField(max_digits=12, decimal_places=2, default=0, editable=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['recurring_invoice', 'recurring_period'], name='invoice_unique_recurring_period'),
+        ]
+
     panels = [
         MultiFieldPanel([
             FieldPanel('reference_id', read_only=True),
@@ -50,23 +69,33 @@ class Invoice(ClusterableModel):
             # Safely generate reference_id
             last_id = int(last_invoice.reference_id.replace(self.REFERENCE_PREFIX, '')) if last_invoice and last_invoice.reference_id.startswith(self.REFERENCE_PREFIX) else 0
             self.reference_id = f'{self.REFERENCE_PREFIX}{str(last_id + 1).zfill(3)}'
+        # Items may have changed since this instance was loaded, so read the
+        # subtotal from the database rather than trusting the in-memory value
+        if self.pk:
+            self.subtotal = item_subtotal(self.pk)
+        self.discount_amount, self.total = apply_discount(self.subtotal, self.discount)
         super().save(*args, **kwargs)
-    
+
+    def update_totals(self):
+        """Recompute stored totals from the items and write only those columns"""
+        self.subtotal = item_subtotal(self.pk)
+        self.discount_amount, self.total = apply_discount(self.subtotal, self.discount)
+        Invoice.objects.filter(pk=self.pk).update(
+            subtotal=self.subtotal, discount_amount=self.discount_amount, total=self.total,
+        )
+
     def get_subtotal(self):
-        """Calculate subtotal amount from all invoice items (before discount)"""
-        return round(sum(item.total for item in self.items.all()), 2)
-    
+        """Subtotal of all invoice items (before discount)"""
+        return self.subtotal
+
     def get_discount_amount(self):
-        """Calculate discount amount"""
-        subtotal = self.get_subtotal()
-        return round(subtotal * (self.discount / 100), 2)
-    
+        """Discount amount"""
+        return self.discount_amount
+
     def get_total(self):
-        """Calculate total amount from all invoice items"""
-        subtotal = self.get_subtotal()
-        discount_amount = self.get_discount_amount()
-        return round(subtotal - discount_amount, 2)
-    
+        """Total after discount"""
+        return self.total
+
     @property
     def invoice_no(self):
         """Alias for reference_id for template compatibility"""
@@ -77,11 +106,6 @@ class Invoice(ClusterableModel):
         """Alias for start_date for template compatibility"""
         return self.start_date
     
-    @property
-    def total(self):
-        """Calculate and return total amount"""
-        return self.get_total()
-
     def __str__(self):
         return self.reference_id
 
@@ -137,9 +161,11 @@ class InvoiceItem(models.Model):
 # invoice/models.py (ViewSet and Grouping)
 
 from wagtail.snippets.views.snippets import SnippetViewSet, SnippetViewSetGroup, IndexView
+from home.exports import ExportQuerysetMixin
+from home.filters import TypeaheadFilterMixin
 from django.http import HttpResponseForbidden
 
-class InvoiceViewSet(SnippetViewSet):
+class InvoiceViewSet(TypeaheadFilterMixin, SnippetViewSet):
     model = Invoice
     icon = "folder-open-inverse"
     menu_label = "Invoices"
@@ -167,6 +193,7 @@ class InvoiceViewSet(SnippetViewSet):
         'start_date',
         'due_date',
     )
+    typeahead_filters = {'customer': 'customers'}
     
     # Export fields (use stringified dates so Excel doesn't render them as ###)
     list_export = [
@@ -203,7 +230,9 @@ class InvoiceViewSet(SnippetViewSet):
         return redirect(self.get_edit_url(instance))
 
     # Custom IndexView to restrict export to superusers
-    class RestrictedIndexView(IndexView):
+    class RestrictedIndexView(ExportQuerysetMixin, IndexView):
+        export_select_related = ('customer', 'amc_type')
+
         def dispatch(self, request, *args, **kwargs):
             """Override dispatch to check export permissions"""
             # Check if this is an export request
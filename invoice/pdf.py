@@ -0,0 +1,55 @@
+# invoice/pdf.py
+from home.pdf import Details, ItemsTable, PDFDocument, Section, Text
+
+from .models import Invoice
+
+
+class InvoicePDF(PDFDocument):
+    """Printed invoice with line items and grand total"""
+
+    def get_queryset(self):
+        return Invoice.objects.select_related('customer', 'amc_type').prefetch_related('items__item')
+
+    def get_filename(self, invoice):
+        return f'invoice_{invoice.reference_id}.pdf'
+
+    def get_layout(self, invoice):
+        customer = invoice.customer
+
+        return [
+            Details([
+                ('Invoice No:', invoice.reference_id),
+                ('Invoice Date:', invoice.start_date.strftime('%d/%m/%Y') if invoice.start_date else ''),
+                ('Due Date:', invoice.due_date.strftime('%d/%m/%Y') if invoice.due_date else ''),
+                ('AMC Type:', getattr(invoice.amc_type, 'name', '') if invoice.amc_type else ''),
+                ('Status:', invoice.get_status_display()),
+            ]),
+            Section("Customer Details"),
+            Details([
+                ('Customer Name:', getattr(customer, 'site_name', '') if customer else ''),
+                ('Address:', getattr(customer, 'site_address', '') if customer else ''),
+                ('Payment Term:', invoice.get_payment_term_display()),
+                ('Discount:', f"{invoice.discount}%"),
+            ]),
+            Section("Invoice Items"),
+            ItemsTable(
+                ['Item', 'Rate', 'Qty', 'Tax (%)', 'Total'],
+                [
+                    [
+                        getattr(item.item, 'name', 'N/A'),
+                        f"{item.rate:.2f}",
+                        str(item.qty),
+                        f"{item.tax:.2f}",
+                        f"{item.total:.2f}",
+                    ]
+                    for item in invoice.items.all()
+                ],
+                col_widths=[180, 80, 60, 80, 100],
+            ),
+            Text(f"Subtotal: ₹{invoice.subtotal:.2f}"),
+            Text(f"Discount ({invoice.discount}%): ₹{invoice.discount_amount:.2f}"),
+            Text(f"<b>Grand Total:</b> ₹{invoice.total:.2f}", 'Heading3'),
+        ]
+
+
+invoice_pdf = InvoicePDF()
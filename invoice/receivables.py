@@ -0,0 +1,163 @@
+# invoice/receivables.py
+"""
+Receivables: invoice balances and aging.
+
+An invoice's balance is its stored total (maintained from its items, see
+totals.py) minus the payments allocated to it (PaymentReceived/allocation.py),
+computed in SQL with a correlated subquery. Outstanding balances are aged by days past
+the invoice due date into 0-30, 31-60, 61-90 and 90+ buckets (invoices
+not yet due fall in 0-30) and summed per customer in one grouped query.
+Payment amounts not allocated to any invoice are reported per customer
+as unapplied credit.
+
+The aging report is cached; invoice, invoice item and payment writes
+call invalidate_receivables() through signals.
+"""
+from dataclasses import dataclass, field
+from datetime import timedelta
+from decimal import Decimal
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, DecimalField, F, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+CACHE_KEY = 'receivables:aging'
+ZERO = Decimal('0.00')
+
+# (key, label, lower bound in days overdue, upper bound or None)
+AGING_BUCKETS = (
+    ('days_0_30', '0-30', None, 30),
+    ('days_31_60', '31-60', 31, 60),
+    ('days_61_90', '61-90', 61, 90),
+    ('days_90_plus', '90+', 91, None),
+)
+
+MONEY = DecimalField(max_digits=12, decimal_places=2)
+
+
+def get_cache_seconds():
+    return getattr(settings, 'RECEIVABLES_CACHE_SECONDS', 900)
+
+
+def paid_subquery():
+    PaymentAllocation = apps.get_model('PaymentReceived', 'PaymentAllocation')
+    payments = (
+        PaymentAllocation.objects.filter(invoice=OuterRef('pk')).order_by()
+        .values('invoice').annotate(paid=Sum('amount')).values('paid')
+    )
+    return Coalesce(Subquery(payments, output_field=MONEY), Value(ZERO), output_field=MONEY)
+
+
+def with_balances(invoices):
+    """Annotate amount_paid and due_balance on an Invoice queryset"""
+    return invoices.annotate(amount_paid=paid_subquery()).annotate(
+        due_balance=F('total') - F('amount_paid'),
+    )
+
+
+def bucket_filter(lower, upper, today):
+    """Q for invoices overdue by between lower and upper days"""
+    condition = Q()
+    if lower is not None:
+        condition &= Q(due_date__lte=today - timedelta(days=lower))
+    if upper is not None:
+        condition &= Q(due_date__gt=today - timedelta(days=upper + 1))
+    return condition
+
+
+def outstanding_invoices():
+    from .models import Invoice
+
+    return with_balances(Invoice.objects.all()).filter(due_balance__gt=0)
+
+
+@dataclass
+class CustomerAging:
+    customer_id: int
+    site_name: str
+    invoices: int
+    outstanding: Decimal
+    buckets: dict
+    unapplied: Decimal = ZERO
+
+    @property
+    def net_outstanding(self):
+        return self.outstanding - self.unapplied
+
+    @property
+    def bucket_values(self):
+        return [self.buckets[key] for key, *_ in AGING_BUCKETS]
+
+
+@dataclass
+class AgingReport:
+    as_of: object
+    customers: list = field(default_factory=list)
+    totals: dict = field(default_factory=dict)
+    outstanding: Decimal = ZERO
+    unapplied: Decimal = ZERO
+
+    @property
+    def total_values(self):
+        return [self.totals[key] for key, *_ in AGING_BUCKETS]
+
+
+def build_aging_report(today=None):
+    """Per-customer aging of outstanding invoice balances, computed in SQL"""
+    PaymentReceived = apps.get_model('PaymentReceived', 'PaymentReceived')
+    PaymentAllocation = apps.get_model('PaymentReceived', 'PaymentAllocation')
+    today = today or timezone.localdate()
+
+    sums = {
+        key: Coalesce(Sum('due_balance', filter=bucket_filter(lower, upper, today)), Value(ZERO), output_field=MONEY)
+        for key, _label, lower, upper in AGING_BUCKETS
+    }
+    rows = (
+        outstanding_invoices().order_by()
+        .values('customer_id', 'customer__site_name')
+        .annotate(invoice_count=Count('pk'), outstanding=Sum('due_balance'), **sums)
+        .order_by('-outstanding', 'customer__site_name')
+    )
+    unapplied = dict(
+        PaymentReceived.objects.order_by()
+        .values('customer_id').annotate(total=Sum('amount')).values_list('customer_id', 'total')
+    )
+    for customer_id, allocated in (
+        PaymentAllocation.objects.order_by()
+        .values('payment__customer_id').annotate(total=Sum('amount')).values_list('payment__customer_id', 'total')
+    ):
+        unapplied[customer_id] -= allocated
+
+    report = AgingReport(as_of=today, totals={key: ZERO for key, *_ in AGING_BUCKETS})
+    for row in rows:
+        customer = CustomerAging(
+            customer_id=row['customer_id'],
+            site_name=row['customer__site_name'] or 'No customer',
+            invoices=row['invoice_count'],
+            outstanding=row['outstanding'],
+            buckets={key: row[key] for key, *_ in AGING_BUCKETS},
+            unapplied=unapplied.get(row['customer_id']) or ZERO,
+        )
+        report.customers.append(customer)
+        report.outstanding += customer.outstanding
+        report.unapplied += customer.unapplied
+        for key in customer.buckets:
+            report.totals[key] += customer.buckets[key]
+    return report
+
+
+def get_aging_report(today=None):
+    """Cached build_aging_report(); rebuilt after writes or when the day changes"""
+    today = today or timezone.localdate()
+    report = cache.get(CACHE_KEY)
+    if report is None or report.as_of != today:
+        report = build_aging_report(today)
+        cache.set(CACHE_KEY, report, get_cache_seconds())
+    return report
+
+
+def invalidate_receivables():
+    cache.delete(CACHE_KEY)
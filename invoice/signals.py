@@ -0,0 +1,25 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Invoice, InvoiceItem
+from .receivables import invalidate_receivables
+
+
+@receiver(post_save, sender=InvoiceItem)
+@receiver(post_delete, sender=InvoiceItem)
+def refresh_invoice_totals(sender, instance, raw=False, origin=None, **kwargs):
+    """Keep the invoice's stored totals in step with its items"""
+    # Skip fixtures, and cascades from deleting the invoice itself
+    if raw or isinstance(origin, Invoice):
+        return
+    invoice = Invoice.objects.filter(pk=instance.invoice_id).only('pk', 'discount').first()
+    if invoice is not None:
+        invoice.update_totals()
+
+
+@receiver(post_save, sender=Invoice)
+@receiver(post_delete, sender=Invoice)
+@receiver(post_save, sender=InvoiceItem)
+@receiver(post_delete, sender=InvoiceItem)
+def invalidate_receivables_on_invoice_write(sender, **kwargs):
+    invalidate_receivables()
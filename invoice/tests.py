@@ -1,3 +1,108 @@
+from datetime import date
+from decimal import Decimal
+from importlib import import_module
+
+from django.apps import apps
+from django.core.cache import cache
 from django.test import TestCase
 
-# Create your tests here.
+from PaymentReceived.models import PaymentReceived
+from amc.models import AMCType
+from customer.models import Customer
+
+from .models import Invoice, InvoiceItem
+from .receivables import get_aging_report, with_balances
+from .totals import recalculate_totals
+
+
+class InvoiceTotalsTests(TestCase):
+    def setUp(self):
+        self.invoice = Invoice.objects.create(
+            amc_type=AMCType.objects.create(name='Comprehensive'),
+            start_date=date(2026, 1, 1), due_date=date(2026, 1, 31), discount=Decimal('10'),
+        )
+
+    def add_item(self, rate, qty=1, tax=0):
+        return InvoiceItem.objects.create(invoice=self.invoice, rate=Decimal(rate), qty=qty, tax=Decimal(tax))
+
+    def test_item_writes_update_stored_totals(self):
+        self.add_item('100.00', qty=2)
+        item = self.add_item('50.00', tax=18)
+        self.invoice.refresh_from_db()
+        self.assertEqual(self.invoice.subtotal, Decimal('259.00'))
+        self.assertEqual(self.invoice.discount_amount, Decimal('25.90'))
+        self.assertEqual(self.invoice.total, Decimal('233.10'))
+
+        item.delete()
+        self.invoice.refresh_from_db()
+        self.assertEqual(self.invoice.total, Decimal('180.00'))
+
+    def test_discount_change_on_stale_instance(self):
+        stale = Invoice.objects.get(pk=self.invoice.pk)
+        self.add_item('200.00')
+        stale.discount = Decimal('0')
+        stale.save()
+        stale.refresh_from_db()
+        self.assertEqual(stale.total, Decimal('200.00'))
+
+    def test_recalculate_totals(self):
+        self.add_item('100.00')
+        Invoice.objects.update(subtotal=0, discount_amount=0, total=0)
+        self.assertEqual(recalculate_totals(Invoice.objects.all()), 1)
+        self.invoice.refresh_from_db()
+        self.assertEqual(self.invoice.total, Decimal('90.00'))
+
+    def test_migration_backfills_totals(self):
+        migration = import_module('invoice.migrations.0006_stored_totals')
+        self.add_item('100.00', qty=2)
+        self.add_item('50.00', tax=18)
+        Invoice.objects.update(subtotal=0, discount_amount=0, total=0)
+
+        migration.backfill_totals(apps, None)
+        self.invoice.refresh_from_db()
+        self.assertEqual(
+            (self.invoice.subtotal, self.invoice.discount_amount, self.invoice.total),
+            (Decimal('259.00'), Decimal('25.90'), Decimal('233.10')),
+        )
+
+
+class ReceivablesTests(TestCase):
+    today = date(2026, 6, 30)
+
+    def setUp(self):
+        cache.clear()
+        self.customer = Customer.objects.create(
+            site_name='Aging Site', site_address='1 Test Street', email='aging@example.com', phone='9123456783', job_no='J4',
+        )
+        amc_type = AMCType.objects.create(name='Comprehensive')
+        self.recent = self.create_invoice(amc_type, date(2026, 6, 15), '1000.00')
+        self.old = self.create_invoice(amc_type, date(2026, 2, 1), '500.00')
+
+    def create_invoice(self, amc_type, due_date, rate):
+        invoice = Invoice.objects.create(customer=self.customer, amc_type=amc_type, start_date=due_date, due_date=due_date)
+        InvoiceItem.objects.create(invoice=invoice, rate=Decimal(rate), tax=Decimal('0'))
+        return invoice
+
+    def pay(self, amount, invoice=None):
+        return PaymentReceived.objects.create(
+            customer=self.customer, invoice=invoice, amount=Decimal(amount), date=self.today,
+        )
+
+    def test_balances_subtract_linked_payments(self):
+        self.pay('400.00', invoice=self.recent)
+        balance = with_balances(Invoice.objects.filter(pk=self.recent.pk)).get().due_balance
+        self.assertEqual(balance, Decimal('600.00'))
+
+    def test_aging_buckets_and_invalidation(self):
+        report = get_aging_report(self.today)
+        [row] = report.customers
+        self.assertEqual(row.invoices, 2)
+        self.assertEqual(row.buckets['days_0_30'], Decimal('1000.00'))
+        self.assertEqual(row.buckets['days_90_plus'], Decimal('500.00'))
+
+        self.pay('500.00', invoice=self.old)
+        self.pay('50.00')
+        [row] = get_aging_report(self.today).customers
+        self.assertEqual(row.invoices, 1)
+        self.assertEqual(row.outstanding, Decimal('950.00'))
+        self.assertEqual(row.unapplied, Decimal('0.00'))
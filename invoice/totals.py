@@ -0,0 +1,53 @@
+# invoice/totals.py
+"""
+Stored invoice totals.
+
+Invoice.subtotal, discount_amount and total are denormalized from the
+invoice items so listings, reports and the dashboard can aggregate
+invoice value with a single SUM. They are refreshed when an item is
+saved or deleted (signals.py) and when the invoice itself is saved.
+recalculate_totals() rebuilds them for a whole queryset in two UPDATE
+statements and is used by the backfill command (the migration that added
+the columns has its own frozen copy).
+"""
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.db.models import DecimalField, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Round
+
+from home.caching import invalidate_namespaces
+
+from .receivables import invalidate_receivables
+
+CENT = Decimal('0.01')
+ZERO = Decimal('0.00')
+
+
+def apply_discount(subtotal, discount):
+    """(discount_amount, total) for a subtotal and a percentage discount"""
+    subtotal = Decimal(subtotal or 0)
+    discount_amount = (subtotal * Decimal(discount or 0) / 100).quantize(CENT, rounding=ROUND_HALF_UP)
+    return discount_amount, subtotal - discount_amount
+
+
+def item_subtotal(invoice_id):
+    from .models import InvoiceItem
+
+    total = InvoiceItem.objects.filter(invoice_id=invoice_id).aggregate(total=Sum('total'))['total']
+    return (total or ZERO).quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def recalculate_totals(queryset):
+    """Recompute stored totals for every invoice in the queryset; returns the row count"""
+    item_model = queryset.model._meta.get_field('items').related_model
+    amount = DecimalField(max_digits=12, decimal_places=2)
+    item_sum = (
+        item_model.objects.filter(invoice=OuterRef('pk')).order_by()
+        .values('invoice').annotate(total=Sum('total')).values('total')
+    )
+    count = queryset.update(subtotal=Coalesce(Subquery(item_sum, output_field=amount), Value(ZERO), output_field=amount))
+    discount_amount = Round(F('subtotal') * F('discount') / 100, 2, output_field=amount)
+    queryset.update(discount_amount=discount_amount, total=F('subtotal') - discount_amount)
+    invalidate_receivables()
+    invalidate_namespaces('invoices')
+    return count
@@ -3,19 +3,17 @@ import csv
 import io
 from datetime import datetime, date
 from django.shortcuts import get_object_or_404, render
-from django.http import HttpResponse, JsonResponse
+from django.http import Http404, HttpResponse, JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.contrib import messages
 from django.core.exceptions import ValidationError
-from io import BytesIO
-from reportlab.lib.pagesizes import letter
-from reportlab.lib import colors
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 import logging
 import json
 
+from PaymentReceived.allocation import deferred_allocation
+
 from .models import Invoice, InvoiceItem
+from .pdf import invoice_pdf
 
 logger = logging.getLogger(__name__)
 
@@ -23,107 +21,11 @@ logger = logging.getLogger(__name__)
 def download_invoice_pdf(request, pk):
     """Generate and download a PDF for a specific invoice."""
     try:
-        invoice = get_object_or_404(
-            Invoice.objects.select_related('customer', 'amc_type').prefetch_related('items__item'),
-            pk=pk
-        )
-
-        # --- Context Preparation ---
-        context = {
-            'company_name': 'Atom Lifts India Pvt Ltd',
-            'address': 'No.87B, Pillayar Koll Street, Mannurpet, Ambattur Indus Estate, Chennai 50',
-            'phone': '9600087456',
-            'email': 'admin@atomlifts.com',
-
-            'invoice_no': invoice.reference_id,
-            'invoice_date': invoice.start_date.strftime('%d/%m/%Y') if invoice.start_date else '',
-            'due_date': invoice.due_date.strftime('%d/%m/%Y') if invoice.due_date else '',
-            'customer_name': getattr(invoice.customer, 'site_name', '') if invoice.customer else '',
-            'customer_address': getattr(invoice.customer, 'site_address', '') if invoice.customer else '',
-            'amc_type': getattr(invoice.amc_type, 'name', '') if invoice.amc_type else '',
-            'discount': f"{invoice.discount}%",
-            'payment_term': invoice.get_payment_term_display(),
-            'status': invoice.get_status_display(),
-        }
-
-        # --- Build PDF ---
-        buffer = BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=letter, rightMargin=72, leftMargin=72, topMargin=72, bottomMargin=72)
-        styles = getSampleStyleSheet()
-        story = []
-
-        # Header
-        header_style = ParagraphStyle(name='HeaderStyle', parent=styles['Heading1'], fontSize=18, alignment=1)
-        story.append(Paragraph(context['company_name'], header_style))
-        story.append(Paragraph(context['address'], styles['Normal']))
-        story.append(Paragraph(f"Phone: {context['phone']} | Email: {context['email']}", styles['Normal']))
-        story.append(Spacer(1, 12))
-
-        # Invoice Summary
-        data = [
-            ['Invoice No:', context['invoice_no']],
-            ['Invoice Date:', context['invoice_date']],
-            ['Due Date:', context['due_date']],
-            ['AMC Type:', context['amc_type']],
-            ['Status:', context['status']],
-        ]
-        summary_table = Table(data, colWidths=[100, 400])
-        summary_table.setStyle(TableStyle([
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-        ]))
-        story.append(summary_table)
-        story.append(Spacer(1, 12))
-
-        # Customer Info
-        story.append(Paragraph("Customer Details", styles['Heading2']))
-        cust_data = [
-            ['Customer Name:', context['customer_name']],
-            ['Address:', context['customer_address']],
-            ['Payment Term:', context['payment_term']],
-            ['Discount:', context['discount']],
-        ]
-        cust_table = Table(cust_data, colWidths=[100, 400])
-        cust_table.setStyle(TableStyle([
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-        ]))
-        story.append(cust_table)
-        story.append(Spacer(1, 12))
-
-        # Invoice Items
-        story.append(Paragraph("Invoice Items", styles['Heading2']))
-        item_data = [['Item', 'Rate', 'Qty', 'Tax (%)', 'Total']]
-        for item in invoice.items.all():
-            item_data.append([
-                getattr(item.item, 'name', 'N/A'),
-                f"{item.rate:.2f}",
-                str(item.qty),
-                f"{item.tax:.2f}",
-                f"{item.total:.2f}",
-            ])
-        item_table = Table(item_data, colWidths=[180, 80, 60, 80, 100])
-        item_table.setStyle(TableStyle([
-            ('GRID', (0, 0), (-1, -1), 1, colors.black),
-            ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
-            ('ALIGN', (1, 1), (-1, -1), 'RIGHT'),
-        ]))
-        story.append(item_table)
-        story.append(Spacer(1, 12))
-
-        # Totals
-        grand_total = sum(item.total for item in invoice.items.all())
-        story.append(Paragraph(f"<b>Grand Total:</b> ₹{grand_total:.2f}", styles['Heading3']))
-
-        # Build PDF
-        doc.build(story)
-        buffer.seek(0)
-        response = HttpResponse(buffer, content_type='application/pdf')
-        response['Content-Disposition'] = f'attachment; filename=invoice_{context["invoice_no"]}.pdf'
-        return response
+        invoice = get_object_or_404(invoice_pdf.get_queryset(), pk=pk)
+        return invoice_pdf.response(invoice)
 
+    except Http404:
+        raise
     except Exception as e:
         logger.error(f"Error generating invoice PDF: {str(e)}")
         return HttpResponse(f"Error generating PDF: {str(e)}", status=500)
@@ -133,7 +35,6 @@ def download_invoice_pdf(request, pk):
 def add_invoice_custom(request):
     from customer.models import Customer
     from amc.models import AMCType
-    from items.models import Item
     
     if request.method == 'POST':
         try:
@@ -170,11 +71,9 @@ def add_invoice_custom(request):
         except Exception as e:
             return JsonResponse({'success': False, 'error': str(e)})
 
-    # GET: render form
-    customers = Customer.objects.all()
+    # GET: render form (customers and items are searched as the user types)
     amc_types = AMCType.objects.all()
-    items = Item.objects.all()
-    
+
     # Get customerId from URL parameter if provided
     customer_id = request.GET.get('customerId', None)
     preselected_customer = None
@@ -195,9 +94,7 @@ def add_invoice_custom(request):
         preview_invoice_number = f'{Invoice.REFERENCE_PREFIX}{str(last_id + 1).zfill(3)}'
 
     return render(request, 'invoice/add_invoice_custom.html', {
-        'customers': customers,
         'amc_types': amc_types,
-        'items': items,
         'is_edit': False,
         'preselected_customer': preselected_customer,
         'preview_invoice_number': preview_invoice_number
@@ -219,9 +116,7 @@ def view_invoice_custom(request, reference_id):
 
 def edit_invoice_custom(request, reference_id):
     """Custom edit invoice page"""
-    from customer.models import Customer
     from amc.models import AMCType
-    from items.models import Item
     
     try:
         invoice = Invoice.objects.select_related('customer', 'amc_type').prefetch_related('items__item').get(reference_id=reference_id)
@@ -229,9 +124,7 @@ def edit_invoice_custom(request, reference_id):
         messages.error(request, 'Invoice not found')
         return render(request, '404.html')
 
-    customers = Customer.objects.all()
     amc_types = AMCType.objects.all()
-    items = Item.objects.all()
 
     if request.method == 'POST':
         try:
@@ -276,9 +169,7 @@ def edit_invoice_custom(request, reference_id):
 
     return render(request, 'invoice/add_invoice_custom.html', {
         'invoice': invoice,
-        'customers': customers,
         'amc_types': amc_types,
-        'items': items,
         'is_edit': True
     })
 
@@ -528,199 +419,201 @@ def bulk_import_view(request):
                 # If all parsing fails, return None (will be caught by error handling)
                 return None
             
-            for idx, row in enumerate(rows, start=2):  # Start from 2 (1 is header)
-                try:
-                    # Map CSV columns to model fields - handle None values and empty strings
-                    # Headers are normalized to lowercase with underscores
-                    
-                    # Required fields (from add_invoice_custom requirements)
-                    amc_type_value = row.get('amc_type', '') or row.get('amc_type_value', '') or ''
-                    amc_type_value = str(amc_type_value).strip() if amc_type_value else ''
-                    
-                    # Validate required fields (same as add_invoice_custom)
-                    if not amc_type_value:
-                        errors.append(f'Row {idx}: AMC Type is required.')
-                        error_count += 1
-                        continue
-                    
-                    # Get AMC type by name
-                    from amc.models import AMCType
-                    amc_type = AMCType.objects.filter(name=amc_type_value).first()
-                    if not amc_type:
-                        errors.append(f'Row {idx}: AMC Type "{amc_type_value}" not found. Please use an existing AMC type name.')
-                        error_count += 1
-                        continue
+            # Reconcile payments once for the whole file, not per row
+            with deferred_allocation():
+                for idx, row in enumerate(rows, start=2):  # Start from 2 (1 is header)
+                    try:
+                        # Map CSV columns to model fields - handle None values and empty strings
+                        # Headers are normalized to lowercase with underscores
                     
-                    # Optional fields
-                    customer_value = row.get('customer', '') or row.get('customer_value', '') or ''
-                    customer_value = str(customer_value).strip() if customer_value else ''
+                        # Required fields (from add_invoice_custom requirements)
+                        amc_type_value = row.get('amc_type', '') or row.get('amc_type_value', '') or ''
+                        amc_type_value = str(amc_type_value).strip() if amc_type_value else ''
                     
-                    customer = None
-                    if customer_value:
-                        from customer.models import Customer
-                        customer = Customer.objects.filter(site_name=customer_value).first()
-                        if not customer:
-                            errors.append(f'Row {idx}: Customer "{customer_value}" not found. Please use an existing customer site name.')
+                        # Validate required fields (same as add_invoice_custom)
+                        if not amc_type_value:
+                            errors.append(f'Row {idx}: AMC Type is required.')
                             error_count += 1
                             continue
                     
-                    # Handle dates (required in model)
-                    start_date_value = row.get('start_date', '') or row.get('start_date_str', '') or ''
-                    start_date_parsed = None
-                    if start_date_value:
-                        start_date_parsed = parse_date(start_date_value)
-                        if start_date_parsed is None:
-                            errors.append(f'Row {idx}: Invalid start date format. Please use YYYY-MM-DD format.')
+                        # Get AMC type by name
+                        from amc.models import AMCType
+                        amc_type = AMCType.objects.filter(name=amc_type_value).first()
+                        if not amc_type:
+                            errors.append(f'Row {idx}: AMC Type "{amc_type_value}" not found. Please use an existing AMC type name.')
                             error_count += 1
                             continue
-                    else:
-                        # Use today's date if not provided
-                        from django.utils import timezone
-                        start_date_parsed = timezone.now().date()
                     
-                    due_date_value = row.get('due_date', '') or row.get('due_date_str', '') or ''
-                    due_date_parsed = None
-                    if due_date_value:
-                        due_date_parsed = parse_date(due_date_value)
-                        if due_date_parsed is None:
-                            errors.append(f'Row {idx}: Invalid due date format. Please use YYYY-MM-DD format.')
+                        # Optional fields
+                        customer_value = row.get('customer', '') or row.get('customer_value', '') or ''
+                        customer_value = str(customer_value).strip() if customer_value else ''
+                    
+                        customer = None
+                        if customer_value:
+                            from customer.models import Customer
+                            customer = Customer.objects.filter(site_name=customer_value).first()
+                            if not customer:
+                                errors.append(f'Row {idx}: Customer "{customer_value}" not found. Please use an existing customer site name.')
+                                error_count += 1
+                                continue
+                    
+                        # Handle dates (required in model)
+                        start_date_value = row.get('start_date', '') or row.get('start_date_str', '') or ''
+                        start_date_parsed = None
+                        if start_date_value:
+                            start_date_parsed = parse_date(start_date_value)
+                            if start_date_parsed is None:
+                                errors.append(f'Row {idx}: Invalid start date format. Please use YYYY-MM-DD format.')
+                                error_count += 1
+                                continue
+                        else:
+                            # Use today's date if not provided
+                            from django.utils import timezone
+                            start_date_parsed = timezone.now().date()
+                    
+                        due_date_value = row.get('due_date', '') or row.get('due_date_str', '') or ''
+                        due_date_parsed = None
+                        if due_date_value:
+                            due_date_parsed = parse_date(due_date_value)
+                            if due_date_parsed is None:
+                                errors.append(f'Row {idx}: Invalid due date format. Please use YYYY-MM-DD format.')
+                                error_count += 1
+                                continue
+                        else:
+                            # Use start_date + 30 days if not provided
+                            from datetime import timedelta
+                            due_date_parsed = start_date_parsed + timedelta(days=30)
+                    
+                        # Validate date order
+                        if start_date_parsed >= due_date_parsed:
+                            errors.append(f'Row {idx}: Start date must be before due date.')
                             error_count += 1
                             continue
-                    else:
-                        # Use start_date + 30 days if not provided
-                        from datetime import timedelta
-                        due_date_parsed = start_date_parsed + timedelta(days=30)
                     
-                    # Validate date order
-                    if start_date_parsed >= due_date_parsed:
-                        errors.append(f'Row {idx}: Start date must be before due date.')
-                        error_count += 1
-                        continue
-                    
-                    # Parse numeric fields
-                    discount = 0.00
-                    discount_value = row.get('discount', '0') or '0'
-                    try:
-                        discount = float(discount_value)
-                        if discount < 0:
-                            discount = 0.00
-                    except (ValueError, TypeError):
+                        # Parse numeric fields
                         discount = 0.00
+                        discount_value = row.get('discount', '0') or '0'
+                        try:
+                            discount = float(discount_value)
+                            if discount < 0:
+                                discount = 0.00
+                        except (ValueError, TypeError):
+                            discount = 0.00
                     
-                    # Payment term (optional, default: 'cash')
-                    payment_term = row.get('payment_term', 'cash') or 'cash'
-                    valid_payment_terms = ['cash', 'cheque', 'neft']
-                    if payment_term not in valid_payment_terms:
-                        payment_term = 'cash'
+                        # Payment term (optional, default: 'cash')
+                        payment_term = row.get('payment_term', 'cash') or 'cash'
+                        valid_payment_terms = ['cash', 'cheque', 'neft']
+                        if payment_term not in valid_payment_terms:
+                            payment_term = 'cash'
                     
-                    # Status (optional, default: 'open')
-                    status = row.get('status', 'open') or 'open'
-                    valid_statuses = ['open', 'paid', 'partially_paid']
-                    if status not in valid_statuses:
-                        status = 'open'
+                        # Status (optional, default: 'open')
+                        status = row.get('status', 'open') or 'open'
+                        valid_statuses = ['open', 'paid', 'partially_paid']
+                        if status not in valid_statuses:
+                            status = 'open'
                     
-                    # Handle invoice items (optional - JSON format or comma-separated)
-                    items_data = []
-                    items_str = row.get('items', '') or ''
-                    if items_str:
-                        try:
-                            # Try to parse as JSON first
-                            items_data = json.loads(items_str)
-                            if not isinstance(items_data, list):
-                                items_data = []
-                        except (json.JSONDecodeError, ValueError):
-                            # If not JSON, try comma-separated format: "item_name:rate:qty:tax,item_name2:rate2:qty2:tax2"
-                            items_list = [item.strip() for item in str(items_str).split(',') if item.strip()]
-                            for item_str in items_list:
-                                parts = item_str.split(':')
-                                if len(parts) >= 2:
-                                    item_name = parts[0].strip()
-                                    rate = float(parts[1].strip()) if len(parts) > 1 and parts[1].strip() else 0
-                                    qty = int(parts[2].strip()) if len(parts) > 2 and parts[2].strip() else 1
-                                    tax = float(parts[3].strip()) if len(parts) > 3 and parts[3].strip() else 0
-                                    items_data.append({
-                                        'item': item_name,
-                                        'rate': rate,
-                                        'qty': qty,
-                                        'tax': tax
-                                    })
+                        # Handle invoice items (optional - JSON format or comma-separated)
+                        items_data = []
+                        items_str = row.get('items', '') or ''
+                        if items_str:
+                            try:
+                                # Try to parse as JSON first
+                                items_data = json.loads(items_str)
+                                if not isinstance(items_data, list):
+                                    items_data = []
+                            except (json.JSONDecodeError, ValueError):
+                                # If not JSON, try comma-separated format: "item_name:rate:qty:tax,item_name2:rate2:qty2:tax2"
+                                items_list = [item.strip() for item in str(items_str).split(',') if item.strip()]
+                                for item_str in items_list:
+                                    parts = item_str.split(':')
+                                    if len(parts) >= 2:
+                                        item_name = parts[0].strip()
+                                        rate = float(parts[1].strip()) if len(parts) > 1 and parts[1].strip() else 0
+                                        qty = int(parts[2].strip()) if len(parts) > 2 and parts[2].strip() else 1
+                                        tax = float(parts[3].strip()) if len(parts) > 3 and parts[3].strip() else 0
+                                        items_data.append({
+                                            'item': item_name,
+                                            'rate': rate,
+                                            'qty': qty,
+                                            'tax': tax
+                                        })
                     
-                    # Create invoice (same structure as add_invoice_custom)
-                    invoice = Invoice.objects.create(
-                        customer=customer,
-                        amc_type=amc_type,
-                        start_date=start_date_parsed,
-                        due_date=due_date_parsed,
-                        discount=discount,
-                        payment_term=payment_term,
-                        status=status,
-                    )
+                        # Create invoice (same structure as add_invoice_custom)
+                        invoice = Invoice.objects.create(
+                            customer=customer,
+                            amc_type=amc_type,
+                            start_date=start_date_parsed,
+                            due_date=due_date_parsed,
+                            discount=discount,
+                            payment_term=payment_term,
+                            status=status,
+                        )
                     
-                    # Add invoice items if provided
-                    if items_data:
-                        from items.models import Item
-                        for item_data in items_data:
-                            # Handle both dict format (from JSON) and simplified format
-                            if isinstance(item_data, dict):
-                                item_name = item_data.get('item') or item_data.get('item_name', '')
-                                item_obj = None
-                                if item_name:
-                                    item_obj = Item.objects.filter(name=item_name).first()
-                                    if not item_obj:
-                                        errors.append(f'Row {idx}: Item "{item_name}" not found. Skipping this item.')
-                                        continue
+                        # Add invoice items if provided
+                        if items_data:
+                            from items.models import Item
+                            for item_data in items_data:
+                                # Handle both dict format (from JSON) and simplified format
+                                if isinstance(item_data, dict):
+                                    item_name = item_data.get('item') or item_data.get('item_name', '')
+                                    item_obj = None
+                                    if item_name:
+                                        item_obj = Item.objects.filter(name=item_name).first()
+                                        if not item_obj:
+                                            errors.append(f'Row {idx}: Item "{item_name}" not found. Skipping this item.')
+                                            continue
                                 
-                                rate = float(item_data.get('rate', 0))
-                                qty = int(item_data.get('qty', 1))
-                                tax = float(item_data.get('tax', 0))
+                                    rate = float(item_data.get('rate', 0))
+                                    qty = int(item_data.get('qty', 1))
+                                    tax = float(item_data.get('tax', 0))
                                 
-                                if item_obj:
-                                    InvoiceItem.objects.create(
-                                        invoice=invoice,
-                                        item=item_obj,
-                                        rate=rate,
-                                        qty=qty,
-                                        tax=tax,
-                                    )
+                                    if item_obj:
+                                        InvoiceItem.objects.create(
+                                            invoice=invoice,
+                                            item=item_obj,
+                                            rate=rate,
+                                            qty=qty,
+                                            tax=tax,
+                                        )
                     
-                    # Note: File uploads (uploads_files) cannot be handled in bulk import
-                    # Users need to upload files individually after import
+                        # Note: File uploads (uploads_files) cannot be handled in bulk import
+                        # Users need to upload files individually after import
                     
-                    # Validate and save (uses full_clean which applies all model validations)
-                    try:
-                        invoice.full_clean()
-                        invoice.save()
-                        success_count += 1
-                    except ValidationError as e:
-                        # Handle validation errors
-                        if e.message_dict:
-                            error_fields = ['amc_type', 'start_date', 'due_date']
-                            error_msg = None
-                            for field in error_fields:
-                                if field in e.message_dict:
-                                    error_msg = f"Row {idx}: {e.message_dict[field][0]}"
-                                    break
-                            if not error_msg:
-                                error_msg = f"Row {idx}: {list(e.message_dict.values())[0][0]}"
-                        else:
-                            error_msg = f"Row {idx}: {str(e)}"
-                        errors.append(error_msg)
-                        error_count += 1
-                        continue
+                        # Validate and save (uses full_clean which applies all model validations)
+                        try:
+                            invoice.full_clean()
+                            invoice.save()
+                            success_count += 1
+                        except ValidationError as e:
+                            # Handle validation errors
+                            if e.message_dict:
+                                error_fields = ['amc_type', 'start_date', 'due_date']
+                                error_msg = None
+                                for field in error_fields:
+                                    if field in e.message_dict:
+                                        error_msg = f"Row {idx}: {e.message_dict[field][0]}"
+                                        break
+                                if not error_msg:
+                                    error_msg = f"Row {idx}: {list(e.message_dict.values())[0][0]}"
+                            else:
+                                error_msg = f"Row {idx}: {str(e)}"
+                            errors.append(error_msg)
+                            error_count += 1
+                            continue
+                        except Exception as e:
+                            # Handle unique constraint violations and other database errors
+                            error_str = str(e).lower()
+                            if 'unique' in error_str or 'duplicate' in error_str or 'already exists' in error_str:
+                                errors.append(f'Row {idx}: Duplicate entry - {str(e)}')
+                            else:
+                                errors.append(f'Row {idx}: {str(e)}')
+                            error_count += 1
+                            continue
+                        
                     except Exception as e:
-                        # Handle unique constraint violations and other database errors
-                        error_str = str(e).lower()
-                        if 'unique' in error_str or 'duplicate' in error_str or 'already exists' in error_str:
-                            errors.append(f'Row {idx}: Duplicate entry - {str(e)}')
-                        else:
-                            errors.append(f'Row {idx}: {str(e)}')
+                        errors.append(f'Row {idx}: Unexpected error - {str(e)}')
                         error_count += 1
                         continue
-                        
-                except Exception as e:
-                    errors.append(f'Row {idx}: Unexpected error - {str(e)}')
-                    error_count += 1
-                    continue
             
             # Show results
             if success_count > 0:
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('items', '0006_bulkimportitem'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='item',
+            name='name',
+            field=models.CharField(db_index=True, max_length=100),
+        ),
+    ]
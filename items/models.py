@@ -4,6 +4,7 @@ from django.forms.widgets import RadioSelect
 from wagtail.admin.panels import FieldPanel, MultiFieldPanel
 from wagtail.snippets.models import register_snippet
 from wagtail.snippets.views.snippets import SnippetViewSet, SnippetViewSetGroup, IndexView
+from home.exports import ExportQuerysetMixin
 from django.http import HttpResponseForbidden
 from django.forms.widgets import RadioSelect
 from django.urls import reverse
@@ -41,7 +42,7 @@ class Unit(models.Model):
 # ---------- MAIN MODEL ----------
 class Item(models.Model):
     item_number = models.CharField(max_length=10, unique=True, editable=False)
-    name = models.CharField(max_length=100)
+    name = models.CharField(max_length=100, db_index=True)
     make = models.ForeignKey(Make, on_delete=models.SET_NULL, null=True)
     model = models.CharField(max_length=100)
     type = models.ForeignKey(Type, on_delete=models.SET_NULL, null=True)
@@ -236,7 +237,9 @@ class ItemViewSet(SnippetViewSet):
         return redirect(self.get_edit_url(instance))
 
     # Custom IndexView to restrict export to superusers
-    class RestrictedIndexView(IndexView):
+    class RestrictedIndexView(ExportQuerysetMixin, IndexView):
+        export_select_related = ('make', 'type', 'unit')
+
         def dispatch(self, request, *args, **kwargs):
             """Override dispatch to check export permissions"""
             export_format = request.GET.get('export')
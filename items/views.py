@@ -9,6 +9,7 @@ from .models import Item, Type, Make, Unit
 import json
 import csv
 import io
+from home.caching import cached_response
 
 def add_item_custom(request):
     """Custom add item page"""
@@ -142,6 +143,7 @@ def edit_item_custom(request, item_number):
 
 # API endpoints for dropdown options with CRUD
 @csrf_exempt
+@cached_response('lookups', per_user=False)
 def manage_types(request):
     """API for managing types: GET list, POST create"""
     if request.method == 'GET':
@@ -188,6 +190,7 @@ def manage_types_detail(request, pk):
         return JsonResponse({'success': False, 'error': str(e)}, status=500)
 
 @csrf_exempt
+@cached_response('lookups', per_user=False)
 def manage_makes(request):
     """API for managing makes: GET list, POST create"""
     if request.method == 'GET':
@@ -234,6 +237,7 @@ def manage_makes_detail(request, pk):
         return JsonResponse({'success': False, 'error': str(e)}, status=500)
 
 @csrf_exempt
+@cached_response('lookups', per_user=False)
 def manage_units(request):
     """API for managing units: GET list, POST create"""
     if request.method == 'GET':
@@ -2,6 +2,7 @@ from django.db import models
 from wagtail.admin.panels import FieldPanel
 from wagtail.snippets.models import register_snippet
 from wagtail.snippets.views.snippets import SnippetViewSet, SnippetViewSetGroup, IndexView
+from home.exports import ExportQuerysetMixin
 from django.urls import reverse
 from django.shortcuts import redirect
 from django.core.exceptions import ValidationError
@@ -83,7 +84,7 @@ class Cabin(models.Model):
 class Lift(models.Model):
     reference_id = models.CharField(max_length=20, unique=True, editable=False, null=False, blank=False)
     lift_code = models.CharField(max_length=100, unique=True, blank=True, null=True)
-    name = models.CharField(max_length=100)
+    name = models.CharField(max_length=100, db_index=True)
     price = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
     floor_id = models.ForeignKey(FloorID, on_delete=models.SET_NULL, null=True)
     brand = models.ForeignKey(Brand, on_delete=models.SET_NULL, null=True)
@@ -383,7 +384,9 @@ class LiftViewSet(SnippetViewSet):
         return redirect(self.get_edit_url(instance))
 
     # Custom IndexView to restrict export to superusers
-    class RestrictedIndexView(IndexView):
+    class RestrictedIndexView(ExportQuerysetMixin, IndexView):
+        export_select_related = ('floor_id', 'brand', 'lift_type', 'machine_type', 'machine_brand', 'door_type', 'door_brand', 'controller_brand', 'cabin')
+
         def dispatch(self, request, *args, **kwargs):
             """Override dispatch to check export permissions"""
             # Check if this is an export request
@@ -9,6 +9,7 @@ from django.views.decorators.http import require_http_methods
 from django.core.exceptions import ValidationError
 from django.contrib import messages
 from .models import FloorID, Brand, LiftType, MachineType, MachineBrand, DoorType, DoorBrand, ControllerBrand, Cabin, Lift
+from home.caching import cached_response
 
 
 # API endpoints for fetching dropdown options
@@ -882,6 +883,7 @@ def delete_cabin(request, cabin_id):
 
 @csrf_exempt
 @require_http_methods(["GET", "POST"])
+@cached_response('lookups', per_user=False)
 def manage_floorids(request, pk=None):
     """API for managing floor IDs"""
     if request.method == 'GET':
@@ -929,6 +931,7 @@ def manage_floorids_detail(request, pk):
 
 @csrf_exempt
 @require_http_methods(["GET", "POST"])
+@cached_response('lookups', per_user=False)
 def manage_brands(request, pk=None):
     """API for managing brands"""
     if request.method == 'GET':
@@ -976,6 +979,7 @@ def manage_brands_detail(request, pk):
 
 @csrf_exempt
 @require_http_methods(["GET", "POST"])
+@cached_response('lookups', per_user=False)
 def manage_lifttypes(request, pk=None):
     """API for managing lift types"""
     if request.method == 'GET':
@@ -1023,6 +1027,7 @@ def manage_lifttypes_detail(request, pk):
 
 @csrf_exempt
 @require_http_methods(["GET", "POST"])
+@cached_response('lookups', per_user=False)
 def manage_machinetypes(request, pk=None):
     """API for managing machine types"""
     if request.method == 'GET':
@@ -1070,6 +1075,7 @@ def manage_machinetypes_detail(request, pk):
 
 @csrf_exempt
 @require_http_methods(["GET", "POST"])
+@cached_response('lookups', per_user=False)
 def manage_machinebrands(request, pk=None):
     """API for managing machine brands"""
     if request.method == 'GET':
@@ -1117,6 +1123,7 @@ def manage_machinebrands_detail(request, pk):
 
 @csrf_exempt
 @require_http_methods(["GET", "POST"])
+@cached_response('lookups', per_user=False)
 def manage_doortypes(request, pk=None):
     """API for managing door types"""
     if request.method == 'GET':
@@ -1164,6 +1171,7 @@ def manage_doortypes_detail(request, pk):
 
 @csrf_exempt
 @require_http_methods(["GET", "POST"])
+@cached_response('lookups', per_user=False)
 def manage_doorbrands(request, pk=None):
     """API for managing door brands"""
     if request.method == 'GET':
@@ -1211,6 +1219,7 @@ def manage_doorbrands_detail(request, pk):
 
 @csrf_exempt
 @require_http_methods(["GET", "POST"])
+@cached_response('lookups', per_user=False)
 def manage_controllerbrands(request, pk=None):
     """API for managing controller brands"""
     if request.method == 'GET':
@@ -1258,6 +1267,7 @@ def manage_controllerbrands_detail(request, pk):
 
 @csrf_exempt
 @require_http_methods(["GET", "POST"])
+@cached_response('lookups', per_user=False)
 def manage_cabins(request, pk=None):
     """API for managing cabins"""
     if request.method == 'GET':
@@ -0,0 +1,192 @@
+# recurringInvoice/generation.py
+"""
+Batch invoice generation for recurring invoices.
+
+Due contracts are selected on the indexed (status, auto_repeat,
+next_generation_date) columns and processed in chunks. Each chunk runs in
+one transaction: the contracts are locked, every due period gets an
+Invoice (bulk insert) with its items copied from the contract (bulk
+insert), and last_generated_date / next_generation_date are advanced
+with bulk_update. Invoices carry (recurring_invoice, recurring_period),
+which is unique, so a re-run or an overlapping run can never bill the
+same period twice.
+"""
+from dataclasses import dataclass, field
+from datetime import timedelta
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from invoice.models import Invoice, InvoiceItem
+from home.caching import invalidate_namespaces
+from invoice.receivables import invalidate_receivables
+from PaymentReceived.allocation import request_allocation
+from invoice.totals import CENT
+
+from .models import RecurringInvoice
+
+DEFAULT_CHUNK_SIZE = 200
+# Upper bound on catch-up periods per contract in one run
+MAX_PERIODS_PER_RUN = 24
+
+
+def get_due_days():
+    return getattr(settings, 'RECURRING_INVOICE_DUE_DAYS', 15)
+
+
+def get_default_amc_type():
+    from amc.models import AMCType
+
+    name = getattr(settings, 'RECURRING_INVOICE_AMC_TYPE', 'Recurring Invoice')
+    return AMCType.objects.get_or_create(name=name)[0]
+
+
+def due_recurring_invoices(today=None):
+    today = today or timezone.localdate()
+    return RecurringInvoice.objects.filter(status='active', auto_repeat=True, next_generation_date__lte=today)
+
+
+def due_periods(contract, today):
+    """Billing dates owed by a contract up to today, oldest first"""
+    periods = []
+    period = contract.next_generation_date
+    while period is not None and period <= today and len(periods) < MAX_PERIODS_PER_RUN:
+        periods.append(period)
+        period = contract.get_scheduled_date(after=period)
+    return periods
+
+
+def line_total(item):
+    return (item.rate * item.qty * (1 + item.tax / 100)).quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+@dataclass
+class PlannedInvoice:
+    contract: RecurringInvoice
+    period: object
+    items: list
+    subtotal: Decimal
+
+
+@dataclass
+class GenerationResult:
+    contracts: int = 0
+    invoices: int = 0
+    amount: Decimal = Decimal('0.00')
+    planned: list = field(default_factory=list)
+    skipped: list = field(default_factory=list)  # (reference_id, reason)
+
+
+def plan_contract(contract, today, result):
+    """PlannedInvoice rows for one contract (items must be prefetched)"""
+    periods = due_periods(contract, today)
+    items = list(contract.items.all())
+    if not periods:
+        return []
+    if not items:
+        result.skipped.append((contract.reference_id, 'no items'))
+        return []
+    subtotal = sum((line_total(item) for item in items), Decimal('0.00'))
+    return [PlannedInvoice(contract, period, items, subtotal) for period in periods]
+
+
+def _last_reference_number():
+    last_invoice = Invoice.objects.order_by('id').only('reference_id').last()
+    if last_invoice and last_invoice.reference_id.startswith(Invoice.REFERENCE_PREFIX):
+        return int(last_invoice.reference_id.replace(Invoice.REFERENCE_PREFIX, ''))
+    return 0
+
+
+def _generate_chunk(contract_ids, today, amc_type, result):
+    contracts = list(
+        due_recurring_invoices(today).select_for_update()
+        .filter(pk__in=contract_ids).prefetch_related('items').order_by('pk')
+    )
+    planned = []
+    for contract in contracts:
+        planned.extend(plan_contract(contract, today, result))
+    if not planned:
+        return
+
+    due_days = timedelta(days=get_due_days())
+    number = _last_reference_number()
+    invoices = []
+    for row in planned:
+        number += 1
+        invoices.append(Invoice(
+            reference_id=f'{Invoice.REFERENCE_PREFIX}{str(number).zfill(3)}',
+            customer_id=row.contract.customer_id,
+            amc_type_id=row.contract.amc_type_id or amc_type.pk,
+            start_date=row.period,
+            due_date=row.period + due_days,
+            recurring_invoice=row.contract,
+            recurring_period=row.period,
+            subtotal=row.subtotal,
+            discount_amount=Decimal('0.00'),
+            total=row.subtotal,
+        ))
+    Invoice.objects.bulk_create(invoices)
+
+    # bulk_create does not return primary keys on every backend (MySQL)
+    invoice_ids = {
+        (contract_id, period): pk
+        for pk, contract_id, period in Invoice.objects.filter(
+            recurring_invoice__in=contracts, recurring_period__in={row.period for row in planned},
+        ).values_list('pk', 'recurring_invoice_id', 'recurring_period')
+    }
+    InvoiceItem.objects.bulk_create([
+        InvoiceItem(
+            invoice_id=invoice_ids[(row.contract.pk, row.period)],
+            item_id=item.item_id,
+            rate=item.rate,
+            qty=item.qty,
+            tax=item.tax,
+            total=line_total(item),
+        )
+        for row in planned
+        for item in row.items
+    ])
+
+    advanced = {}
+    for row in planned:
+        row.contract.last_generated_date = row.period
+        advanced[row.contract.pk] = row.contract
+    for contract in advanced.values():
+        contract.next_generation_date = contract.get_scheduled_date()
+    RecurringInvoice.objects.bulk_update(advanced.values(), ['last_generated_date', 'next_generation_date'])
+
+    result.contracts += len(advanced)
+    result.invoices += len(invoices)
+    result.amount += sum((row.subtotal for row in planned), Decimal('0.00'))
+    result.planned.extend(planned)
+
+
+def generate_recurring_invoices(today=None, dry_run=False, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Generate every invoice due up to today; returns a GenerationResult"""
+    today = today or timezone.localdate()
+    result = GenerationResult()
+    contract_ids = list(due_recurring_invoices(today).order_by('pk').values_list('pk', flat=True))
+    amc_type = None if dry_run else get_default_amc_type()
+
+    for start in range(0, len(contract_ids), chunk_size):
+        chunk = contract_ids[start:start + chunk_size]
+        if dry_run:
+            contracts = due_recurring_invoices(today).filter(pk__in=chunk).prefetch_related('items').order_by('pk')
+            for contract in contracts:
+                planned = plan_contract(contract, today, result)
+                if planned:
+                    result.contracts += 1
+                    result.invoices += len(planned)
+                    result.amount += sum((row.subtotal for row in planned), Decimal('0.00'))
+                    result.planned.extend(planned)
+            continue
+        with transaction.atomic():
+            _generate_chunk(chunk, today, amc_type, result)
+    if result.invoices and not dry_run:
+        # Bulk inserts bypass the signals that apply payments and keep receivables current
+        request_allocation({row.contract.customer_id for row in result.planned})
+        invalidate_receivables()
+        invalidate_namespaces('invoices')
+    return result
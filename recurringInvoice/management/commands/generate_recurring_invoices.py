@@ -0,0 +1,37 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from recurringInvoice.generation import DEFAULT_CHUNK_SIZE, generate_recurring_invoices
+
+
+class Command(BaseCommand):
+    help = 'Generate invoices for every recurring invoice that is due'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help='Generate as of this date (YYYY-MM-DD), default today')
+        parser.add_argument('--dry-run', action='store_true', help='Report what would be generated without writing')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                            help='Recurring invoices processed per transaction')
+
+    def handle(self, *args, **options):
+        today = None
+        if options['date']:
+            try:
+                today = date.fromisoformat(options['date'])
+            except ValueError:
+                raise CommandError('--date must be YYYY-MM-DD')
+
+        result = generate_recurring_invoices(
+            today=today, dry_run=options['dry_run'], chunk_size=max(options['chunk_size'], 1),
+        )
+
+        for row in result.planned:
+            self.stdout.write(f"{row.contract.reference_id}: {row.period} {row.subtotal}")
+        for reference_id, reason in result.skipped:
+            self.stdout.write(self.style.WARNING(f"{reference_id}: skipped ({reason})"))
+
+        verb = 'Would generate' if options['dry_run'] else 'Generated'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {result.invoices} invoice(s) for {result.contracts} recurring invoice(s), total {result.amount}'
+        ))
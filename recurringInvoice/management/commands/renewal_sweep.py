@@ -0,0 +1,53 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from amc.renewal import renew_expiring_amcs
+from recurringInvoice.renewal import renew_expiring_recurring_invoices
+
+
+class Command(BaseCommand):
+    help = 'Renew every AMC and recurring invoice whose end date falls in a window'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--from', dest='window_start', help='Window start (YYYY-MM-DD), default today')
+        parser.add_argument('--to', dest='window_end', help='Window end (YYYY-MM-DD), default --from plus --days')
+        parser.add_argument('--days', type=int, default=30, help='Window length when --to is not given')
+        parser.add_argument('--only', choices=['amc', 'recurring'], help='Renew only one kind of contract')
+        parser.add_argument('--no-quotations', action='store_true', help='Do not raise AMC renewal quotations')
+        parser.add_argument('--dry-run', action='store_true', help='Report renewals without writing')
+
+    def parse_date(self, value, option):
+        try:
+            return date.fromisoformat(value)
+        except ValueError:
+            raise CommandError(f'{option} must be YYYY-MM-DD')
+
+    def handle(self, *args, **options):
+        window_start = self.parse_date(options['window_start'], '--from') if options['window_start'] else timezone.now().date()
+        if options['window_end']:
+            window_end = self.parse_date(options['window_end'], '--to')
+        else:
+            window_end = window_start + timedelta(days=options['days'])
+        if window_end < window_start:
+            raise CommandError('--to must not be before --from')
+
+        dry_run = options['dry_run']
+        results = []
+        if options['only'] in (None, 'amc'):
+            results.append(renew_expiring_amcs(
+                window_start, window_end, dry_run=dry_run, create_quotations=not options['no_quotations'],
+            ))
+        if options['only'] in (None, 'recurring'):
+            results.append(renew_expiring_recurring_invoices(window_start, window_end, dry_run=dry_run))
+
+        verb = 'Would renew' if dry_run else 'Renewed'
+        self.stdout.write(f'Contracts ending {window_start} to {window_end}')
+        for result in results:
+            for reference_id, old_end_date, new_end_date in result.renewed:
+                self.stdout.write(f'  {reference_id}: {old_end_date} -> {new_end_date}')
+            summary = f'{verb} {len(result.renewed)} {result.label}(s)'
+            if result.quotations:
+                summary += f', {result.quotations} renewal quotation(s)'
+            self.stdout.write(self.style.SUCCESS(summary))
@@ -0,0 +1,74 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:20
+
+from datetime import timedelta
+
+import django.db.models.deletion
+from dateutil.relativedelta import relativedelta
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+# Frozen copy of recurringInvoice.schedule as of this migration
+PERIOD_DELTAS = {
+    'week': timedelta(days=7),
+    '2week': timedelta(days=14),
+    'month': relativedelta(months=1),
+    '2month': relativedelta(months=2),
+    '3month': relativedelta(months=3),
+    '6month': relativedelta(months=6),
+    'year': relativedelta(years=1),
+    '2year': relativedelta(years=2),
+}
+DEFAULT_PERIOD = timedelta(days=30)
+
+
+def first_period_from(contract, today):
+    """The contract's first billing date on or after today, or None once past end_date"""
+    if not contract.start_date:
+        return None
+    delta = PERIOD_DELTAS.get(contract.repeat_every, DEFAULT_PERIOD)
+    next_date = (contract.last_generated_date or contract.start_date) + delta
+    while next_date < today:
+        next_date += delta
+    if contract.end_date and next_date > contract.end_date:
+        return None
+    return next_date
+
+
+def backfill_schedule(apps, schema_editor):
+    # Periods before today were billed by the old generator or by hand:
+    # schedule from today so the first run does not back-bill them
+    RecurringInvoice = apps.get_model('recurringInvoice', 'RecurringInvoice')
+    today = timezone.localdate()
+    contracts = list(RecurringInvoice.objects.filter(status='active', auto_repeat=True))
+    for contract in contracts:
+        contract.next_generation_date = first_period_from(contract, today)
+    RecurringInvoice.objects.bulk_update(contracts, ['next_generation_date'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('amc', '0010_bulkcertificateamcroutineservice'),
+        ('customer', '0022_customerlicense_license_ref_no_and_more'),
+        ('recurringInvoice', '0003_add_auto_repeat_field'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recurringinvoice',
+            name='amc_type',
+            field=models.ForeignKey(blank=True, help_text='AMC type for generated invoices (defaults to RECURRING_INVOICE_AMC_TYPE)', null=True, on_delete=django.db.models.deletion.SET_NULL, to='amc.amctype'),
+        ),
+        migrations.AddField(
+            model_name='recurringinvoice',
+            name='next_generation_date',
+            field=models.DateField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='recurringinvoice',
+            index=models.Index(fields=['status', 'auto_repeat', 'next_generation_date'], name='rinv_due_idx'),
+        ),
+        migrations.RunPython(backfill_schedule, migrations.RunPython.noop),
+    ]
@@ -12,6 +12,7 @@ from modelcluster.models import ClusterableModel
 from datetime import timedelta
 from dateutil.relativedelta import relativedelta
 from authentication.models import CustomUser  # Corrected import
+from .schedule import advance_date, scheduled_date
 import re
 
 
@@ -49,6 +50,12 @@ class RecurringInvoice(ClusterableModel):
     start_date = models.DateField()
     end_date = models.DateField(null=True, blank=True)
     last_generated_date = models.DateField(null=True, blank=True)
+    # Stored schedule for the generation engine (see recurringInvoice/generation.py)
+    next_generation_date = models.DateField(null=True, blank=True, editable=False)
+    amc_type = models.ForeignKey(
+        'amc.AMCType', on_delete=models.SET_NULL, null=True, blank=True,
+        help_text="AMC type for generated invoices (defaults to RECURRING_INVOICE_AMC_TYPE)",
+    )
 
     sales_person = models.ForeignKey(
     CustomUser,
@@ -79,11 +86,30 @@ class RecurringInvoice(ClusterableModel):
             FieldPanel('gst_treatment'),
             FieldPanel('uploads_files'),
             FieldPanel('status'),
+            FieldPanel('amc_type'),
             FieldPanel('last_generated_date', read_only=True),
         ], heading="Recurring Details"),
         InlinePanel('items', label="Recurring Invoice Items"),
     ]
 
+    # Fields next_generation_date is computed from
+    SCHEDULE_FIELDS = ('repeat_every', 'start_date', 'end_date', 'last_generated_date')
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'auto_repeat', 'next_generation_date'], name='rinv_due_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_schedule = instance.get_schedule_fields()
+        return instance
+
+    def get_schedule_fields(self):
+        # __dict__, so deferred fields are not loaded
+        return tuple(self.__dict__.get(name) for name in self.SCHEDULE_FIELDS)
+
     def save(self, *args, **kwargs):
         if not self.reference_id:
             last_invoice = RecurringInvoice.objects.all().order_by('id').last()
@@ -92,7 +118,26 @@ class RecurringInvoice(ClusterableModel):
         if self.customer and not self.billing_address:
             # Assuming the 'customer' object is loaded when accessed
             self.billing_address = self.customer.site_address
+        # Views assign raw form strings; parse them before scheduling
+        for name in ('start_date', 'end_date', 'last_generated_date'):
+            setattr(self, name, self._meta.get_field(name).to_python(getattr(self, name)))
+        # Keep the stored date while the schedule is unchanged: migrated
+        # contracts were scheduled from go-live, not from their start date
+        if self.next_generation_date is None or getattr(self, '_loaded_schedule', None) != self.get_schedule_fields():
+            self.next_generation_date = self.get_scheduled_date()
         super().save(*args, **kwargs)
+        self._loaded_schedule = self.get_schedule_fields()
+
+    def get_scheduled_date(self, after=None):
+        """
+        Date the next invoice is due, counting from `after` (default: the last
+        generated date, or the start date). Unlike get_next_date() this never
+        skips missed periods, so the generation engine can catch up on them.
+        Returns None once past the end date or when not auto-repeating.
+        """
+        if not self.auto_repeat or self.status != 'active':
+            return None
+        return scheduled_date(self.repeat_every, self.start_date, self.end_date, self.last_generated_date, after=after)
 
     def __str__(self):
         return self.reference_id
@@ -142,24 +187,7 @@ class RecurringInvoice(ClusterableModel):
     
     def _calculate_next_from_date(self, from_date):
         """Helper method to calculate next date from a given date"""
-        if self.repeat_every == 'week':
-            return from_date + timedelta(days=7)
-        elif self.repeat_every == '2week':
-            return from_date + timedelta(days=14)
-        elif self.repeat_every == 'month':
-            return from_date + relativedelta(months=1)
-        elif self.repeat_every == '2month':
-            return from_date + relativedelta(months=2)
-        elif self.repeat_every == '3month':
-            return from_date + relativedelta(months=3)
-        elif self.repeat_every == '6month':
-            return from_date + relativedelta(months=6)
-        elif self.repeat_every == 'year':
-            return from_date + relativedelta(years=1)
-        elif self.repeat_every == '2year':
-            return from_date + relativedelta(years=2)
-        else:
-            return from_date + timedelta(days=30)
+        return advance_date(from_date, self.repeat_every)
     
     @property
     def next_invoice_date(self):
@@ -214,6 +242,10 @@ class RecurringInvoice(ClusterableModel):
         # 3. End date has passed or is close to passing
         return self.status == 'active' and self.end_date is not None
     
+    def get_renewed_end_date(self):
+        """End date after a default renewal (one repeat_every period)"""
+        return advance_date(self.end_date, self.repeat_every)
+
     def renew_recurring_invoice(self, new_end_date=None, extend_days=None):
         """
         Renew the recurring invoice by extending the end date
@@ -232,25 +264,8 @@ class RecurringInvoice(ClusterableModel):
             elif extend_days:
                 self.end_date = self.end_date + timedelta(days=extend_days)
             else:
-                # Default: extend by the same period as repeat_every using proper date calculations
-                if self.repeat_every == 'week':
-                    self.end_date = self.end_date + timedelta(days=7)
-                elif self.repeat_every == '2week':
-                    self.end_date = self.end_date + timedelta(days=14)
-                elif self.repeat_every == 'month':
-                    self.end_date = self.end_date + relativedelta(months=1)
-                elif self.repeat_every == '2month':
-                    self.end_date = self.end_date + relativedelta(months=2)
-                elif self.repeat_every == '3month':
-                    self.end_date = self.end_date + relativedelta(months=3)
-                elif self.repeat_every == '6month':
-                    self.end_date = self.end_date + relativedelta(months=6)
-                elif self.repeat_every == 'year':
-                    self.end_date = self.end_date + relativedelta(years=1)
-                elif self.repeat_every == '2year':
-                    self.end_date = self.end_date + relativedelta(years=2)
-                else:
-                    self.end_date = self.end_date + timedelta(days=30)
+                # Default: extend by the same period as repeat_every
+                self.end_date = self.get_renewed_end_date()
             
             self.save()
             return True
@@ -361,6 +376,7 @@ class RecurringInvoiceItem(models.Model):
 # recurring_invoice/models.py (ViewSet and Grouping)
 
 from wagtail.snippets.views.snippets import SnippetViewSet, SnippetViewSetGroup, IndexView
+from home.exports import ExportQuerysetMixin
 from django.http import HttpResponseForbidden
 
 class RecurringInvoiceViewSet(SnippetViewSet):
@@ -428,7 +444,9 @@ class RecurringInvoiceViewSet(SnippetViewSet):
         return redirect(self.get_edit_url(instance))
 
     # Custom IndexView to restrict export to superusers
-    class RestrictedIndexView(IndexView):
+    class RestrictedIndexView(ExportQuerysetMixin, IndexView):
+        export_select_related = ("customer", "sales_person")
+
         def dispatch(self, request, *args, **kwargs):
             """Override dispatch to check export permissions"""
             export_format = request.GET.get('export')
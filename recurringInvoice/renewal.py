@@ -0,0 +1,38 @@
+# recurringInvoice/renewal.py
+"""
+Batch renewal of expiring recurring invoices.
+
+Every active recurring invoice whose end date falls in the window is
+fetched with one query and extended by one repeat_every period, the
+default of RecurringInvoice.renew_recurring_invoice(). The new end date
+and the generation schedule it re-opens are written with one bulk_update.
+"""
+from django.db import transaction
+
+from amc.renewal import RenewalResult
+
+from .models import RecurringInvoice
+
+
+def expiring_recurring_invoices(window_start, window_end):
+    return RecurringInvoice.objects.filter(
+        status='active', end_date__range=(window_start, window_end),
+    ).order_by('end_date', 'pk')
+
+
+def renew_expiring_recurring_invoices(window_start, window_end, dry_run=False):
+    """Extend every recurring invoice ending in the window; returns a RenewalResult"""
+    result = RenewalResult(label='recurring invoice')
+    with transaction.atomic():
+        queryset = expiring_recurring_invoices(window_start, window_end)
+        if not dry_run:
+            queryset = queryset.select_for_update()
+        contracts = list(queryset)
+        for contract in contracts:
+            old_end_date = contract.end_date
+            contract.end_date = contract.get_renewed_end_date()
+            contract.next_generation_date = contract.get_scheduled_date()
+            result.renewed.append((contract.reference_id, old_end_date, contract.end_date))
+        if not dry_run and contracts:
+            RecurringInvoice.objects.bulk_update(contracts, ['end_date', 'next_generation_date'], batch_size=500)
+    return result
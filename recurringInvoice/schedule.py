@@ -0,0 +1,32 @@
+# recurringInvoice/schedule.py
+"""Billing period arithmetic shared by the model and the generation engine"""
+from datetime import timedelta
+
+from dateutil.relativedelta import relativedelta
+
+PERIOD_DELTAS = {
+    'week': timedelta(days=7),
+    '2week': timedelta(days=14),
+    'month': relativedelta(months=1),
+    '2month': relativedelta(months=2),
+    '3month': relativedelta(months=3),
+    '6month': relativedelta(months=6),
+    'year': relativedelta(years=1),
+    '2year': relativedelta(years=2),
+}
+DEFAULT_PERIOD = timedelta(days=30)
+
+
+def advance_date(base_date, repeat_every):
+    """Start of the period following base_date"""
+    return base_date + PERIOD_DELTAS.get(repeat_every, DEFAULT_PERIOD)
+
+
+def scheduled_date(repeat_every, start_date, end_date=None, last_generated_date=None, after=None):
+    """Next invoice date, or None once it would fall after end_date"""
+    if not start_date:
+        return None
+    next_date = advance_date(after or last_generated_date or start_date, repeat_every)
+    if end_date and next_date > end_date:
+        return None
+    return next_date
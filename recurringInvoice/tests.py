@@ -1,3 +1,96 @@
+from datetime import date
+from decimal import Decimal
+from importlib import import_module
+
+from django.apps import apps
 from django.test import TestCase
+from django.utils import timezone
+
+from invoice.models import Invoice
+
+from .generation import generate_recurring_invoices
+from .models import RecurringInvoice, RecurringInvoiceItem
+from .renewal import renew_expiring_recurring_invoices
+
+
+class RecurringInvoiceGenerationTests(TestCase):
+    def setUp(self):
+        self.contract = RecurringInvoice.objects.create(
+            profile_name='Monthly AMC', repeat_every='month', start_date=date(2026, 1, 1),
+        )
+        RecurringInvoiceItem.objects.create(
+            recurring_invoice=self.contract, rate=Decimal('1000.00'), qty=1, tax=Decimal('18'),
+        )
+
+    def test_generates_every_due_period(self):
+        self.assertEqual(self.contract.next_generation_date, date(2026, 2, 1))
+        result = generate_recurring_invoices(today=date(2026, 3, 15))
+        self.assertEqual(result.invoices, 2)
+
+        invoices = Invoice.objects.filter(recurring_invoice=self.contract).order_by('recurring_period')
+        self.assertEqual([invoice.recurring_period for invoice in invoices], [date(2026, 2, 1), date(2026, 3, 1)])
+        self.assertEqual(invoices[0].total, Decimal('1180.00'))
+        self.assertEqual(invoices[0].items.get().total, Decimal('1180.00'))
+
+        self.contract.refresh_from_db()
+        self.assertEqual(self.contract.last_generated_date, date(2026, 3, 1))
+        self.assertEqual(self.contract.next_generation_date, date(2026, 4, 1))
+
+    def test_rerun_is_idempotent(self):
+        generate_recurring_invoices(today=date(2026, 3, 15))
+        result = generate_recurring_invoices(today=date(2026, 3, 15))
+        self.assertEqual(result.invoices, 0)
+        self.assertEqual(Invoice.objects.count(), 2)
+
+    def test_dry_run_writes_nothing(self):
+        result = generate_recurring_invoices(today=date(2026, 3, 15), dry_run=True)
+        self.assertEqual(result.invoices, 2)
+        self.assertEqual(result.amount, Decimal('2360.00'))
+        self.assertFalse(Invoice.objects.exists())
+        self.contract.refresh_from_db()
+        self.assertIsNone(self.contract.last_generated_date)
+
+    def test_schedule_backfill_does_not_back_bill(self):
+        migration = import_module('recurringInvoice.migrations.0004_generation_schedule')
+        old = RecurringInvoice.objects.create(profile_name='Old AMC', repeat_every='month', start_date=date(2024, 1, 1))
+        RecurringInvoiceItem.objects.create(recurring_invoice=old, rate=Decimal('500.00'), qty=1, tax=Decimal('0'))
+        RecurringInvoice.objects.update(next_generation_date=None)
+
+        migration.backfill_schedule(apps, None)
+        today = timezone.localdate()
+        old.refresh_from_db()
+        self.assertGreaterEqual(old.next_generation_date, today)
+        self.assertEqual(old.next_generation_date.day, 1)
+        generate_recurring_invoices(today=today)
+        self.assertLessEqual(Invoice.objects.filter(recurring_invoice=old).count(), 1)
+
+    def test_editing_a_backfilled_contract_keeps_its_schedule(self):
+        old = RecurringInvoice.objects.create(profile_name='Old AMC', repeat_every='month', start_date=date(2025, 1, 1))
+        RecurringInvoice.objects.filter(pk=old.pk).update(next_generation_date=date(2026, 11, 1))
+
+        old = RecurringInvoice.objects.get(pk=old.pk)
+        old.profile_name = 'Old AMC (renamed)'
+        old.save()
+        old.refresh_from_db()
+        self.assertEqual(old.next_generation_date, date(2026, 11, 1))
+
+        old.repeat_every = '3month'
+        old.last_generated_date = date(2026, 10, 1)
+        old.save()
+        old.refresh_from_db()
+        self.assertEqual(old.next_generation_date, date(2027, 1, 1))
+
+
+class RecurringInvoiceRenewalSweepTests(TestCase):
+    def test_extends_by_one_period_and_reopens_schedule(self):
+        contract = RecurringInvoice.objects.create(
+            profile_name='Quarterly AMC', repeat_every='3month', start_date=date(2026, 1, 1),
+            end_date=date(2026, 10, 15), last_generated_date=date(2026, 10, 1),
+        )
+        self.assertIsNone(contract.next_generation_date)
 
-# Create your tests here.
+        result = renew_expiring_recurring_invoices(date(2026, 10, 1), date(2026, 10, 31))
+        self.assertEqual(len(result.renewed), 1)
+        contract.refresh_from_db()
+        self.assertEqual(contract.end_date, date(2027, 1, 15))
+        self.assertEqual(contract.next_generation_date, date(2027, 1, 1))
@@ -11,6 +11,7 @@ urlpatterns = [
     path('amcs/', views.amc_report, name='amc_report'),
     path('quotations/', views.quotation_report, name='quotation_report'),
     path('routine-services/', views.routine_service_report, name='routine_service_report'),
+    path('receivables/', views.receivables_report, name='receivables_report'),
     
     # Export endpoints - CSV
     path('export/complaints/csv/', views.export_complaints_csv, name='export_complaints_csv'),
@@ -27,4 +28,5 @@ urlpatterns = [
     path('export/payments/xlsx/', views.export_payments_xlsx, name='export_payments_xlsx'),
     path('export/amc/xlsx/', views.export_amc_xlsx, name='export_amc_xlsx'),
     path('export/routine-services/xlsx/', views.export_routine_service_xlsx, name='export_routine_service_xlsx'),
+    path('export/receivables/xlsx/', views.export_receivables_xlsx, name='export_receivables_xlsx'),
 ]
@@ -1,19 +1,21 @@
 from django.shortcuts import render
 from django.contrib.auth.decorators import login_required
 from django.http import HttpResponse, JsonResponse
-from django.db.models import Q, Sum, Count
+from django.db.models import Avg, Count, Q, Sum
 import json
 from datetime import datetime, timedelta
 import csv
 import io
 from openpyxl import Workbook
 from openpyxl.styles import Font, PatternFill, Alignment
-from complaints.models import Complaint
+from complaints.models import Complaint, ComplaintSLA, format_duration
 from invoice.models import Invoice
+from invoice.receivables import AGING_BUCKETS, get_aging_report, outstanding_invoices, with_balances
 from PaymentReceived.models import PaymentReceived
 from Quotation.models import Quotation
 from amc.models import AMC, AMCRoutineService
 from customer.models import Customer
+from home.caching import cached_response
 
 
 @login_required
@@ -28,7 +30,7 @@ def complaints_report(request):
     search_query = request.GET.get('q', '').strip()
     
     # Base queryset
-    complaints = Complaint.objects.all().select_related('customer', 'assign_to', 'complaint_type', 'priority')
+    complaints = Complaint.objects.all().select_related('customer', 'assign_to', 'complaint_type', 'priority', 'sla')
     
     # Apply search query
     if search_query:
@@ -92,8 +94,23 @@ def complaints_report(request):
         }
         return render(request, 'reports/graph_report.html', context)
 
+    # SLA figures come from the precomputed ComplaintSLA rows
+    sla_totals = ComplaintSLA.objects.filter(complaint__in=complaints.values('pk')).aggregate(
+        avg_response=Avg('time_to_first_response'),
+        avg_resolution=Avg('resolution_time'),
+        breached=Count('pk', filter=Q(response_breached=True) | Q(resolution_breached=True)),
+        reopened=Count('pk', filter=Q(reopen_count__gt=0)),
+    )
+    sla_summary = {
+        'avg_response': format_duration(sla_totals['avg_response']),
+        'avg_resolution': format_duration(sla_totals['avg_resolution']),
+        'breached': sla_totals['breached'],
+        'reopened': sla_totals['reopened'],
+    }
+
     context = {
         'complaints': complaints,
+        'sla_summary': sla_summary,
         'customers': customers,
         'selected_period': period,
         'selected_customer': customer_filter,
@@ -116,7 +133,7 @@ def invoice_report(request):
     search_query = request.GET.get('q', '').strip()
     
     # Base queryset
-    invoices = Invoice.objects.all().select_related('customer', 'amc_type')
+    invoices = with_balances(Invoice.objects.all().select_related('customer', 'amc_type'))
     
     # Apply search query
     if search_query:
@@ -164,6 +181,7 @@ def invoice_report(request):
 
     context = {
         'invoices': invoices,
+        'invoice_value_total': invoices.aggregate(total=Sum('total'))['total'] or 0,
         'customers': customers,
         'selected_period': period,
         'selected_customer': customer_filter,
@@ -174,6 +192,51 @@ def invoice_report(request):
     return render(request, 'reports/invoice_report.html', context)
 
 
+@login_required
+def receivables_report(request):
+    """Receivables aging by customer, with the outstanding invoices of one customer"""
+    view_mode = request.GET.get('view')
+    search_query = request.GET.get('q', '').strip()
+    customer_id = request.GET.get('customer', '')
+
+    report = get_aging_report()
+    customers = report.customers
+    if search_query:
+        customers = [row for row in customers if search_query.lower() in row.site_name.lower()]
+
+    if view_mode == 'graph':
+        context = {
+            'graph_title': 'Receivables Aging',
+            'labels_json': json.dumps([label for _key, label, *_ in AGING_BUCKETS]),
+            'datasets_json': json.dumps([
+                {
+                    'label': 'Outstanding',
+                    'data': [float(report.totals[key]) for key, *_ in AGING_BUCKETS],
+                    'backgroundColor': ['#34d399', '#fbbf24', '#fb923c', '#f87171'],
+                }
+            ]),
+            'chart_type': 'bar',
+        }
+        return render(request, 'reports/graph_report.html', context)
+
+    invoices = []
+    if customer_id.isdigit():
+        invoices = (
+            outstanding_invoices().filter(customer_id=customer_id)
+            .select_related('customer').order_by('due_date')
+        )
+
+    context = {
+        'report': report,
+        'customers': customers,
+        'buckets': [label for _key, label, *_ in AGING_BUCKETS],
+        'invoices': invoices,
+        'selected_customer': customer_id,
+        'search_query': search_query,
+    }
+    return render(request, 'reports/receivables_report.html', context)
+
+
 @login_required
 def payment_report(request):
     """Payment Report View"""
@@ -189,7 +252,7 @@ def payment_report(request):
     search_query = request.GET.get('q', '').strip()
     
     # Base queryset
-    payments = PaymentReceived.objects.all().select_related('customer', 'invoice')
+    payments = PaymentReceived.objects.all().select_related('customer', 'invoice__amc_type')
     
     # Apply search query
     if search_query:
@@ -565,6 +628,7 @@ def amc_report(request):
 
 
 @login_required
+@cached_response('complaints', 'customers', 'lookups', 'users')
 def export_complaints_csv(request):
     """Export Complaints to CSV"""
     # Only allow superusers to export
@@ -603,6 +667,7 @@ def export_complaints_csv(request):
 
 
 @login_required
+@cached_response('invoices', 'customers', 'lookups')
 def export_invoices_csv(request):
     """Export Invoices to CSV"""
     # Only allow superusers to export
@@ -618,7 +683,7 @@ def export_invoices_csv(request):
     writer = csv.writer(response)
     writer.writerow([
         'Invoice ID', 'Customer', 'AMC Type', 'Invoice Date', 'Due Date',
-        'Discount', 'Payment Term', 'Status'
+        'Discount', 'Payment Term', 'Status', 'Total'
     ])
     
     invoices = Invoice.objects.all().select_related('customer', 'amc_type')
@@ -632,12 +697,14 @@ def export_invoices_csv(request):
             f'{invoice.discount}%' if invoice.discount else '0%',
             invoice.get_payment_term_display() if invoice.payment_term else 'N/A',
             invoice.get_status_display() if invoice.status else 'Open',
+            invoice.total,
         ])
     
     return response
 
 
 @login_required
+@cached_response('quotations', 'customers', 'lookups', 'users')
 def export_quotations_csv(request):
     """Export Quotations to CSV"""
     # Only allow superusers to export
@@ -672,6 +739,7 @@ def export_quotations_csv(request):
 
 
 @login_required
+@cached_response('complaints', 'customers', 'lookups', 'users')
 def export_complaints_xlsx(request):
     """Export Complaints to XLSX"""
     # Only allow superusers to export
@@ -744,6 +812,7 @@ def export_complaints_xlsx(request):
 
 
 @login_required
+@cached_response('invoices', 'customers', 'lookups')
 def export_invoices_xlsx(request):
     """Export Invoices to XLSX"""
     # Only allow superusers to export
@@ -765,7 +834,7 @@ def export_invoices_xlsx(request):
     # Headers
     headers = [
         'Invoice ID', 'Customer', 'AMC Type', 'Invoice Date', 'Due Date',
-        'Discount', 'Payment Term', 'Status'
+        'Discount', 'Payment Term', 'Status', 'Total'
     ]
     
     for col_num, header in enumerate(headers, 1):
@@ -796,6 +865,7 @@ def export_invoices_xlsx(request):
         worksheet.cell(row=row_num, column=6, value=f'{invoice.discount}%' if invoice.discount else '0%')
         worksheet.cell(row=row_num, column=7, value=invoice.get_payment_term_display() if invoice.payment_term else 'N/A')
         worksheet.cell(row=row_num, column=8, value=invoice.get_status_display() if invoice.status else 'Open')
+        worksheet.cell(row=row_num, column=9, value=invoice.total)
     
     # Adjust column widths
     for col in worksheet.columns:
@@ -819,6 +889,7 @@ def export_invoices_xlsx(request):
 
 
 @login_required
+@cached_response('quotations', 'customers', 'lookups', 'users')
 def export_quotations_xlsx(request):
     """Export Quotations to XLSX"""
     # Only allow superusers to export
@@ -888,6 +959,7 @@ def export_quotations_xlsx(request):
 
 
 @login_required
+@cached_response('payments', 'invoices', 'customers')
 def export_payments_csv(request):
     """Export Payments to CSV"""
     # Only allow superusers to export
@@ -922,6 +994,7 @@ def export_payments_csv(request):
 
 
 @login_required
+@cached_response('payments', 'invoices', 'customers')
 def export_payments_xlsx(request):
     """Export Payments to XLSX"""
     # Only allow superusers to export
@@ -991,6 +1064,7 @@ def export_payments_xlsx(request):
 
 
 @login_required
+@cached_response('amcs', 'customers', 'lookups')
 def export_amc_csv(request):
     """Export AMC to CSV"""
     # Only allow superusers to export
@@ -1027,6 +1101,7 @@ def export_amc_csv(request):
 
 
 @login_required
+@cached_response('amcs', 'customers', 'lookups')
 def export_amc_xlsx(request):
     """Export AMC to XLSX"""
     # Only allow superusers to export
@@ -1103,6 +1178,7 @@ def export_amc_xlsx(request):
 
 
 @login_required
+@cached_response('routine_services', 'amcs', 'customers', 'users')
 def export_routine_service_csv(request):
     """Export Routine Services to CSV"""
     # Only allow superusers to export
@@ -1143,6 +1219,7 @@ def export_routine_service_csv(request):
 
 
 @login_required
+@cached_response('routine_services', 'amcs', 'customers', 'users')
 def export_routine_service_xlsx(request):
     """Export Routine Services to XLSX"""
     # Only allow superusers to export
@@ -1214,4 +1291,67 @@ def export_routine_service_xlsx(request):
     response['Content-Disposition'] = 'attachment; filename="routine_service_report.xlsx"'
     workbook.save(response)
     
-    return response
\ No newline at end of file
+    return response
+
+@login_required
+@cached_response('invoices', 'payments', 'customers')
+def export_receivables_xlsx(request):
+    """Export receivables aging to XLSX (customer summary and outstanding invoices)"""
+    # Only allow superusers to export
+    if not request.user.is_superuser:
+        from django.contrib import messages
+        messages.error(request, "You do not have permission to export receivables.")
+        from django.shortcuts import redirect
+        return redirect('reports:receivables_report')
+
+    workbook = Workbook()
+    header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
+    header_font = Font(bold=True, color="FFFFFF")
+    header_alignment = Alignment(horizontal="center", vertical="center")
+    bucket_labels = [f'{label} Days' for _key, label, *_ in AGING_BUCKETS]
+
+    def write_headers(worksheet, headers):
+        for col_num, header in enumerate(headers, 1):
+            cell = worksheet.cell(row=1, column=col_num)
+            cell.value = header
+            cell.fill = header_fill
+            cell.font = header_font
+            cell.alignment = header_alignment
+
+    report = get_aging_report()
+    summary = workbook.active
+    summary.title = "Aging by Customer"
+    write_headers(summary, ['Customer', 'Invoices', *bucket_labels, 'Outstanding', 'Unapplied Payments', 'Net Outstanding'])
+    for row_num, customer in enumerate(report.customers, 2):
+        values = [
+            customer.site_name, customer.invoices, *customer.bucket_values,
+            customer.outstanding, customer.unapplied, customer.net_outstanding,
+        ]
+        for col_num, value in enumerate(values, 1):
+            summary.cell(row=row_num, column=col_num, value=value)
+
+    detail = workbook.create_sheet("Outstanding Invoices")
+    write_headers(detail, ['Invoice ID', 'Customer', 'Invoice Date', 'Due Date', 'Days Overdue', 'Total', 'Paid', 'Balance'])
+    today = report.as_of
+    invoices = outstanding_invoices().select_related('customer').order_by('customer__site_name', 'due_date')
+    for row_num, invoice in enumerate(invoices, 2):
+        detail.cell(row=row_num, column=1, value=invoice.reference_id)
+        detail.cell(row=row_num, column=2, value=invoice.customer.site_name if invoice.customer else 'N/A')
+        detail.cell(row=row_num, column=3, value=invoice.start_date).number_format = 'DD-MM-YYYY'
+        detail.cell(row=row_num, column=4, value=invoice.due_date).number_format = 'DD-MM-YYYY'
+        detail.cell(row=row_num, column=5, value=max((today - invoice.due_date).days, 0))
+        detail.cell(row=row_num, column=6, value=invoice.total)
+        detail.cell(row=row_num, column=7, value=invoice.amount_paid)
+        detail.cell(row=row_num, column=8, value=invoice.due_balance)
+
+    for worksheet in (summary, detail):
+        for col in worksheet.columns:
+            col_letter = col[0].column_letter
+            max_length = max(len(str(cell.value)) if cell.value is not None else 0 for cell in col)
+            worksheet.column_dimensions[col_letter].width = min(max_length + 2, 50)
+
+    response = HttpResponse(content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+    response['Content-Disposition'] = 'attachment; filename="receivables_aging.xlsx"'
+    workbook.save(response)
+
+    return response
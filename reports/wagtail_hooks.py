@@ -25,6 +25,12 @@ def register_reports_menu():
             icon_name='doc-full-inverse',
             order=300
         ),
+        MenuItem(
+            'Receivables Aging',
+            reverse('reports:receivables_report'),
+            icon_name='doc-full-inverse',
+            order=320
+        ),
         MenuItem(
             'AMC Report',
             reverse('reports:amc_report'),